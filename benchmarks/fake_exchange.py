@@ -0,0 +1,991 @@
+"""本地模拟交易所：在一个 HTTP 服务里模拟 Binance、OKX、Bybit、Gate 的行情接口。
+
+路径、参数与返回格式按 collector/*/series.py 与 binance/market.py 实际请求的接口实现，
+数据是 (交易所, 币种, 时间) 的确定性函数，同一时间窗重复请求得到相同结果。
+每个交易所挂在自己的路径前缀下，把 base url 指过来即可离线压测采集链路：
+
+    python -m benchmarks.fake_exchange --port 18080 --latency normal:40:10 --latency okx=lognormal:80:0.5
+    BINANCE_BASE_URL=http://127.0.0.1:18080/binance OKX_BASE_URL=http://127.0.0.1:18080/okx \\
+    BYBIT_BASE_URL=http://127.0.0.1:18080/bybit GATE_BASE_URL=http://127.0.0.1:18080/gate \\
+    python -m coinx.collector_main
+
+支持：
+- 延迟分布 fixed:MS、uniform:MIN:MAX、normal:MEAN:STD、lognormal:MEDIAN:SIGMA，可按交易所覆盖；
+- 按交易所（OKX 按接口组）的固定窗口限频，返回各自的限频头（X-MBX-USED-WEIGHT、
+  X-RateLimit-*、X-Bapi-Limit-*、X-Gate-RateLimit-*），超限时返回 429/403 与 Retry-After；
+- 按比例注入错误状态码（例如 okx:429:0.05）与不完整分页（只返回较早的一半记录）；
+- GET /_stats 返回各交易所、各接口的请求数与状态码分布，用于核对吞吐与限频行为。
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.symbols import DEFAULT_SEED, benchmark_symbols
+
+
+EXCHANGES = ('binance', 'okx', 'bybit', 'gate')
+BASE_URL_ENV = {
+    'binance': 'BINANCE_BASE_URL',
+    'okx': 'OKX_BASE_URL',
+    'bybit': 'BYBIT_BASE_URL',
+    'gate': 'GATE_BASE_URL',
+}
+DEFAULT_PORT = 18080
+MINUTE_MS = 60 * 1000
+DAY_MS = 24 * 60 * MINUTE_MS
+FUNDING_INTERVAL_MS = 8 * 60 * MINUTE_MS
+
+# (交易所, 接口组) -> (窗口内允许的请求数或权重, 窗口秒数)，数值取各交易所公开文档的量级
+DEFAULT_RATE_LIMITS = {
+    ('binance', 'weight'): (2400, 60),
+    ('okx', 'default'): (20, 2),
+    ('okx', 'rubik'): (5, 2),
+    ('okx', 'funding'): (20, 2),
+    ('bybit', 'default'): (600, 5),
+    ('gate', 'default'): (200, 10),
+}
+# 超限时返回的状态码：Bybit 按 IP 限频时返回 403，其余交易所返回 429
+RATE_LIMIT_STATUS = {'binance': 429, 'okx': 429, 'bybit': 403, 'gate': 429}
+
+
+class _BadRequest(Exception):
+    """请求参数对应的币种或周期不存在，按交易所各自的错误格式返回。"""
+
+
+@dataclass
+class FakeExchangeSettings:
+    symbols: list = field(default_factory=lambda: benchmark_symbols(20))
+    seed: int = DEFAULT_SEED
+    # 固定的“当前时间”，None 表示使用真实时间；只返回在此之前已收盘的 K 线
+    now_ms: int = None
+    # {交易所或 '*': 延迟规格}
+    latency: dict = field(default_factory=dict)
+    # {(交易所, 接口组): (数量, 秒)}，None 表示不限频
+    rate_limits: dict = field(default_factory=lambda: dict(DEFAULT_RATE_LIMITS))
+    # [(交易所或 '*', 状态码, 比例)]
+    inject: list = field(default_factory=list)
+    partial_page_rate: float = 0.0
+    instrument_page_size: int = 500
+
+
+def parse_latency(spec):
+    """把延迟规格解析成 (分布, 参数)；单位毫秒，lognormal 的第二个参数是 sigma。"""
+    kind, _, raw = str(spec).partition(':')
+    values = [float(item) for item in raw.split(':') if item != '']
+    expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+    if kind not in expected or len(values) != expected[kind]:
+        raise ValueError(f'invalid latency spec: {spec}')
+    return kind, tuple(values)
+
+
+def sample_latency_ms(spec, rng):
+    kind, values = spec
+    if kind == 'fixed':
+        return values[0]
+    if kind == 'uniform':
+        return rng.uniform(values[0], values[1])
+    if kind == 'normal':
+        return max(0.0, rng.gauss(values[0], values[1]))
+    return values[0] * math.exp(rng.gauss(0, values[1]))
+
+
+def period_to_ms(period):
+    """兼容各交易所的周期写法：5m / 1H / 1D（OKX）、5 / 60 / D（Bybit）、5min（Bybit 持仓量）。"""
+    text = str(period)
+    if text == 'D':
+        return DAY_MS
+    if text.isdigit():
+        return int(text) * MINUTE_MS
+    if text.endswith('min') and text[:-3].isdigit():
+        return int(text[:-3]) * MINUTE_MS
+    units = {'m': MINUTE_MS, 'h': 60 * MINUTE_MS, 'H': 60 * MINUTE_MS, 'd': DAY_MS, 'D': DAY_MS}
+    if text[:-1].isdigit() and text[-1] in units:
+        return int(text[:-1]) * units[text[-1]]
+    raise _BadRequest(f'unsupported period: {period}')
+
+
+class FakeMarket:
+    """确定性行情：价格是时间的平滑函数加上按 (种子, 交易所, 币种, 时间) 哈希的噪声。"""
+
+    def __init__(self, seed=DEFAULT_SEED):
+        self.seed = seed
+
+    def _unit(self, *key):
+        return zlib.crc32(':'.join(str(item) for item in (self.seed, *key)).encode()) / 0xFFFFFFFF
+
+    def base_price(self, symbol):
+        return 10 ** int(self._unit('magnitude', symbol) * 5) * (1 + self._unit('price', symbol))
+
+    def price(self, exchange, symbol, time_ms):
+        phase = self._unit('phase', symbol) * 2 * math.pi
+        trend = 0.04 * math.sin(2 * math.pi * time_ms / DAY_MS + phase) + 0.02 * math.sin(2 * math.pi * time_ms / (7 * DAY_MS))
+        noise = 0.002 * (self._unit(exchange, symbol, time_ms) - 0.5)
+        basis = 0.0005 * (EXCHANGES.index(exchange) if exchange in EXCHANGES else 0)
+        return self.base_price(symbol) * (1 + trend + noise + basis)
+
+    def bar(self, exchange, symbol, open_time, period_ms):
+        open_price = self.price(exchange, symbol, open_time)
+        close_price = self.price(exchange, symbol, open_time + period_ms)
+        scale = period_ms / (5 * MINUTE_MS)
+        volume = (1000 + 4000 * self._unit('volume', exchange, symbol, open_time)) * scale
+        buy_volume = volume * (0.35 + 0.3 * self._unit('buy', exchange, symbol, open_time))
+        return {
+            'open': open_price,
+            'high': max(open_price, close_price) * (1 + 0.001 * self._unit('high', exchange, symbol, open_time)),
+            'low': min(open_price, close_price) * (1 - 0.001 * self._unit('low', exchange, symbol, open_time)),
+            'close': close_price,
+            'volume': volume,
+            'quote_volume': volume * close_price,
+            'buy_volume': buy_volume,
+            'sell_volume': volume - buy_volume,
+            'trades': int(volume // 3),
+        }
+
+    def open_interest(self, exchange, symbol, time_ms):
+        base = 10_000_000 / self.base_price(symbol)
+        phase = self._unit('oi_phase', symbol) * 2 * math.pi
+        return base * (1 + 0.05 * math.sin(2 * math.pi * time_ms / (3 * DAY_MS) + phase) + 0.005 * self._unit('oi', exchange, symbol, time_ms))
+
+    def funding_rate(self, exchange, symbol, time_ms):
+        return round(0.0001 + 0.0004 * (self._unit('funding', exchange, symbol, time_ms // FUNDING_INTERVAL_MS) - 0.5), 8)
+
+
+def window_times(period_ms, now_ms, limit, start=None, end=None, oldest_first=False):
+    """返回时间窗内已收盘 K 线的开盘时间（升序），超过 limit 时保留最新（或最早）的 limit 根。"""
+    last_closed = now_ms - now_ms % period_ms - period_ms
+    high = last_closed if end is None else min(last_closed, end - end % period_ms)
+    low = None if start is None else start + (-start) % period_ms
+    if low is None:
+        low = high - (limit - 1) * period_ms
+    if high < low or limit <= 0:
+        return []
+    if (high - low) // period_ms + 1 > limit:
+        if oldest_first:
+            high = low + (limit - 1) * period_ms
+        else:
+            low = high - (limit - 1) * period_ms
+    return list(range(low, high + 1, period_ms))
+
+
+def _fmt(value, digits=8):
+    return f'{value:.{digits}f}'.rstrip('0').rstrip('.') or '0'
+
+
+def _int_param(params, key, default, maximum):
+    value = params.get(key)
+    if value in (None, ''):
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def _optional_int(params, key):
+    value = params.get(key)
+    return int(value) if value not in (None, '') else None
+
+
+class FixedWindowLimiter:
+    def __init__(self, limit, window_seconds):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.window_started_at = 0.0
+        self.used = 0
+
+    def consume(self, cost, now):
+        """记一次请求；返回 (是否放行, 已用量, 窗口重置时间戳秒)。"""
+        if now - self.window_started_at >= self.window_seconds:
+            self.window_started_at = now - now % self.window_seconds
+            self.used = 0
+        allowed = self.used + cost <= self.limit
+        if allowed:
+            self.used += cost
+        return allowed, self.used, self.window_started_at + self.window_seconds
+
+
+class FakeExchange:
+    """与 HTTP 无关的请求处理：handle(path, params) -> (状态码, 响应头, 响应体)。"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or FakeExchangeSettings()
+        self.market = FakeMarket(self.settings.seed)
+        self.symbols = list(self.settings.symbols)
+        self.symbol_set = set(self.symbols)
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.settings.seed)
+        self._latency_specs = {key: parse_latency(spec) for key, spec in (self.settings.latency or {}).items()}
+        self._limiters = {
+            key: FixedWindowLimiter(*value)
+            for key, value in (self.settings.rate_limits or {}).items()
+            if value is not None
+        }
+        self._started_at = time.time()
+        self._stats = {}
+        self.routes = {
+            ('binance', '/fapi/v1/klines'): self._binance_klines,
+            ('binance', '/futures/data/openInterestHist'): self._binance_open_interest_hist,
+            ('binance', '/futures/data/takerlongshortRatio'): self._binance_taker_ratio,
+            ('binance', '/fapi/v1/premiumIndex'): self._binance_premium_index,
+            ('binance', '/fapi/v1/openInterest'): self._binance_open_interest,
+            ('binance', '/fapi/v2/ticker/price'): self._binance_ticker_price,
+            ('binance', '/fapi/v1/ticker/24hr'): self._binance_ticker_24hr,
+            ('binance', '/fapi/v1/exchangeInfo'): self._binance_exchange_info,
+            ('okx', '/api/v5/market/history-candles'): self._okx_candles,
+            ('okx', '/api/v5/market/candles'): self._okx_candles,
+            ('okx', '/api/v5/rubik/stat/contracts/open-interest-history'): self._okx_open_interest_history,
+            ('okx', '/api/v5/rubik/stat/taker-volume-contract'): self._okx_taker_volume,
+            ('okx', '/api/v5/public/instruments'): self._okx_instruments,
+            ('okx', '/api/v5/public/funding-rate'): self._okx_funding_rate,
+            ('okx', '/api/v5/public/time'): self._okx_time,
+            ('bybit', '/v5/market/kline'): self._bybit_kline,
+            ('bybit', '/v5/market/open-interest'): self._bybit_open_interest,
+            ('bybit', '/v5/market/instruments-info'): self._bybit_instruments,
+            ('bybit', '/v5/market/tickers'): self._bybit_tickers,
+            ('gate', '/api/v4/futures/usdt/candlesticks'): self._gate_candlesticks,
+            ('gate', '/api/v4/futures/usdt/contract_stats'): self._gate_contract_stats,
+            ('gate', '/api/v4/futures/usdt/contracts'): self._gate_contracts,
+            ('gate', '/api/v4/futures/usdt/funding_rate'): self._gate_funding_rate,
+            ('gate', '/api/v4/futures/usdt/tickers'): self._gate_tickers,
+        }
+
+    # ---- 公共入口 ----
+
+    def now_ms(self):
+        return self.settings.now_ms if self.settings.now_ms is not None else int(time.time() * 1000)
+
+    def handle(self, path, params):
+        if path == '/_stats':
+            return 200, {}, self.stats()
+        exchange, _, rest = path.lstrip('/').partition('/')
+        endpoint = '/' + rest
+        route = self.routes.get((exchange, endpoint))
+        if route is None:
+            self._record(exchange or '-', endpoint, 404)
+            return 404, {}, {'error': f'unknown endpoint: {path}'}
+
+        delay_ms = self._sample_latency(exchange)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+        allowed, limit_headers = self._consume_rate_limit(exchange, endpoint, params)
+        if not allowed:
+            status = RATE_LIMIT_STATUS[exchange]
+            self._record(exchange, endpoint, status, reason='rate_limited')
+            return status, limit_headers, self._error_body(exchange, status)
+
+        injected = self._injected_status(exchange)
+        if injected is not None:
+            headers = dict(limit_headers)
+            if injected in (403, 429):
+                headers['Retry-After'] = '1'
+            self._record(exchange, endpoint, injected, reason='injected')
+            return injected, headers, self._error_body(exchange, injected)
+
+        try:
+            body = route(params)
+        except _BadRequest as exc:
+            status, body = self._bad_request(exchange, str(exc))
+            self._record(exchange, endpoint, status, reason='bad_request')
+            return status, limit_headers, body
+        self._record(exchange, endpoint, 200)
+        return 200, limit_headers, body
+
+    def stats(self):
+        with self._lock:
+            exchanges = json.loads(json.dumps(self._stats))
+        elapsed = max(time.time() - self._started_at, 1e-9)
+        total = sum(item['requests'] for item in exchanges.values())
+        return {
+            'uptime_seconds': round(elapsed, 3),
+            'requests': total,
+            'requests_per_second': round(total / elapsed, 3),
+            'exchanges': exchanges,
+        }
+
+    # ---- 延迟、限频、注入与统计 ----
+
+    def _sample_latency(self, exchange):
+        spec = self._latency_specs.get(exchange) or self._latency_specs.get('*')
+        if spec is None:
+            return 0.0
+        with self._lock:
+            return sample_latency_ms(spec, self._rng)
+
+    def _rate_limit_group(self, exchange, endpoint):
+        if exchange == 'binance':
+            return 'weight'
+        if exchange == 'okx':
+            if endpoint.startswith('/api/v5/rubik/'):
+                return 'rubik'
+            if endpoint == '/api/v5/public/funding-rate':
+                return 'funding'
+        return 'default'
+
+    def _request_weight(self, exchange, endpoint, params):
+        if exchange != 'binance':
+            return 1
+        if endpoint == '/fapi/v1/klines':
+            limit = _int_param(params, 'limit', 500, 1500)
+            return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+        if endpoint in ('/fapi/v1/ticker/24hr', '/fapi/v1/premiumIndex') and not params.get('symbol'):
+            return 40 if endpoint == '/fapi/v1/ticker/24hr' else 10
+        return 1
+
+    def _consume_rate_limit(self, exchange, endpoint, params):
+        group = self._rate_limit_group(exchange, endpoint)
+        limiter = self._limiters.get((exchange, group))
+        if limiter is None:
+            return True, {}
+        now = time.time()
+        with self._lock:
+            allowed, used, reset_at = limiter.consume(self._request_weight(exchange, endpoint, params), now)
+        remaining = max(0, limiter.limit - used)
+        if exchange == 'binance':
+            headers = {'X-MBX-USED-WEIGHT': str(used), 'X-MBX-USED-WEIGHT-1M': str(used)}
+        elif exchange == 'okx':
+            headers = {
+                'X-RateLimit-Limit': str(limiter.limit),
+                'X-RateLimit-Remaining': str(remaining),
+                'X-RateLimit-Reset': str(int(reset_at * 1000)),
+            }
+        elif exchange == 'bybit':
+            headers = {
+                'X-Bapi-Limit': str(limiter.limit),
+                'X-Bapi-Limit-Status': str(remaining),
+                'X-Bapi-Limit-Reset-Timestamp': str(int(reset_at * 1000)),
+            }
+        else:
+            headers = {
+                'X-Gate-RateLimit-Limit': str(limiter.limit),
+                'X-Gate-RateLimit-Requests-Remain': str(remaining),
+                'X-Gate-RateLimit-Reset-Timestamp': str(int(math.ceil(reset_at))),
+            }
+        if not allowed:
+            headers['Retry-After'] = str(max(1, int(math.ceil(reset_at - now))))
+        return allowed, headers
+
+    def _injected_status(self, exchange):
+        for rule_exchange, status, rate in self.settings.inject or ():
+            if rule_exchange not in ('*', exchange):
+                continue
+            with self._lock:
+                hit = self._rng.random() < rate
+            if hit:
+                return int(status)
+        return None
+
+    def _maybe_partial(self, rows, newest_first=False):
+        """按 partial_page_rate 只返回较早的一半记录，模拟交易所还没发布完整的最新数据。"""
+        if len(rows) < 2 or self.settings.partial_page_rate <= 0:
+            return rows
+        with self._lock:
+            hit = self._rng.random() < self.settings.partial_page_rate
+        if not hit:
+            return rows
+        keep = (len(rows) + 1) // 2
+        return rows[-keep:] if newest_first else rows[:keep]
+
+    def _record(self, exchange, endpoint, status, reason=None):
+        with self._lock:
+            exchange_stats = self._stats.setdefault(exchange, {'requests': 0, 'endpoints': {}})
+            exchange_stats['requests'] += 1
+            endpoint_stats = exchange_stats['endpoints'].setdefault(endpoint, {'requests': 0, 'status': {}})
+            endpoint_stats['requests'] += 1
+            endpoint_stats['status'][str(status)] = endpoint_stats['status'].get(str(status), 0) + 1
+            if reason:
+                exchange_stats[reason] = exchange_stats.get(reason, 0) + 1
+
+    def _error_body(self, exchange, status):
+        if exchange == 'binance':
+            if status in (403, 429):
+                return {'code': -1003, 'msg': 'Too many requests; current limit is exceeded.'}
+            return {'code': -1001, 'msg': 'Internal error; unable to process your request. Please try again.'}
+        if exchange == 'okx':
+            if status == 429:
+                return {'code': '50011', 'msg': 'Too Many Requests', 'data': []}
+            return {'code': '50001', 'msg': 'Service temporarily unavailable. Please try again later.', 'data': []}
+        if exchange == 'bybit':
+            if status == 403:
+                return {'retCode': 10006, 'retMsg': 'access too frequent', 'result': {}}
+            if status == 429:
+                return {'retCode': 10006, 'retMsg': 'Too many visits!', 'result': {}}
+            return {'retCode': 10016, 'retMsg': 'Server error.', 'result': {}}
+        if status == 429:
+            return {'label': 'TOO_MANY_REQUESTS', 'message': 'Request Rate limit Exceeded'}
+        if status == 403:
+            return {'label': 'FORBIDDEN', 'message': 'Forbidden'}
+        return {'label': 'SERVER_ERROR', 'message': 'Internal server error'}
+
+    def _bad_request(self, exchange, message):
+        if exchange == 'binance':
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+        if exchange == 'okx':
+            return 200, {'code': '51001', 'msg': "Instrument ID doesn't exist.", 'data': []}
+        if exchange == 'bybit':
+            return 200, {'retCode': 10001, 'retMsg': f'params error: {message}', 'result': {}}
+        return 400, {'label': 'CONTRACT_NOT_FOUND', 'message': message}
+
+    # ---- 币种换算 ----
+
+    def _symbol(self, symbol):
+        if symbol not in self.symbol_set:
+            raise _BadRequest(f'symbol not found: {symbol}')
+        return symbol
+
+    def _okx_symbol(self, inst_id):
+        parts = str(inst_id or '').split('-')
+        if len(parts) != 3 or parts[2] != 'SWAP':
+            raise _BadRequest(f'instrument not found: {inst_id}')
+        return self._symbol(parts[0] + parts[1])
+
+    def _gate_symbol(self, contract):
+        return self._symbol(str(contract or '').replace('_', ''))
+
+    # ---- Binance ----
+
+    def _binance_window(self, params, default_limit, max_limit, period_key):
+        period_ms = period_to_ms(params.get(period_key) or '5m')
+        start = _optional_int(params, 'startTime')
+        return period_ms, window_times(
+            period_ms,
+            self.now_ms(),
+            _int_param(params, 'limit', default_limit, max_limit),
+            start=start,
+            end=_optional_int(params, 'endTime'),
+            oldest_first=start is not None,
+        )
+
+    def _binance_klines(self, params):
+        symbol = self._symbol(params.get('symbol'))
+        period_ms, times = self._binance_window(params, 500, 1500, 'interval')
+        rows = []
+        for open_time in times:
+            bar = self.market.bar('binance', symbol, open_time, period_ms)
+            rows.append([
+                open_time,
+                _fmt(bar['open']), _fmt(bar['high']), _fmt(bar['low']), _fmt(bar['close']),
+                _fmt(bar['volume'], 3),
+                open_time + period_ms - 1,
+                _fmt(bar['quote_volume'], 4),
+                bar['trades'],
+                _fmt(bar['buy_volume'], 3),
+                _fmt(bar['buy_volume'] * bar['close'], 4),
+                '0',
+            ])
+        return self._maybe_partial(rows)
+
+    def _binance_open_interest_hist(self, params):
+        symbol = self._symbol(params.get('symbol'))
+        _, times = self._binance_window(params, 30, 500, 'period')
+        rows = []
+        for event_time in times:
+            open_interest = self.market.open_interest('binance', symbol, event_time)
+            rows.append({
+                'symbol': symbol,
+                'sumOpenInterest': _fmt(open_interest),
+                'sumOpenInterestValue': _fmt(open_interest * self.market.price('binance', symbol, event_time)),
+                'timestamp': event_time,
+            })
+        return self._maybe_partial(rows)
+
+    def _binance_taker_ratio(self, params):
+        symbol = self._symbol(params.get('symbol'))
+        period_ms, times = self._binance_window(params, 30, 500, 'period')
+        rows = []
+        for event_time in times:
+            bar = self.market.bar('binance', symbol, event_time, period_ms)
+            rows.append({
+                'buySellRatio': _fmt(bar['buy_volume'] / bar['sell_volume'], 4),
+                'buyVol': _fmt(bar['buy_volume'], 4),
+                'sellVol': _fmt(bar['sell_volume'], 4),
+                'timestamp': event_time,
+            })
+        return self._maybe_partial(rows)
+
+    def _binance_premium_row(self, symbol, now_ms):
+        mark_price = self.market.price('binance', symbol, now_ms)
+        return {
+            'symbol': symbol,
+            'markPrice': _fmt(mark_price),
+            'indexPrice': _fmt(mark_price * 0.9999),
+            'estimatedSettlePrice': _fmt(mark_price),
+            'lastFundingRate': _fmt(self.market.funding_rate('binance', symbol, now_ms)),
+            'interestRate': '0.00010000',
+            'nextFundingTime': now_ms - now_ms % FUNDING_INTERVAL_MS + FUNDING_INTERVAL_MS,
+            'time': now_ms,
+        }
+
+    def _binance_premium_index(self, params):
+        now_ms = self.now_ms()
+        if params.get('symbol'):
+            return self._binance_premium_row(self._symbol(params['symbol']), now_ms)
+        return [self._binance_premium_row(symbol, now_ms) for symbol in self.symbols]
+
+    def _binance_open_interest(self, params):
+        symbol = self._symbol(params.get('symbol'))
+        now_ms = self.now_ms()
+        return {'symbol': symbol, 'openInterest': _fmt(self.market.open_interest('binance', symbol, now_ms)), 'time': now_ms}
+
+    def _binance_ticker_price(self, params):
+        now_ms = self.now_ms()
+        rows = [
+            {'symbol': symbol, 'price': _fmt(self.market.price('binance', symbol, now_ms)), 'time': now_ms}
+            for symbol in ([self._symbol(params['symbol'])] if params.get('symbol') else self.symbols)
+        ]
+        return rows[0] if params.get('symbol') else rows
+
+    def _binance_ticker_row(self, symbol, now_ms):
+        open_price = self.market.price('binance', symbol, now_ms - DAY_MS)
+        last_price = self.market.price('binance', symbol, now_ms)
+        volume = 288 * 3000 * (0.5 + self.market._unit('ticker_volume', symbol))
+        return {
+            'symbol': symbol,
+            'priceChange': _fmt(last_price - open_price),
+            'priceChangePercent': _fmt((last_price / open_price - 1) * 100, 3),
+            'weightedAvgPrice': _fmt((open_price + last_price) / 2),
+            'lastPrice': _fmt(last_price),
+            'lastQty': '1',
+            'openPrice': _fmt(open_price),
+            'highPrice': _fmt(max(open_price, last_price) * 1.01),
+            'lowPrice': _fmt(min(open_price, last_price) * 0.99),
+            'volume': _fmt(volume, 3),
+            'quoteVolume': _fmt(volume * last_price, 2),
+            'openTime': now_ms - DAY_MS,
+            'closeTime': now_ms,
+            'firstId': 1,
+            'lastId': int(volume),
+            'count': int(volume),
+        }
+
+    def _binance_ticker_24hr(self, params):
+        now_ms = self.now_ms()
+        if params.get('symbol'):
+            return self._binance_ticker_row(self._symbol(params['symbol']), now_ms)
+        return [self._binance_ticker_row(symbol, now_ms) for symbol in self.symbols]
+
+    def _binance_exchange_info(self, params):
+        return {
+            'timezone': 'UTC',
+            'serverTime': self.now_ms(),
+            'symbols': [
+                {
+                    'symbol': symbol,
+                    'pair': symbol,
+                    'contractType': 'PERPETUAL',
+                    'deliveryDate': 4133404800000,
+                    'onboardDate': 1569398400000,
+                    'status': 'TRADING',
+                    'maintMarginPercent': '2.5000',
+                    'requiredMarginPercent': '5.0000',
+                    'baseAsset': symbol[:-4],
+                    'quoteAsset': 'USDT',
+                    'marginAsset': 'USDT',
+                    'pricePrecision': 4,
+                    'quantityPrecision': 1,
+                    'baseAssetPrecision': 8,
+                    'quotePrecision': 8,
+                    'underlyingType': 'COIN',
+                    'liquidationFee': '0.012500',
+                }
+                for symbol in self.symbols
+            ],
+        }
+
+    # ---- OKX ----
+
+    @staticmethod
+    def _okx_body(data):
+        return {'code': '0', 'msg': '', 'data': data}
+
+    def _okx_window(self, params, period_key, start_key, end_key, exclusive, default_limit, max_limit):
+        period_ms = period_to_ms(params.get(period_key) or '5m')
+        start = _optional_int(params, start_key)
+        end = _optional_int(params, end_key)
+        if exclusive:
+            # history-candles: after 取更早的数据，before 取更新的数据，都不含边界
+            start = start + 1 if start is not None else None
+            end = end - 1 if end is not None else None
+        times = window_times(period_ms, self.now_ms(), _int_param(params, 'limit', default_limit, max_limit), start=start, end=end)
+        return period_ms, list(reversed(times))
+
+    def _okx_candles(self, params):
+        symbol = self._okx_symbol(params.get('instId'))
+        period_ms, times = self._okx_window(params, 'bar', 'before', 'after', True, 100, 100)
+        rows = []
+        for open_time in times:
+            bar = self.market.bar('okx', symbol, open_time, period_ms)
+            contracts = bar['volume'] * 10
+            rows.append([
+                str(open_time),
+                _fmt(bar['open']), _fmt(bar['high']), _fmt(bar['low']), _fmt(bar['close']),
+                _fmt(contracts, 2), _fmt(bar['volume'], 4), _fmt(bar['quote_volume'], 4), '1',
+            ])
+        return self._okx_body(self._maybe_partial(rows, newest_first=True))
+
+    def _okx_open_interest_history(self, params):
+        symbol = self._okx_symbol(params.get('instId'))
+        _, times = self._okx_window(params, 'period', 'begin', 'end', False, 100, 100)
+        rows = []
+        for event_time in times:
+            open_interest = self.market.open_interest('okx', symbol, event_time)
+            rows.append([
+                str(event_time),
+                _fmt(open_interest * 10, 2),
+                _fmt(open_interest, 4),
+                _fmt(open_interest * self.market.price('okx', symbol, event_time), 4),
+            ])
+        return self._okx_body(self._maybe_partial(rows, newest_first=True))
+
+    def _okx_taker_volume(self, params):
+        symbol = self._okx_symbol(params.get('instId'))
+        period_ms, times = self._okx_window(params, 'period', 'begin', 'end', False, 100, 100)
+        rows = []
+        for event_time in times:
+            bar = self.market.bar('okx', symbol, event_time, period_ms)
+            # 单位为张，合约面值 ctVal=0.1
+            rows.append([str(event_time), _fmt(bar['sell_volume'] * 10, 2), _fmt(bar['buy_volume'] * 10, 2)])
+        return self._okx_body(self._maybe_partial(rows, newest_first=True))
+
+    def _okx_instruments(self, params):
+        return self._okx_body([
+            {
+                'instId': f'{symbol[:-4]}-USDT-SWAP',
+                'instType': 'SWAP',
+                'uly': f'{symbol[:-4]}-USDT',
+                'settleCcy': 'USDT',
+                'ctVal': '0.1',
+                'ctValCcy': symbol[:-4],
+                'state': 'live',
+            }
+            for symbol in self.symbols
+        ])
+
+    def _okx_funding_row(self, symbol, now_ms):
+        next_funding_time = now_ms - now_ms % FUNDING_INTERVAL_MS + FUNDING_INTERVAL_MS
+        return {
+            'instId': f'{symbol[:-4]}-USDT-SWAP',
+            'instType': 'SWAP',
+            'fundingRate': _fmt(self.market.funding_rate('okx', symbol, now_ms)),
+            'nextFundingRate': '',
+            'fundingTime': str(next_funding_time),
+            'nextFundingTime': str(next_funding_time + FUNDING_INTERVAL_MS),
+        }
+
+    def _okx_funding_rate(self, params):
+        now_ms = self.now_ms()
+        if params.get('instId') == 'ANY':
+            return self._okx_body([self._okx_funding_row(symbol, now_ms) for symbol in self.symbols])
+        return self._okx_body([self._okx_funding_row(self._okx_symbol(params.get('instId')), now_ms)])
+
+    def _okx_time(self, params):
+        return self._okx_body([{'ts': str(self.now_ms())}])
+
+    # ---- Bybit ----
+
+    def _bybit_body(self, result):
+        return {'retCode': 0, 'retMsg': 'OK', 'result': result, 'retExtInfo': {}, 'time': self.now_ms()}
+
+    def _bybit_kline(self, params):
+        symbol = self._symbol(params.get('symbol'))
+        period_ms = period_to_ms(params.get('interval') or '5')
+        times = window_times(
+            period_ms,
+            self.now_ms(),
+            _int_param(params, 'limit', 200, 1000),
+            start=_optional_int(params, 'start'),
+            end=_optional_int(params, 'end'),
+        )
+        rows = []
+        for open_time in reversed(times):
+            bar = self.market.bar('bybit', symbol, open_time, period_ms)
+            rows.append([
+                str(open_time),
+                _fmt(bar['open']), _fmt(bar['high']), _fmt(bar['low']), _fmt(bar['close']),
+                _fmt(bar['volume'], 3), _fmt(bar['quote_volume'], 4),
+            ])
+        return self._bybit_body({'category': params.get('category', 'linear'), 'symbol': symbol, 'list': self._maybe_partial(rows, newest_first=True)})
+
+    def _bybit_open_interest(self, params):
+        symbol = self._symbol(params.get('symbol'))
+        period_ms = period_to_ms(params.get('intervalTime') or '5min')
+        limit = _int_param(params, 'limit', 50, 200)
+        end = _optional_int(params, 'endTime')
+        cursor = _optional_int(params, 'cursor')
+        if cursor is not None:
+            end = cursor if end is None else min(end, cursor)
+        times = list(reversed(window_times(period_ms, self.now_ms(), limit, start=_optional_int(params, 'startTime'), end=end)))
+        rows = [
+            {'openInterest': _fmt(self.market.open_interest('bybit', symbol, event_time), 3), 'timestamp': str(event_time)}
+            for event_time in times
+        ]
+        next_cursor = str(times[-1] - period_ms) if len(times) == limit else ''
+        return self._bybit_body({
+            'symbol': symbol,
+            'category': params.get('category', 'linear'),
+            'list': self._maybe_partial(rows, newest_first=True),
+            'nextPageCursor': next_cursor,
+        })
+
+    def _bybit_instruments(self, params):
+        page_size = _int_param(params, 'limit', self.settings.instrument_page_size, 1000)
+        offset = _optional_int(params, 'cursor') or 0
+        page = self.symbols[offset:offset + page_size]
+        next_offset = offset + len(page)
+        return self._bybit_body({
+            'category': params.get('category', 'linear'),
+            'list': [
+                {
+                    'symbol': symbol,
+                    'contractType': 'LinearPerpetual',
+                    'status': 'Trading',
+                    'baseCoin': symbol[:-4],
+                    'quoteCoin': 'USDT',
+                    'settleCoin': 'USDT',
+                }
+                for symbol in page
+            ],
+            'nextPageCursor': str(next_offset) if next_offset < len(self.symbols) else '',
+        })
+
+    def _bybit_tickers(self, params):
+        now_ms = self.now_ms()
+        symbols = [self._symbol(params['symbol'])] if params.get('symbol') else self.symbols
+        return self._bybit_body({
+            'category': params.get('category', 'linear'),
+            'list': [
+                {
+                    'symbol': symbol,
+                    'lastPrice': _fmt(self.market.price('bybit', symbol, now_ms)),
+                    'markPrice': _fmt(self.market.price('bybit', symbol, now_ms)),
+                    'fundingRate': _fmt(self.market.funding_rate('bybit', symbol, now_ms)),
+                    'nextFundingTime': str(now_ms - now_ms % FUNDING_INTERVAL_MS + FUNDING_INTERVAL_MS),
+                    'openInterest': _fmt(self.market.open_interest('bybit', symbol, now_ms), 3),
+                }
+                for symbol in symbols
+            ],
+        })
+
+    # ---- Gate ----
+
+    def _gate_window(self, params, default_limit, max_limit):
+        period_ms = period_to_ms(params.get('interval') or '5m')
+        start = _optional_int(params, 'from')
+        end = _optional_int(params, 'to')
+        return period_ms, window_times(
+            period_ms,
+            self.now_ms(),
+            _int_param(params, 'limit', default_limit, max_limit),
+            start=start * 1000 if start is not None else None,
+            end=end * 1000 if end is not None else None,
+            oldest_first=start is not None,
+        )
+
+    def _gate_candlesticks(self, params):
+        symbol = self._gate_symbol(params.get('contract'))
+        period_ms, times = self._gate_window(params, 100, 2000)
+        rows = []
+        for open_time in times:
+            bar = self.market.bar('gate', symbol, open_time, period_ms)
+            rows.append({
+                't': open_time // 1000,
+                'v': int(bar['volume'] * 10),
+                'c': _fmt(bar['close']),
+                'h': _fmt(bar['high']),
+                'l': _fmt(bar['low']),
+                'o': _fmt(bar['open']),
+                'sum': _fmt(bar['quote_volume'], 4),
+            })
+        return self._maybe_partial(rows)
+
+    def _gate_contract_stats(self, params):
+        symbol = self._gate_symbol(params.get('contract'))
+        period_ms, times = self._gate_window(params, 30, 100)
+        rows = []
+        for event_time in times:
+            bar = self.market.bar('gate', symbol, event_time, period_ms)
+            open_interest = self.market.open_interest('gate', symbol, event_time)
+            rows.append({
+                'time': event_time // 1000,
+                'lsr_taker': round(bar['buy_volume'] / bar['sell_volume'], 4),
+                'lsr_account': 1.0,
+                'long_liq_size': 0,
+                'short_liq_size': 0,
+                'open_interest': int(open_interest * 10),
+                'open_interest_usd': round(open_interest * self.market.price('gate', symbol, event_time), 4),
+                'long_taker_size': int(bar['buy_volume'] * 10),
+                'short_taker_size': int(bar['sell_volume'] * 10),
+                'mark_price': round(bar['close'], 8),
+            })
+        return self._maybe_partial(rows)
+
+    def _gate_contracts(self, params):
+        now_ms = self.now_ms()
+        return [
+            {
+                'name': f'{symbol[:-4]}_USDT',
+                'type': 'direct',
+                'quanto_multiplier': '0.1',
+                'mark_price': _fmt(self.market.price('gate', symbol, now_ms)),
+                'funding_rate': _fmt(self.market.funding_rate('gate', symbol, now_ms)),
+                'in_delisting': False,
+            }
+            for symbol in self.symbols
+        ]
+
+    def _gate_funding_rate(self, params):
+        symbol = self._gate_symbol(params.get('contract'))
+        now_ms = self.now_ms()
+        last_settle = now_ms - now_ms % FUNDING_INTERVAL_MS
+        return [
+            {'t': (last_settle - index * FUNDING_INTERVAL_MS) // 1000, 'r': _fmt(self.market.funding_rate('gate', symbol, last_settle - index * FUNDING_INTERVAL_MS))}
+            for index in range(_int_param(params, 'limit', 100, 1000))
+        ]
+
+    def _gate_tickers(self, params):
+        now_ms = self.now_ms()
+        symbols = [self._gate_symbol(params['contract'])] if params.get('contract') else self.symbols
+        return [
+            {
+                'contract': f'{symbol[:-4]}_USDT',
+                'last': _fmt(self.market.price('gate', symbol, now_ms)),
+                'mark_price': _fmt(self.market.price('gate', symbol, now_ms)),
+                'funding_rate': _fmt(self.market.funding_rate('gate', symbol, now_ms)),
+                'funding_next_apply': (now_ms - now_ms % FUNDING_INTERVAL_MS + FUNDING_INTERVAL_MS) // 1000,
+            }
+            for symbol in symbols
+        ]
+
+
+class _FakeExchangeHandler(BaseHTTPRequestHandler):
+    server_version = 'CoinXFakeExchange/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        status, headers, body = self.server.fake.handle(parts.path, params)
+        payload = json.dumps(body, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeExchangeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fake, host='127.0.0.1', port=0, verbose=False):
+        super().__init__((host, port), _FakeExchangeHandler)
+        self.fake = fake
+        self.verbose = verbose
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def base_urls(self):
+        """返回可以直接写入环境变量的 {BINANCE_BASE_URL: ..., ...}。"""
+        return {env: f'{self.base_url}/{exchange}' for exchange, env in BASE_URL_ENV.items()}
+
+
+def start_fake_exchange(settings=None, host='127.0.0.1', port=0, verbose=False):
+    """在后台线程启动模拟交易所并返回服务对象；用完调用 stop_fake_exchange。"""
+    server = FakeExchangeServer(FakeExchange(settings), host=host, port=port, verbose=verbose)
+    threading.Thread(target=server.serve_forever, daemon=True, name='fake-exchange').start()
+    return server
+
+
+def stop_fake_exchange(server):
+    server.shutdown()
+    server.server_close()
+
+
+def _parse_keyed(values, parser):
+    parsed = {}
+    for item in values or ():
+        key, sep, spec = item.partition('=')
+        if not sep:
+            key, spec = '*', item
+        parsed[key] = parser(spec)
+    return parsed
+
+
+def _parse_limit(spec):
+    if spec in ('off', 'none'):
+        return None
+    count, _, seconds = spec.partition('/')
+    return int(count), float(seconds or 1)
+
+
+def _parse_inject(spec):
+    parts = spec.split(':')
+    if len(parts) == 2:
+        parts = ['*', *parts]
+    if len(parts) != 3:
+        raise ValueError(f'invalid inject spec: {spec}')
+    return parts[0], int(parts[1]), float(parts[2])
+
+
+def build_settings(args):
+    rate_limits = {} if args.no_rate_limit else dict(DEFAULT_RATE_LIMITS)
+    for key, value in _parse_keyed(args.limit, _parse_limit).items():
+        exchange, _, group = key.partition('.')
+        rate_limits[(exchange, group or ('weight' if exchange == 'binance' else 'default'))] = value
+    latency = _parse_keyed(args.latency, lambda spec: spec)
+    for spec in latency.values():
+        parse_latency(spec)
+    return FakeExchangeSettings(
+        symbols=benchmark_symbols(args.symbols),
+        seed=args.seed,
+        now_ms=args.now_ms,
+        latency=latency,
+        rate_limits=rate_limits,
+        inject=[_parse_inject(spec) for spec in args.inject or ()],
+        partial_page_rate=args.partial_page_rate,
+        instrument_page_size=args.instrument_page_size,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--symbols', type=int, default=20, help='模拟的币种数量（默认 20）')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--now-ms', type=int, help='固定的当前时间（毫秒），默认使用真实时间')
+    parser.add_argument('--latency', action='append', metavar='[EXCHANGE=]SPEC', help='延迟分布，可重复，例如 okx=normal:80:20')
+    parser.add_argument('--limit', action='append', metavar='EXCHANGE[.GROUP]=N/SECONDS', help='覆盖限频，例如 okx.rubik=5/2 或 gate=off')
+    parser.add_argument('--no-rate-limit', action='store_true', help='关闭全部限频')
+    parser.add_argument('--inject', action='append', metavar='[EXCHANGE:]STATUS:RATE', help='按比例注入错误，例如 gate:403:0.02')
+    parser.add_argument('--partial-page-rate', type=float, default=0.0, help='返回不完整分页的比例')
+    parser.add_argument('--instrument-page-size', type=int, default=500, help='Bybit 合约列表每页条数')
+    parser.add_argument('--verbose', action='store_true', help='打印每个请求')
+    args = parser.parse_args(argv)
+
+    server = FakeExchangeServer(FakeExchange(build_settings(args)), host=args.host, port=args.port, verbose=args.verbose)
+    for env, url in server.base_urls().items():
+        print(f'export {env}={url}')
+    print(f'stats: {server.base_url}/_stats', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
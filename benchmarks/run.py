@@ -0,0 +1,464 @@
+"""热点路径基准测试：生成合成数据后逐项计时，结果写成 JSON 以便逐次对比。
+
+默认在临时 SQLite 库中生成 20 个币种 × 4 个交易所 × 8 天的 5m 数据（首页 168h
+变化需要 7 天以上的历史），也可以用 --db-url 指向 MySQL 兼容库。交易所支持币种
+缓存直接按合成币种预置，rolling 修补使用进程内的合成交易所，整个过程不访问网络。
+加 --fake-exchange 时在本地启动 benchmarks.fake_exchange，把各交易所 base url 指向它，
+额外计时一次走真实适配器与 HTTP 请求的 rolling 修补（不注入延迟与限频）。
+
+    python -m benchmarks.run
+    python -m benchmarks.run --fake-exchange --cases repair_rolling_symbols,repair_rolling_symbols_http
+    python -m benchmarks.run --symbols 50 --repeat 10 --output bench.json
+    python -m benchmarks.run --baseline benchmarks/results/base.json --max-regression 0.2
+
+每个用例先执行 setup（清空对应的内存缓存，或删掉需要重新写入的数据），
+只对用例本身计时；报告 min/median/mean/p95/max，对比时使用 median。
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT / 'src') not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT / 'src'))
+
+
+from benchmarks.symbols import DEFAULT_SEED, benchmark_symbols
+
+
+RESULT_SCHEMA_VERSION = 1
+DEFAULT_RESULTS_DIR = PROJECT_ROOT / 'benchmarks' / 'results'
+DEFAULT_EXCHANGES = ('binance', 'okx', 'bybit', 'gate')
+UPSERT_SYMBOL = 'BENCHUPSERTUSDT'
+UPSERT_BARS = 2000
+UPSERT_BATCH_SIZE = 500
+REPAIR_SYMBOL_COUNT = 5
+REPAIR_MISSING_BARS = 6
+
+
+def _percentile(sorted_values, ratio):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(ratio * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize_timings(timings_ms):
+    ordered = sorted(timings_ms)
+    return {
+        'runs': len(ordered),
+        'first_ms': round(timings_ms[0], 3),
+        'min_ms': round(ordered[0], 3),
+        'median_ms': round(statistics.median(ordered), 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'p95_ms': round(_percentile(ordered, 0.95), 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+class SyntheticExchangeAdapter:
+    """进程内的合成交易所：按与数据生成器相同的种子返回请求时间窗内的记录。"""
+
+    supported_series_types = ('klines', 'open_interest_hist', 'taker_buy_sell_vol')
+    precise_series_types = supported_series_types
+
+    def __init__(self, exchange_id, dataset):
+        self.exchange_id = exchange_id
+        self.dataset = dataset
+        self._series = {}
+        self.calls = 0
+
+    def supports_time_window(self, series_type):
+        return True
+
+    def supports_symbol(self, symbol, series_type=None, session=None):
+        return True
+
+    def periods_for_series(self, series_type):
+        return ('5m',)
+
+    def _symbol_series(self, symbol):
+        from benchmarks.datagen import generate_symbol_series
+
+        if symbol not in self._series:
+            self._series[symbol] = generate_symbol_series(
+                self.exchange_id,
+                symbol,
+                self.dataset['start_time'],
+                self.dataset['bars_per_series'],
+                seed=self.dataset['seed'],
+            )
+        return self._series[symbol]
+
+    def fetch_series_payload(self, series_type, symbol, period, limit, session=None, start_time=None, end_time=None):
+        self.calls += 1
+        time_field = 'open_time' if series_type == 'klines' else 'event_time'
+        records = self._symbol_series(symbol)[series_type]
+        if start_time is not None:
+            records = [record for record in records if record[time_field] >= start_time]
+        if end_time is not None:
+            records = [record for record in records if record[time_field] <= end_time]
+        return records[-limit:] if limit else records
+
+    def parse_series_payload(self, series_type, payload, symbol, period):
+        return list(payload)
+
+
+def configure_environment(db_url, exchanges, verbose=False, base_urls=None):
+    """在导入业务模块前指定数据库、交易所与交易所 base url；引擎在第一次使用时按这里的地址创建。"""
+    os.environ['ENABLED_EXCHANGES'] = ','.join(exchanges)
+    # 各交易所模块在导入时读取 base url，必须在导入 coinx.config 之前写入环境变量
+    os.environ.update(base_urls or {})
+    from coinx import config, database
+
+    if database.is_engine_created():
+        raise RuntimeError('数据库引擎已创建，无法切换到基准测试库')
+    config.DATABASE_URI = db_url
+    if not verbose:
+        # coinx.utils 导入时会把根日志级别设为 INFO，先导入再调高级别
+        import coinx.utils  # noqa: F401
+
+        logging.getLogger().setLevel(logging.ERROR)
+    return database.get_engine()
+
+
+def seed_symbol_support(symbols):
+    """把合成币种写入各交易所的支持币种缓存，避免计时过程中请求交易所接口。"""
+    import importlib
+
+    from coinx.warm_start import SYMBOL_SUPPORT_EXTRA_FIELDS, SYMBOL_SUPPORT_MODULES
+
+    for _, module_name in SYMBOL_SUPPORT_MODULES:
+        cache = importlib.import_module(module_name)._supported_symbols_cache
+        cache['symbols'] = set(symbols) | {UPSERT_SYMBOL}
+        cache['loaded_at'] = time.time()
+        for field in SYMBOL_SUPPORT_EXTRA_FIELDS:
+            if field in cache:
+                cache[field] = {symbol: 1.0 for symbol in cache['symbols']}
+
+
+def load_dataset_info(engine, symbols, exchanges, seed):
+    """从库中读出已生成数据的时间范围，--skip-generate 复用旧库时同样适用。"""
+    from sqlalchemy import func, select
+
+    from benchmarks.datagen import FIVE_MINUTES_MS
+    from coinx.models import MarketKline
+
+    with engine.connect() as connection:
+        start_time, end_time = connection.execute(
+            select(func.min(MarketKline.open_time), func.max(MarketKline.open_time)).where(
+                MarketKline.symbol == symbols[0],
+                MarketKline.exchange == exchanges[0],
+            )
+        ).one()
+    if end_time is None:
+        raise RuntimeError('基准测试库中没有数据，请去掉 --skip-generate 重新生成')
+    return {
+        'start_time': int(start_time),
+        'end_time': int(end_time),
+        'bars_per_series': (int(end_time) - int(start_time)) // FIVE_MINUTES_MS + 1,
+        'seed': seed,
+    }
+
+
+def _reset_read_caches():
+    from coinx.repositories.market_structure_indicators import reset_indicator_states
+    from coinx.repositories.price_volume_metrics import reset_price_volume_metrics
+    from coinx.repositories.series_frame import reset_series_frames
+
+    reset_series_frames()
+    reset_indicator_states()
+    reset_price_volume_metrics()
+
+
+def _delete_symbol_rows(engine, symbols, exchanges=None, since=None):
+    from coinx.models import MarketKline, MarketOpenInterestHist, MarketTakerBuySellVol
+
+    with engine.begin() as connection:
+        for model, time_column in (
+            (MarketKline, MarketKline.open_time),
+            (MarketOpenInterestHist, MarketOpenInterestHist.event_time),
+            (MarketTakerBuySellVol, MarketTakerBuySellVol.event_time),
+        ):
+            statement = model.__table__.delete().where(model.symbol.in_(list(symbols)))
+            if exchanges is not None:
+                statement = statement.where(model.exchange.in_(list(exchanges)))
+            if since is not None:
+                statement = statement.where(time_column >= since)
+            connection.execute(statement)
+
+
+def benchmark_now_ms(dataset):
+    """计时用例使用的“当前时间”：数据集最后一根 K 线收盘之后。"""
+    from benchmarks.datagen import FIVE_MINUTES_MS
+
+    return dataset['end_time'] + FIVE_MINUTES_MS + 1000
+
+
+def build_cases(engine, symbols, exchanges, dataset, http_repair=False):
+    """返回 [(用例名, setup, run)]；run 的返回值会被压缩成简短的结果描述写进报告。
+
+    http_repair 为 True 时追加一个使用真实交易所适配器的修补用例，需要先把 base url
+    指向模拟交易所。
+    """
+    from benchmarks.datagen import FIVE_MINUTES_MS, generate_symbol_series
+    from coinx.collector import exchange_repair
+    from coinx.database import get_session
+    from coinx.repositories.chart_series import load_contract_chart_series
+    from coinx.repositories.funding_rate import load_latest_funding_rate_page
+    from coinx.repositories.homepage_series import get_homepage_series_snapshot
+    from coinx.repositories.market_structure_score import get_market_structure_score_snapshot
+    from coinx.repositories.series import upsert_series_records_in_batches
+
+    now_ms = benchmark_now_ms(dataset)
+    upsert_records = generate_symbol_series(
+        'binance',
+        UPSERT_SYMBOL,
+        dataset['end_time'] - (UPSERT_BARS - 1) * FIVE_MINUTES_MS,
+        UPSERT_BARS,
+        seed=dataset['seed'],
+    )['klines']
+    repair_symbols = symbols[:REPAIR_SYMBOL_COUNT]
+    repair_since = dataset['end_time'] - (REPAIR_MISSING_BARS - 1) * FIVE_MINUTES_MS
+    adapters = [SyntheticExchangeAdapter(exchange, dataset) for exchange in exchanges]
+
+    def noop():
+        return None
+
+    def homepage():
+        return get_homepage_series_snapshot(symbols=symbols, now_ms=now_ms)
+
+    def market_structure_score():
+        return get_market_structure_score_snapshot(symbols=symbols, now_ms=now_ms, exchanges=exchanges)
+
+    def chart(range_key):
+        return lambda: load_contract_chart_series(symbols[0], range_key)
+
+    def funding_rate_page():
+        # 显式传入会话走 SQL 路径，不使用内存中的最新费率快照
+        session = get_session()
+        try:
+            return load_latest_funding_rate_page(session=session)
+        finally:
+            session.close()
+
+    def clear_upsert_symbol():
+        _delete_symbol_rows(engine, [UPSERT_SYMBOL])
+
+    def upsert():
+        return upsert_series_records_in_batches('binance', 'klines', upsert_records, UPSERT_BATCH_SIZE)
+
+    def drop_latest_bars():
+        _delete_symbol_rows(engine, repair_symbols, exchanges, since=repair_since)
+
+    def repair_with_adapters():
+        return exchange_repair.repair_rolling_symbols(
+            symbols=repair_symbols,
+            exchanges=list(exchanges),
+            now_ms=now_ms,
+            points=REPAIR_MISSING_BARS * 2,
+        )
+
+    def repair():
+        original = exchange_repair.get_exchange_adapters
+        exchange_repair.get_exchange_adapters = lambda target_exchanges: adapters
+        try:
+            return repair_with_adapters()
+        finally:
+            exchange_repair.get_exchange_adapters = original
+
+    cases = [
+        ('homepage_series_snapshot', _reset_read_caches, homepage),
+        ('homepage_series_snapshot_warm', noop, homepage),
+        ('market_structure_score_snapshot', _reset_read_caches, market_structure_score),
+        ('contract_chart_series_24h', noop, chart('24h')),
+        ('contract_chart_series_7d', noop, chart('7d')),
+        ('latest_funding_rate_page', noop, funding_rate_page),
+        ('upsert_series_records_in_batches_insert', clear_upsert_symbol, upsert),
+        ('upsert_series_records_in_batches_update', noop, upsert),
+        ('repair_rolling_symbols', drop_latest_bars, repair),
+    ]
+    if http_repair:
+        cases.append(('repair_rolling_symbols_http', drop_latest_bars, repair_with_adapters))
+    return cases
+
+
+def describe_result(result):
+    """把用例返回值压缩成几项计数，确认每次计时的工作量相同。"""
+    if isinstance(result, int):
+        return {'affected': result}
+    if not isinstance(result, dict):
+        return {}
+    described = {}
+    if isinstance(result.get('data'), list):
+        described['rows'] = len(result['data'])
+        statuses = [item.get('status') for item in result['data'] if isinstance(item, dict) and item.get('status')]
+        if statuses:
+            described['complete'] = statuses.count('complete')
+    for key in ('market', 'flow'):
+        if isinstance(result.get(key), list):
+            described[f'{key}_points'] = len(result[key])
+    if 'total_count' in result:
+        described['total_count'] = result['total_count']
+    for key in ('task_count', 'success_count', 'affected'):
+        if key in result:
+            described[key] = result[key]
+    return described
+
+
+def run_cases(cases, repeat, selected=None):
+    results = {}
+    for name, setup, run in cases:
+        if selected and name not in selected:
+            continue
+        timings = []
+        result = None
+        for _ in range(max(1, repeat)):
+            setup()
+            started_at = time.perf_counter()
+            result = run()
+            timings.append((time.perf_counter() - started_at) * 1000)
+        results[name] = {**summarize_timings(timings), 'result': describe_result(result)}
+        print(f"{name:42s} median={results[name]['median_ms']:10.2f} ms  p95={results[name]['p95_ms']:10.2f} ms")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            cwd=str(PROJECT_ROOT),
+            timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare_results(baseline, current, max_regression):
+    """按 median 对比两次结果，返回变慢超过 max_regression（比例）的用例。"""
+    regressions = []
+    for name, item in current.get('cases', {}).items():
+        base = baseline.get('cases', {}).get(name)
+        if not base or not base.get('median_ms'):
+            continue
+        change = item['median_ms'] / base['median_ms'] - 1
+        print(f"{name:42s} {base['median_ms']:10.2f} -> {item['median_ms']:10.2f} ms  ({change:+.1%})")
+        if change > max_regression:
+            regressions.append({'case': name, 'baseline_ms': base['median_ms'], 'current_ms': item['median_ms'], 'change': round(change, 4)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-url', help='基准测试库地址，默认在临时目录新建 SQLite 库')
+    parser.add_argument('--symbols', type=int, default=20, help='币种数量（默认 20）')
+    parser.add_argument('--days', type=float, default=8, help='生成天数（默认 8）')
+    parser.add_argument('--exchanges', default=','.join(DEFAULT_EXCHANGES), help='逗号分隔的交易所')
+    parser.add_argument('--seed', type=int, default=None, help='数据生成种子')
+    parser.add_argument('--repeat', type=int, default=5, help='每个用例的计时次数（默认 5）')
+    parser.add_argument('--cases', default='', help='只运行这些用例，逗号分隔')
+    parser.add_argument('--skip-generate', action='store_true', help='复用 --db-url 中已生成的数据')
+    parser.add_argument('--output', help='结果 JSON 路径，默认 benchmarks/results/<时间>.json')
+    parser.add_argument('--baseline', help='与之对比的历史结果 JSON')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='median 变慢超过该比例时返回非零（默认 0.2）')
+    parser.add_argument('--fake-exchange', action='store_true', help='启动本地模拟交易所并计时 HTTP 修补用例')
+    parser.add_argument('--verbose', action='store_true', help='保留业务日志输出')
+    args = parser.parse_args(argv)
+
+    exchanges = tuple(item.strip() for item in args.exchanges.split(',') if item.strip())
+    tmp_dir = None
+    db_url = args.db_url
+    if not db_url:
+        if args.skip_generate:
+            parser.error('--skip-generate 需要同时指定 --db-url')
+        tmp_dir = tempfile.TemporaryDirectory(prefix='coinx-bench-')
+        db_url = f"sqlite:///{Path(tmp_dir.name) / 'bench.db'}"
+
+    seed = DEFAULT_SEED if args.seed is None else args.seed
+    symbols = benchmark_symbols(args.symbols)
+    fake_server = None
+    if args.fake_exchange:
+        from benchmarks.fake_exchange import FakeExchangeSettings, start_fake_exchange
+
+        fake_server = start_fake_exchange(FakeExchangeSettings(symbols=symbols, seed=seed, rate_limits={}))
+
+    engine = configure_environment(
+        db_url,
+        exchanges,
+        verbose=args.verbose,
+        base_urls=fake_server.base_urls() if fake_server else None,
+    )
+    from benchmarks import datagen
+
+    generation = None
+    if not args.skip_generate:
+        generation = datagen.generate_market_data(engine, symbols, exchanges=exchanges, days=args.days, seed=seed)
+        print(f"generated {generation['rows']} in {generation['duration_ms']:.0f} ms")
+    dataset = load_dataset_info(engine, symbols, exchanges, seed)
+    seed_symbol_support(symbols)
+    if fake_server is not None:
+        # 模拟交易所与计时用例使用同一个“当前时间”，修补范围与返回的 K 线一致
+        fake_server.fake.settings.now_ms = benchmark_now_ms(dataset)
+
+    selected = {item.strip() for item in args.cases.split(',') if item.strip()}
+    cases = run_cases(
+        build_cases(engine, symbols, exchanges, dataset, http_repair=fake_server is not None),
+        args.repeat,
+        selected,
+    )
+    report = {
+        'schema_version': RESULT_SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'database': engine.dialect.name,
+        'dataset': {
+            'symbols': len(symbols),
+            'exchanges': list(exchanges),
+            'days': args.days,
+            'bars_per_series': dataset['bars_per_series'],
+            'end_time': dataset['end_time'],
+            'seed': seed,
+            'rows': generation['rows'] if generation else None,
+        },
+        'repeat': args.repeat,
+        'cases': cases,
+    }
+    if fake_server is not None:
+        report['fake_exchange'] = fake_server.fake.stats()
+        from benchmarks.fake_exchange import stop_fake_exchange
+
+        stop_fake_exchange(fake_server)
+
+    output = Path(args.output) if args.output else DEFAULT_RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f'results written to {output}')
+
+    engine.dispose()
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare_results(baseline, report, args.max_regression)
+        if regressions:
+            print(f'{len(regressions)} case(s) regressed by more than {args.max_regression:.0%}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
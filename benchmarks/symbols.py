@@ -0,0 +1,12 @@
+"""基准测试与模拟交易所共用的币种列表与随机种子；不依赖 coinx，可以在设置环境变量之前导入。"""
+
+DEFAULT_SEED = 7
+BASE_SYMBOLS = ('BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'BNBUSDT', 'XRPUSDT', 'DOGEUSDT', 'ADAUSDT', 'AVAXUSDT')
+
+
+def benchmark_symbols(count):
+    """返回 count 个币种：先用常见主流币，不够时补 BENCH001USDT 这样的合成币种。"""
+    symbols = list(BASE_SYMBOLS[:count])
+    for index in range(len(symbols), count):
+        symbols.append(f'BENCH{index:03d}USDT')
+    return symbols
@@ -1,6 +1,6 @@
 """Create the notification tables without modifying existing CoinX tables."""
 
-from coinx.database import Base, engine
+from coinx.database import Base, engine, get_session
 from coinx.models import (
     AlertEvaluationRun,
     AlertRule,
@@ -8,7 +8,9 @@ from coinx.models import (
     AlertState,
     NotificationChannel,
     NotificationDelivery,
+    NotificationOutbox,
 )
+from coinx.notifications import ensure_alert_state_version
 
 
 TABLES = [
@@ -17,10 +19,16 @@ TABLES = [
     AlertRuleChannel.__table__,
     AlertState.__table__,
     NotificationDelivery.__table__,
+    NotificationOutbox.__table__,
     AlertEvaluationRun.__table__,
 ]
 
 
 if __name__ == '__main__':
     Base.metadata.create_all(bind=engine, tables=TABLES)
+    session = get_session()
+    try:
+        ensure_alert_state_version(session)
+    finally:
+        session.close()
     print('Notification tables are ready.')
@@ -0,0 +1,37 @@
+"""Pack historical market_tickers rows into market_ticker_snapshots.
+
+Safe to re-run: close_times that already have a compact snapshot are skipped,
+and rows are only pruned once their snapshot exists.
+"""
+
+import argparse
+
+from coinx.config import MARKET_TICKERS_KEEP_ROW_SNAPSHOTS
+from coinx.database import Base, engine
+from coinx.models import MarketTickerSnapshot
+from coinx.repositories.market_ticker_snapshots import (
+    MARKET_TICKER_MIGRATION_BATCH_SIZE,
+    migrate_market_tickers_to_snapshots,
+)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch-size', type=int, default=MARKET_TICKER_MIGRATION_BATCH_SIZE)
+    parser.add_argument(
+        '--keep-row-snapshots',
+        type=int,
+        default=MARKET_TICKERS_KEEP_ROW_SNAPSHOTS,
+        help='latest snapshots to keep in market_tickers after migration; 0 keeps every row',
+    )
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine, tables=[MarketTickerSnapshot.__table__])
+    summary = migrate_market_tickers_to_snapshots(
+        batch_size=args.batch_size,
+        keep_row_snapshots=args.keep_row_snapshots,
+    )
+    print(
+        f"Migrated {summary['snapshots']} snapshots ({summary['rows']} rows), "
+        f"pruned {summary['pruned_rows']} rows in {summary['duration_ms']}ms."
+    )
@@ -0,0 +1,133 @@
+"""Measure CoinX startup: import-time breakdown plus the cost of each startup phase.
+
+Runs `python -X importtime` in a fresh interpreter for the target module, then
+times the phases that happen before the web server can answer: importing the
+app, creating the database engine and restoring the warm-start snapshot.
+
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --module coinx.collector_main --top 40
+    python scripts/profile_startup.py --json > startup_profile.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+project_root = Path(__file__).parent.parent
+SRC_DIR = project_root / "src"
+
+PHASE_SCRIPT = r"""
+import json, time
+timings = {}
+started = time.perf_counter()
+import coinx.config
+timings['import_config_ms'] = (time.perf_counter() - started) * 1000
+mark = time.perf_counter()
+import %(module)s
+timings['import_module_ms'] = (time.perf_counter() - mark) * 1000
+from coinx import database
+timings['engine_created_at_import'] = database.is_engine_created()
+mark = time.perf_counter()
+database.get_engine()
+timings['create_engine_ms'] = (time.perf_counter() - mark) * 1000
+from coinx.warm_start import restore_warm_start_snapshot
+mark = time.perf_counter()
+timings['warm_start_sections'] = sorted(restore_warm_start_snapshot())
+timings['warm_start_restore_ms'] = (time.perf_counter() - mark) * 1000
+timings['total_ms'] = (time.perf_counter() - started) * 1000
+print('PHASES ' + json.dumps(timings))
+"""
+
+
+def _child_env():
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(SRC_DIR) + (os.pathsep + env["PYTHONPATH"] if env.get("PYTHONPATH") else "")
+    return env
+
+
+def _parse_line(line):
+    """Parse one `-X importtime` line into self/cumulative milliseconds and nesting depth."""
+    head, cumulative_us, name = line.split("|")
+    self_us = head.split(":", 1)[1]
+    depth = (len(name) - len(name.lstrip(" "))) // 2
+    return {
+        "module": name.strip(),
+        "self_ms": int(self_us) / 1000,
+        "cumulative_ms": int(cumulative_us) / 1000,
+        "depth": depth,
+    }
+
+
+def profile_imports(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=_child_env(),
+        cwd=str(project_root),
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            rows.append(_parse_line(line))
+    return rows
+
+
+def group_by_package(rows):
+    """Sum self time per top-level package (coinx subpackages are kept separate)."""
+    totals = {}
+    for row in rows:
+        parts = row["module"].split(".")
+        key = ".".join(parts[:2]) if parts[0] == "coinx" else parts[0]
+        totals[key] = totals.get(key, 0.0) + row["self_ms"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def profile_phases(module):
+    result = subprocess.run(
+        [sys.executable, "-c", PHASE_SCRIPT % {"module": module}],
+        capture_output=True,
+        text=True,
+        env=_child_env(),
+        cwd=str(project_root),
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("PHASES "):
+            return json.loads(line[len("PHASES "):])
+    raise RuntimeError(f"phase profiling failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="coinx.web.app", help="module to import (default: coinx.web.app)")
+    parser.add_argument("--top", type=int, default=25, help="rows to show per table")
+    parser.add_argument("--json", action="store_true", help="print the full profile as JSON")
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+    packages = group_by_package(rows)
+    phases = profile_phases(args.module)
+
+    if args.json:
+        print(json.dumps({"module": args.module, "phases": phases, "packages_ms": packages, "imports": rows}, indent=2))
+        return
+
+    print(f"Startup phases for {args.module}:")
+    for key, value in phases.items():
+        print(f"  {key:28s} {value:.1f}" if isinstance(value, float) else f"  {key:28s} {value}")
+
+    print(f"\nSelf time by package (top {args.top}):")
+    for name, self_ms in list(packages.items())[: args.top]:
+        print(f"  {self_ms:8.1f} ms  {name}")
+
+    print(f"\nSlowest imports by cumulative time (top {args.top}):")
+    for row in sorted(rows, key=lambda item: item["cumulative_ms"], reverse=True)[: args.top]:
+        print(f"  {row['cumulative_ms']:8.1f} ms  (self {row['self_ms']:7.1f})  {'  ' * row['depth']}{row['module']}")
+
+
+if __name__ == "__main__":
+    main()
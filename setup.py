@@ -36,6 +36,7 @@ setup(
     entry_points={
         'console_scripts': [
             'coinx=coinx.main:main',
+            'coinx-collector=coinx.collector_main:main',
         ],
     },
 )
@@ -22,6 +22,62 @@ CREATE TABLE IF NOT EXISTS coins (
     INDEX idx_coins_is_tracking (is_tracking)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='币种配置表';
 
+-- 跟踪币种集合版本号：修改 coins 后递增，各进程轮询该行判断是否需要重新加载
+CREATE TABLE IF NOT EXISTS coin_registry_versions (
+    name VARCHAR(50) PRIMARY KEY COMMENT '注册表名称',
+    version BIGINT NOT NULL DEFAULT 0 COMMENT '版本号',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='跟踪币种集合版本号';
+
+-- 采集节点心跳租约表（多节点分片）
+CREATE TABLE IF NOT EXISTS collector_nodes (
+    node_id VARCHAR(128) PRIMARY KEY COMMENT '采集节点标识',
+    hostname VARCHAR(255) NULL COMMENT '节点主机名',
+    started_at BIGINT NOT NULL COMMENT '节点启动时间戳（毫秒）',
+    heartbeat_at BIGINT NOT NULL COMMENT '最近一次心跳时间戳（毫秒）',
+    lease_expires_at BIGINT NOT NULL COMMENT '租约到期时间戳（毫秒），过期后移出分片',
+    KEY idx_collector_nodes_lease (lease_expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='采集节点心跳租约';
+
+-- 定时任务运行历史
+CREATE TABLE IF NOT EXISTS job_runs (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '自增ID',
+    job_id VARCHAR(64) NOT NULL COMMENT '任务ID',
+    node_id VARCHAR(128) NULL COMMENT '执行节点',
+    status VARCHAR(20) NOT NULL COMMENT '运行结果 success/partial/error',
+    started_at BIGINT NULL COMMENT '开始时间戳（毫秒）',
+    finished_at BIGINT NOT NULL COMMENT '结束时间戳（毫秒）',
+    duration_ms INT NULL COMMENT '总耗时（毫秒）',
+    breakdown_json JSON NULL COMMENT '耗时分类：stages 为整体，exchanges 为各交易所',
+    error_message VARCHAR(500) NULL COMMENT '错误信息',
+    KEY idx_job_runs_job_finished (job_id, finished_at),
+    KEY idx_job_runs_finished (finished_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='定时任务运行历史';
+
+-- Web 进程提交给采集进程执行的指令（PROCESS_ROLE=web）
+CREATE TABLE IF NOT EXISTS collector_commands (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '自增ID',
+    command VARCHAR(64) NOT NULL COMMENT '指令名称',
+    payload_json JSON NULL COMMENT '指令参数',
+    status VARCHAR(20) NOT NULL COMMENT '状态 pending/running/success/error',
+    created_at BIGINT NOT NULL COMMENT '提交时间戳（毫秒）',
+    claimed_by VARCHAR(128) NULL COMMENT '领取指令的采集节点',
+    started_at BIGINT NULL COMMENT '开始执行时间戳（毫秒）',
+    finished_at BIGINT NULL COMMENT '执行结束时间戳（毫秒）',
+    result_json JSON NULL COMMENT '执行结果摘要',
+    error_message VARCHAR(500) NULL COMMENT '错误信息',
+    KEY idx_collector_commands_status_created (status, created_at),
+    KEY idx_collector_commands_finished (finished_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='Web 进程提交给采集进程的指令';
+
+-- 采集进程发布的定时任务状态
+CREATE TABLE IF NOT EXISTS collector_job_states (
+    job_id VARCHAR(64) PRIMARY KEY COMMENT '任务ID，__collector__ 为采集进程自身状态',
+    node_id VARCHAR(128) NULL COMMENT '发布状态的采集节点',
+    state_json JSON NULL COMMENT '任务状态（下次运行时间、暂停、最近一次运行摘要）',
+    updated_at BIGINT NOT NULL COMMENT '发布时间戳（毫秒）'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='采集进程发布的定时任务状态';
+
 -- 市场数据快照表
 CREATE TABLE IF NOT EXISTS market_snapshots (
     id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '自增ID',
@@ -62,6 +118,17 @@ CREATE TABLE IF NOT EXISTS market_tickers (
     KEY idx_close_time (close_time)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='行情快照原始数据表';
 
+-- 行情快照列式压缩存储：每个快照一行，market_tickers 只保留最近几个快照供排行与通知查询
+CREATE TABLE IF NOT EXISTS market_ticker_snapshots (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    close_time BIGINT NOT NULL COMMENT '快照时间戳（毫秒）',
+    symbol_count INT NOT NULL COMMENT '快照内币种数量',
+    encoding VARCHAR(20) NOT NULL COMMENT 'payload 编码版本',
+    payload MEDIUMTEXT NOT NULL COMMENT '列式打包后压缩的快照数据',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_mts_close_time (close_time)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='行情快照列式压缩存储';
+
 -- 多交易所持仓量历史数据表
 CREATE TABLE IF NOT EXISTS market_open_interest_hist (
     id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '主键ID',
@@ -135,6 +202,43 @@ CREATE TABLE IF NOT EXISTS market_funding_rate (
     INDEX idx_symbol_time (symbol, event_time)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='资金费率历史';
 
+-- 各交易所最新资金费率缓存：资金费率任务整体刷新，评分与首页只读这里
+CREATE TABLE IF NOT EXISTS market_funding_rate_latest (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    exchange VARCHAR(20) NOT NULL COMMENT '交易所',
+    symbol VARCHAR(20) NOT NULL COMMENT '交易对名称',
+    funding_rate DECIMAL(20, 8) COMMENT '当前资金费率',
+    predicted_rate DECIMAL(20, 8) COMMENT '预测费率（下次结算）',
+    next_funding_time BIGINT COMMENT '下次结算时间戳（毫秒）',
+    mark_price DECIMAL(20, 8) COMMENT '标记价格',
+    event_time BIGINT COMMENT '交易所数据时间戳（毫秒）',
+    fetched_time BIGINT NOT NULL COMMENT '采集时间戳（毫秒）',
+    UNIQUE KEY uk_mfrl_exchange_symbol (exchange, symbol)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='各交易所最新资金费率缓存';
+
+-- 合约市场结构评分快照：每个 5m 锚点每个币种一行，完整明细保存在 report_json
+CREATE TABLE IF NOT EXISTS market_structure_scores (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '主键ID',
+    symbol VARCHAR(20) NOT NULL COMMENT '交易对名称',
+    anchor_time BIGINT NOT NULL COMMENT '评分锚点（5m K 线开盘时间，毫秒）',
+    rank_index INT DEFAULT NULL COMMENT '锚点内排名',
+    status VARCHAR(16) DEFAULT NULL COMMENT 'complete / partial',
+    total_score DECIMAL(12, 4) DEFAULT NULL COMMENT '总分',
+    trend_score DECIMAL(12, 4) DEFAULT NULL COMMENT '趋势分',
+    momentum_score DECIMAL(12, 4) DEFAULT NULL COMMENT '动能分',
+    position_score DECIMAL(12, 4) DEFAULT NULL COMMENT '持仓结构分',
+    sentiment_score DECIMAL(12, 4) DEFAULT NULL COMMENT '情绪分',
+    risk_score DECIMAL(12, 4) DEFAULT NULL COMMENT '风险分',
+    trade_signal VARCHAR(16) DEFAULT NULL COMMENT '交易信号',
+    risk_level VARCHAR(8) DEFAULT NULL COMMENT '风险等级',
+    current_price DECIMAL(30, 8) DEFAULT NULL COMMENT '加权价格',
+    current_open_interest_value DECIMAL(30, 8) DEFAULT NULL COMMENT '持仓价值合计',
+    report_json JSON NOT NULL COMMENT '完整评分明细（含各交易所评分与诊断）',
+    created_at DATETIME NULL COMMENT '创建时间',
+    UNIQUE KEY uk_mss_symbol_anchor_time (symbol, anchor_time),
+    KEY idx_mss_anchor_time (anchor_time)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='合约市场结构评分快照';
+
 -- 通知渠道：Apprise URL 仅保存为应用层 Fernet 密文。
 CREATE TABLE IF NOT EXISTS notification_channels (
     id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '主键ID',
@@ -183,6 +287,7 @@ CREATE TABLE IF NOT EXISTS alert_states (
     last_triggered_at BIGINT COMMENT '最近一次触发异常时间戳（毫秒）',
     last_notified_at BIGINT COMMENT '最近一次发送通知时间戳（毫秒）',
     last_recovered_at BIGINT COMMENT '最近一次恢复正常时间戳（毫秒）',
+    version INT NOT NULL DEFAULT 0 COMMENT '乐观锁版本号，每次状态写入加一',
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '状态更新时间',
     UNIQUE KEY uk_alert_state (rule_id, subject_key, dimension_key),
     KEY idx_alert_states_rule (rule_id)
@@ -205,6 +310,27 @@ CREATE TABLE IF NOT EXISTS notification_deliveries (
     KEY idx_notification_deliveries_sent_at (sent_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='通知发送记录';
 
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '主键ID',
+    rule_id BIGINT NULL COMMENT '关联告警规则ID',
+    channel_id BIGINT NOT NULL COMMENT '目标通知渠道ID',
+    event_key VARCHAR(255) NOT NULL COMMENT '投递事件幂等标识',
+    event_status VARCHAR(20) NOT NULL COMMENT '事件状态，例如 triggered、recovered、summary',
+    payload_json JSON NOT NULL COMMENT '待发送消息内容与上下文',
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' COMMENT '队列状态：pending 或 sending',
+    attempts INT NOT NULL DEFAULT 0 COMMENT '已尝试发送次数',
+    next_attempt_at BIGINT NOT NULL COMMENT '下次可发送时间戳（毫秒）',
+    claim_token VARCHAR(40) NULL COMMENT '发送线程认领标识',
+    locked_until BIGINT NULL COMMENT '认领过期时间戳（毫秒），过期后可被重新认领',
+    last_error VARCHAR(500) NULL COMMENT '最近一次发送失败原因',
+    created_at BIGINT NOT NULL COMMENT '入队时间戳（毫秒）',
+    KEY idx_notification_outbox_rule (rule_id),
+    KEY idx_notification_outbox_channel (channel_id),
+    KEY idx_notification_outbox_status (status),
+    KEY idx_notification_outbox_next_attempt (next_attempt_at),
+    KEY idx_notification_outbox_claim (claim_token)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='通知待发送队列';
+
 CREATE TABLE IF NOT EXISTS alert_evaluation_runs (
     id BIGINT AUTO_INCREMENT PRIMARY KEY COMMENT '主键ID',
     rule_id BIGINT NOT NULL COMMENT '被评估的告警规则ID',
@@ -27,6 +27,68 @@ CREATE TABLE IF NOT EXISTS coins (
 DISTRIBUTED BY HASH(symbol) BUCKETS 1
 PROPERTIES ("replication_num" = "1");
 
+-- 跟踪币种集合版本号
+CREATE TABLE IF NOT EXISTS coin_registry_versions (
+    name VARCHAR(50) NOT NULL COMMENT '注册表名称',
+    version BIGINT NOT NULL DEFAULT '0' COMMENT '版本号',
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '更新时间'
+) PRIMARY KEY (name)
+DISTRIBUTED BY HASH(name) BUCKETS 1
+PROPERTIES ("replication_num" = "1");
+
+-- Web 进程提交给采集进程执行的指令（PROCESS_ROLE=web）
+CREATE TABLE IF NOT EXISTS collector_commands (
+    id BIGINT NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    command VARCHAR(64) NOT NULL COMMENT '指令名称',
+    payload_json JSON COMMENT '指令参数',
+    status VARCHAR(20) NOT NULL COMMENT '状态 pending/running/success/error',
+    created_at BIGINT NOT NULL COMMENT '提交时间戳（毫秒）',
+    claimed_by VARCHAR(128) COMMENT '领取指令的采集节点',
+    started_at BIGINT COMMENT '开始执行时间戳（毫秒）',
+    finished_at BIGINT COMMENT '执行结束时间戳（毫秒）',
+    result_json JSON COMMENT '执行结果摘要',
+    error_message VARCHAR(500) COMMENT '错误信息'
+) PRIMARY KEY (id)
+DISTRIBUTED BY HASH(id) BUCKETS 1
+PROPERTIES ("replication_num" = "1");
+
+-- 采集节点心跳租约（CLUSTER_ENABLED 时按存活节点分片；StarRocks 不支持 GET_LOCK，各节点都会执行全部任务）
+CREATE TABLE IF NOT EXISTS collector_nodes (
+    node_id VARCHAR(128) NOT NULL COMMENT '采集节点标识',
+    hostname VARCHAR(255) COMMENT '节点主机名',
+    started_at BIGINT NOT NULL COMMENT '节点启动时间戳（毫秒）',
+    heartbeat_at BIGINT NOT NULL COMMENT '最近一次心跳时间戳（毫秒）',
+    lease_expires_at BIGINT NOT NULL COMMENT '租约到期时间戳（毫秒），过期后移出分片'
+) PRIMARY KEY (node_id)
+DISTRIBUTED BY HASH(node_id) BUCKETS 1
+PROPERTIES ("replication_num" = "1");
+
+-- 定时任务运行历史（主键模型，按结束时间排序便于窗口统计与过期清理）
+CREATE TABLE IF NOT EXISTS job_runs (
+    id BIGINT NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    job_id VARCHAR(64) NOT NULL COMMENT '任务ID',
+    node_id VARCHAR(128) COMMENT '执行节点',
+    status VARCHAR(20) NOT NULL COMMENT '运行结果 success/partial/error',
+    started_at BIGINT COMMENT '开始时间戳（毫秒）',
+    finished_at BIGINT NOT NULL COMMENT '结束时间戳（毫秒）',
+    duration_ms INT COMMENT '总耗时（毫秒）',
+    breakdown_json JSON COMMENT '耗时分类：stages 为整体，exchanges 为各交易所',
+    error_message VARCHAR(500) COMMENT '错误信息'
+) PRIMARY KEY (id)
+DISTRIBUTED BY HASH(id) BUCKETS 1
+ORDER BY (finished_at, job_id)
+PROPERTIES ("replication_num" = "1");
+
+-- 采集进程发布的定时任务状态
+CREATE TABLE IF NOT EXISTS collector_job_states (
+    job_id VARCHAR(64) NOT NULL COMMENT '任务ID，__collector__ 为采集进程自身状态',
+    node_id VARCHAR(128) COMMENT '发布状态的采集节点',
+    state_json JSON COMMENT '任务状态（下次运行时间、暂停、最近一次运行摘要）',
+    updated_at BIGINT NOT NULL COMMENT '发布时间戳（毫秒）'
+) PRIMARY KEY (job_id)
+DISTRIBUTED BY HASH(job_id) BUCKETS 1
+PROPERTIES ("replication_num" = "1");
+
 -- 市场数据快照表（DUPLICATE KEY 模型，支持按 symbol 分布）
 CREATE TABLE IF NOT EXISTS market_snapshots (
     snapshot_time BIGINT NOT NULL COMMENT '快照时间戳，毫秒',
@@ -64,6 +126,17 @@ CREATE TABLE IF NOT EXISTS market_tickers (
 DISTRIBUTED BY HASH(symbol) BUCKETS 4
 PROPERTIES ("replication_num" = "1");
 
+-- 行情快照列式压缩存储（KEY 列必须在最前面）
+CREATE TABLE IF NOT EXISTS market_ticker_snapshots (
+    close_time BIGINT NOT NULL COMMENT '快照时间戳（毫秒）',
+    symbol_count INT NOT NULL COMMENT '快照内币种数量',
+    encoding VARCHAR(20) NOT NULL COMMENT 'payload 编码版本',
+    payload STRING NOT NULL COMMENT '列式打包后压缩的快照数据',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) PRIMARY KEY (close_time)
+DISTRIBUTED BY HASH(close_time) BUCKETS 4
+PROPERTIES ("replication_num" = "1");
+
 -- 多交易所持仓量历史数据表（KEY 列必须在最前面）
 CREATE TABLE IF NOT EXISTS market_open_interest_hist (
     exchange VARCHAR(20) NOT NULL COMMENT '交易所标识，例如 binance、okx',
@@ -130,3 +203,39 @@ CREATE TABLE IF NOT EXISTS market_funding_rate (
 ) PRIMARY KEY (symbol, period, event_time)
 DISTRIBUTED BY HASH(symbol) BUCKETS 4
 PROPERTIES ("replication_num" = "1");
+
+-- 各交易所最新资金费率缓存（KEY 列必须在最前面）
+CREATE TABLE IF NOT EXISTS market_funding_rate_latest (
+    exchange VARCHAR(20) NOT NULL COMMENT '交易所',
+    symbol VARCHAR(20) NOT NULL COMMENT '交易对名称',
+    funding_rate DECIMAL(20, 8) COMMENT '当前资金费率',
+    predicted_rate DECIMAL(20, 8) COMMENT '预测费率（下次结算）',
+    next_funding_time BIGINT COMMENT '下次结算时间戳（毫秒）',
+    mark_price DECIMAL(20, 8) COMMENT '标记价格',
+    event_time BIGINT COMMENT '交易所数据时间戳（毫秒）',
+    fetched_time BIGINT NOT NULL COMMENT '采集时间戳（毫秒）'
+) PRIMARY KEY (exchange, symbol)
+DISTRIBUTED BY HASH(symbol) BUCKETS 4
+PROPERTIES ("replication_num" = "1");
+
+-- 合约市场结构评分快照（KEY 列必须在最前面）
+CREATE TABLE IF NOT EXISTS market_structure_scores (
+    symbol VARCHAR(20) NOT NULL COMMENT '交易对名称',
+    anchor_time BIGINT NOT NULL COMMENT '评分锚点（5m K 线开盘时间，毫秒）',
+    rank_index INT COMMENT '锚点内排名',
+    status VARCHAR(16) COMMENT 'complete / partial',
+    total_score DECIMAL(12, 4) COMMENT '总分',
+    trend_score DECIMAL(12, 4) COMMENT '趋势分',
+    momentum_score DECIMAL(12, 4) COMMENT '动能分',
+    position_score DECIMAL(12, 4) COMMENT '持仓结构分',
+    sentiment_score DECIMAL(12, 4) COMMENT '情绪分',
+    risk_score DECIMAL(12, 4) COMMENT '风险分',
+    trade_signal VARCHAR(16) COMMENT '交易信号',
+    risk_level VARCHAR(8) COMMENT '风险等级',
+    current_price DECIMAL(30, 8) COMMENT '加权价格',
+    current_open_interest_value DECIMAL(30, 8) COMMENT '持仓价值合计',
+    report_json JSON COMMENT '完整评分明细（含各交易所评分与诊断）',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间'
+) PRIMARY KEY (symbol, anchor_time)
+DISTRIBUTED BY HASH(symbol) BUCKETS 4
+PROPERTIES ("replication_num" = "1");
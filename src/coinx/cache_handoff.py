@@ -0,0 +1,95 @@
+"""采集进程与 Web 进程之间的缓存交接。
+
+独立运行采集进程（coinx-collector）时，写入新数据的是采集进程，Web 进程内存中的快照
+只能靠定时回查数据库发现变化。采集进程发布新快照后把各缓存的版本号写入共享文件
+CACHE_HANDOFF_FILE（写临时文件后原子替换），Web 进程读取内存快照前对比文件中的版本号，
+版本变化即跳过回查间隔、立即从数据库重新加载。
+
+同进程运行（PROCESS_ROLE=all）时采集与 Web 共用内存，不读写该文件。
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from coinx import config
+from coinx.utils import logger
+
+
+PROCESS_ROLE_ALL = 'all'
+PROCESS_ROLE_WEB = 'web'
+PROCESS_ROLE_COLLECTOR = 'collector'
+
+CACHE_HANDOFF_LOCK = threading.Lock()
+_PUBLISHED_VERSIONS = {}
+_READ_STATE = {'path': None, 'mtime_ns': None, 'versions': {}}
+
+
+def _handoff_path():
+    return config.CACHE_HANDOFF_FILE
+
+
+def _write_versions(path, versions):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.cache_handoff.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump({'pid': os.getpid(), 'versions': versions}, fh)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def publish_cache_version(name, version=None):
+    """采集进程发布缓存新版本；非采集进程直接返回 None。"""
+    if config.PROCESS_ROLE != PROCESS_ROLE_COLLECTOR:
+        return None
+    version = int(version if version is not None else time.time() * 1000)
+    with CACHE_HANDOFF_LOCK:
+        # 同一时间戳内的多次发布也要让 Web 进程看到变化
+        previous = _PUBLISHED_VERSIONS.get(name)
+        if previous is not None and version <= previous:
+            version = previous + 1
+        _PUBLISHED_VERSIONS[name] = version
+        try:
+            _write_versions(_handoff_path(), dict(_PUBLISHED_VERSIONS))
+        except Exception as exc:
+            logger.warning('缓存交接文件写入失败: cache=%s error=%s', name, exc)
+    return version
+
+
+def get_cache_version(name):
+    """Web 进程读取采集进程发布的缓存版本；文件不存在或非 Web 进程返回 None。
+
+    只在文件修改时间变化时重新解析，平时每次调用只有一次 stat。
+    """
+    if config.PROCESS_ROLE != PROCESS_ROLE_WEB:
+        return None
+    path = _handoff_path()
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with CACHE_HANDOFF_LOCK:
+        if _READ_STATE['path'] != path or _READ_STATE['mtime_ns'] != mtime_ns:
+            try:
+                with open(path, encoding='utf-8') as fh:
+                    versions = json.load(fh).get('versions') or {}
+            except (OSError, ValueError) as exc:
+                logger.warning('缓存交接文件读取失败: %s', exc)
+                return _READ_STATE['versions'].get(name)
+            _READ_STATE.update(path=path, mtime_ns=mtime_ns, versions=versions)
+        return _READ_STATE['versions'].get(name)
+
+
+def reset_cache_handoff():
+    with CACHE_HANDOFF_LOCK:
+        _PUBLISHED_VERSIONS.clear()
+        _READ_STATE.update(path=None, mtime_ns=None, versions={})
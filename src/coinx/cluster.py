@@ -0,0 +1,274 @@
+"""多节点采集协调：按任务选主与按币种分片。
+
+- 选主：每个定时任务对应一个 MySQL 命名锁（GET_LOCK），由本节点一个常驻连接持有，
+  持有者即该任务的 leader；节点宕机时连接断开、锁自动释放，其他节点下一轮接手。
+- 分片：节点定期在 collector_nodes 续期心跳租约。开启 CLUSTER_SHARDING_ENABLED 后，
+  修补任务在所有节点上运行，按存活节点构成的一致性哈希环只处理本节点负责的币种；
+  某节点租约过期后，它负责的币种落到环上的相邻节点，其余币种归属不变。
+
+未开启 CLUSTER_ENABLED 或数据库不是 MySQL（单机 SQLite）时，本节点总是 leader 且负责全部币种。
+数据库不支持命名锁（StarRocks，或 GET_LOCK 执行报错而连接本身正常）时同样退回为 leader：
+各节点都会执行全部任务，重复采集好过所有节点都跳过。
+"""
+import bisect
+import hashlib
+import os
+import socket
+import threading
+import time
+
+from sqlalchemy import text
+
+from coinx import config
+from coinx.database import get_session
+from coinx.models import CollectorNode
+from coinx.utils import logger
+
+
+CLUSTER_HASH_VNODES = 64
+CLUSTER_JOB_LOCK_PREFIX = 'coinx:job:'
+
+CLUSTER_LOCK = threading.Lock()
+_CLUSTER_STATE = {
+    'node_id': None,
+    'started_at': None,
+    'heartbeat_at': 0,
+    'table_ready': False,
+    'connection': None,
+    'held_jobs': set(),
+    'locking_unsupported': None,
+}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def get_node_id():
+    """本节点标识：CLUSTER_NODE_ID，未配置时为 主机名-进程号。"""
+    with CLUSTER_LOCK:
+        if _CLUSTER_STATE['node_id'] is None:
+            _CLUSTER_STATE['node_id'] = config.CLUSTER_NODE_ID or f'{socket.gethostname()}-{os.getpid()}'
+            _CLUSTER_STATE['started_at'] = _now_ms()
+        return _CLUSTER_STATE['node_id']
+
+
+def _hash(value):
+    # 内置 hash() 每个进程随机化，各节点必须得到相同的环
+    return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+
+def build_hash_ring(node_ids, vnodes=CLUSTER_HASH_VNODES):
+    """返回按哈希值排序的 [(point, node_id), ...]，每个节点放置 vnodes 个虚拟节点。"""
+    return sorted(
+        (_hash(f'{node_id}#{replica}'), node_id)
+        for node_id in set(node_ids)
+        for replica in range(vnodes)
+    )
+
+
+def ring_owner(ring, key):
+    """顺时针找到第一个不小于 key 哈希值的虚拟节点。"""
+    if not ring:
+        return None
+    index = bisect.bisect_left(ring, (_hash(key), ''))
+    return ring[index % len(ring)][1]
+
+
+def select_shard(symbols, node_ids, node_id):
+    """从 symbols 中挑出一致性哈希环上归属 node_id 的币种，保持原有顺序。"""
+    ring = build_hash_ring(node_ids)
+    return [symbol for symbol in symbols if ring_owner(ring, symbol) == node_id]
+
+
+def _ensure_table(db):
+    if _CLUSTER_STATE['table_ready']:
+        return
+    CollectorNode.__table__.create(bind=db.get_bind(), checkfirst=True)
+    _CLUSTER_STATE['table_ready'] = True
+
+
+def heartbeat(session=None, force=False):
+    """续期本节点租约；距上次续期不足租约的 1/3 时跳过。"""
+    if not config.CLUSTER_ENABLED:
+        return None
+    node_id = get_node_id()
+    now = _now_ms()
+    lease_ms = max(1, int(config.CLUSTER_LEASE_SECONDS)) * 1000
+    if not force and now - _CLUSTER_STATE['heartbeat_at'] < lease_ms // 3:
+        return None
+
+    own_session = session is None
+    db = session or get_session()
+    try:
+        _ensure_table(db)
+        updated = db.query(CollectorNode).filter(CollectorNode.node_id == node_id).update({
+            'heartbeat_at': now,
+            'lease_expires_at': now + lease_ms,
+        }, synchronize_session=False)
+        if not updated:
+            db.add(CollectorNode(
+                node_id=node_id,
+                hostname=socket.gethostname(),
+                started_at=_CLUSTER_STATE['started_at'] or now,
+                heartbeat_at=now,
+                lease_expires_at=now + lease_ms,
+            ))
+        db.commit()
+        _CLUSTER_STATE['heartbeat_at'] = now
+        return now
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def live_node_ids(session=None, now_ms=None):
+    """租约未过期的节点（始终包含本节点），按 node_id 排序。"""
+    own_session = session is None
+    db = session or get_session()
+    try:
+        heartbeat(session=db)
+        now = _now_ms() if now_ms is None else now_ms
+        rows = db.query(CollectorNode.node_id).filter(CollectorNode.lease_expires_at >= now).all()
+        return sorted({row.node_id for row in rows} | {get_node_id()})
+    finally:
+        if own_session:
+            db.close()
+
+
+def shard_symbols(symbols, session=None):
+    """返回本节点负责的币种；未开启分片时原样返回。
+
+    读取存活节点失败时退回全部币种：重复采集好过漏采。
+    """
+    symbols = list(symbols or [])
+    if not (config.CLUSTER_ENABLED and config.CLUSTER_SHARDING_ENABLED) or not symbols:
+        return symbols
+    try:
+        node_ids = live_node_ids(session=session)
+    except Exception as exc:
+        logger.warning('读取采集节点失败，本轮处理全部币种: %s', exc)
+        return symbols
+    shard = select_shard(symbols, node_ids, get_node_id())
+    logger.info('币种分片: node=%s nodes=%d symbols=%d/%d', get_node_id(), len(node_ids), len(shard), len(symbols))
+    return shard
+
+
+def _leader_connection_locked(db):
+    connection = _CLUSTER_STATE['connection']
+    if connection is not None:
+        try:
+            connection.execute(text('SELECT 1'))
+            return connection
+        except Exception:
+            logger.warning('选主连接已断开，已持有的任务锁全部失效')
+            try:
+                connection.close()
+            except Exception:
+                pass
+            _CLUSTER_STATE['held_jobs'].clear()
+    connection = db.get_bind().connect()
+    _CLUSTER_STATE['connection'] = connection
+    return connection
+
+
+def _mark_locking_unsupported_locked(reason):
+    if _CLUSTER_STATE['locking_unsupported'] is None:
+        logger.error('数据库不支持任务命名锁，CLUSTER_ENABLED 的选主退回为每个节点都执行全部任务: %s', reason)
+    _CLUSTER_STATE['locking_unsupported'] = reason
+
+
+def _connection_alive(connection):
+    try:
+        connection.rollback()
+        connection.execute(text('SELECT 1'))
+        return True
+    except Exception:
+        return False
+
+
+def is_job_leader(job_id, session=None):
+    """本节点是否是 job_id 的 leader；已持有锁时确认仍由本连接持有，否则尝试抢锁。
+
+    数据库不支持命名锁时返回 True（见模块说明）；只有连接本身不可用时才返回 False、本轮跳过。
+    """
+    if not config.CLUSTER_ENABLED:
+        return True
+    own_session = session is None
+    db = session or get_session()
+    try:
+        if db.get_bind().dialect.name != 'mysql':
+            return True
+        name = f'{CLUSTER_JOB_LOCK_PREFIX}{job_id}'
+        node_id = get_node_id()
+        with CLUSTER_LOCK:
+            if config.DB_TYPE == 'starrocks':
+                _mark_locking_unsupported_locked('DB_TYPE=starrocks')
+            if _CLUSTER_STATE['locking_unsupported'] is not None:
+                return True
+            connection = _leader_connection_locked(db)
+            held_jobs = _CLUSTER_STATE['held_jobs']
+            try:
+                if job_id in held_jobs:
+                    if connection.execute(
+                        text('SELECT IS_USED_LOCK(:name) = CONNECTION_ID()'), {'name': name},
+                    ).scalar() == 1:
+                        return True
+                    held_jobs.discard(job_id)
+                acquired = connection.execute(text('SELECT GET_LOCK(:name, 0)'), {'name': name}).scalar() == 1
+            except Exception as exc:
+                if not _connection_alive(connection):
+                    raise
+                _mark_locking_unsupported_locked(exc)
+                return True
+            if acquired:
+                held_jobs.add(job_id)
+                logger.info('本节点成为任务 leader: job=%s node=%s', job_id, node_id)
+            return acquired
+    except Exception as exc:
+        logger.warning('任务选主失败（数据库连接不可用），本轮跳过: job=%s error=%s', job_id, exc)
+        return False
+    finally:
+        if own_session:
+            db.close()
+
+
+def leave_cluster(session=None):
+    """退出前释放任务锁并删除心跳，其他节点立即接手任务与币种。"""
+    if not config.CLUSTER_ENABLED:
+        return
+    with CLUSTER_LOCK:
+        connection = _CLUSTER_STATE['connection']
+        _CLUSTER_STATE['connection'] = None
+        _CLUSTER_STATE['held_jobs'].clear()
+    if connection is not None:
+        try:
+            connection.execute(text('SELECT RELEASE_ALL_LOCKS()'))
+        except Exception as exc:
+            logger.warning('释放任务锁失败: %s', exc)
+        finally:
+            connection.close()
+
+    own_session = session is None
+    db = session or get_session()
+    try:
+        db.query(CollectorNode).filter(CollectorNode.node_id == get_node_id()).delete(synchronize_session=False)
+        db.commit()
+        logger.info('采集节点已退出集群: node=%s', get_node_id())
+    except Exception as exc:
+        db.rollback()
+        logger.warning('删除采集节点心跳失败: %s', exc)
+    finally:
+        if own_session:
+            db.close()
+
+
+def reset_cluster_state():
+    with CLUSTER_LOCK:
+        _CLUSTER_STATE.update(
+            node_id=None, started_at=None, heartbeat_at=0, table_ready=False, connection=None, locking_unsupported=None,
+        )
+        _CLUSTER_STATE['held_jobs'].clear()
@@ -1,6 +1,8 @@
 import sys
 import os
 import json
+import threading
+import time
 from datetime import datetime
 from sqlalchemy import text
 
@@ -12,9 +14,9 @@ sys.path.insert(0, project_root)
 sys.path.insert(0, os.path.join(project_root, 'src'))
 
 from coinx.utils import logger
-from coinx.database import db_session, init_db
-from coinx.models import Coin
-from coinx.config import DB_TYPE, DATA_DIR, TIME_INTERVALS
+from coinx.database import db_session, get_engine, init_db
+from coinx.models import Coin, CoinRegistryVersion
+from coinx.config import COIN_REGISTRY_RECHECK_SECONDS, DB_TYPE, DATA_DIR, TIME_INTERVALS
 
 
 def _is_mysql_compatible():
@@ -22,20 +24,24 @@ def _is_mysql_compatible():
     return DB_TYPE in ('mysql', 'starrocks')
 
 
-def _raw_upsert_coin(session, values):
+def _raw_upsert(session, table_name, key_column, values):
     """MySQL: INSERT ... ON DUPLICATE KEY UPDATE; StarRocks: INSERT（主键自动覆盖）"""
     columns = list(values.keys())
     placeholders = ', '.join(':{}'.format(col) for col in columns)
     if DB_TYPE == 'starrocks':
-        sql = 'INSERT INTO coins ({}) VALUES ({})'.format(', '.join(columns), placeholders)
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(table_name, ', '.join(columns), placeholders)
     else:
-        update_clause = ', '.join('{} = VALUES({})'.format(col, col) for col in columns if col != 'symbol')
-        sql = 'INSERT INTO coins ({}) VALUES ({}) ON DUPLICATE KEY UPDATE {}'.format(
-            ', '.join(columns), placeholders, update_clause
+        update_clause = ', '.join('{} = VALUES({})'.format(col, col) for col in columns if col != key_column)
+        sql = 'INSERT INTO {} ({}) VALUES ({}) ON DUPLICATE KEY UPDATE {}'.format(
+            table_name, ', '.join(columns), placeholders, update_clause
         )
     session.execute(text(sql), values)
 
 
+def _raw_upsert_coin(session, values):
+    _raw_upsert(session, 'coins', 'symbol', values)
+
+
 # 币种配置文件路径
 COINS_CONFIG_FILE = os.path.join(DATA_DIR, 'coins_config.json')
 DEFAULT_TRACKED_COINS = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT']
@@ -110,6 +116,7 @@ def save_coins_config_dict(coins_dict):
                     db_session.add(Coin(symbol=symbol, is_tracking=tracked))
 
         db_session.commit()
+        _publish_coin_registry_change()
         logger.info(f"币种配置已保存到数据库: {len(coins_dict)} 个币种")
 
     except Exception as e:
@@ -218,6 +225,7 @@ def update_coins_config():
                         db_session.add(Coin(**values))
             
             db_session.commit()
+            _publish_coin_registry_change()
             
             if count > 0:
                 logger.info(f"添加了 {count} 个新币种")
@@ -228,19 +236,102 @@ def update_coins_config():
         logger.error(f"更新币种配置失败: {e}")
         return False
 
+# 跟踪币种注册表：进程内缓存启用跟踪的币种元组，任一进程修改 coins 后递增
+# coin_registry_versions 中的版本号，其他进程轮询版本号发现变化后重新加载。
+COIN_REGISTRY_NAME = 'tracked_coins'
+# 加载过程中可能回调 add_coin 引导默认币种，需要可重入锁
+COIN_REGISTRY_LOCK = threading.RLock()
+_COIN_REGISTRY_STATE = {'coins': None, 'version': None, 'checked_at': 0.0}
+
+
+def _read_coin_registry_version():
+    """用独立连接读取版本号，避免在长生命周期会话的事务快照里读到旧值"""
+    with get_engine().connect() as conn:
+        return conn.execute(
+            CoinRegistryVersion.__table__.select()
+            .with_only_columns(CoinRegistryVersion.version)
+            .where(CoinRegistryVersion.name == COIN_REGISTRY_NAME)
+        ).scalar()
+
+
+def _publish_coin_registry_change():
+    """币种修改提交后递增版本号并清空本进程缓存；版本号写入失败不影响已提交的修改"""
+    try:
+        values = {
+            'name': COIN_REGISTRY_NAME,
+            'version': time.time_ns() // 1000,
+            'updated_at': datetime.now(),
+        }
+        if _is_mysql_compatible():
+            _raw_upsert(db_session, 'coin_registry_versions', 'name', values)
+        else:
+            db_session.merge(CoinRegistryVersion(**values))
+        db_session.commit()
+    except Exception as e:
+        db_session.rollback()
+        logger.warning(f"更新跟踪币种版本号失败，其他进程将按轮询间隔重新加载: {e}")
+    finally:
+        invalidate_coin_registry()
+
+
+def invalidate_coin_registry():
+    """清空本进程的跟踪币种缓存，下次读取时重新加载"""
+    with COIN_REGISTRY_LOCK:
+        _COIN_REGISTRY_STATE.update(coins=None, version=None, checked_at=0.0)
+
+
+def get_tracked_coins():
+    """
+    获取启用跟踪的币种元组（不可变，可直接共享）
+    首次调用从数据库加载；之后最多每 COIN_REGISTRY_RECHECK_SECONDS 秒读取一次版本号，
+    版本号变化（或无法确定版本号）时才重新加载。
+    """
+    now = time.monotonic()
+    with COIN_REGISTRY_LOCK:
+        coins = _COIN_REGISTRY_STATE['coins']
+        if coins is not None and now - _COIN_REGISTRY_STATE['checked_at'] < COIN_REGISTRY_RECHECK_SECONDS:
+            return coins
+
+        try:
+            version = _read_coin_registry_version()
+        except Exception as e:
+            logger.debug(f"读取跟踪币种版本号失败: {e}")
+            version = None
+
+        if coins is not None and version is not None and version == _COIN_REGISTRY_STATE['version']:
+            _COIN_REGISTRY_STATE['checked_at'] = now
+            return coins
+
+        loaded = load_coins_config()
+        coins = tuple(loaded)
+        # 默认币种是加载失败或无跟踪币种时的回退值，不绑定版本号，下次轮询重新加载
+        _COIN_REGISTRY_STATE.update(
+            coins=coins,
+            version=None if loaded is DEFAULT_TRACKED_COINS else version,
+            checked_at=now,
+        )
+        return coins
+
+
+def get_coin_registry_version():
+    """当前缓存的跟踪币种版本号，可作为依赖币种集合的缓存键的一部分"""
+    get_tracked_coins()
+    with COIN_REGISTRY_LOCK:
+        return _COIN_REGISTRY_STATE['version']
+
+
 def get_active_coins(filter_symbols=None):
     """
     获取活跃的币种列表（启用跟踪的币种）
     :param filter_symbols: 可选的筛选币种列表
-    :return: 币种列表
+    :return: 币种元组（不可变）
     """
-    # 加载启用跟踪的币种配置
-    tracked_coins = load_coins_config()
+    tracked_coins = get_tracked_coins()
     
     # 如果提供了筛选列表，则只返回筛选后的币种
     if filter_symbols:
-        filtered_coins = [coin for coin in tracked_coins if coin in filter_symbols]
-        return filtered_coins
+        filter_set = set(filter_symbols)
+        return tuple(coin for coin in tracked_coins if coin in filter_set)
     
     return tracked_coins
 
@@ -283,6 +374,7 @@ def set_coin_tracking(symbol, tracked):
                 db_session.add(Coin(symbol=symbol, is_tracking=tracked))
 
         db_session.commit()
+        _publish_coin_registry_change()
         
         logger.info(f"币种 {symbol} 跟踪状态已更新为: {tracked}")
         return True
@@ -308,6 +400,7 @@ def remove_coin(symbol):
     try:
         db_session.query(Coin).filter(Coin.symbol == symbol).delete()
         db_session.commit()
+        _publish_coin_registry_change()
         logger.info(f"币种 {symbol} 已从配置中移除")
         return True
     except Exception as e:
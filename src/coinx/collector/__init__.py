@@ -35,6 +35,7 @@ from coinx.collector.binance.series import (
 from coinx.collector.exchange_repair import (
     repair_history_symbols,
     repair_rolling_symbols,
+    repair_rolling_symbols_to_anchor,
 )
 
 
@@ -84,8 +85,23 @@ def repair_rolling_tracked_symbols(
     http_session=None,
     db_session=None,
     exchanges=None,
+    align_to_bar_close=False,
 ):
-    """Repair a rolling 5m window for enabled exchanges."""
+    """Repair a rolling 5m window for enabled exchanges.
+
+    With ``align_to_bar_close`` the run waits for each exchange's publication
+    lag after the latest bar close and retries only series still missing it.
+    """
+    if align_to_bar_close:
+        return repair_rolling_symbols_to_anchor(
+            symbols=symbols,
+            series_types=series_types,
+            exchanges=exchanges,
+            points=points,
+            max_workers=max_workers,
+            http_session=http_session,
+            db_session=db_session,
+        )
     return repair_rolling_symbols(
         symbols=symbols,
         series_types=series_types,
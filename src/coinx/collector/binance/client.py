@@ -1,14 +1,25 @@
 import time
+from urllib.parse import urlsplit
 
 import requests
 
 from coinx.collector.rate_limit import (
     RateLimitRegistry,
     RateLimitUnavailable,
+    exchange_budget,
     parse_retry_after_seconds,
     record_rate_limit_wait_seconds,
 )
-from coinx.config import HTTPS_PROXY_URL, PROXY_URL, USE_PROXY
+from coinx.config import (
+    BINANCE_BASE_URL,
+    BYBIT_BASE_URL,
+    GATE_BASE_URL,
+    HTTPS_PROXY_URL,
+    OKX_BASE_URL,
+    PROXY_URL,
+    USE_PROXY,
+)
+from coinx.metrics import inc_counter, observe
 from coinx.utils import logger
 
 
@@ -79,17 +90,41 @@ def _session_proxy_summary(session):
     return https_proxy or http_proxy or 'direct'
 
 
+_EXCHANGE_BASE_URLS = (
+    ('binance', BINANCE_BASE_URL),
+    ('okx', OKX_BASE_URL),
+    ('bybit', BYBIT_BASE_URL),
+    ('gate', GATE_BASE_URL),
+)
+
+
+def _request_metric_labels(url):
+    # 各交易所可能共用同一个反代域名，按完整的 base url 前缀区分；路径里不含币种，基数可控
+    for exchange, base_url in _EXCHANGE_BASE_URLS:
+        if base_url and url.startswith(base_url):
+            return exchange, urlsplit(url[len(base_url):]).path or '/'
+    return 'other', urlsplit(url).path or '/'
+
+
+def _record_request_metrics(url, status, started_at):
+    exchange, endpoint = _request_metric_labels(url)
+    inc_counter('coinx_exchange_requests_total', exchange=exchange, endpoint=endpoint, status=status)
+    observe('coinx_exchange_request_duration_seconds', time.perf_counter() - started_at, exchange=exchange, endpoint=endpoint)
+
+
 def request_with_retry(session, url, params=None, timeout=10, max_retries=3, base_delay=0.5, headers=None):
     """Perform GET requests with bounded retry only."""
     attempt = 0
     request_headers = _merge_request_headers(session, headers)
 
     while True:
+        started_at = time.perf_counter()
         try:
             request_kwargs = {'params': params, 'timeout': timeout}
             if request_headers is not None:
                 request_kwargs['headers'] = request_headers
             response = session.get(url, **request_kwargs)
+            _record_request_metrics(url, response.status_code, started_at)
             if response.status_code in RETRYABLE_HTTP_STATUS_CODES:
                 error = requests.exceptions.HTTPError(f"{response.status_code} {response.reason}")
                 error.response = response
@@ -98,6 +133,8 @@ def request_with_retry(session, url, params=None, timeout=10, max_retries=3, bas
             return response
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.HTTPError) as exc:
             response = getattr(exc, 'response', None)
+            if response is None:
+                _record_request_metrics(url, type(exc).__name__, started_at)
             if response is not None and response.status_code not in RETRYABLE_HTTP_STATUS_CODES:
                 raise exc
 
@@ -131,6 +168,7 @@ def request_with_binance_retry(session, url, params=None, timeout=10, max_retrie
         wait_seconds = _binance_rate_limits.unavailable_remaining_seconds('binance', rate_limit_group)
         if wait_seconds > 0:
             raise BinanceRateLimitUnavailable(rate_limit_group, wait_seconds)
+        exchange_budget.admit('binance', registry=_binance_rate_limits, group=rate_limit_group)
 
         try:
             return request_with_retry(
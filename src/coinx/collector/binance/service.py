@@ -1,7 +1,9 @@
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from coinx.collector.rate_limit import bind_request_class
 from coinx.config import TIME_INTERVALS
+from coinx.repositories.market_ticker_index import refresh_market_ticker_index
 from coinx.repositories.market_tickers import get_latest_close_time
 from coinx.utils import save_all_coins_data, logger
 from coinx.coin_manager import get_active_coins
@@ -64,7 +66,7 @@ def update_single_coin_data(symbol):
             with ThreadPoolExecutor(max_workers=min(2, len(TIME_INTERVALS) or 1)) as executor:
                 # 提交所有时间周期的任务
                 future_to_interval = {
-                    executor.submit(get_open_interest_history, symbol, interval, limit=2): interval 
+                    executor.submit(bind_request_class(get_open_interest_history), symbol, interval, limit=2): interval 
                     for interval in TIME_INTERVALS
                 }
                 
@@ -147,7 +149,7 @@ def update_all_data(symbols=None, force_update=False):
         with ThreadPoolExecutor(max_workers=min(2, len(symbols) or 1)) as executor:
             # 提交所有币种的任务
             future_to_symbol = {
-                executor.submit(update_single_coin_data, symbol): symbol 
+                executor.submit(bind_request_class(update_single_coin_data), symbol): symbol 
                 for symbol in symbols
             }
             
@@ -277,6 +279,11 @@ def refresh_market_tickers(force_update=False):
 
     try:
         records = update_market_tickers(force_update=force_update)
+        if records:
+            try:
+                refresh_market_ticker_index()
+            except Exception as exc:
+                logger.warning(f"行情榜排序索引重建失败，等待下次请求重新加载: {exc}")
         snapshot_time = get_latest_close_time()
         if not records:
             logger.warning("行情榜快照刷新未获取到有效数据")
@@ -3,7 +3,12 @@ import time
 import requests
 
 from coinx.collector.binance.client import get_session, request_with_retry
-from coinx.collector.rate_limit import RateLimitRegistry, RateLimitUnavailable, parse_retry_after_seconds
+from coinx.collector.rate_limit import (
+    RateLimitRegistry,
+    RateLimitUnavailable,
+    exchange_budget,
+    parse_retry_after_seconds,
+)
 from coinx.config import BYBIT_BASE_URL, BYBIT_CATEGORY
 from coinx.repositories.series import upsert_series_records
 from coinx.utils import logger
@@ -116,6 +121,7 @@ def _request_bybit(path, params, session=None, timeout=10):
     wait_seconds = _bybit_rate_limits.unavailable_remaining_seconds('bybit', group)
     if wait_seconds > 0:
         raise BybitRateLimitUnavailable(group, wait_seconds)
+    exchange_budget.admit('bybit', registry=_bybit_rate_limits, group=group)
     _bybit_rate_limits.wait_for_slot('bybit', group, min_interval_ms=BYBIT_MIN_INTERVAL_MS)
     try:
         response = request_with_retry(http_session, url, params=params, timeout=timeout)
@@ -7,7 +7,7 @@ from coinx.collector.binance.client import BinanceRateLimitUnavailable, is_binan
 from coinx.collector.bybit.series import BybitRateLimitUnavailable, is_bybit_budget_unavailable
 from coinx.collector.gate.series import GateRateLimitUnavailable, GateUnsupportedContract, is_gate_budget_unavailable
 from coinx.collector.okx.series import OKXRateLimitUnavailable, is_okx_budget_unavailable
-from coinx.collector.rate_limit import RateLimitUnavailable
+from coinx.collector.rate_limit import RateLimitUnavailable, bind_request_class
 from coinx.collector.timing import (
     add_duration_breakdown,
     attach_other_duration,
@@ -20,6 +20,7 @@ from coinx.collector.timing import (
 )
 from coinx.config import (
     ENABLED_EXCHANGES,
+    EXCHANGE_PUBLISH_LAG_SECONDS,
     HOMEPAGE_SERIES_REPAIR_PERIOD,
     HOMEPAGE_SERIES_TYPES,
     REPAIR_HISTORY_COVERAGE_HOURS,
@@ -28,19 +29,26 @@ from coinx.config import (
     REPAIR_HISTORY_WRITE_BATCH_SIZE,
     REPAIR_ROLLING_MAX_WORKERS,
     REPAIR_ROLLING_POINTS,
+    REPAIR_ROLLING_RETRY_SECONDS,
+    REPAIR_ROLLING_RETRY_WINDOW_SECONDS,
     REPAIR_ROLLING_WRITE_BATCH_SIZE,
 )
 from coinx.database import get_session
+from coinx.metrics import inc_counter
 from coinx.repositories.series import (
     get_existing_series_timestamps,
     upsert_series_records_in_batches,
 )
+from coinx.shutdown import SHUTDOWN_EVENT, is_shutting_down
 from coinx.utils import logger
 
 
 FIVE_MINUTES_MS = 5 * 60 * 1000
 LOCAL_DAY_OFFSET_MS = 8 * 60 * 60 * 1000
 _history_symbol_cursor = 0
+# 重启后从快照恢复的游标币种；下一轮按它在当前币种列表中的位置续上
+_history_cursor_pending_symbol = None
+_history_cursor_next_symbol = None
 _RATE_LIMIT_EXCEPTIONS = (
     GateRateLimitUnavailable,
     OKXRateLimitUnavailable,
@@ -456,6 +464,9 @@ def _log_result_volume_stats_by_series(mode, results):
                 stats[field] += item.get(field) or 0
 
     for (exchange, series_type), stats in sorted(grouped.items()):
+        labels = {'mode': mode or 'unknown', 'exchange': exchange, 'series_type': series_type}
+        inc_counter('coinx_repair_records_fetched_total', stats['api_records'], **labels)
+        inc_counter('coinx_repair_records_written_total', stats['written_records'], **labels)
         logger.info(
             '数据量统计明细: 模式=%s 交易所=%s 序列类型=%s 缺口记录=%d 目标命中=%d 未命中缺口=%d 无数据缺口=%d 写库记录=%d 影响行=%d API返回=%d',
             mode,
@@ -588,9 +599,39 @@ def _log_task_progress(mode, exchange, completed, total, results, task, started_
     )
 
 
+def _shutdown_skipped_result(task, mode=None):
+    return _result_with_breakdown(
+        {
+            'exchange': task.get('exchange'),
+            'symbol': task.get('symbol'),
+            'series_type': task.get('series_type'),
+            'period': task.get('period'),
+            'status': 'skipped',
+            'mode': mode,
+            'reason': 'shutdown',
+            'affected': 0,
+            'records': 0,
+            'api_records': 0,
+            'written_records': 0,
+            'pages': 0,
+        },
+        empty_duration_breakdown(),
+    )
+
+
+def _skip_when_shutting_down(worker_func, mode=None):
+    """进程正在关闭时不再开始新的币种任务，已在执行的任务照常完成并写库。"""
+    def run(task, db_session=None):
+        if is_shutting_down():
+            return _shutdown_skipped_result(task, mode)
+        return worker_func(task, db_session=db_session)
+    return run
+
+
 def _run_tasks(tasks, worker_func, max_workers, db_session=None, mode=None, exchange=None):
     if not tasks:
         return []
+    worker_func = _skip_when_shutting_down(worker_func, mode)
     worker_count = max(1, int(max_workers or 1))
     started_at = time.perf_counter()
     total = len(tasks)
@@ -604,7 +645,7 @@ def _run_tasks(tasks, worker_func, max_workers, db_session=None, mode=None, exch
 
     results = []
     with ThreadPoolExecutor(max_workers=worker_count) as executor:
-        future_to_task = {executor.submit(worker_func, task, db_session=None): task for task in tasks}
+        future_to_task = {executor.submit(bind_request_class(worker_func), task, db_session=None): task for task in tasks}
         for future in as_completed(future_to_task):
             results.append(future.result())
             if mode:
@@ -809,7 +850,7 @@ def _run_grouped_tasks(tasks, worker_func, max_workers, group_key_func, db_sessi
     results = []
     with ThreadPoolExecutor(max_workers=worker_count) as executor:
         future_to_group = {
-            executor.submit(run_group, group_key, group_tasks): group_key
+            executor.submit(bind_request_class(run_group), group_key, group_tasks): group_key
             for group_key, group_tasks in grouped_tasks.items()
         }
         for future in as_completed(future_to_group):
@@ -1190,12 +1231,188 @@ def repair_rolling_symbols(symbols=None, series_types=None, exchanges=None, now_
     return summary
 
 
+def publication_lag_ms(exchange):
+    return max(0, int(EXCHANGE_PUBLISH_LAG_SECONDS.get(exchange, 0) or 0)) * 1000
+
+
+def _missing_anchor_scopes(results, now_ms, db_session=None):
+    """返回本轮仍缺最新已收盘点的 {exchange: {series_type: {symbol, ...}}}。
+
+    不支持的币种、预检已完整的币种与因进程关闭而跳过的币种不再检查；其余按 (交易所, 序列, 周期) 各查一次锚点是否已入库。
+    """
+    candidates = {}
+    for item in results:
+        if not item.get('symbol') or item.get('reason') in ('unsupported_symbol', 'rolling window already complete', 'shutdown'):
+            continue
+        key = (item['exchange'], item['series_type'], item.get('period') or HOMEPAGE_SERIES_REPAIR_PERIOD)
+        candidates.setdefault(key, set()).add(item['symbol'])
+
+    scopes = {}
+    for (exchange, series_type, period), symbols in candidates.items():
+        anchor_time = latest_closed_period_open_time(now_ms, period)
+        existing = get_existing_series_timestamps(
+            exchange=exchange,
+            series_type=series_type,
+            symbols=sorted(symbols),
+            timestamps=[anchor_time],
+            period=period,
+            session=db_session,
+        )
+        missing = {symbol for symbol in symbols if anchor_time not in existing.get(symbol, set())}
+        if missing:
+            scopes.setdefault(exchange, {}).setdefault(series_type, set()).update(missing)
+    return scopes
+
+
+def _scope_symbols(scopes, exchanges):
+    return sorted({symbol for exchange in exchanges for symbols in scopes[exchange].values() for symbol in symbols})
+
+
+def _scope_series_types(scopes, exchanges):
+    return sorted({series_type for exchange in exchanges for series_type in scopes[exchange]})
+
+
+def repair_rolling_symbols_to_anchor(
+    symbols=None,
+    series_types=None,
+    exchanges=None,
+    points=None,
+    max_workers=None,
+    http_session=None,
+    db_session=None,
+    now_func=None,
+    sleep_func=None,
+):
+    """对齐最近一次 K 线收盘的滚动修补。
+
+    每个交易所在收盘时间 + 发布延迟之后才执行首轮；之后每 REPAIR_ROLLING_RETRY_SECONDS 秒
+    只对仍缺最新收盘点的 (交易所, 币种, 序列) 重试，超过收盘后 REPAIR_ROLLING_RETRY_WINDOW_SECONDS
+    或全部补齐即停止。返回合并后的 summary：同一序列以最后一轮的结果为准。
+    进程开始关闭时不再开始新的一轮，等待也会被关闭信号立即唤醒。
+    """
+    clock = now_func or (lambda: int(time.time() * 1000))
+    sleep = sleep_func or SHUTDOWN_EVENT.wait
+    target_symbols = symbols if symbols is not None else get_active_coins()
+    target_exchanges = list(dict.fromkeys(exchanges or ENABLED_EXCHANGES))
+    period_ms = _period_to_ms(HOMEPAGE_SERIES_REPAIR_PERIOD)
+    started_at = time.perf_counter()
+    started_ms = clock()
+    bar_close_time = started_ms - started_ms % period_ms
+    deadline = bar_close_time + max(0, REPAIR_ROLLING_RETRY_WINDOW_SECONDS) * 1000
+    retry_ms = max(1, REPAIR_ROLLING_RETRY_SECONDS) * 1000
+
+    # 首轮 scope 为 None，表示全部币种与序列
+    pending = {exchange: None for exchange in target_exchanges}
+    not_before = {exchange: bar_close_time + publication_lag_ms(exchange) for exchange in target_exchanges}
+    results_by_key = {}
+    rounds = []
+    first_summary = None
+    total_breakdown = empty_duration_breakdown()
+    missing_scopes = {}
+
+    while pending:
+        if is_shutting_down():
+            logger.info('进程正在关闭，停止滚动修补对齐收盘重试: 未执行交易所=%s', ','.join(pending))
+            break
+        now = clock()
+        ready = [exchange for exchange in pending if now >= not_before[exchange]]
+        if not ready:
+            sleep((min(not_before[exchange] for exchange in pending) - now) / 1000)
+            continue
+
+        first_round = [exchange for exchange in ready if pending[exchange] is None]
+        retry_round = [exchange for exchange in ready if pending[exchange] is not None]
+        scopes = {exchange: pending.pop(exchange) for exchange in ready}
+        for is_retry, round_exchanges, round_symbols, round_series_types in (
+            (False, first_round, target_symbols, series_types),
+            (True, retry_round, _scope_symbols(scopes, retry_round), _scope_series_types(scopes, retry_round)),
+        ):
+            if not round_exchanges:
+                continue
+            summary = repair_rolling_symbols(
+                symbols=round_symbols,
+                series_types=round_series_types,
+                exchanges=round_exchanges,
+                now_ms=now,
+                points=points,
+                max_workers=max_workers,
+                http_session=http_session,
+                db_session=db_session,
+            )
+            first_summary = first_summary or summary
+            add_duration_breakdown(total_breakdown, summary.get('duration_breakdown_ms') or {})
+            for item in summary.get('results') or []:
+                results_by_key[(item.get('exchange'), item.get('symbol'), item.get('series_type'), item.get('period'))] = item
+            round_missing = _missing_anchor_scopes(summary.get('results') or [], now, db_session=db_session)
+            rounds.append({
+                'started_at_ms': now,
+                'exchanges': round_exchanges,
+                'symbols': len(round_symbols),
+                'retry': is_retry,
+                'missing': sum(len(symbols) for scope in round_missing.values() for symbols in scope.values()),
+            })
+            for exchange in round_exchanges:
+                missing_scopes.pop(exchange, None)
+            missing_scopes.update(round_missing)
+
+        retry_at = clock() + retry_ms
+        for exchange in ready:
+            if exchange in missing_scopes and retry_at <= deadline:
+                pending[exchange] = missing_scopes[exchange]
+                not_before[exchange] = retry_at
+
+    missing_count = sum(len(symbols) for scope in missing_scopes.values() for symbols in scope.values())
+    if len(rounds) > 1 or missing_count:
+        logger.info(
+            '滚动修补对齐收盘完成: 收盘时间=%s 轮次=%d 仍缺最新点=%d',
+            bar_close_time,
+            len(rounds),
+            missing_count,
+        )
+    first_summary = first_summary or {}
+    return _build_summary(
+        mode='rolling',
+        symbols=target_symbols,
+        series_types=series_types or HOMEPAGE_SERIES_TYPES,
+        exchanges=target_exchanges,
+        results=list(results_by_key.values()),
+        started_at=started_at,
+        extra={
+            'target_times': first_summary.get('target_times', []),
+            'precheck_skipped_count': first_summary.get('precheck_skipped_count', 0),
+            'unsupported_count': first_summary.get('unsupported_count', 0),
+            'exchange_progress': first_summary.get('exchange_progress', {}),
+            'bar_close_time': bar_close_time,
+            'anchor_rounds': rounds,
+            'anchor_missing_count': missing_count,
+            'duration_breakdown_ms': total_breakdown,
+        },
+    )
+
+
+def get_history_cursor():
+    """返回低频历史修补的币种游标，供启动预热快照保存。"""
+    return {'index': _history_symbol_cursor, 'next_symbol': _history_cursor_next_symbol}
+
+
+def restore_history_cursor(index=0, next_symbol=None):
+    global _history_symbol_cursor, _history_cursor_pending_symbol, _history_cursor_next_symbol
+    _history_symbol_cursor = max(0, int(index or 0))
+    _history_cursor_pending_symbol = next_symbol
+    _history_cursor_next_symbol = next_symbol
+
+
 def _history_target_symbols(symbols, full_scan):
-    global _history_symbol_cursor
+    global _history_symbol_cursor, _history_cursor_pending_symbol, _history_cursor_next_symbol
     target_symbols = symbols if symbols is not None else get_active_coins()
     if full_scan or not target_symbols or REPAIR_HISTORY_SYMBOL_BATCH_SIZE <= 0:
         return target_symbols
 
+    if _history_cursor_pending_symbol is not None:
+        # 币种列表在重启期间可能变化，优先按游标币种定位
+        if _history_cursor_pending_symbol in target_symbols:
+            _history_symbol_cursor = list(target_symbols).index(_history_cursor_pending_symbol)
+        _history_cursor_pending_symbol = None
     if _history_symbol_cursor >= len(target_symbols):
         _history_symbol_cursor = 0
     start_index = _history_symbol_cursor
@@ -1205,6 +1422,7 @@ def _history_target_symbols(symbols, full_scan):
     else:
         batch = target_symbols[start_index:] + target_symbols[:end_index % len(target_symbols)]
     _history_symbol_cursor = end_index % len(target_symbols)
+    _history_cursor_next_symbol = target_symbols[_history_symbol_cursor]
     return batch
 
 
@@ -1368,6 +1586,9 @@ def repair_history_symbols(symbols=None, series_types=None, exchanges=None, now_
             pages = 0
 
             while cursor_time <= target_end_time:
+                if pages and is_shutting_down():
+                    # 关闭时停在当前页，已拉到的记录照常写库，剩余窗口留给下次历史修补
+                    break
                 use_open_ended_history_paging = _uses_open_ended_history_paging(task['adapter'], task['series_type'])
                 use_backward_window_history_paging = (
                     window_precise and _uses_backward_window_history_paging(task['adapter'], task['series_type'])
@@ -2,7 +2,12 @@ import time
 import requests
 
 from coinx.collector.binance.client import get_session, request_with_retry
-from coinx.collector.rate_limit import RateLimitRegistry, RateLimitUnavailable, record_rate_limit_wait_seconds
+from coinx.collector.rate_limit import (
+    RateLimitRegistry,
+    RateLimitUnavailable,
+    exchange_budget,
+    record_rate_limit_wait_seconds,
+)
 from coinx.config import (
     GATE_403_RETRY_FALLBACK_SECONDS,
     GATE_BASE_URL,
@@ -154,6 +159,7 @@ def is_gate_budget_unavailable():
 
 
 def _wait_for_gate_slot():
+    exchange_budget.admit('gate', registry=_gate_rate_limits, group='default')
     _gate_rate_limits.wait_for_slot('gate', 'default', min_interval_ms=GATE_MIN_INTERVAL_MS, consume_budget=True)
 
 
@@ -8,7 +8,12 @@ from coinx.collector.proxy_pool import (
     get_okx_session,
     mark_okx_proxy_failure,
 )
-from coinx.collector.rate_limit import RateLimitRegistry, RateLimitUnavailable, parse_retry_after_seconds
+from coinx.collector.rate_limit import (
+    RateLimitRegistry,
+    RateLimitUnavailable,
+    exchange_budget,
+    parse_retry_after_seconds,
+)
 from coinx.config import OKX_BASE_URL, OKX_429_RETRY_FALLBACK_SECONDS, OKX_RUBIK_MIN_INTERVAL_MS
 from coinx.repositories.series import upsert_series_records
 from coinx.utils import logger
@@ -204,6 +209,7 @@ def _request_okx(path, params, session=None, timeout=10, proxy_id=None):
     wait_seconds = _okx_rate_limits.unavailable_remaining_seconds('okx', rate_limit_group, proxy_id=resolved_proxy_id)
     if wait_seconds > 0:
         raise OKXRateLimitUnavailable(rate_limit_group, wait_seconds)
+    exchange_budget.admit('okx', registry=_okx_rate_limits, group=rate_limit_group, proxy_id=resolved_proxy_id)
     _okx_rate_limits.wait_for_slot(
         'okx',
         rate_limit_group,
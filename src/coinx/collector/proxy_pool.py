@@ -145,6 +145,14 @@ class ProxyPool:
                 return 0.0
             return max(0.0, proxy['cooldown_until'] - time.time())
 
+    def health_snapshot(self):
+        now = time.time()
+        with self._lock:
+            return [
+                {'id': proxy['id'], 'cooldown_seconds': max(0.0, proxy['cooldown_until'] - now)}
+                for proxy in self._proxies
+            ]
+
     def _find_proxy_unlocked(self, proxy_id):
         for proxy in self._proxies:
             if proxy['id'] == proxy_id:
@@ -1,12 +1,34 @@
 from __future__ import annotations
 
+import functools
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 from email.utils import parsedate_to_datetime
-from threading import Lock, local
+from threading import Condition, Lock, local
+
+from coinx.config import (
+    EXCHANGE_BUDGET_HISTORY_RESERVE_RATIO,
+    EXCHANGE_BUDGET_HOLD_SECONDS,
+    EXCHANGE_BUDGET_MAX_PAUSE_SECONDS,
+)
 
 
 _rate_limit_wait_state = local()
+_request_class_state = local()
+
+REQUEST_CLASS_INTERACTIVE = 'interactive'
+REQUEST_CLASS_ROLLING = 'rolling'
+REQUEST_CLASS_FUNDING = 'funding'
+REQUEST_CLASS_HISTORY = 'history'
+# 优先级从高到低
+REQUEST_CLASSES = (
+    REQUEST_CLASS_INTERACTIVE,
+    REQUEST_CLASS_ROLLING,
+    REQUEST_CLASS_FUNDING,
+    REQUEST_CLASS_HISTORY,
+)
+REQUEST_CLASS_PRIORITY = {name: index for index, name in enumerate(REQUEST_CLASSES)}
 
 
 def record_rate_limit_wait_seconds(seconds):
@@ -22,6 +44,35 @@ def consume_rate_limit_wait_seconds():
     return seconds
 
 
+def current_request_class():
+    """Request class of the current thread; untagged threads are treated as background history work."""
+    return getattr(_request_class_state, 'name', None) or REQUEST_CLASS_HISTORY
+
+
+@contextmanager
+def use_request_class(name):
+    if name not in REQUEST_CLASS_PRIORITY:
+        raise ValueError(f'unknown request class: {name}')
+    previous = getattr(_request_class_state, 'name', None)
+    _request_class_state.name = name
+    try:
+        yield name
+    finally:
+        _request_class_state.name = previous
+
+
+def bind_request_class(func):
+    """Carry the caller's request class into executor worker threads."""
+    name = current_request_class()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_request_class(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
 class RateLimitUnavailable(RuntimeError):
     """Raised when a rate limit group is cooling down or budget is unavailable."""
 
@@ -72,6 +123,19 @@ class RateLimitRegistry:
                 last_headers=dict(state.last_headers or {}),
             )
 
+    def snapshot_states(self):
+        """All groups' remaining budget and cooldown seconds, keyed by (exchange, group, proxy_id)."""
+        now = time.time()
+        with self._lock:
+            return {
+                key: {
+                    'remain': state.remain,
+                    'limit': state.limit,
+                    'cooldown_seconds': max(0.0, state.cooldown_until - now, state.budget_unavailable_until - now),
+                }
+                for key, state in self._states.items()
+            }
+
     def unavailable_remaining_seconds(self, exchange, group, proxy_id='direct'):
         with self._lock:
             state = self._states.setdefault((exchange, group, proxy_id), RateLimitState(last_headers={}))
@@ -161,6 +225,129 @@ class RateLimitRegistry:
                 state.next_allowed_at = max(state.next_allowed_at, float(next_allowed_at))
 
 
+class ExchangeBudgetArbiter:
+    """Per-exchange priority gate in front of RateLimitRegistry.
+
+    Every request announces itself with admit() before taking a registry slot. A request
+    waits while a higher class on the same exchange is queued or was admitted within
+    hold_seconds, so rolling repair takes the budget from funding and history while it runs.
+    History requests also leave the last reserve_ratio of a known remaining budget to the
+    other classes. Paused requests proceed after max_pause_seconds, except history
+    requests, which are preempted with RateLimitUnavailable and retried on the next run.
+    """
+
+    def __init__(self, hold_seconds=1.0, max_pause_seconds=30.0, history_reserve_ratio=0.2):
+        self.hold_seconds = max(0.0, float(hold_seconds))
+        self.max_pause_seconds = max(0.0, float(max_pause_seconds))
+        self.history_reserve_ratio = max(0.0, float(history_reserve_ratio))
+        self._condition = Condition()
+        self._waiting = {}
+        self._admitted_at = {}
+        self._stats = {}
+
+    def clear(self):
+        with self._condition:
+            self._waiting.clear()
+            self._admitted_at.clear()
+            self._stats.clear()
+            self._condition.notify_all()
+
+    def _stat(self, exchange, name):
+        return self._stats.setdefault((exchange, name), {'admitted': 0, 'preempted': 0, 'paused_seconds': 0.0})
+
+    def _blocking_class(self, exchange, priority, now):
+        for name in REQUEST_CLASSES[:priority]:
+            if self._waiting.get((exchange, name)):
+                return name
+            if now - self._admitted_at.get((exchange, name), float('-inf')) < self.hold_seconds:
+                return name
+        return None
+
+    def admit(self, exchange, registry=None, group='default', proxy_id='direct'):
+        """Block until the current thread's request class may use the exchange budget."""
+        name = current_request_class()
+        priority = REQUEST_CLASS_PRIORITY[name]
+        key = (exchange, name)
+        started = time.monotonic()
+        with self._condition:
+            self._waiting[key] = self._waiting.get(key, 0) + 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    waited = now - started
+                    blocking = self._blocking_class(exchange, priority, now)
+                    reserve_wait = 0.0
+                    if blocking is None and name == REQUEST_CLASS_HISTORY and registry is not None:
+                        reserve_wait = _history_reserve_wait_seconds(
+                            registry, exchange, group, proxy_id, self.history_reserve_ratio,
+                        )
+                        if reserve_wait > 0:
+                            blocking = 'reserve'
+                    if blocking is None:
+                        break
+                    if waited >= self.max_pause_seconds:
+                        if name == REQUEST_CLASS_HISTORY:
+                            self._stat(exchange, name)['preempted'] += 1
+                            self._stat(exchange, name)['paused_seconds'] += waited
+                            raise RateLimitUnavailable(
+                                exchange, group, max(reserve_wait, self.hold_seconds), reason=f'preempted_by_{blocking}',
+                            )
+                        break
+                    timeout = self.max_pause_seconds - waited
+                    if reserve_wait > 0:
+                        timeout = min(timeout, reserve_wait)
+                    else:
+                        timeout = min(timeout, max(self.hold_seconds, 0.01))
+                    self._condition.wait(timeout)
+            finally:
+                self._waiting[key] -= 1
+                self._condition.notify_all()
+
+            paused_seconds = time.monotonic() - started
+            stat = self._stat(exchange, name)
+            stat['admitted'] += 1
+            stat['paused_seconds'] += paused_seconds
+            self._admitted_at[key] = time.monotonic()
+        if paused_seconds > 0.001:
+            record_rate_limit_wait_seconds(paused_seconds)
+        return paused_seconds
+
+    def queue_depths(self):
+        """Waiting requests and counters per exchange and request class, highest priority first."""
+        with self._condition:
+            exchanges = sorted({exchange for exchange, _ in self._stats} | {exchange for exchange, _ in self._waiting})
+            return {
+                exchange: {
+                    name: {
+                        'waiting': self._waiting.get((exchange, name), 0),
+                        'admitted': self._stats.get((exchange, name), {}).get('admitted', 0),
+                        'preempted': self._stats.get((exchange, name), {}).get('preempted', 0),
+                        'paused_seconds': round(self._stats.get((exchange, name), {}).get('paused_seconds', 0.0), 3),
+                    }
+                    for name in REQUEST_CLASSES
+                }
+                for exchange in exchanges
+            }
+
+
+def _history_reserve_wait_seconds(registry, exchange, group, proxy_id, reserve_ratio):
+    if reserve_ratio <= 0:
+        return 0.0
+    state = registry.get_state_snapshot(exchange, group, proxy_id=proxy_id)
+    if state.remain is None or not state.limit or state.reset_at is None:
+        return 0.0
+    if state.remain > state.limit * reserve_ratio:
+        return 0.0
+    return max(0.0, state.reset_at - time.time())
+
+
+exchange_budget = ExchangeBudgetArbiter(
+    hold_seconds=EXCHANGE_BUDGET_HOLD_SECONDS,
+    max_pause_seconds=EXCHANGE_BUDGET_MAX_PAUSE_SECONDS,
+    history_reserve_ratio=EXCHANGE_BUDGET_HISTORY_RESERVE_RATIO,
+)
+
+
 def parse_retry_after_seconds(value):
     if value in (None, ''):
         return None
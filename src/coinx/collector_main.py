@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""独立采集进程入口（coinx-collector）。
+
+只运行 APScheduler 定时任务、启动期首页序列补全与通知投递，不提供 Web 服务。
+配合 PROCESS_ROLE=web 的 Web 进程使用：修复任务的 CPU 开销不再与请求处理争用 GIL，
+Web 进程也可以安全地使用 gunicorn 多 worker。新数据通过 coinx.cache_handoff 通知 Web 进程。
+"""
+import logging
+import os
+import signal
+import threading
+
+from coinx import config
+from coinx.cache_handoff import PROCESS_ROLE_COLLECTOR
+
+STOP_EVENT = threading.Event()
+
+
+def signal_handler(sig, frame):
+    """收到退出信号后唤醒主线程，由主线程有序关闭；关闭过程中再次收到信号则立即退出。"""
+    if STOP_EVENT.is_set():
+        os._exit(1)
+    STOP_EVENT.set()
+
+
+def main():
+    """主函数"""
+    # 在导入调度器之前设置，确保各缓存发布时写入交接文件
+    config.PROCESS_ROLE = PROCESS_ROLE_COLLECTOR
+
+    from coinx.metrics_server import start_metrics_server, stop_metrics_server
+    from coinx.runtime import start_runtime_services
+    from coinx.shutdown import graceful_shutdown
+    from coinx.utils import logger
+
+    logger.info("币种数据监控系统 - 独立采集进程")
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    metrics_server = None
+    try:
+        if config.METRICS_ENABLED and config.METRICS_PORT > 0:
+            metrics_server = start_metrics_server()
+        runtime = start_runtime_services(with_startup_repair=True, startup_delay_seconds=1)
+        if runtime['scheduler_thread'] is None:
+            logger.warning("调度器未启动，采集进程退出")
+            return
+        logger.info("采集进程已启动，缓存交接文件: %s", config.CACHE_HANDOFF_FILE)
+        while not STOP_EVENT.wait(1):
+            pass
+        logger.info("接收到关闭信号，正在停止采集进程...")
+    except Exception as e:
+        logger.error(f"采集进程运行出错: {e}")
+        logger.exception(e)
+    finally:
+        # 停止调度、等待任务写库、停止通知投递、释放集群锁并保存预热快照与历史修补游标
+        try:
+            graceful_shutdown()
+        except Exception as e:
+            logger.error(f"有序关闭时出错: {e}")
+        try:
+            stop_metrics_server(metrics_server)
+        except Exception as e:
+            logger.warning(f"关闭指标接口时出错: {e}")
+        logging.shutdown()
+
+
+if __name__ == "__main__":
+    main()
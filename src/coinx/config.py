@@ -40,13 +40,55 @@ WEB_JWT_REFRESH_TOKEN_EXPIRES_DAYS = get_env('WEB_JWT_REFRESH_TOKEN_EXPIRES_DAYS
 WEB_JWT_COOKIE_SECURE = get_env('WEB_JWT_COOKIE_SECURE', False, bool)
 WEB_JWT_COOKIE_DOMAIN = get_env('WEB_JWT_COOKIE_DOMAIN')
 
+# Prometheus 指标接口 /metrics：默认与其他页面一样需要登录；配置 METRICS_AUTH_TOKEN 后
+# 抓取端可用 Authorization: Bearer <token> 访问，METRICS_PUBLIC=true 时不做任何校验。
+METRICS_ENABLED = get_env('METRICS_ENABLED', True, bool)
+METRICS_AUTH_TOKEN = get_env('METRICS_AUTH_TOKEN')
+METRICS_PUBLIC = get_env('METRICS_PUBLIC', False, bool)
+# 独立采集进程（coinx-collector）没有 Web 服务，在该地址与端口单独提供 /metrics，鉴权同上；端口设为 0 时不启动
+METRICS_HOST = get_env('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = get_env('METRICS_PORT', 9101, int)
+
 # 定时任务总开关；关闭后不会注册或启动 APScheduler，也不会执行启动期首页数据补采。
 SCHEDULER_ENABLED = get_env('SCHEDULER_ENABLED', True, bool)
 
+# 进程角色：all 为 Web 与定时任务同进程；web 只提供 Web 服务，不启动调度器；
+# collector 由 coinx-collector 入口设置，只运行定时任务。
+PROCESS_ROLE = (get_env('PROCESS_ROLE', 'all') or 'all').strip().lower()
+# 采集进程与 Web 进程交接缓存版本的共享文件，两个进程需能访问同一路径
+CACHE_HANDOFF_FILE = get_env('CACHE_HANDOFF_FILE', os.path.join(DATA_DIR, 'cache_handoff.json'))
+# Web 进程的手动补齐、刷新与任务控制写入 collector_commands 表，由采集进程按该间隔（秒）领取执行；
+# 需要等待结果的请求最多等待 COLLECTOR_COMMAND_TIMEOUT_SECONDS 秒
+COLLECTOR_COMMAND_POLL_SECONDS = get_env('COLLECTOR_COMMAND_POLL_SECONDS', 2, int)
+COLLECTOR_COMMAND_TIMEOUT_SECONDS = get_env('COLLECTOR_COMMAND_TIMEOUT_SECONDS', 120, int)
+
+# 启动预热快照：定期把首页、评分与交易所支持币种缓存写入本地文件，重启后先用它提供服务，
+# 超过 WARM_START_MAX_AGE_SECONDS 的首页与评分快照不再使用。
+WARM_START_ENABLED = get_env('WARM_START_ENABLED', True, bool)
+WARM_START_FILE = get_env('WARM_START_FILE', os.path.join(DATA_DIR, 'warm_start.json'))
+WARM_START_MAX_AGE_SECONDS = get_env('WARM_START_MAX_AGE_SECONDS', 1800, int)
+WARM_START_SAVE_INTERVAL_SECONDS = get_env('WARM_START_SAVE_INTERVAL_SECONDS', 300, int)
+
+# 收到退出信号后的有序关闭总时限：停止触发新任务、等待运行中的任务写库、释放集群锁、
+# 保存预热快照与历史修补游标，超时后直接退出。应小于部署平台的强制终止等待时间。
+SHUTDOWN_TIMEOUT_SECONDS = get_env('SHUTDOWN_TIMEOUT_SECONDS', 25, float)
+
+# 多节点采集：每个任务只由持有数据库锁的一个节点执行；开启分片后修补任务按一致性哈希
+# 把币种分给存活节点，节点心跳超过 CLUSTER_LEASE_SECONDS 未续期即视为下线并重新分配。
+CLUSTER_ENABLED = get_env('CLUSTER_ENABLED', False, bool)
+CLUSTER_NODE_ID = get_env('CLUSTER_NODE_ID')
+CLUSTER_LEASE_SECONDS = get_env('CLUSTER_LEASE_SECONDS', 60, int)
+CLUSTER_SHARDING_ENABLED = get_env('CLUSTER_SHARDING_ENABLED', False, bool)
+
+# 定时任务运行历史：每次运行落库一行（含耗时分类），任务管理页按窗口统计 p50/p95。
+JOB_RUN_HISTORY_ENABLED = get_env('JOB_RUN_HISTORY_ENABLED', True, bool)
+JOB_RUN_HISTORY_RETENTION_DAYS = get_env('JOB_RUN_HISTORY_RETENTION_DAYS', 14, int)
+JOB_RUN_STATS_WINDOWS_HOURS = [int(value) for value in get_env('JOB_RUN_STATS_WINDOWS_HOURS', [1, 24, 168], list)]
+
 UPDATE_INTERVAL = get_env('UPDATE_INTERVAL', 300, int)
 TIME_INTERVALS = get_env(
     'TIME_INTERVALS',
-    '5m,15m,30m,1h,4h,12h,24h,48h,72h,168h',
+    ['5m', '15m', '30m', '1h', '4h', '12h', '24h', '48h', '72h', '168h'],
     list
 )
 
@@ -61,7 +103,7 @@ HOMEPAGE_WINDOW_HEALTH_THRESHOLD = get_env('HOMEPAGE_WINDOW_HEALTH_THRESHOLD', 9
 
 HOMEPAGE_SERIES_TYPES = get_env(
     'HOMEPAGE_SERIES_TYPES',
-    'klines,open_interest_hist,taker_buy_sell_vol',
+    ['klines', 'open_interest_hist', 'taker_buy_sell_vol'],
     list
 )
 
@@ -95,7 +137,7 @@ else:
 
 BINANCE_BASE_URL = get_env('BINANCE_BASE_URL', 'https://proxy.yffjglcms.com/fapi.binance.com')
 
-ENABLED_EXCHANGES = get_env('ENABLED_EXCHANGES', 'binance,okx,gate', list)
+ENABLED_EXCHANGES = get_env('ENABLED_EXCHANGES', ['binance', 'okx', 'gate'], list)
 PRIMARY_PRICE_EXCHANGE = get_env('PRIMARY_PRICE_EXCHANGE', 'binance')
 OKX_BASE_URL = get_env('OKX_BASE_URL', 'https://proxy.yffjglcms.com/www.okx.com')
 OKX_RUBIK_MIN_INTERVAL_MS = get_env('OKX_RUBIK_MIN_INTERVAL_MS', 500, int)
@@ -111,12 +153,26 @@ GATE_403_RETRY_FALLBACK_SECONDS = get_env('GATE_403_RETRY_FALLBACK_SECONDS', 8,
 FETCH_COINS_ENABLED = get_env('FETCH_COINS_ENABLED', True, bool)
 FETCH_COINS_INTERVAL = get_env('FETCH_COINS_INTERVAL', 600, int)
 FETCH_COINS_TOP_VOLUME_COUNT = get_env('FETCH_COINS_TOP_VOLUME_COUNT', 100, int)
+# 跟踪币种集合缓存在内存中，按该间隔轮询版本号发现其他进程的修改
+COIN_REGISTRY_RECHECK_SECONDS = get_env('COIN_REGISTRY_RECHECK_SECONDS', 5, int)
 
 # 跟踪币种修补任务配置
 REPAIR_TRACKED_INTERVAL = get_env('REPAIR_TRACKED_INTERVAL', 300, int)
 REPAIR_ROLLING_POINTS = get_env('REPAIR_ROLLING_POINTS', 5, int)
 REPAIR_ROLLING_MAX_WORKERS = get_env('REPAIR_ROLLING_MAX_WORKERS', 6, int)
 REPAIR_ROLLING_WRITE_BATCH_SIZE = get_env('REPAIR_ROLLING_WRITE_BATCH_SIZE', 500, int)
+# 滚动修补对齐 K 线收盘：在每根 5m K 线收盘后按各交易所发布延迟触发，
+# 之后每 REPAIR_ROLLING_RETRY_SECONDS 秒只重试仍缺最新收盘点的币种，收盘后超过重试窗口即停止。
+REPAIR_ROLLING_ALIGN_TO_BAR_CLOSE = get_env('REPAIR_ROLLING_ALIGN_TO_BAR_CLOSE', True, bool)
+REPAIR_ROLLING_RETRY_SECONDS = get_env('REPAIR_ROLLING_RETRY_SECONDS', 15, int)
+REPAIR_ROLLING_RETRY_WINDOW_SECONDS = get_env('REPAIR_ROLLING_RETRY_WINDOW_SECONDS', 120, int)
+# 各交易所在 K 线收盘后发布该周期统计数据的大致延迟（秒）
+EXCHANGE_PUBLISH_LAG_SECONDS = {
+    'binance': get_env('BINANCE_PUBLISH_LAG_SECONDS', 3, int),
+    'okx': get_env('OKX_PUBLISH_LAG_SECONDS', 5, int),
+    'bybit': get_env('BYBIT_PUBLISH_LAG_SECONDS', 5, int),
+    'gate': get_env('GATE_PUBLISH_LAG_SECONDS', 10, int),
+}
 REPAIR_HISTORY_ENABLED = get_env('REPAIR_HISTORY_ENABLED', True, bool)
 REPAIR_HISTORY_INTERVAL = get_env('REPAIR_HISTORY_INTERVAL', 3600, int)
 REPAIR_HISTORY_MAX_WORKERS = get_env('REPAIR_HISTORY_MAX_WORKERS', 2, int)
@@ -124,6 +180,17 @@ REPAIR_HISTORY_WRITE_BATCH_SIZE = get_env('REPAIR_HISTORY_WRITE_BATCH_SIZE', 200
 REPAIR_HISTORY_SYMBOL_BATCH_SIZE = get_env('REPAIR_HISTORY_SYMBOL_BATCH_SIZE', 0, int)
 REPAIR_HISTORY_COVERAGE_HOURS = get_env('REPAIR_HISTORY_COVERAGE_HOURS', 168, int)
 
+# 交易所请求预算仲裁：interactive > rolling > funding > history，
+# 高优先级请求排队或在 HOLD 秒内发出过请求时，同一交易所的低优先级请求暂停。
+EXCHANGE_BUDGET_HOLD_SECONDS = get_env('EXCHANGE_BUDGET_HOLD_SECONDS', 1.0, float)
+EXCHANGE_BUDGET_MAX_PAUSE_SECONDS = get_env('EXCHANGE_BUDGET_MAX_PAUSE_SECONDS', 30.0, float)
+EXCHANGE_BUDGET_HISTORY_RESERVE_RATIO = get_env('EXCHANGE_BUDGET_HISTORY_RESERVE_RATIO', 0.2, float)
+
+# 合约市场结构评分快照配置
+MARKET_STRUCTURE_SCORE_PERSIST_ENABLED = get_env('MARKET_STRUCTURE_SCORE_PERSIST_ENABLED', True, bool)
+MARKET_STRUCTURE_SCORE_RETENTION_HOURS = get_env('MARKET_STRUCTURE_SCORE_RETENTION_HOURS', 168, int)
+MARKET_STRUCTURE_SCORE_MAX_STALE_SECONDS = get_env('MARKET_STRUCTURE_SCORE_MAX_STALE_SECONDS', 900, int)
+
 # 资金费率配置
 FUNDING_RATE_COLLECT_ENABLED = get_env('FUNDING_RATE_COLLECT_ENABLED', True, bool)
 FUNDING_RATE_ABNORMAL_THRESHOLD = get_env(
@@ -131,9 +198,33 @@ FUNDING_RATE_ABNORMAL_THRESHOLD = get_env(
     0.001,  # 0.1%
     float
 )
+# 各交易所最新资金费率缓存的有效期，超过后评分与首页视为无资金费率
+FUNDING_RATE_CACHE_TTL_SECONDS = get_env('FUNDING_RATE_CACHE_TTL_SECONDS', 900, int)
+
+# 合约详情页缓存：按 (symbol, range, 5m 锚点) 缓存详情/趋势/结构评分，滚动修补后预热成交额前 N 个币种
+CONTRACT_DETAIL_CACHE_SIZE = get_env('CONTRACT_DETAIL_CACHE_SIZE', 512, int)
+CONTRACT_DETAIL_PREWARM_TOP_N = get_env('CONTRACT_DETAIL_PREWARM_TOP_N', 20, int)
+CONTRACT_DETAIL_PREWARM_RANGES = get_env('CONTRACT_DETAIL_PREWARM_RANGES', ['24h'], list)
+
+# 行情快照历史按列压缩存入 market_ticker_snapshots，market_tickers 只保留最近 N 个快照（<=0 表示不清理）
+MARKET_TICKERS_KEEP_ROW_SNAPSHOTS = get_env('MARKET_TICKERS_KEEP_ROW_SNAPSHOTS', 2, int)
+# 压缩快照保留天数；明细行清理与过期快照删除由 market_ticker_retention_job 按该间隔执行，不在每次保存时进行
+MARKET_TICKER_SNAPSHOT_RETENTION_DAYS = get_env('MARKET_TICKER_SNAPSHOT_RETENTION_DAYS', 7, int)
+MARKET_TICKER_RETENTION_INTERVAL = get_env('MARKET_TICKER_RETENTION_INTERVAL', 600, int)
 
 # 通知配置。渠道 URL 加密存入数据库，主密钥只保存在部署环境中。
 NOTIFICATIONS_ENABLED = get_env('NOTIFICATIONS_ENABLED', False, bool)
 NOTIFICATION_ENCRYPTION_KEY = get_env('NOTIFICATION_ENCRYPTION_KEY')
 NOTIFICATION_ENCRYPTION_KEY_VERSION = get_env('NOTIFICATION_ENCRYPTION_KEY_VERSION', 'v1')
 NOTIFICATION_TIMEOUT_SECONDS = get_env('NOTIFICATION_TIMEOUT_SECONDS', 5, int)
+# 通知投递：async 写入 notification_outbox 由后台线程发送；sync 在规则评估中直接发送
+NOTIFICATION_DELIVERY_MODE = get_env('NOTIFICATION_DELIVERY_MODE', 'async')
+NOTIFICATION_DELIVERY_WORKERS = get_env('NOTIFICATION_DELIVERY_WORKERS', 4, int)
+# 同一渠道同时发送的最大请求数
+NOTIFICATION_CHANNEL_CONCURRENCY = get_env('NOTIFICATION_CHANNEL_CONCURRENCY', 1, int)
+# 同一渠道一次合并发送的最大事件数
+NOTIFICATION_BATCH_MAX_EVENTS = get_env('NOTIFICATION_BATCH_MAX_EVENTS', 10, int)
+NOTIFICATION_MAX_ATTEMPTS = get_env('NOTIFICATION_MAX_ATTEMPTS', 5, int)
+# 失败重试退避：base * 2^(attempts-1) 秒，最多 max 秒
+NOTIFICATION_RETRY_BASE_SECONDS = get_env('NOTIFICATION_RETRY_BASE_SECONDS', 15, int)
+NOTIFICATION_RETRY_MAX_SECONDS = get_env('NOTIFICATION_RETRY_MAX_SECONDS', 600, int)
@@ -1,19 +1,62 @@
-from sqlalchemy import create_engine
+import threading
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import scoped_session, sessionmaker, DeclarativeBase
 from coinx import config
+from coinx.metrics import inc_counter
+
+# 数据库引擎在第一次使用时才创建：导入本模块不会加载数据库驱动，
+# Web 进程启动时也不必等待引擎初始化。
+_ENGINE_LOCK = threading.Lock()
+_ENGINE_STATE = {'engine': None}
+
+
+def _count_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    inc_counter('coinx_db_pool_checkouts_total')
+
+
+def get_engine():
+    """返回全局数据库引擎，首次调用时创建。"""
+    engine = _ENGINE_STATE['engine']
+    if engine is not None:
+        return engine
+    with _ENGINE_LOCK:
+        if _ENGINE_STATE['engine'] is None:
+            engine = create_engine(
+                config.DATABASE_URI,
+                pool_recycle=3600,
+                pool_size=10,
+                max_overflow=20,
+                pool_pre_ping=True,
+                echo=False  # 设置为True可以查看生成的SQL语句
+            )
+            event.listen(engine, 'checkout', _count_pool_checkout)
+            _ENGINE_STATE['engine'] = engine
+        return _ENGINE_STATE['engine']
+
+
+def is_engine_created():
+    return _ENGINE_STATE['engine'] is not None
+
+
+def __getattr__(name):
+    # 兼容 from coinx.database import engine 的旧用法
+    if name == 'engine':
+        return get_engine()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _create_session(**kwargs):
+    if 'bind' not in kwargs:
+        kwargs['bind'] = get_engine()
+    return _session_factory(**kwargs)
 
-# 创建数据库引擎
-engine = create_engine(
-    config.DATABASE_URI, 
-    pool_recycle=3600, 
-    pool_size=10, 
-    max_overflow=20,
-    pool_pre_ping=True,
-    echo=False  # 设置为True可以查看生成的SQL语句
-)
 
 # 创建线程安全的会话
-db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+db_session = scoped_session(_create_session)
 
 # 创建基类
 class Base(DeclarativeBase):
@@ -26,10 +69,10 @@ def init_db():
     """初始化数据库，创建所有表"""
     # 在这里导入定义模型的所有模块，以便它们在元数据上正确注册。
     # 否则，您必须在调用 init_db() 之前先导入它们。
-    
+
     from coinx import models
-    
-    Base.metadata.create_all(bind=engine)
+
+    Base.metadata.create_all(bind=get_engine())
 
 def get_session():
     """获取一个新的会话"""
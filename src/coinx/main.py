@@ -9,19 +9,20 @@ import logging
 from coinx.config import WEB_DEBUG, WEB_HOST, WEB_PORT
 from coinx.runtime import start_runtime_services
 from coinx.web.app import app
-from coinx.scheduler import scheduler
+from coinx.shutdown import graceful_shutdown, is_shutting_down
 from coinx.utils import logger
 
 def signal_handler(sig, frame):
-    """信号处理函数，用于快速关闭应用与后台线程"""
+    """信号处理函数：有序关闭后台任务并保存状态后退出；关闭过程中再次收到信号则立即退出"""
+    if is_shutting_down():
+        logger.warning("再次收到关闭信号，立即退出")
+        logging.shutdown()
+        os._exit(1)
     logger.info("接收到关闭信号，正在停止应用...")
     try:
-        # 关闭调度器
-        if scheduler.running:
-            scheduler.shutdown(wait=False)
-            logger.info("调度器已强制关闭")
+        graceful_shutdown()
     except Exception as e:
-        logger.error(f"关闭调度器时出错: {e}")
+        logger.error(f"有序关闭时出错: {e}")
 
     logger.info("应用已停止")
     logging.shutdown()
@@ -53,13 +54,11 @@ def main():
         logger.error(f"主程序运行出错: {e}")
         logger.exception(e)
     finally:
-        # 确保调度器被正确关闭
+        # 确保后台任务被有序关闭（已关闭过时直接返回）
         try:
-            if scheduler.running:
-                scheduler.shutdown(wait=False)
-                logger.info("调度器已强制关闭")
+            graceful_shutdown()
         except Exception as e:
-            logger.error(f"关闭调度器时出错: {e}")
+            logger.error(f"有序关闭时出错: {e}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,276 @@
+"""进程内指标与 Prometheus 文本格式导出（/metrics）。
+
+业务代码在热点路径上调用 inc_counter / observe / set_gauge，只在一把全局锁内做字典
+累加；限频状态、代理池、数据库连接池、通知队列等状态类指标不在平时维护，
+而是在抓取时由 _collect_runtime_gauges 逐项读取快照。渲染前先复制计数器，
+格式化在锁外完成，每 15 秒抓取一次不会阻塞采集线程。
+"""
+import hmac
+import math
+import threading
+
+from coinx import config
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+METRIC_DEFINITIONS = {
+    'coinx_exchange_requests_total': (COUNTER, '交易所 HTTP 请求次数（每次重试单独计数）'),
+    'coinx_exchange_request_duration_seconds': (HISTOGRAM, '交易所 HTTP 请求耗时'),
+    'coinx_rate_limit_remaining': (GAUGE, '交易所响应头中的剩余请求额度'),
+    'coinx_rate_limit_limit': (GAUGE, '交易所响应头中的额度上限'),
+    'coinx_rate_limit_cooldown_seconds': (GAUGE, '限频分组剩余冷却秒数'),
+    'coinx_exchange_budget_waiting': (GAUGE, '预算仲裁中按请求类别排队的请求数'),
+    'coinx_exchange_budget_admitted_total': (COUNTER, '预算仲裁放行的请求数'),
+    'coinx_exchange_budget_preempted_total': (COUNTER, '预算仲裁让出的低优先级请求数'),
+    'coinx_proxy_pool_size': (GAUGE, 'OKX 代理池中的代理数量'),
+    'coinx_proxy_available': (GAUGE, '代理当前是否可用（不在冷却中）'),
+    'coinx_proxy_cooldown_seconds': (GAUGE, '代理剩余冷却秒数'),
+    'coinx_repair_records_fetched_total': (COUNTER, '修补任务从交易所取回的记录数'),
+    'coinx_repair_records_written_total': (COUNTER, '修补任务写库的记录数'),
+    'coinx_series_upsert_rows_total': (COUNTER, '分批写入序列表的行数'),
+    'coinx_series_upsert_seconds_total': (COUNTER, '分批写入序列表的累计耗时'),
+    'coinx_series_upsert_rows_per_second': (GAUGE, '最近一次分批写入的速率'),
+    'coinx_cache_requests_total': (COUNTER, '缓存读取次数，result 为 hit/miss'),
+    'coinx_cache_build_duration_seconds': (HISTOGRAM, '缓存未命中时重建快照的耗时'),
+    'coinx_job_duration_seconds': (HISTOGRAM, '定时任务运行耗时'),
+    'coinx_job_running': (GAUGE, '定时任务是否正在运行'),
+    'coinx_job_last_duration_seconds': (GAUGE, '定时任务最近一次运行耗时'),
+    'coinx_notification_outbox_depth': (GAUGE, '通知队列中待发送/发送中的消息数'),
+    'coinx_notification_batches_in_flight': (GAUGE, '正在发送的通知批次数'),
+    'coinx_db_pool_size': (GAUGE, 'SQLAlchemy 连接池容量'),
+    'coinx_db_pool_checked_out': (GAUGE, 'SQLAlchemy 连接池已借出的连接数'),
+    'coinx_db_pool_overflow': (GAUGE, 'SQLAlchemy 连接池溢出连接数'),
+    'coinx_db_pool_checkouts_total': (COUNTER, 'SQLAlchemy 连接池借出次数'),
+    'coinx_http_requests_total': (COUNTER, 'Web 请求次数'),
+    'coinx_http_request_duration_seconds': (HISTOGRAM, 'Web 请求耗时'),
+}
+
+METRICS_LOCK = threading.Lock()
+_COUNTERS = {}
+_GAUGES = {}
+_HISTOGRAMS = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc_counter(name, value=1.0, **labels):
+    if not value:
+        return
+    key = _key(name, labels)
+    with METRICS_LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0.0) + value
+
+
+def set_gauge(name, value, **labels):
+    key = _key(name, labels)
+    with METRICS_LOCK:
+        _GAUGES[key] = float(value)
+
+
+def observe(name, seconds, **labels):
+    """记录一次耗时到直方图，桶边界为 DURATION_BUCKETS_SECONDS。"""
+    seconds = max(0.0, float(seconds))
+    key = _key(name, labels)
+    with METRICS_LOCK:
+        histogram = _HISTOGRAMS.get(key)
+        if histogram is None:
+            histogram = _HISTOGRAMS[key] = [[0] * len(DURATION_BUCKETS_SECONDS), 0.0, 0]
+        for index, bound in enumerate(DURATION_BUCKETS_SECONDS):
+            if seconds <= bound:
+                histogram[0][index] += 1
+                break
+        histogram[1] += seconds
+        histogram[2] += 1
+
+
+def record_cache_lookup(cache, hit):
+    inc_counter('coinx_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+
+def _format_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 'NaN'
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + list(extra or [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+def _histogram_lines(name, labels, histogram):
+    buckets, total, count = histogram
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(DURATION_BUCKETS_SECONDS, buckets):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", _format_value(float(bound)))])} {cumulative}')
+    lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {count}')
+    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+    lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    return lines
+
+
+def _collect_rate_limits(gauges, counters):
+    from coinx.collector.binance.client import _binance_rate_limits
+    from coinx.collector.bybit.series import _bybit_rate_limits
+    from coinx.collector.gate.series import _gate_rate_limits
+    from coinx.collector.okx.series import _okx_rate_limits
+
+    for registry in (_binance_rate_limits, _okx_rate_limits, _bybit_rate_limits, _gate_rate_limits):
+        for (exchange, group, proxy_id), state in registry.snapshot_states().items():
+            labels = {'exchange': exchange, 'group': group, 'proxy': proxy_id}
+            gauges[_key('coinx_rate_limit_cooldown_seconds', labels)] = state['cooldown_seconds']
+            if state['remain'] is not None:
+                gauges[_key('coinx_rate_limit_remaining', labels)] = state['remain']
+            if state['limit'] is not None:
+                gauges[_key('coinx_rate_limit_limit', labels)] = state['limit']
+
+
+def _collect_exchange_budget(gauges, counters):
+    from coinx.collector.rate_limit import exchange_budget
+
+    for exchange, classes in exchange_budget.queue_depths().items():
+        for request_class, stats in classes.items():
+            labels = {'exchange': exchange, 'class': request_class}
+            gauges[_key('coinx_exchange_budget_waiting', labels)] = stats['waiting']
+            counters[_key('coinx_exchange_budget_admitted_total', labels)] = stats['admitted']
+            counters[_key('coinx_exchange_budget_preempted_total', labels)] = stats['preempted']
+
+
+def _collect_proxy_pool(gauges, counters):
+    from coinx.collector.proxy_pool import _okx_proxy_pool
+
+    proxies = _okx_proxy_pool.health_snapshot()
+    gauges[_key('coinx_proxy_pool_size', {})] = len(proxies)
+    for proxy in proxies:
+        labels = {'proxy': proxy['id']}
+        gauges[_key('coinx_proxy_available', labels)] = 0 if proxy['cooldown_seconds'] > 0 else 1
+        gauges[_key('coinx_proxy_cooldown_seconds', labels)] = proxy['cooldown_seconds']
+
+
+def _collect_contract_detail_cache(gauges, counters):
+    from coinx.repositories.contract_detail_cache import get_contract_detail_cache_stats
+
+    stats = get_contract_detail_cache_stats()
+    counters[_key('coinx_cache_requests_total', {'cache': 'contract_detail', 'result': 'hit'})] = stats['hits']
+    counters[_key('coinx_cache_requests_total', {'cache': 'contract_detail', 'result': 'miss'})] = stats['misses']
+
+
+def _collect_jobs(gauges, counters):
+    from coinx.scheduler import get_all_job_runtime_metadata
+
+    for job_id, metadata in get_all_job_runtime_metadata().items():
+        gauges[_key('coinx_job_running', {'job': job_id})] = 1 if metadata.get('running') else 0
+        if metadata.get('last_duration_ms') is not None:
+            gauges[_key('coinx_job_last_duration_seconds', {'job': job_id})] = metadata['last_duration_ms'] / 1000.0
+
+
+def _collect_notification_queue(gauges, counters):
+    from coinx import config
+    from coinx.notification_delivery import get_outbox_depth
+
+    if not config.NOTIFICATIONS_ENABLED:
+        return
+    depth = get_outbox_depth()
+    for status, count in depth['statuses'].items():
+        gauges[_key('coinx_notification_outbox_depth', {'status': status})] = count
+    gauges[_key('coinx_notification_batches_in_flight', {})] = depth['in_flight']
+
+
+def _collect_db_pool(gauges, counters):
+    from coinx.database import get_engine
+
+    pool = get_engine().pool
+    for name, method in (
+        ('coinx_db_pool_size', 'size'),
+        ('coinx_db_pool_checked_out', 'checkedout'),
+        ('coinx_db_pool_overflow', 'overflow'),
+    ):
+        if hasattr(pool, method):
+            gauges[_key(name, {})] = getattr(pool, method)()
+
+
+RUNTIME_COLLECTORS = (
+    ('rate_limit', _collect_rate_limits),
+    ('exchange_budget', _collect_exchange_budget),
+    ('proxy_pool', _collect_proxy_pool),
+    ('contract_detail_cache', _collect_contract_detail_cache),
+    ('jobs', _collect_jobs),
+    ('notification_queue', _collect_notification_queue),
+    ('db_pool', _collect_db_pool),
+)
+
+
+def _collect_runtime_gauges(gauges, counters):
+    # database 在建引擎时就会导入本模块，logger 所在的 utils 又依赖 database，这里延迟导入
+    from coinx.utils import logger
+
+    for name, collector in RUNTIME_COLLECTORS:
+        try:
+            collector(gauges, counters)
+        except Exception as exc:
+            logger.warning('指标采集失败: collector=%s error=%s', name, exc)
+
+
+def is_metrics_authorization_valid(authorization):
+    """METRICS_PUBLIC 或 Authorization: Bearer <METRICS_AUTH_TOKEN> 匹配时返回 True。"""
+    if config.METRICS_PUBLIC:
+        return True
+    token = config.METRICS_AUTH_TOKEN
+    if not token:
+        return False
+    scheme, _, value = (authorization or '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(value.strip().encode(), token.encode())
+
+
+def render_metrics():
+    """返回 Prometheus 文本格式（0.0.4）的全部指标。"""
+    with METRICS_LOCK:
+        counters = dict(_COUNTERS)
+        gauges = dict(_GAUGES)
+        histograms = {key: [list(value[0]), value[1], value[2]] for key, value in _HISTOGRAMS.items()}
+    _collect_runtime_gauges(gauges, counters)
+
+    families = {}
+    for source in (counters, gauges, histograms):
+        for (name, labels), value in source.items():
+            families.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(families):
+        metric_type, help_text = METRIC_DEFINITIONS.get(name, (GAUGE, name))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for labels, value in sorted(families[name]):
+            if metric_type == HISTOGRAM:
+                lines.extend(_histogram_lines(name, labels, value))
+            else:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset_metrics():
+    with METRICS_LOCK:
+        _COUNTERS.clear()
+        _GAUGES.clear()
+        _HISTOGRAMS.clear()
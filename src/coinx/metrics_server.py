@@ -0,0 +1,67 @@
+"""独立采集进程的 Prometheus 指标接口。
+
+采集进程（coinx-collector）不运行 Flask，交易所请求、限频、修补与任务耗时等指标都在
+它自己的进程内存里。这里用标准库 http.server 在 METRICS_PORT 上只提供 GET /metrics，
+鉴权与 Web 进程的 /metrics 相同：METRICS_PUBLIC=true 不校验，否则要求
+Authorization: Bearer <METRICS_AUTH_TOKEN>；采集进程没有登录页，未配置 token 时一律返回 401。
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from coinx import config
+from coinx.metrics import PROMETHEUS_CONTENT_TYPE, is_metrics_authorization_valid, render_metrics
+from coinx.utils import logger
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'coinx-collector-metrics'
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics' or not config.METRICS_ENABLED:
+            self._send(404, 'not found\n')
+            return
+        if not is_metrics_authorization_valid(self.headers.get('Authorization')):
+            self._send(401, 'unauthorized\n', {'WWW-Authenticate': 'Bearer'})
+            return
+        try:
+            body = render_metrics()
+        except Exception as exc:
+            logger.warning('采集进程指标渲染失败: %s', exc)
+            self._send(500, 'failed to render metrics\n')
+            return
+        self._send(200, body, content_type=PROMETHEUS_CONTENT_TYPE)
+
+    def _send(self, status, body, headers=None, content_type='text/plain; charset=utf-8'):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug('采集进程指标请求: %s %s', self.address_string(), format % args)
+
+
+def start_metrics_server(port=None, host=None):
+    """在后台线程启动指标接口并返回 server；端口为 0 时由系统分配（见 server.server_address）。"""
+    server = ThreadingHTTPServer(
+        (host if host is not None else config.METRICS_HOST, config.METRICS_PORT if port is None else port),
+        MetricsRequestHandler,
+    )
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='coinx-metrics', daemon=True)
+    thread.start()
+    if not config.METRICS_PUBLIC and not config.METRICS_AUTH_TOKEN:
+        logger.warning('未配置 METRICS_AUTH_TOKEN，采集进程 /metrics 将拒绝所有请求')
+    logger.info('采集进程指标接口已启动: %s:%s/metrics', *server.server_address[:2])
+    return server
+
+
+def stop_metrics_server(server):
+    if server is None:
+        return
+    server.shutdown()
+    server.server_close()
@@ -16,12 +16,20 @@ from sqlalchemy import (
     UniqueConstraint,
 )
 
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+
+from coinx import config
 from coinx.database import Base
 
 
 SQLITE_BIGINT_PK = BigInteger().with_variant(Integer, 'sqlite')
 
 
+def _not_starrocks(*args, **kwargs):
+    """StarRocks 不支持 CREATE INDEX 二级索引，相关表的排序与分桶见 sql/schema_starrocks.sql。"""
+    return config.DB_TYPE != 'starrocks'
+
+
 class Coin(Base):
 
     __tablename__ = 'coins'
@@ -74,6 +82,82 @@ class MarketSnapshot(Base):
         return f"<MarketSnapshot(symbol='{self.symbol}', time={self.snapshot_time})>"
 
 
+class CoinRegistryVersion(Base):
+    """跟踪币种集合的版本号，任一进程修改 coins 后递增，其他进程轮询发现变化后重新加载。"""
+
+    __tablename__ = 'coin_registry_versions'
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f"<CoinRegistryVersion(name='{self.name}', version={self.version})>"
+
+
+class CollectorNode(Base):
+    """采集节点心跳租约；lease_expires_at 之前视为存活，参与币种分片。"""
+
+    __tablename__ = 'collector_nodes'
+
+    node_id = Column(String(128), primary_key=True)
+    hostname = Column(String(255))
+    started_at = Column(BigInteger, nullable=False)
+    heartbeat_at = Column(BigInteger, nullable=False)
+    lease_expires_at = Column(BigInteger, nullable=False, index=True)
+
+
+class JobRun(Base):
+    """定时任务每次运行的耗时记录；breakdown_json 保存整体与各交易所的耗时分类（毫秒）。"""
+
+    __tablename__ = 'job_runs'
+    __table_args__ = (
+        Index('idx_job_runs_job_finished', 'job_id', 'finished_at').ddl_if(callable_=_not_starrocks),
+        Index('idx_job_runs_finished', 'finished_at').ddl_if(callable_=_not_starrocks),
+    )
+
+    id = Column(SQLITE_BIGINT_PK, primary_key=True, autoincrement=True)
+    job_id = Column(String(64), nullable=False)
+    node_id = Column(String(128))
+    status = Column(String(20), nullable=False)
+    started_at = Column(BigInteger)
+    finished_at = Column(BigInteger, nullable=False)
+    duration_ms = Column(Integer)
+    breakdown_json = Column(JSON)
+    error_message = Column(String(500))
+
+
+class CollectorCommand(Base):
+    """Web 进程（PROCESS_ROLE=web）请求采集进程执行的手动补齐、刷新与任务控制操作。"""
+
+    __tablename__ = 'collector_commands'
+    __table_args__ = (
+        Index('idx_collector_commands_status_created', 'status', 'created_at'),
+    )
+
+    id = Column(SQLITE_BIGINT_PK, primary_key=True, autoincrement=True)
+    command = Column(String(64), nullable=False)
+    payload_json = Column(JSON)
+    status = Column(String(20), nullable=False)
+    created_at = Column(BigInteger, nullable=False)
+    claimed_by = Column(String(128))
+    started_at = Column(BigInteger)
+    finished_at = Column(BigInteger, index=True)
+    result_json = Column(JSON)
+    error_message = Column(String(500))
+
+
+class CollectorJobState(Base):
+    """采集进程发布的定时任务状态，Web 进程的任务管理页据此展示。"""
+
+    __tablename__ = 'collector_job_states'
+
+    job_id = Column(String(64), primary_key=True)
+    node_id = Column(String(128))
+    state_json = Column(JSON)
+    updated_at = Column(BigInteger, nullable=False)
+
+
 class MarketTickers(Base):
 
     __tablename__ = 'market_tickers'
@@ -105,6 +189,26 @@ class MarketTickers(Base):
         return f"<MarketTickers(symbol='{self.symbol}', close_time={self.close_time})>"
 
 
+class MarketTickerSnapshot(Base):
+    """行情快照压缩存储，每个快照一行，各字段按列打包。"""
+
+    __tablename__ = 'market_ticker_snapshots'
+    __table_args__ = (
+        UniqueConstraint('close_time', name='uk_mts_close_time'),
+        {'comment': '行情快照列式压缩存储'}
+    )
+
+    id = Column(SQLITE_BIGINT_PK, primary_key=True, autoincrement=True)
+    close_time = Column(BigInteger, nullable=False, comment='快照时间戳（毫秒）')
+    symbol_count = Column(Integer, nullable=False, comment='快照内币种数量')
+    encoding = Column(String(20), nullable=False, comment='payload 编码版本')
+    payload = Column(Text().with_variant(MEDIUMTEXT(), 'mysql'), nullable=False, comment='列式打包后压缩的快照数据')
+    created_at = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<MarketTickerSnapshot(close_time={self.close_time}, symbol_count={self.symbol_count})>"
+
+
 class MarketOpenInterestHist(Base):
 
     __tablename__ = 'market_open_interest_hist'
@@ -203,6 +307,61 @@ class MarketFundingRate(Base):
         return f"<MarketFundingRate(symbol='{self.symbol}', predicted_rate={self.predicted_rate})>"
 
 
+class MarketFundingRateLatest(Base):
+    """各交易所最新资金费率缓存，每个交易所每个币种一行。"""
+
+    __tablename__ = 'market_funding_rate_latest'
+    __table_args__ = (
+        UniqueConstraint('exchange', 'symbol', name='uk_mfrl_exchange_symbol'),
+        {'comment': '各交易所最新资金费率缓存'}
+    )
+
+    id = Column(SQLITE_BIGINT_PK, primary_key=True, autoincrement=True)
+    exchange = Column(String(20), nullable=False, comment='交易所')
+    symbol = Column(String(20), nullable=False, comment='交易对名称')
+    funding_rate = Column(Numeric(20, 8), comment='当前资金费率')
+    predicted_rate = Column(Numeric(20, 8), comment='预测费率（下次结算）')
+    next_funding_time = Column(BigInteger, comment='下次结算时间戳（毫秒）')
+    mark_price = Column(Numeric(20, 8), comment='标记价格')
+    event_time = Column(BigInteger, comment='交易所数据时间戳（毫秒）')
+    fetched_time = Column(BigInteger, nullable=False, comment='采集时间戳（毫秒）')
+
+    def __repr__(self):
+        return f"<MarketFundingRateLatest(exchange='{self.exchange}', symbol='{self.symbol}')>"
+
+
+class MarketStructureScore(Base):
+    """合约市场结构评分快照，每个锚点每个币种一行。"""
+
+    __tablename__ = 'market_structure_scores'
+    __table_args__ = (
+        UniqueConstraint('symbol', 'anchor_time', name='uk_mss_symbol_anchor_time'),
+        Index('idx_mss_anchor_time', 'anchor_time'),
+        {'comment': '合约市场结构评分快照'}
+    )
+
+    id = Column(SQLITE_BIGINT_PK, primary_key=True, autoincrement=True)
+    symbol = Column(String(20), nullable=False, comment='交易对名称')
+    anchor_time = Column(BigInteger, nullable=False, comment='评分锚点（5m K 线开盘时间，毫秒）')
+    rank_index = Column(Integer, comment='锚点内排名')
+    status = Column(String(16), comment='complete / partial')
+    total_score = Column(Numeric(12, 4), comment='总分')
+    trend_score = Column(Numeric(12, 4), comment='趋势分')
+    momentum_score = Column(Numeric(12, 4), comment='动能分')
+    position_score = Column(Numeric(12, 4), comment='持仓结构分')
+    sentiment_score = Column(Numeric(12, 4), comment='情绪分')
+    risk_score = Column(Numeric(12, 4), comment='风险分')
+    trade_signal = Column(String(16), comment='交易信号')
+    risk_level = Column(String(8), comment='风险等级')
+    current_price = Column(Numeric(30, 8), comment='加权价格')
+    current_open_interest_value = Column(Numeric(30, 8), comment='持仓价值合计')
+    report_json = Column(JSON, nullable=False, default=dict, comment='完整评分明细（含各交易所评分与诊断）')
+    created_at = Column(DateTime, default=datetime.now, comment='创建时间')
+
+    def __repr__(self):
+        return f"<MarketStructureScore(symbol='{self.symbol}', anchor_time={self.anchor_time})>"
+
+
 class NotificationChannel(Base):
     __tablename__ = 'notification_channels'
 
@@ -256,6 +415,8 @@ class AlertState(Base):
     last_triggered_at = Column(BigInteger)
     last_notified_at = Column(BigInteger)
     last_recovered_at = Column(BigInteger)
+    # Optimistic lock: every state write bumps the version it was read at.
+    version = Column(Integer, nullable=False, default=0, server_default='0')
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
 
@@ -274,6 +435,26 @@ class NotificationDelivery(Base):
     sent_at = Column(BigInteger, nullable=False, index=True)
 
 
+class NotificationOutbox(Base):
+    """Pending deliveries written with the evaluation and sent by the delivery workers."""
+
+    __tablename__ = 'notification_outbox'
+
+    id = Column(SQLITE_BIGINT_PK, primary_key=True, autoincrement=True)
+    rule_id = Column(SQLITE_BIGINT_PK, nullable=True, index=True)
+    channel_id = Column(SQLITE_BIGINT_PK, nullable=False, index=True)
+    event_key = Column(String(255), nullable=False)
+    event_status = Column(String(20), nullable=False)
+    payload_json = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default='pending', index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(BigInteger, nullable=False, index=True)
+    claim_token = Column(String(40), index=True)
+    locked_until = Column(BigInteger)
+    last_error = Column(String(500))
+    created_at = Column(BigInteger, nullable=False)
+
+
 class AlertEvaluationRun(Base):
     __tablename__ = 'alert_evaluation_runs'
 
@@ -0,0 +1,383 @@
+"""Outbox-based asynchronous notification delivery.
+
+Rule evaluation only inserts rows into ``notification_outbox`` inside its own
+transaction and returns.  A dispatcher thread claims due rows, groups them per
+channel and hands each batch to a worker pool; every channel has its own
+concurrency limit, so a slow webhook only delays its own queue.  Several
+events for one channel are merged into a single message.  Failed sends are
+retried with exponential backoff; once a batch succeeds or runs out of
+attempts it is written to ``notification_deliveries`` and removed from the
+outbox.
+"""
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import and_, delete, event, func, or_, update
+
+from coinx import config, notifications
+from coinx.database import get_session
+from coinx.models import NotificationChannel, NotificationDelivery, NotificationOutbox
+from coinx.utils import logger
+
+
+OUTBOX_POLL_SECONDS = 2
+OUTBOX_CLAIM_SCAN_LIMIT = 500
+# A claimed batch that is not finished within the lease is claimed again.
+OUTBOX_LEASE_MS = 5 * 60 * 1000
+BATCH_SEPARATOR = '\n\n────────\n\n'
+
+_DISPATCHER_LOCK = threading.Lock()
+_DISPATCHER = None
+
+
+def _wake_after_commit(db):
+    if db.info.get('notification_wake_registered'):
+        return
+
+    def wake(session):
+        session.info.pop('notification_wake_registered', None)
+        wake_delivery_workers()
+
+    db.info['notification_wake_registered'] = True
+    event.listen(db, 'after_commit', wake, once=True)
+
+
+def enqueue_delivery(db, rule, channel, event_key, event_status, payload):
+    """Queue one rendered message; it is sent after the caller commits."""
+    timestamp = notifications.now_ms()
+    row = NotificationOutbox(
+        rule_id=rule.id if rule else None,
+        channel_id=channel.id,
+        event_key=event_key,
+        event_status=event_status,
+        payload_json=payload,
+        status='pending',
+        attempts=0,
+        next_attempt_at=timestamp,
+        created_at=timestamp,
+    )
+    db.add(row)
+    _wake_after_commit(db)
+    return row
+
+
+def ensure_outbox_table(db):
+    """Create the additive outbox table for deployments with an older schema."""
+    NotificationOutbox.__table__.create(bind=db.get_bind(), checkfirst=True)
+
+
+def _due_condition(now):
+    return or_(
+        and_(NotificationOutbox.status == 'pending', NotificationOutbox.next_attempt_at <= now),
+        and_(NotificationOutbox.status == 'sending', NotificationOutbox.locked_until < now),
+    )
+
+
+def _plan_batches(rows, busy_slots=None):
+    """Split due rows into per-channel batches respecting channel concurrency."""
+    busy_slots = busy_slots or {}
+    batch_size = max(1, int(config.NOTIFICATION_BATCH_MAX_EVENTS))
+    concurrency = max(1, int(config.NOTIFICATION_CHANNEL_CONCURRENCY))
+    rows_by_channel = defaultdict(list)
+    for row in rows:
+        rows_by_channel[row.channel_id].append(row.id)
+
+    batches = []
+    for channel_id, ids in rows_by_channel.items():
+        free_slots = concurrency - busy_slots.get(channel_id, 0)
+        for start in range(0, len(ids), batch_size):
+            if free_slots <= 0:
+                break
+            batches.append((channel_id, ids[start:start + batch_size]))
+            free_slots -= 1
+    return batches
+
+
+def claim_due_batches(db, busy_slots=None, now=None):
+    """Claim due outbox rows and return ``[(channel_id, [outbox_id, ...], claim_token), ...]``.
+
+    Claims are made with a conditional UPDATE, so several processes can poll
+    the same outbox without sending a row twice within its lease.  The token
+    identifies this claim; a row whose lease expired and was claimed again
+    carries a new token and is no longer touched by the old batch.
+    """
+    now = notifications.now_ms() if now is None else now
+    rows = db.query(NotificationOutbox.id, NotificationOutbox.channel_id).filter(
+        _due_condition(now),
+    ).order_by(NotificationOutbox.id.asc()).limit(OUTBOX_CLAIM_SCAN_LIMIT).all()
+    batches = _plan_batches(rows, busy_slots)
+    if not batches:
+        return []
+
+    token = uuid.uuid4().hex
+    planned_ids = [outbox_id for _channel_id, ids in batches for outbox_id in ids]
+    db.execute(update(NotificationOutbox).where(
+        NotificationOutbox.id.in_(planned_ids),
+        _due_condition(now),
+    ).values(
+        status='sending',
+        claim_token=token,
+        locked_until=now + OUTBOX_LEASE_MS,
+    ).execution_options(synchronize_session=False))
+    db.commit()
+
+    claimed_ids = {
+        row.id for row in db.query(NotificationOutbox.id).filter(NotificationOutbox.claim_token == token).all()
+    }
+    return [
+        (channel_id, [outbox_id for outbox_id in ids if outbox_id in claimed_ids], token)
+        for channel_id, ids in batches
+        if any(outbox_id in claimed_ids for outbox_id in ids)
+    ]
+
+
+def build_batch_message(rows):
+    """Merge the rendered messages of one channel batch into a single message."""
+    messages = [row.payload_json.get('message') or {} for row in rows]
+    if len(messages) == 1:
+        return messages[0].get('title', ''), messages[0].get('body', '')
+    body = BATCH_SEPARATOR.join(
+        f"【{message.get('title', '')}】\n{message.get('body', '')}" for message in messages
+    )
+    return f'CoinX · {len(messages)} 条通知', body
+
+
+def _retry_delay_ms(attempts):
+    delay_seconds = int(config.NOTIFICATION_RETRY_BASE_SECONDS) * (2 ** max(attempts - 1, 0))
+    return min(delay_seconds, int(config.NOTIFICATION_RETRY_MAX_SECONDS)) * 1000
+
+
+def _finish_rows(db, rows, claim_token, attempts, delivery_status, error_message, timestamp):
+    """Move rows that still carry ``claim_token`` into the delivery log."""
+    finished = 0
+    for row in rows:
+        deleted = db.execute(delete(NotificationOutbox).where(
+            NotificationOutbox.id == row.id,
+            NotificationOutbox.claim_token == claim_token,
+        ).execution_options(synchronize_session=False)).rowcount
+        if not deleted:
+            continue
+        finished += 1
+        payload = dict(row.payload_json or {})
+        payload['delivery'] = {'attempts': attempts, 'batch_size': len(rows)}
+        db.add(NotificationDelivery(
+            rule_id=row.rule_id,
+            channel_id=row.channel_id,
+            event_key=row.event_key,
+            event_status=row.event_status,
+            payload_json=payload,
+            delivery_status=delivery_status,
+            error_message=error_message,
+            sent_at=timestamp,
+        ))
+    if finished < len(rows):
+        logger.warning(
+            '通知批次租约已被重新领取，跳过已转交的事件: events=%d finished=%d',
+            len(rows), finished,
+        )
+    return finished
+
+
+def deliver_channel_batch(channel_id, outbox_ids, claim_token, session=None):
+    """Send one claimed batch and record the outcome; never raises on send errors.
+
+    Only rows still holding ``claim_token`` are sent, finished or rescheduled.
+    """
+    own_session = session is None
+    db = session or get_session()
+    try:
+        rows = db.query(NotificationOutbox).filter(
+            NotificationOutbox.id.in_(outbox_ids),
+            NotificationOutbox.claim_token == claim_token,
+        ).order_by(NotificationOutbox.id.asc()).all()
+        if not rows:
+            return {'status': 'skipped', 'sent': 0}
+
+        timestamp = notifications.now_ms()
+        attempts = int(rows[0].attempts or 0) + 1
+        channel = db.get(NotificationChannel, channel_id)
+        try:
+            if channel is None or not channel.enabled:
+                raise notifications.NotificationConfigError('notification channel is missing or disabled')
+            title, body = build_batch_message(rows)
+            notifications.send_apprise(notifications.cached_apprise_url(channel), title, body)
+        except Exception as exc:
+            error_message = str(exc)[:500]
+            terminal = (
+                isinstance(exc, notifications.NotificationConfigError)
+                or attempts >= int(config.NOTIFICATION_MAX_ATTEMPTS)
+            )
+            logger.warning(
+                '通知发送失败: channel=%s events=%d attempt=%d terminal=%s error=%s',
+                channel_id, len(rows), attempts, terminal, error_message,
+            )
+            if terminal:
+                _finish_rows(db, rows, claim_token, attempts, 'failed', error_message, timestamp)
+                status = 'failed'
+            else:
+                db.execute(update(NotificationOutbox).where(
+                    NotificationOutbox.id.in_([row.id for row in rows]),
+                    NotificationOutbox.claim_token == claim_token,
+                ).values(
+                    status='pending',
+                    claim_token=None,
+                    locked_until=None,
+                    attempts=attempts,
+                    next_attempt_at=timestamp + _retry_delay_ms(attempts),
+                    last_error=error_message,
+                ).execution_options(synchronize_session=False))
+                status = 'retry'
+            db.commit()
+            return {'status': status, 'sent': 0, 'events': len(rows)}
+
+        _finish_rows(db, rows, claim_token, attempts, 'success', None, timestamp)
+        db.commit()
+        return {'status': 'success', 'sent': 1, 'events': len(rows)}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def process_notification_outbox(session=None):
+    """Claim and send every due batch inline; returns a summary of the round."""
+    own_session = session is None
+    db = session or get_session()
+    summary = {'batches': 0, 'events': 0, 'sent': 0, 'retry': 0, 'failed': 0}
+    try:
+        for channel_id, outbox_ids, claim_token in claim_due_batches(db):
+            result = deliver_channel_batch(channel_id, outbox_ids, claim_token, session=db)
+            summary['batches'] += 1
+            summary['events'] += result.get('events', 0)
+            summary['sent'] += result['sent']
+            if result['status'] in ('retry', 'failed'):
+                summary[result['status']] += 1
+        return summary
+    finally:
+        if own_session:
+            db.close()
+
+
+class NotificationDeliveryDispatcher:
+    """Poll the outbox and feed per-channel batches to a worker pool."""
+
+    def __init__(self, workers=None, poll_seconds=OUTBOX_POLL_SECONDS):
+        self.workers = max(1, int(workers or config.NOTIFICATION_DELIVERY_WORKERS))
+        self.poll_seconds = poll_seconds
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.busy_lock = threading.Lock()
+        self.busy_slots = defaultdict(int)
+        self.executor = None
+        self.thread = None
+
+    def start(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='notify')
+        self.thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+        self.thread.start()
+        logger.info('通知投递线程已启动: workers=%d', self.workers)
+        return self
+
+    def wake(self):
+        self.wake_event.set()
+
+    def stop(self, timeout=None):
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        logger.info('通知投递线程已停止')
+
+    def _run(self):
+        db = get_session()
+        try:
+            ensure_outbox_table(db)
+        except Exception as exc:
+            logger.warning('通知队列表检查失败: %s', exc)
+        finally:
+            db.close()
+
+        while not self.stop_event.is_set():
+            try:
+                self._dispatch_round()
+            except Exception:
+                logger.exception('通知投递调度异常')
+            self.wake_event.wait(self.poll_seconds)
+            self.wake_event.clear()
+
+    def _dispatch_round(self):
+        with self.busy_lock:
+            busy_slots = dict(self.busy_slots)
+        db = get_session()
+        try:
+            batches = claim_due_batches(db, busy_slots=busy_slots)
+        finally:
+            db.close()
+        for channel_id, outbox_ids, claim_token in batches:
+            with self.busy_lock:
+                self.busy_slots[channel_id] += 1
+            future = self.executor.submit(deliver_channel_batch, channel_id, outbox_ids, claim_token)
+            future.add_done_callback(lambda done, channel_id=channel_id: self._batch_done(channel_id, done))
+
+    def _batch_done(self, channel_id, future):
+        with self.busy_lock:
+            self.busy_slots[channel_id] -= 1
+            if self.busy_slots[channel_id] <= 0:
+                del self.busy_slots[channel_id]
+        if future.exception() is not None:
+            logger.error('通知批次发送异常: channel=%s error=%s', channel_id, future.exception())
+        # A free channel slot may unblock queued rows for the same channel.
+        self.wake()
+
+
+def get_outbox_depth(session=None):
+    """Queued outbox rows by status plus batches currently being sent."""
+    own_session = session is None
+    db = session or get_session()
+    try:
+        rows = db.query(NotificationOutbox.status, func.count(NotificationOutbox.id)).filter(
+            NotificationOutbox.status.in_(('pending', 'sending')),
+        ).group_by(NotificationOutbox.status).all()
+    finally:
+        if own_session:
+            db.close()
+    statuses = {'pending': 0, 'sending': 0}
+    statuses.update({status: count for status, count in rows})
+    dispatcher = _DISPATCHER
+    in_flight = 0
+    if dispatcher is not None:
+        with dispatcher.busy_lock:
+            in_flight = sum(dispatcher.busy_slots.values())
+    return {'statuses': statuses, 'in_flight': in_flight}
+
+
+def wake_delivery_workers():
+    dispatcher = _DISPATCHER
+    if dispatcher is not None:
+        dispatcher.wake()
+
+
+def start_notification_delivery():
+    """Start the process-wide dispatcher once; returns it, or None in sync mode."""
+    global _DISPATCHER
+    if config.NOTIFICATION_DELIVERY_MODE == 'sync':
+        logger.info('通知投递为同步模式，不启动后台发送线程')
+        return None
+    with _DISPATCHER_LOCK:
+        if _DISPATCHER is None:
+            _DISPATCHER = NotificationDeliveryDispatcher().start()
+        return _DISPATCHER
+
+
+def stop_notification_delivery(timeout=None):
+    global _DISPATCHER
+    with _DISPATCHER_LOCK:
+        dispatcher, _DISPATCHER = _DISPATCHER, None
+    if dispatcher is not None:
+        dispatcher.stop(timeout)
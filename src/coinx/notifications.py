@@ -5,13 +5,16 @@ failures are recorded but never allowed to fail a collection or repair job.
 """
 import time
 import threading
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Callable
 from urllib.parse import urlsplit
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import text, update
+from sqlalchemy import bindparam, inspect, text, update
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 
 from cryptography.fernet import Fernet, InvalidToken
 from coinx import config
@@ -25,7 +28,10 @@ from coinx.models import (
     NotificationChannel,
     NotificationDelivery,
 )
+from coinx.collector.exchange_repair import latest_closed_5m_open_time
 from coinx.repositories.funding_rate import load_latest_funding_rates
+from coinx.repositories.price_volume_metrics import PRICE_VOLUME_LOOKBACK_MS, load_price_volume_metrics
+from coinx.repositories.series_frame import SERIES_FRAME_WINDOW_POINTS, get_cached_series_frame
 from coinx.utils import logger
 
 
@@ -41,6 +47,14 @@ EVENT_SCOPE = {
 
 EVALUATION_RUN_LOCK = threading.Lock()
 ACTIVE_EVALUATION_RUN_IDS = set()
+STATE_CAS_ATTEMPTS = 3
+ALERT_STATE_VERSION_CHECKED = False
+# Decrypted channel URLs and their Apprise objects are reused across sends;
+# the cache key includes the ciphertext, so editing a channel invalidates it.
+APPRISE_CACHE_SIZE = 64
+APPRISE_CACHE_LOCK = threading.Lock()
+DECRYPTED_URL_CACHE = OrderedDict()
+APPRISE_NOTIFIER_CACHE = OrderedDict()
 NOTIFICATION_TIME_ZONE = ZoneInfo('Asia/Shanghai')
 APPRISE_TARGET_TYPES = {
     'bark': 'Bark',
@@ -67,33 +81,43 @@ def _evaluation_run_lock_name(run_id):
     return f'coinx_alert_evaluation_{run_id}'
 
 
-def _acquire_evaluation_lease(db, name):
+def _acquire_evaluation_lease(db, name, connection=None):
+    """Take a MySQL advisory lock, optionally on a connection that holds others.
+
+    Several named locks can share one connection, so a batch of rules needs
+    one extra connection instead of two per rule.
+    """
     if db.get_bind().dialect.name != 'mysql':
         return True, None
-    connection = db.get_bind().connect()
+    own_connection = connection is None
+    connection = connection or db.get_bind().connect()
     try:
         acquired = connection.execute(
             text('SELECT GET_LOCK(:name, 0)'), {'name': name},
         ).scalar() == 1
         if not acquired:
-            connection.close()
+            if own_connection:
+                connection.close()
             return False, None
         return True, connection
     except Exception:
-        connection.close()
+        if own_connection:
+            connection.close()
         raise
 
 
-def _release_evaluation_lease(connection, name):
+def _release_evaluation_lease(connection, name, close=True):
     if connection is None:
         return
     try:
-        connection.execute(text('SELECT RELEASE_LOCK(:name)'), {'name': name})
+        if name:
+            connection.execute(text('SELECT RELEASE_LOCK(:name)'), {'name': name})
     finally:
-        connection.close()
+        if close:
+            connection.close()
 
 
-def acquire_evaluation_run_lease(db, run_id):
+def acquire_evaluation_run_lease(db, run_id, connection=None):
     """Hold a MySQL advisory lock for an active evaluation run.
 
     A separate connection owns the lock because evaluator commits must not
@@ -105,7 +129,7 @@ def acquire_evaluation_run_lease(db, run_id):
         return True, None
     try:
         acquired, connection = _acquire_evaluation_lease(
-            db, _evaluation_run_lock_name(run_id),
+            db, _evaluation_run_lock_name(run_id), connection,
         )
         if acquired:
             return True, connection
@@ -118,12 +142,12 @@ def acquire_evaluation_run_lease(db, run_id):
         raise
 
 
-def release_evaluation_run_lease(run_id, connection):
+def release_evaluation_run_lease(run_id, connection, close=True):
     with EVALUATION_RUN_LOCK:
         ACTIVE_EVALUATION_RUN_IDS.discard(run_id)
     if connection is None:
         return
-    _release_evaluation_lease(connection, _evaluation_run_lock_name(run_id))
+    _release_evaluation_lease(connection, _evaluation_run_lock_name(run_id), close=close)
 
 
 def is_evaluation_run_active(db, run_id):
@@ -186,10 +210,42 @@ def decrypt_apprise_url(channel):
         raise NotificationConfigError('unable to decrypt notification channel') from exc
 
 
+def _cache_get(cache, key):
+    with APPRISE_CACHE_LOCK:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def _cache_put(cache, key, value):
+    with APPRISE_CACHE_LOCK:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > APPRISE_CACHE_SIZE:
+            cache.popitem(last=False)
+    return value
+
+
+def cached_apprise_url(channel):
+    """Decrypt a channel URL once per ciphertext and encryption key."""
+    key = (config.NOTIFICATION_ENCRYPTION_KEY, channel.config_encrypted)
+    url = _cache_get(DECRYPTED_URL_CACHE, key)
+    if url is None:
+        url = _cache_put(DECRYPTED_URL_CACHE, key, decrypt_apprise_url(channel))
+    return url
+
+
+def reset_apprise_cache():
+    with APPRISE_CACHE_LOCK:
+        DECRYPTED_URL_CACHE.clear()
+        APPRISE_NOTIFIER_CACHE.clear()
+
+
 def apprise_target_type(channel):
     """Return a display-safe Apprise target name without exposing its URL."""
     try:
-        scheme = urlsplit(decrypt_apprise_url(channel)).scheme.lower()
+        scheme = urlsplit(cached_apprise_url(channel)).scheme.lower()
     except NotificationConfigError:
         return 'Unknown'
     return APPRISE_TARGET_TYPES.get(scheme, scheme or 'Unknown')
@@ -352,22 +408,36 @@ def send_apprise(url, title, body):
         import apprise
     except ImportError as exc:
         raise RuntimeError('apprise is not installed') from exc
-    notifier = apprise.Apprise()
-    if not notifier.add(url):
-        raise NotificationConfigError('invalid Apprise URL')
+    notifier = _cache_get(APPRISE_NOTIFIER_CACHE, url)
+    if notifier is None:
+        notifier = apprise.Apprise()
+        if not notifier.add(url):
+            raise NotificationConfigError('invalid Apprise URL')
+        _cache_put(APPRISE_NOTIFIER_CACHE, url, notifier)
     if not notifier.notify(title=title, body=body, notify_type=apprise.NotifyType.INFO):
         raise RuntimeError('Apprise delivery failed')
     return True
 
 
 def _delivery(db, rule, channel, event_key, event_status, payload, title, body):
+    """Render one message and queue it, or send it inline in ``sync`` mode."""
     timestamp = now_ms()
     body_with_time = f'{body}\n\n时间：{format_notification_time(timestamp)}'
     payload = dict(payload or {})
     # Keep the exact rendered content so delivery history can be audited later.
     payload['message'] = {'title': title, 'body': body_with_time}
+    if config.NOTIFICATION_DELIVERY_MODE != 'sync':
+        from coinx.notification_delivery import enqueue_delivery
+
+        return enqueue_delivery(db, rule, channel, event_key, event_status, payload)
+    return _send_delivery(db, rule, channel, event_key, event_status, payload, timestamp)
+
+
+def _send_delivery(db, rule, channel, event_key, event_status, payload, timestamp):
+    title = payload['message']['title']
+    body_with_time = payload['message']['body']
     try:
-        send_apprise(decrypt_apprise_url(channel), title, body_with_time)
+        send_apprise(cached_apprise_url(channel), title, body_with_time)
         delivery = NotificationDelivery(
             rule_id=rule.id if rule else None,
             channel_id=channel.id,
@@ -394,8 +464,17 @@ def _delivery(db, rule, channel, event_key, event_status, payload, title, body):
 
 
 def test_channel(db, channel):
-    payload = {'kind': 'channel_test', 'channel_name': channel.name}
-    return _delivery(db, None, channel, f'channel:{channel.id}|test', 'test', payload, 'CoinX 渠道测试', 'CoinX 通知渠道配置测试成功。')
+    """Send a channel test immediately so the caller can report the result."""
+    timestamp = now_ms()
+    payload = {
+        'kind': 'channel_test',
+        'channel_name': channel.name,
+        'message': {
+            'title': 'CoinX 渠道测试',
+            'body': f'CoinX 通知渠道配置测试成功。\n\n时间：{format_notification_time(timestamp)}',
+        },
+    }
+    return _send_delivery(db, None, channel, f'channel:{channel.id}|test', 'test', payload, timestamp)
 
 
 def _insert_alert_states_ignore_conflicts(db, records):
@@ -428,35 +507,51 @@ def _insert_alert_states_ignore_conflicts(db, records):
     db.execute(statement)
 
 
-def _load_rule_states(db, rule_id, dimension_key, subject_keys):
-    """Batch-create and load state rows for an evaluation scope."""
-    keys = list(dict.fromkeys(subject_keys))
+def _load_alert_states(db, keys):
+    """Batch-create and load the state rows of many rules in two statements.
+
+    ``keys`` are ``(rule_id, dimension_key, subject_key)`` tuples; the result
+    maps each tuple to its ``AlertState``.
+    """
+    keys = list(dict.fromkeys(keys))
     if not keys:
         return {}
     timestamp = datetime.now()
     _insert_alert_states_ignore_conflicts(db, [{
         'rule_id': rule_id,
-        'subject_key': key,
+        'subject_key': subject_key,
         'dimension_key': dimension_key,
         'state': 'normal',
         'consecutive_matches': 0,
+        'version': 0,
         'updated_at': timestamp,
-    } for key in keys])
+    } for rule_id, dimension_key, subject_key in keys])
+    wanted = set(keys)
     rows = db.query(AlertState).filter(
-        AlertState.rule_id == rule_id,
-        AlertState.dimension_key == dimension_key,
-        AlertState.subject_key.in_(keys),
+        AlertState.rule_id.in_({key[0] for key in keys}),
+        AlertState.dimension_key.in_({key[1] for key in keys}),
+        AlertState.subject_key.in_({key[2] for key in keys}),
     ).all()
-    return {row.subject_key: row for row in rows}
+    return {
+        (row.rule_id, row.dimension_key, row.subject_key): row
+        for row in rows
+        if (row.rule_id, row.dimension_key, row.subject_key) in wanted
+    }
+
+
+def _load_rule_states(db, rule_id, dimension_key, subject_keys):
+    """Batch-create and load state rows for an evaluation scope."""
+    states = _load_alert_states(db, [(rule_id, dimension_key, key) for key in subject_keys])
+    return {key[2]: state for key, state in states.items()}
 
 
 def _cas_update_alert_state(db, state, values):
-    """Compare-and-swap on the observed target state only."""
-    criteria = [
+    """Compare-and-swap on the version the state was read at."""
+    version = int(state.version or 0)
+    result = db.execute(update(AlertState).where(
         AlertState.id == state.id,
-        AlertState.state == state.state,
-    ]
-    result = db.execute(update(AlertState).where(*criteria).values(**values))
+        AlertState.version == version,
+    ).values(**values, version=version + 1))
     if result.rowcount:
         return True
     db.expire(state)
@@ -464,6 +559,79 @@ def _cas_update_alert_state(db, state, values):
     return False
 
 
+def _plan_transition(state, matched, values, consecutive_matches, recovery_confirmations, timestamp):
+    """Apply the normal/triggered/recovered state machine to one observation.
+
+    Returns None when the observation does not advance the stored state,
+    otherwise the column values to write plus the resulting event.
+    """
+    previous = state.state
+    previous_values = state.last_value_json or {}
+    consecutive_value = (
+        consecutive_matches if consecutive_matches is not None
+        else (int(state.consecutive_matches or 0) + 1 if matched else 0)
+    )
+    recovery_count = int(previous_values.get('_recovery_count', 0))
+
+    # Most periodic observations do not advance the state machine. Avoid
+    # a CAS write for normal observations and sustained triggered states.
+    if (
+        not matched
+        and previous != 'triggered'
+        and consecutive_value == int(state.consecutive_matches or 0)
+    ):
+        return None
+    if matched and previous == 'triggered' and recovery_count == 0:
+        return None
+
+    observed_values = dict(values)
+    next_state = previous
+    next_triggered_at = state.last_triggered_at
+    next_recovered_at = state.last_recovered_at
+    event_status = None
+    if matched:
+        observed_values['_recovery_count'] = 0
+        observed_values['_last_triggered_values'] = dict(observed_values)
+        if previous != 'triggered':
+            next_state = 'triggered'
+            next_triggered_at = timestamp
+            event_status = 'triggered'
+    elif previous == 'triggered':
+        recovery_count += 1
+        observed_values['_recovery_count'] = recovery_count
+        last_triggered_values = previous_values.get('_last_triggered_values', previous_values)
+        observed_values['_last_triggered_values'] = last_triggered_values
+        if recovery_count >= recovery_confirmations:
+            next_state = 'normal'
+            next_recovered_at = timestamp
+            event_status = 'recovered'
+            previous_values = last_triggered_values
+    else:
+        observed_values['_recovery_count'] = 0
+
+    return {
+        'values': {
+            'state': next_state,
+            'consecutive_matches': consecutive_value,
+            'last_value_json': observed_values,
+            'last_triggered_at': next_triggered_at,
+            'last_recovered_at': next_recovered_at,
+        },
+        'event_status': event_status,
+        'previous_values': previous_values,
+    }
+
+
+def _notification_allowed(rule, state, event_status, timestamp):
+    if not event_status or (event_status == 'recovered' and not rule.recovery_enabled):
+        return False
+    if event_status == 'triggered' and state.last_notified_at and (
+        timestamp - state.last_notified_at < rule.cooldown_seconds * 1000
+    ):
+        return False
+    return True
+
+
 def _observe(
     db, rule, subject_key, dimension_key, matched, values, title, summary,
     consecutive_matches=None, recovery_confirmations=1, state=None, aggregate=False,
@@ -477,70 +645,22 @@ def _observe(
 
     # A peer evaluator may update this subject between loading the scope and
     # committing it. Rebuild the state transition from the latest row on CAS loss.
-    for _attempt in range(3):
-        previous = state.state
-        previous_values = state.last_value_json or {}
-        consecutive_value = (
-            consecutive_matches if consecutive_matches is not None
-            else (int(state.consecutive_matches or 0) + 1 if matched else 0)
-        )
-        recovery_count = int(previous_values.get('_recovery_count', 0))
-
-        # Most periodic observations do not advance the state machine. Avoid
-        # a CAS write for normal observations and sustained triggered states.
-        if (
-            not matched
-            and previous != 'triggered'
-            and consecutive_value == int(state.consecutive_matches or 0)
-        ):
-            return {'event_status': None, 'sent': 0}
-        if matched and previous == 'triggered' and recovery_count == 0:
+    for _attempt in range(STATE_CAS_ATTEMPTS):
+        plan = _plan_transition(state, matched, values, consecutive_matches, recovery_confirmations, timestamp)
+        if plan is None:
             return {'event_status': None, 'sent': 0}
-
-        observed_values = dict(values)
-        next_state = previous
-        next_triggered_at = state.last_triggered_at
-        next_recovered_at = state.last_recovered_at
-        event_status = None
-        if matched:
-            observed_values['_recovery_count'] = 0
-            observed_values['_last_triggered_values'] = dict(observed_values)
-            if previous != 'triggered':
-                next_state = 'triggered'
-                next_triggered_at = timestamp
-                event_status = 'triggered'
-        elif previous == 'triggered':
-            recovery_count += 1
-            observed_values['_recovery_count'] = recovery_count
-            last_triggered_values = previous_values.get('_last_triggered_values', previous_values)
-            observed_values['_last_triggered_values'] = last_triggered_values
-            if recovery_count >= recovery_confirmations:
-                next_state = 'normal'
-                next_recovered_at = timestamp
-                event_status = 'recovered'
-                previous_values = last_triggered_values
-                title = f'{title}已恢复'
-                summary = f'{summary}；当前已恢复至规则阈值内。'
-        else:
-            observed_values['_recovery_count'] = 0
-
-        if _cas_update_alert_state(db, state, {
-            'state': next_state,
-            'consecutive_matches': consecutive_value,
-            'last_value_json': observed_values,
-            'last_triggered_at': next_triggered_at,
-            'last_recovered_at': next_recovered_at,
-        }):
-            values = observed_values
+        if _cas_update_alert_state(db, state, plan['values']):
+            values = plan['values']['last_value_json']
             break
     else:
         raise RuntimeError(f'alert state CAS conflict: {rule.id}/{subject_key}/{dimension_key}')
 
-    if not event_status or (event_status == 'recovered' and not rule.recovery_enabled):
-        return {'event_status': event_status, 'sent': 0}
-    if event_status == 'triggered' and state.last_notified_at and (
-        timestamp - state.last_notified_at < rule.cooldown_seconds * 1000
-    ):
+    event_status = plan['event_status']
+    previous_values = plan['previous_values']
+    if event_status == 'recovered':
+        title = f'{title}已恢复'
+        summary = f'{summary}；当前已恢复至规则阈值内。'
+    if not _notification_allowed(rule, state, event_status, timestamp):
         return {'event_status': event_status, 'sent': 0}
 
     if aggregate:
@@ -565,14 +685,211 @@ def _observe(
     return {'event_status': event_status, 'sent': len(deliveries)}
 
 
-def _enabled_rules(db, event_type, rule_id=None):
+@dataclass(frozen=True, slots=True)
+class AlertObservation:
+    """One (rule, subject) observation for the bulk state machine.
+
+    ``evaluate`` receives the current state row and returns
+    ``(matched, values, consecutive_matches)``; it is called again with the
+    fresh row when a concurrent writer wins the CAS.
+    """
+
+    rule: object
+    subject_key: str
+    dimension_key: str
+    evaluate: Callable
+    recovery_confirmations: int = 1
+    context: object = None
+
+
+def _mark_states_written(writes, updated_at):
+    """Mirror a successful bulk write on the loaded rows without dirtying them."""
+    for state, values in writes:
+        next_version = int(state.version or 0) + 1
+        for name, value in {**values, 'version': next_version, 'updated_at': updated_at}.items():
+            set_committed_value(state, name, value)
+
+
+def _bulk_cas_update_alert_states(db, writes):
+    """Write many planned transitions with one executemany UPDATE.
+
+    ``writes`` are ``(state, values)`` pairs.  Returns the states whose
+    version moved underneath us; their rows are refreshed for a retry.
+    """
+    if not writes:
+        return []
+    table = AlertState.__table__
+    statement = update(table).where(
+        table.c.id == bindparam('b_id'),
+        table.c.version == bindparam('b_version'),
+    ).values(
+        state=bindparam('b_state'),
+        consecutive_matches=bindparam('b_consecutive_matches'),
+        last_value_json=bindparam('b_last_value_json'),
+        last_triggered_at=bindparam('b_last_triggered_at'),
+        last_recovered_at=bindparam('b_last_recovered_at'),
+        version=bindparam('b_next_version'),
+        updated_at=bindparam('b_updated_at'),
+    )
+    updated_at = datetime.now()
+    result = db.execute(statement, [{
+        'b_id': state.id,
+        'b_version': int(state.version or 0),
+        'b_next_version': int(state.version or 0) + 1,
+        'b_state': values['state'],
+        'b_consecutive_matches': values['consecutive_matches'],
+        'b_last_value_json': values['last_value_json'],
+        'b_last_triggered_at': values['last_triggered_at'],
+        'b_last_recovered_at': values['last_recovered_at'],
+        'b_updated_at': updated_at,
+    } for state, values in writes])
+    if db.get_bind().dialect.supports_sane_multi_rowcount and result.rowcount == len(writes):
+        _mark_states_written(writes, updated_at)
+        return []
+
+    # The driver cannot tell which rows matched: a row is ours when it now
+    # sits at the version we wrote with the values we wrote.
+    expected = {state.id: (int(state.version or 0) + 1, values) for state, values in writes}
+    current = db.query(
+        AlertState.id, AlertState.version, AlertState.state,
+        AlertState.consecutive_matches, AlertState.last_value_json,
+    ).filter(AlertState.id.in_(expected)).all()
+    won = {
+        row.id for row in current
+        if row.version == expected[row.id][0]
+        and row.state == expected[row.id][1]['state']
+        and row.consecutive_matches == expected[row.id][1]['consecutive_matches']
+        and row.last_value_json == expected[row.id][1]['last_value_json']
+    }
+    _mark_states_written([(state, values) for state, values in writes if state.id in won], updated_at)
+    lost = [state for state, _values in writes if state.id not in won]
+    for state in lost:
+        db.expire(state)
+    if lost:
+        db.query(AlertState).filter(AlertState.id.in_([state.id for state in lost])).all()
+    return lost
+
+
+def _plan_observations(observations, pending, states, results, timestamp, rule_errors):
+    """Evaluate ``pending`` observations and plan their transitions.
+
+    An observation that cannot be evaluated fails its rule: the error is
+    recorded in ``rule_errors`` and none of that rule's remaining pairs are
+    planned, so a broken rule never blocks its siblings.
+    """
+    planned = {}
+    for index in pending:
+        observation = observations[index]
+        rule_id = observation.rule.id
+        if rule_id in rule_errors:
+            continue
+        state = states.get((rule_id, observation.dimension_key, observation.subject_key))
+        try:
+            if state is None:
+                raise RuntimeError(
+                    f'unable to initialize alert state: {rule_id}/'
+                    f'{observation.subject_key}/{observation.dimension_key}'
+                )
+            matched, values, consecutive_matches = observation.evaluate(state)
+            results[index].update(event_status=None, matched=bool(matched))
+            plan = _plan_transition(
+                state, matched, values, consecutive_matches, observation.recovery_confirmations, timestamp,
+            )
+        except Exception as exc:
+            logger.exception('告警规则观测失败: rule_id=%s subject=%s', rule_id, observation.subject_key)
+            rule_errors[rule_id] = str(exc)[:500]
+            continue
+        if plan is not None:
+            planned[index] = (state, plan)
+    return {index: item for index, item in planned.items() if observations[index].rule.id not in rule_errors}
+
+
+def _record_observation(observation, state, plan, result, timestamp):
+    result['event_status'] = plan['event_status']
+    if _notification_allowed(observation.rule, state, plan['event_status'], timestamp):
+        result.update(state=state, previous_values=plan['previous_values'])
+
+
+def _retry_observation(db, observation, state, result, timestamp, rule_errors):
+    """Per-row CAS retry for a pair that kept losing the bulk write."""
+    rule_id = observation.rule.id
+    for _attempt in range(STATE_CAS_ATTEMPTS):
+        planned = _plan_observations([observation], [0], {
+            (rule_id, observation.dimension_key, observation.subject_key): state,
+        }, [result], timestamp, rule_errors)
+        if not planned:
+            return
+        _state, plan = planned[0]
+        if _cas_update_alert_state(db, state, plan['values']):
+            _record_observation(observation, state, plan, result, timestamp)
+            return
+    rule_errors[rule_id] = (
+        f'alert state CAS conflict: {rule_id}/{observation.subject_key}/{observation.dimension_key}'
+    )
+    logger.warning('告警状态并发写入冲突: %s', rule_errors[rule_id])
+
+
+def _observe_many(db, observations, timestamp=None, stages=None, rule_errors=None):
+    """Run the state machine for many observations with bulk state I/O.
+
+    States of every (rule, subject) pair are loaded in one query and the
+    resulting transitions are written with one versioned bulk CAS; only the
+    pairs that lose a CAS are re-evaluated, and pairs still conflicting after
+    ``STATE_CAS_ATTEMPTS`` rounds fall back to a per-row CAS.  Failures are
+    isolated per rule: they are recorded in ``rule_errors`` (rule id ->
+    message) and only skip that rule's unwritten pairs.  Returns one result
+    per observation in the aggregate format of ``_observe``.
+    """
+    timestamp = now_ms() if timestamp is None else timestamp
+    stages = stages if stages is not None else defaultdict(float)
+    rule_errors = rule_errors if rule_errors is not None else {}
+    stage_started = time.perf_counter()
+    states = _load_alert_states(db, [
+        (observation.rule.id, observation.dimension_key, observation.subject_key)
+        for observation in observations
+    ])
+    stages['state_load_ms'] += (time.perf_counter() - stage_started) * 1000
+    results = [{'event_status': None, 'sent': 0, 'matched': False} for _observation in observations]
+    pending = list(range(len(observations)))
+    for _attempt in range(STATE_CAS_ATTEMPTS):
+        stage_started = time.perf_counter()
+        planned = _plan_observations(observations, pending, states, results, timestamp, rule_errors)
+        stages['observation_ms'] += (time.perf_counter() - stage_started) * 1000
+        stage_started = time.perf_counter()
+        lost_ids = {
+            state.id for state in _bulk_cas_update_alert_states(db, [(state, plan['values']) for state, plan in planned.values()])
+        }
+        stages['state_write_ms'] += (time.perf_counter() - stage_started) * 1000
+        pending = []
+        for index, (state, plan) in planned.items():
+            if state.id in lost_ids:
+                pending.append(index)
+                continue
+            _record_observation(observations[index], state, plan, results[index], timestamp)
+        if not pending:
+            return results
+
+    stage_started = time.perf_counter()
+    for index in pending:
+        observation = observations[index]
+        if observation.rule.id in rule_errors:
+            continue
+        state = states[(observation.rule.id, observation.dimension_key, observation.subject_key)]
+        _retry_observation(db, observation, state, results[index], timestamp, rule_errors)
+    stages['state_write_ms'] += (time.perf_counter() - stage_started) * 1000
+    return results
+
+
+def _enabled_rules(db, event_type, rule_id=None, rule_ids=None):
     query = db.query(AlertRule).filter(
         AlertRule.event_type == event_type,
         AlertRule.enabled.is_(True),
     )
     if rule_id is not None:
         query = query.filter(AlertRule.id == rule_id)
-    return query.all()
+    if rule_ids is not None:
+        query = query.filter(AlertRule.id.in_(list(rule_ids)))
+    return query.order_by(AlertRule.id.asc()).all()
 
 
 def _deliver_evaluation_summary(db, rule, checked, events, condition):
@@ -625,16 +942,94 @@ def _evaluation_metrics(started_at, stages, **extra):
     }
 
 
-PRICE_VOLUME_LOOKBACK_MS = 26 * 60 * 60 * 1000
 EVALUATION_QUERY_TIMEOUT_MS = 4 * 60 * 1000
 
 
+def _load_price_volume_scope(db, scope_limit):
+    """Return the current top quote-volume symbols and their ticker snapshot time."""
+    rows = db.execute(text("""
+        SELECT mt.symbol, mt.close_time
+        FROM market_tickers AS mt
+        WHERE mt.close_time = (SELECT MAX(close_time) FROM market_tickers)
+        ORDER BY mt.quote_volume DESC
+        LIMIT :scope_limit
+    """), {'scope_limit': int(scope_limit)}).all()
+    snapshot_time = int(rows[0].close_time) if rows else None
+    return [row.symbol for row in rows], snapshot_time
+
+
+def _load_price_volume_metrics_from_store(db, scope_limit):
+    """Read the incrementally maintained metrics for the current scope.
+
+    Kline writes keep each symbol's latest 289 Binance 5-minute bars and the
+    derived metrics in memory; only symbols the store has not caught up with
+    are read back, with a plain range query instead of the window function.
+    """
+    symbols, snapshot_time = _load_price_volume_scope(db, scope_limit)
+    if not symbols:
+        return {}
+    return load_price_volume_metrics(
+        db,
+        symbols,
+        latest_closed_5m_open_time(int(time.time() * 1000)),
+        since_time=snapshot_time - PRICE_VOLUME_LOOKBACK_MS,
+    )
+
+
+def _load_price_volume_metrics_from_frame(db, scope_limit):
+    """Reuse the shared series frame of the current anchor when it covers the scope.
+
+    Only symbols whose latest 289 Binance 5-minute klines are all present in
+    the frame qualify, so the result equals the SQL window below; otherwise
+    None is returned and the caller falls back to the database query.
+    """
+    symbols, _snapshot_time = _load_price_volume_scope(db, scope_limit)
+    if not symbols:
+        return None
+    frame = get_cached_series_frame(
+        'binance', latest_closed_5m_open_time(int(time.time() * 1000)), symbols,
+    )
+    if frame is None:
+        return None
+
+    metrics = {}
+    for symbol in sorted(symbols):
+        symbol_series = frame.get(symbol)
+        if symbol_series.window_kline_rows < SERIES_FRAME_WINDOW_POINTS:
+            return None
+        latest = symbol_series.klines.get(frame.anchor_time)
+        quote_volumes = frame.recent_quote_volumes(symbol, SERIES_FRAME_WINDOW_POINTS)
+        historical_volumes = [value for value in quote_volumes[:-1] if value is not None]
+        average_volume = sum(historical_volumes) / len(historical_volumes) if historical_volumes else None
+        price_change = None
+        if latest.open_price not in (None, 0) and latest.close_price is not None:
+            price_change = (latest.close_price - latest.open_price) / latest.open_price
+        volume_ratio = None
+        if latest.quote_volume is not None and average_volume not in (None, 0):
+            volume_ratio = latest.quote_volume / average_volume
+        metrics[symbol] = {
+            'open_time': frame.anchor_time,
+            'price_change': price_change,
+            'volume_ratio': volume_ratio,
+            'kline_count': symbol_series.window_kline_rows,
+            'historical_volume_count': len(historical_volumes),
+        }
+    return metrics
+
+
 def _load_price_volume_metrics(db, scope_limit):
     """Calculate the per-symbol price and volume metrics in the database.
 
     The 26-hour range bounds each 5-minute series to roughly 312 rows before
     the window function keeps the latest 289 observations.
     """
+    try:
+        return _load_price_volume_metrics_from_store(db, scope_limit)
+    except Exception as exc:
+        logger.warning('读取增量价格放量指标失败，回退查询: %s', exc)
+    metrics = _load_price_volume_metrics_from_frame(db, scope_limit)
+    if metrics is not None:
+        return metrics
     query_hint = (
         f'/*+ MAX_EXECUTION_TIME({EVALUATION_QUERY_TIMEOUT_MS}) */ '
         if db.get_bind().dialect.name == 'mysql' else ''
@@ -702,74 +1097,130 @@ def _load_price_volume_metrics(db, scope_limit):
     }
 
 
-def evaluate_funding_rate_rules(session=None, rule_id=None):
+def _disabled_result():
+    return {'status': 'disabled', 'evaluated': 0, 'checked': 0, 'matched': 0, 'sent': 0}
+
+
+def _deliver_rule_summaries(db, rules, observations, results, describe, conditions, stages, rule_errors=None):
+    """Tally the pass per rule and send one summary per rule and channel.
+
+    Each rule delivers inside its own savepoint, so a failing rule keeps its
+    ``error`` status without discarding the summaries of the others.  A rule
+    that failed during observation still reports the transitions it wrote.
+    """
+    rule_errors = rule_errors or {}
+    rule_stats = {
+        rule.id: {'status': 'error' if rule.id in rule_errors else 'success', 'checked': 0, 'matched': 0, 'sent': 0}
+        for rule in rules
+    }
+    for rule_id, error in rule_errors.items():
+        if rule_id in rule_stats:
+            rule_stats[rule_id]['error'] = error
+    events = defaultdict(list)
+    for observation, result in zip(observations, results):
+        stats = rule_stats[observation.rule.id]
+        stats['checked'] += 1
+        stats['matched'] += int(result['matched'])
+        if result.get('state') and result['event_status']:
+            events[observation.rule.id].append({
+                'status': result['event_status'],
+                'state': result['state'],
+                **describe(observation, result['previous_values'] or {}),
+            })
+    stage_started = time.perf_counter()
+    for rule in rules:
+        if not events[rule.id]:
+            continue
+        try:
+            with db.begin_nested():
+                rule_stats[rule.id]['sent'] = _deliver_evaluation_summary(
+                    db, rule, rule_stats[rule.id]['checked'], events[rule.id], conditions[rule.id],
+                )
+        except Exception as exc:
+            logger.exception('告警规则通知投递失败: rule_id=%s', rule.id)
+            rule_stats[rule.id].update(status='error', error=str(exc)[:500], sent=0)
+    stages['delivery_ms'] += (time.perf_counter() - stage_started) * 1000
+    return rule_stats
+
+
+def _evaluation_result(rules, rule_stats, metrics):
+    errors = [f'rule {rule_id}: {stats["error"]}' for rule_id, stats in rule_stats.items() if stats.get('error')]
+    result = {
+        'status': 'error' if errors else 'success',
+        'evaluated': len(rules),
+        'checked': sum(stats['checked'] for stats in rule_stats.values()),
+        'matched': sum(stats['matched'] for stats in rule_stats.values()),
+        'sent': sum(stats['sent'] for stats in rule_stats.values()),
+        'rules': rule_stats,
+        'metrics': metrics,
+    }
+    if errors:
+        result['error'] = '; '.join(errors)[:500]
+    return result
+
+
+def _describe_funding_rate_event(observation, previous_values):
+    symbol, rate = observation.context
+    previous_rate = float(previous_values.get('funding_rate') or 0)
+    return {
+        'triggered': f'- {symbol} 资金费率 {rate * 100:.4f}%',
+        'recovered': f'- {symbol}\n  之前：{previous_rate * 100:.4f}%\n  当前：{rate * 100:.4f}%',
+    }
+
+
+def evaluate_funding_rate_rules(session=None, rule_id=None, rule_ids=None):
+    """Evaluate every enabled funding-rate rule in one pass over the latest rates."""
     if not config.NOTIFICATIONS_ENABLED:
-        return {'status': 'disabled', 'evaluated': 0, 'checked': 0, 'matched': 0, 'sent': 0}
+        return _disabled_result()
     own_session = session is None
     db = session or get_session()
     started_at = time.perf_counter()
     stages = defaultdict(float)
     try:
-        rules = _enabled_rules(db, EVENT_FUNDING_RATE, rule_id=rule_id)
+        rules = _enabled_rules(db, EVENT_FUNDING_RATE, rule_id=rule_id, rule_ids=rule_ids)
         if not rules:
             return {
-                'status': 'success', 'evaluated': 0, 'checked': 0, 'matched': 0, 'sent': 0,
+                'status': 'success', 'evaluated': 0, 'checked': 0, 'matched': 0, 'sent': 0, 'rules': {},
                 'metrics': _evaluation_metrics(started_at, stages, symbols=0),
             }
         stage_started = time.perf_counter()
         rates = load_latest_funding_rates(session=db)
         stages['rate_load_ms'] += (time.perf_counter() - stage_started) * 1000
-        sent = checked = matched_count = 0
+
+        rule_params = []
+        conditions = {}
         for rule in rules:
             params = rule.params_json or {}
             threshold = float(params.get('threshold'))
-            direction = params.get('direction', 'absolute')
-            recovery_confirmations = int(params.get('recovery_confirmations', 3))
-            stage_started = time.perf_counter()
-            states = _load_rule_states(db, rule.id, direction, rates)
-            stages['state_load_ms'] += (time.perf_counter() - stage_started) * 1000
-            events = []
-            rule_checked = 0
-            stage_started = time.perf_counter()
-            for symbol, row in rates.items():
-                if row['funding_rate'] is None:
-                    continue
-                rate = row['funding_rate']
+            rule_params.append((
+                rule, threshold, params.get('direction', 'absolute'), int(params.get('recovery_confirmations', 3)),
+            ))
+            conditions[rule.id] = f'|资金费率| >= {threshold * 100:.4f}%'
+        observations = []
+        for symbol, row in rates.items():
+            rate = row['funding_rate']
+            if rate is None:
+                continue
+            for rule, threshold, direction, recovery_confirmations in rule_params:
                 matched = abs(rate) >= threshold if direction == 'absolute' else (rate >= threshold if direction == 'positive' else rate <= -threshold)
-                checked += 1
-                rule_checked += 1
-                matched_count += int(matched)
-                result = _observe(
-                    db, rule, symbol, direction, matched,
-                    {'funding_rate': rate, 'threshold': threshold, 'direction': direction, 'event_time': row['event_time']},
-                    f'{symbol} 资金费率异常',
-                    f'资金费率 {rate * 100:.4f}%，规则阈值 {threshold * 100:.4f}%。',
-                    recovery_confirmations=recovery_confirmations,
-                    state=states.get(symbol),
-                    aggregate=True,
-                )
-                if result.get('state') and result['event_status']:
-                    previous_rate = float((result['previous_values'] or {}).get('funding_rate') or 0)
-                    events.append({
-                        'status': result['event_status'],
-                        'state': result['state'],
-                        'triggered': f'- {symbol} 资金费率 {rate * 100:.4f}%',
-                        'recovered': f'- {symbol}\n  之前：{previous_rate * 100:.4f}%\n  当前：{rate * 100:.4f}%',
-                    })
-            stages['observation_ms'] += (time.perf_counter() - stage_started) * 1000
-            stage_started = time.perf_counter()
-            sent += _deliver_evaluation_summary(
-                db, rule, rule_checked, events, f'|资金费率| >= {threshold * 100:.4f}%',
-            )
-            stages['delivery_ms'] += (time.perf_counter() - stage_started) * 1000
+                values = {'funding_rate': rate, 'threshold': threshold, 'direction': direction, 'event_time': row['event_time']}
+                observations.append(AlertObservation(
+                    rule, symbol, direction,
+                    lambda _state, matched=matched, values=values: (matched, values, None),
+                    recovery_confirmations, context=(symbol, rate),
+                ))
+
+        rule_errors = {}
+        results = _observe_many(db, observations, stages=stages, rule_errors=rule_errors)
+        rule_stats = _deliver_rule_summaries(
+            db, rules, observations, results, _describe_funding_rate_event, conditions, stages, rule_errors,
+        )
         stage_started = time.perf_counter()
         db.commit()
         stages['commit_ms'] += (time.perf_counter() - stage_started) * 1000
-        return {
-            'status': 'success', 'evaluated': len(rules), 'checked': checked,
-            'matched': matched_count, 'sent': sent,
-            'metrics': _evaluation_metrics(started_at, stages, symbols=len(rates)),
-        }
+        return _evaluation_result(
+            rules, rule_stats, _evaluation_metrics(started_at, stages, symbols=len(rates), rules=len(rules)),
+        )
     except Exception:
         db.rollback()
         logger.exception('资金费率告警评估失败')
@@ -783,89 +1234,94 @@ def evaluate_funding_rate_rules(session=None, rule_id=None):
             db.close()
 
 
-def evaluate_price_volume_rules(session=None, rule_id=None):
+def _describe_price_volume_event(observation, previous_values):
+    symbol, price_change, volume_ratio = observation.context
+    previous_change = float(previous_values.get('price_change') or 0)
+    previous_ratio = float(previous_values.get('volume_ratio') or 0)
+    return {
+        'triggered': f'- {symbol} 5分钟涨跌 {price_change * 100:.2f}%，成交额放大 {volume_ratio:.2f} 倍',
+        'recovered': (
+            f'- {symbol}\n  之前：涨跌 {previous_change * 100:.2f}%，成交额 {previous_ratio:.2f} 倍'
+            f'\n  当前：涨跌 {price_change * 100:.2f}%，成交额 {volume_ratio:.2f} 倍'
+        ),
+    }
+
+
+def evaluate_price_volume_rules(session=None, rule_id=None, rule_ids=None):
+    """Evaluate every enabled price/volume rule against one shared metric load.
+
+    Metrics are loaded once for the widest rule scope; narrower scopes take
+    the leading symbols of the same quote-volume ranking.
+    """
     if not config.NOTIFICATIONS_ENABLED:
-        return {'status': 'disabled', 'evaluated': 0, 'checked': 0, 'matched': 0, 'sent': 0}
+        return _disabled_result()
     own_session = session is None
     db = session or get_session()
     started_at = time.perf_counter()
     stages = defaultdict(float)
     try:
-        rules = _enabled_rules(db, EVENT_PRICE_VOLUME, rule_id=rule_id)
-        sent = checked = matched_count = 0
+        rules = _enabled_rules(db, EVENT_PRICE_VOLUME, rule_id=rule_id, rule_ids=rule_ids)
+        if not rules:
+            return {
+                'status': 'success', 'evaluated': 0, 'checked': 0, 'matched': 0, 'sent': 0, 'rules': {},
+                'metrics': _evaluation_metrics(started_at, stages, symbols=0, kline_rows=0),
+            }
+        scope_limits = {
+            rule.id: int((rule.scope_json or {}).get('limit', config.FETCH_COINS_TOP_VOLUME_COUNT))
+            for rule in rules
+        }
+        max_limit = max(scope_limits.values())
+        stage_started = time.perf_counter()
+        metrics_by_symbol = _load_price_volume_metrics(db, max_limit)
+        symbol_ranks = None
+        if len(set(scope_limits.values())) > 1:
+            ranked_symbols, _snapshot_time = _load_price_volume_scope(db, max_limit)
+            symbol_ranks = {symbol: rank for rank, symbol in enumerate(ranked_symbols)}
+        stages['metric_load_ms'] += (time.perf_counter() - stage_started) * 1000
+
+        rule_params = []
+        conditions = {}
         for rule in rules:
             params = rule.params_json or {}
-            scope = rule.scope_json or {}
-            events = []
-            rule_checked = 0
-            stage_started = time.perf_counter()
-            metrics_by_symbol = _load_price_volume_metrics(
-                db, int(scope.get('limit', config.FETCH_COINS_TOP_VOLUME_COUNT)),
-            )
-            stages['metric_load_ms'] += (time.perf_counter() - stage_started) * 1000
-            symbols = list(metrics_by_symbol)
-            direction = params.get('direction', 'absolute')
-            stage_started = time.perf_counter()
-            states = _load_rule_states(db, rule.id, direction, symbols)
-            stages['state_load_ms'] += (time.perf_counter() - stage_started) * 1000
-            stage_started = time.perf_counter()
-            for symbol in symbols:
-                metric = metrics_by_symbol[symbol]
-                price_change = metric['price_change']
-                volume_ratio = metric['volume_ratio']
-                if (
-                    metric['kline_count'] < 2
-                    or metric['historical_volume_count'] == 0
-                    or price_change is None
-                    or volume_ratio is None
-                ):
+            price_threshold = float(params['price_change_threshold'])
+            volume_threshold = float(params['volume_ratio_threshold'])
+            rule_params.append((rule, price_threshold, volume_threshold, params.get('direction', 'absolute')))
+            conditions[rule.id] = f'5分钟涨跌 {price_threshold * 100:.2f}% 且成交额放大 >= {volume_threshold:.2f} 倍'
+        observations = []
+        for symbol, metric in metrics_by_symbol.items():
+            price_change = metric['price_change']
+            volume_ratio = metric['volume_ratio']
+            if (
+                metric['kline_count'] < 2
+                or metric['historical_volume_count'] == 0
+                or price_change is None
+                or volume_ratio is None
+            ):
+                continue
+            for rule, price_threshold, volume_threshold, direction in rule_params:
+                if symbol_ranks is not None and symbol_ranks.get(symbol, max_limit) >= scope_limits[rule.id]:
                     continue
-                price_threshold = float(params['price_change_threshold'])
-                volume_threshold = float(params['volume_ratio_threshold'])
                 direction_match = abs(price_change) >= price_threshold if direction == 'absolute' else (price_change >= price_threshold if direction == 'up' else price_change <= -price_threshold)
-                is_match = direction_match and volume_ratio >= volume_threshold
-                checked += 1
-                rule_checked += 1
-                matched_count += int(is_match)
-                result = _observe(
-                    db, rule, symbol, direction, is_match,
-                    {'price_change': price_change, 'price_change_threshold': price_threshold, 'volume_ratio': volume_ratio, 'volume_ratio_threshold': volume_threshold, 'open_time': metric['open_time']},
-                    f'{symbol} 价格放量异动',
-                    f'5分钟涨跌 {price_change * 100:.2f}%，成交额放大 {volume_ratio:.2f} 倍。',
-                    state=states.get(symbol),
-                    aggregate=True,
-                )
-                if result.get('state') and result['event_status']:
-                    previous = result['previous_values'] or {}
-                    previous_change = float(previous.get('price_change') or 0)
-                    previous_ratio = float(previous.get('volume_ratio') or 0)
-                    events.append({
-                        'status': result['event_status'],
-                        'state': result['state'],
-                        'triggered': f'- {symbol} 5分钟涨跌 {price_change * 100:.2f}%，成交额放大 {volume_ratio:.2f} 倍',
-                        'recovered': (
-                            f'- {symbol}\n  之前：涨跌 {previous_change * 100:.2f}%，成交额 {previous_ratio:.2f} 倍'
-                            f'\n  当前：涨跌 {price_change * 100:.2f}%，成交额 {volume_ratio:.2f} 倍'
-                        ),
-                    })
-            stages['observation_ms'] += (time.perf_counter() - stage_started) * 1000
-            stage_started = time.perf_counter()
-            sent += _deliver_evaluation_summary(
-                db, rule, rule_checked, events,
-                f'5分钟涨跌 {price_threshold * 100:.2f}% 且成交额放大 >= {volume_threshold:.2f} 倍',
-            )
-            stages['delivery_ms'] += (time.perf_counter() - stage_started) * 1000
+                matched = direction_match and volume_ratio >= volume_threshold
+                values = {'price_change': price_change, 'price_change_threshold': price_threshold, 'volume_ratio': volume_ratio, 'volume_ratio_threshold': volume_threshold, 'open_time': metric['open_time']}
+                observations.append(AlertObservation(
+                    rule, symbol, direction,
+                    lambda _state, matched=matched, values=values: (matched, values, None),
+                    context=(symbol, price_change, volume_ratio),
+                ))
+
+        rule_errors = {}
+        results = _observe_many(db, observations, stages=stages, rule_errors=rule_errors)
+        rule_stats = _deliver_rule_summaries(
+            db, rules, observations, results, _describe_price_volume_event, conditions, stages, rule_errors,
+        )
         stage_started = time.perf_counter()
         db.commit()
         stages['commit_ms'] += (time.perf_counter() - stage_started) * 1000
-        return {
-            'status': 'success', 'evaluated': len(rules), 'checked': checked,
-            'matched': matched_count, 'sent': sent,
-            'metrics': _evaluation_metrics(
-                started_at, stages, symbols=len(symbols) if rules else 0,
-                kline_rows=sum(metric['kline_count'] for metric in metrics_by_symbol.values()) if rules else 0,
-            ),
-        }
+        return _evaluation_result(rules, rule_stats, _evaluation_metrics(
+            started_at, stages, symbols=len(metrics_by_symbol), rules=len(rules),
+            kline_rows=sum(metric['kline_count'] for metric in metrics_by_symbol.values()),
+        ))
     except Exception:
         db.rollback()
         logger.exception('价格放量告警评估失败')
@@ -879,66 +1335,57 @@ def evaluate_price_volume_rules(session=None, rule_id=None):
             db.close()
 
 
-def evaluate_job_failure_rules(metadata, session=None, rule_id=None):
+def _describe_job_failure_event(observation, previous_values):
+    job_id, job = observation.context
+    previous_error = previous_values.get('last_error') or '未提供'
+    return {
+        'triggered': f'- {job_id} 错误：{job.get("last_error") or "未提供"}',
+        'recovered': f'- {job_id}\n  之前：{previous_error}\n  当前：成功',
+    }
+
+
+def _job_failure_evaluator(job, required_failures):
+    failed = job.get('last_status') == 'error'
+
+    def evaluate(state):
+        current_failures = int(state.consecutive_matches or 0) + 1 if failed else 0
+        values = {'last_status': job.get('last_status'), 'last_error': job.get('last_error'), 'consecutive_failures': current_failures}
+        return failed and current_failures >= required_failures, values, current_failures
+
+    return evaluate
+
+
+def evaluate_job_failure_rules(metadata, session=None, rule_id=None, rule_ids=None):
     if not config.NOTIFICATIONS_ENABLED:
-        return {'status': 'disabled', 'evaluated': 0, 'checked': 0, 'matched': 0, 'sent': 0}
+        return _disabled_result()
     own_session = session is None
     db = session or get_session()
     started_at = time.perf_counter()
     stages = defaultdict(float)
     try:
-        rules = _enabled_rules(db, EVENT_JOB_FAILURE, rule_id=rule_id)
-        sent = checked = matched_count = 0
+        rules = _enabled_rules(db, EVENT_JOB_FAILURE, rule_id=rule_id, rule_ids=rule_ids)
+        observations = []
+        conditions = {}
         for rule in rules:
             params = rule.params_json or {}
             required_failures = int(params.get('consecutive_failures', 1))
-            events = []
-            rule_checked = 0
-            job_ids = params.get('job_ids', [])
-            stage_started = time.perf_counter()
-            states = _load_rule_states(db, rule.id, 'failure', job_ids)
-            stages['state_load_ms'] += (time.perf_counter() - stage_started) * 1000
-            stage_started = time.perf_counter()
-            for job_id in job_ids:
+            conditions[rule.id] = f'连续失败 >= {required_failures} 次'
+            for job_id in dict.fromkeys(params.get('job_ids', [])):
                 job = metadata.get(job_id) or {}
-                failed = job.get('last_status') == 'error'
-                state = states.get(job_id)
-                current_failures = (int(state.consecutive_matches or 0) if state else 0) + 1 if failed else 0
-                is_match = failed and current_failures >= required_failures
-                checked += 1
-                rule_checked += 1
-                matched_count += int(is_match)
-                result = _observe(
-                    db, rule, job_id, 'failure', is_match,
-                    {'last_status': job.get('last_status'), 'last_error': job.get('last_error'), 'consecutive_failures': current_failures},
-                    f'任务 {job_id} 执行失败',
-                    f'任务状态为 {job.get("last_status") or "unknown"}；错误：{job.get("last_error") or "未提供"}。',
-                    consecutive_matches=current_failures,
-                    aggregate=True,
-                )
-                if result.get('state') and result['event_status']:
-                    previous = result['previous_values'] or {}
-                    previous_error = previous.get('last_error') or '未提供'
-                    events.append({
-                        'status': result['event_status'],
-                    'state': result['state'],
-                        'triggered': f'- {job_id} 错误：{job.get("last_error") or "未提供"}',
-                        'recovered': f'- {job_id}\n  之前：{previous_error}\n  当前：成功',
-                    })
-            stages['observation_ms'] += (time.perf_counter() - stage_started) * 1000
-            stage_started = time.perf_counter()
-            sent += _deliver_evaluation_summary(
-                db, rule, rule_checked, events, f'连续失败 >= {required_failures} 次',
-            )
-            stages['delivery_ms'] += (time.perf_counter() - stage_started) * 1000
+                observations.append(AlertObservation(
+                    rule, job_id, 'failure', _job_failure_evaluator(job, required_failures),
+                    context=(job_id, job),
+                ))
+
+        rule_errors = {}
+        results = _observe_many(db, observations, stages=stages, rule_errors=rule_errors)
+        rule_stats = _deliver_rule_summaries(
+            db, rules, observations, results, _describe_job_failure_event, conditions, stages, rule_errors,
+        )
         stage_started = time.perf_counter()
         db.commit()
         stages['commit_ms'] += (time.perf_counter() - stage_started) * 1000
-        return {
-            'status': 'success', 'evaluated': len(rules), 'checked': checked,
-            'matched': matched_count, 'sent': sent,
-            'metrics': _evaluation_metrics(started_at, stages),
-        }
+        return _evaluation_result(rules, rule_stats, _evaluation_metrics(started_at, stages, rules=len(rules)))
     except Exception:
         db.rollback()
         logger.exception('任务失败告警评估失败')
@@ -952,92 +1399,167 @@ def evaluate_job_failure_rules(metadata, session=None, rule_id=None):
             db.close()
 
 
+def _evaluate_event_rules(event_type, rule_ids, session=None, metadata=None):
+    if event_type == EVENT_FUNDING_RATE:
+        return evaluate_funding_rate_rules(session=session, rule_ids=rule_ids)
+    if event_type == EVENT_PRICE_VOLUME:
+        return evaluate_price_volume_rules(session=session, rule_ids=rule_ids)
+    return evaluate_job_failure_rules(metadata or {}, session=session, rule_ids=rule_ids)
+
+
 def evaluate_rule(rule, session=None, metadata=None):
-    if rule.event_type == EVENT_FUNDING_RATE:
-        return evaluate_funding_rate_rules(session=session, rule_id=rule.id)
-    if rule.event_type == EVENT_PRICE_VOLUME:
-        return evaluate_price_volume_rules(session=session, rule_id=rule.id)
-    return evaluate_job_failure_rules(metadata or {}, session=session, rule_id=rule.id)
+    return _evaluate_event_rules(rule.event_type, [rule.id], session=session, metadata=metadata)
 
 
-def evaluate_rule_with_run(rule, trigger_source, session=None, metadata=None):
-    """Evaluate one rule and persist the same observable run for every source."""
+def ensure_alert_state_version(db):
+    """Add ``alert_states.version`` for deployments created before optimistic versioning.
+
+    Runs once per process from ``coinx.runtime.upgrade_database_schema``;
+    new deployments get the column from ``sql/schema.sql``.
+    """
+    global ALERT_STATE_VERSION_CHECKED
+    if ALERT_STATE_VERSION_CHECKED:
+        return
+    bind = db.get_bind()
+    columns = {column['name'] for column in inspect(bind).get_columns(AlertState.__tablename__)}
+    if 'version' not in columns:
+        with bind.begin() as connection:
+            connection.execute(text('ALTER TABLE alert_states ADD COLUMN version INT NOT NULL DEFAULT 0'))
+        logger.info('alert_states.version 列已补齐')
+    ALERT_STATE_VERSION_CHECKED = True
+
+
+def _finish_run(db, run, result):
+    run.status = result['status']
+    run.checked_count = result.get('checked', 0)
+    run.matched_count = result.get('matched', 0)
+    run.sent_count = result.get('sent', 0)
+    run.error_message = result.get('error')
+    run.completed_at = now_ms()
+    metrics = result.get('metrics') or {}
+    if metrics:
+        db.add(AlertEvaluationMetric(run_id=run.id, metrics_json=metrics))
+
+
+def evaluate_rules_with_runs(rules, trigger_source, session=None, metadata=None):
+    """Evaluate rules in one pass per event type, recording one run per rule.
+
+    All leases of the batch share one extra connection.  Rules whose lease is
+    held by another evaluator are recorded as skipped.  Returns one result
+    per rule, in the order given.
+    """
     own_session = session is None
     db = session or get_session()
-    run = None
+    rules = list(rules)
+    runs = {}
+    results = {}
     lease_connection = None
-    rule_lease_connection = None
+    run_leases = []
+    rule_leases = []
     try:
         AlertEvaluationMetric.__table__.create(bind=db.get_bind(), checkfirst=True)
-        run = AlertEvaluationRun(
-            rule_id=rule.id,
-            trigger_source=trigger_source,
-            status='running',
-            started_at=now_ms(),
-        )
-        db.add(run)
+        started = now_ms()
+        for rule in rules:
+            runs[rule.id] = AlertEvaluationRun(
+                rule_id=rule.id,
+                trigger_source=trigger_source,
+                status='running',
+                started_at=started,
+            )
+            db.add(runs[rule.id])
         db.commit()
 
-        lease_acquired, lease_connection = acquire_evaluation_run_lease(db, run.id)
-        if not lease_acquired:
-            raise RuntimeError('unable to acquire evaluation run lease')
-        rule_lease_acquired, rule_lease_connection = _acquire_evaluation_lease(
-            db, f'coinx_alert_rule_{rule.id}',
-        )
-        if not rule_lease_acquired:
-            run.status = 'skipped'
-            run.error_message = 'another evaluation for this rule is still running'
-            run.completed_at = now_ms()
-            db.commit()
-            return {
-                'status': 'skipped', 'checked': 0, 'matched': 0, 'sent': 0,
-                'error': run.error_message, 'run_id': run.id,
-            }
-
-        result = evaluate_rule(rule, session=db, metadata=metadata)
-        run.status = result['status']
-        run.checked_count = result.get('checked', 0)
-        run.matched_count = result.get('matched', 0)
-        run.sent_count = result.get('sent', 0)
-        run.error_message = result.get('error')
-        run.completed_at = now_ms()
-        metrics = result.get('metrics') or {}
-        if metrics:
-            db.add(AlertEvaluationMetric(run_id=run.id, metrics_json=metrics))
+        runnable = defaultdict(list)
+        for rule in rules:
+            run = runs[rule.id]
+            lease_acquired, connection = acquire_evaluation_run_lease(db, run.id, lease_connection)
+            lease_connection = lease_connection or connection
+            if not lease_acquired:
+                results[rule.id] = {
+                    'status': 'error', 'checked': 0, 'matched': 0, 'sent': 0,
+                    'error': 'unable to acquire evaluation run lease',
+                }
+                _finish_run(db, run, results[rule.id])
+                continue
+            run_leases.append(run.id)
+            rule_lease_name = f'coinx_alert_rule_{rule.id}'
+            rule_lease_acquired, connection = _acquire_evaluation_lease(db, rule_lease_name, lease_connection)
+            lease_connection = lease_connection or connection
+            if not rule_lease_acquired:
+                results[rule.id] = {
+                    'status': 'skipped', 'checked': 0, 'matched': 0, 'sent': 0,
+                    'error': 'another evaluation for this rule is still running',
+                }
+                _finish_run(db, run, results[rule.id])
+                continue
+            rule_leases.append(rule_lease_name)
+            runnable[rule.event_type].append(rule)
         db.commit()
-        result['run_id'] = run.id
-        return result
+
+        for event_type, event_rules in runnable.items():
+            batch = _evaluate_event_rules(
+                event_type, [rule.id for rule in event_rules], session=db, metadata=metadata,
+            )
+            rule_stats = batch.get('rules') or {}
+            for rule in event_rules:
+                stats = rule_stats.get(rule.id)
+                if stats is None:
+                    # The whole pass failed before it could tally this rule.
+                    stats = {'status': batch['status'], 'error': batch.get('error')}
+                result = {
+                    'status': stats.get('status', batch['status']),
+                    'checked': stats.get('checked', 0),
+                    'matched': stats.get('matched', 0),
+                    'sent': stats.get('sent', 0),
+                    'metrics': batch.get('metrics'),
+                }
+                if stats.get('error'):
+                    result['error'] = stats['error']
+                _finish_run(db, runs[rule.id], result)
+                results[rule.id] = result
+            db.commit()
+        return [{**results[rule.id], 'run_id': runs[rule.id].id} for rule in rules]
     except Exception as exc:
         db.rollback()
-        if run is not None:
-            failed_run = db.get(AlertEvaluationRun, run.id)
-            if failed_run:
+        run_ids = {rule_id: run.id for rule_id, run in runs.items() if run.id is not None}
+        for rule_id, run_id in run_ids.items():
+            failed_run = db.get(AlertEvaluationRun, run_id)
+            if failed_run and failed_run.status == 'running':
                 failed_run.status = 'error'
                 failed_run.error_message = str(exc)[:500]
                 failed_run.completed_at = now_ms()
-                db.commit()
-        logger.exception('%s alert evaluation failed: rule=%s', trigger_source, rule.id)
-        return {
-            'status': 'error', 'checked': 0, 'matched': 0, 'sent': 0,
-            'error': 'rule evaluation failed', 'run_id': run.id if run else None,
-        }
+        if run_ids:
+            db.commit()
+        logger.exception('%s alert evaluation failed: rules=%s', trigger_source, [rule.id for rule in rules])
+        return [
+            {
+                'status': 'error', 'checked': 0, 'matched': 0, 'sent': 0,
+                'error': 'rule evaluation failed', 'run_id': run_ids.get(rule.id),
+            }
+            for rule in rules
+        ]
     finally:
-        _release_evaluation_lease(rule_lease_connection, f'coinx_alert_rule_{rule.id}' if run else None)
-        if run is not None:
-            release_evaluation_run_lease(run.id, lease_connection)
+        for rule_lease_name in rule_leases:
+            _release_evaluation_lease(lease_connection, rule_lease_name, close=False)
+        for run_id in run_leases:
+            release_evaluation_run_lease(run_id, lease_connection, close=False)
+        if lease_connection is not None:
+            lease_connection.close()
         if own_session:
             db.close()
 
 
+def evaluate_rule_with_run(rule, trigger_source, session=None, metadata=None):
+    """Evaluate one rule and persist the same observable run for every source."""
+    return evaluate_rules_with_runs([rule], trigger_source, session=session, metadata=metadata)[0]
+
+
 def evaluate_scheduled_rules(event_type, metadata=None):
-    """Evaluate enabled rules for a scheduler event, recording one run per rule."""
+    """Evaluate enabled rules for a scheduler event in one pass, recording one run per rule."""
     db = get_session()
     try:
         rules = _enabled_rules(db, event_type)
-        results = [
-            evaluate_rule_with_run(rule, 'scheduled', session=db, metadata=metadata)
-            for rule in rules
-        ]
+        results = evaluate_rules_with_runs(rules, 'scheduled', session=db, metadata=metadata) if rules else []
         return {
             'status': 'error' if any(result['status'] == 'error' for result in results) else 'success',
             'evaluated': len(results),
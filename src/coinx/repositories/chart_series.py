@@ -0,0 +1,397 @@
+"""合约详情页趋势图序列。
+
+按时间范围选择读取粒度：短范围直接读 5m 行，长范围在数据库内按桶聚合
+（成交量、主动买卖量求和，价格与持仓取桶内最后一根），四类序列只选所需列并发加载。
+合并交易所后仍超过 max_points 时做保形降采样：价格/持仓用 LTTB，
+买卖流向按相邻点合并求和，资金费率保留每桶最高与最低点，避免尖峰被等距抽样丢掉。
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import and_, func, literal_column, select
+
+from coinx.database import get_session
+from coinx.models import MarketFundingRate, MarketKline, MarketOpenInterestHist, MarketTakerBuySellVol
+from coinx.utils import logger
+
+
+FIVE_MINUTES_MS = 5 * 60 * 1000
+RANGE_HOURS = {'1h': 1, '4h': 4, '24h': 24, '72h': 72, '7d': 168, '30d': 720, '90d': 2160}
+# 可选的读取粒度（毫秒），从细到粗
+CHART_RESOLUTIONS_MS = (
+    FIVE_MINUTES_MS,
+    15 * 60 * 1000,
+    60 * 60 * 1000,
+    4 * 60 * 60 * 1000,
+    24 * 60 * 60 * 1000,
+)
+# 读取粒度允许的点数上限为 max_points 的倍数，留给降采样挑选形状
+CHART_RESOLUTION_OVERSAMPLE = 4
+CHART_SERIES_MAX_WORKERS = 4
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+def select_chart_resolution(hours, max_points):
+    """选择使范围内点数不超过 max_points * CHART_RESOLUTION_OVERSAMPLE 的最细粒度。"""
+    budget = max(1, int(max_points)) * CHART_RESOLUTION_OVERSAMPLE
+    range_ms = int(hours) * 60 * 60 * 1000
+    for resolution_ms in CHART_RESOLUTIONS_MS:
+        if range_ms // resolution_ms <= budget:
+            return resolution_ms
+    return CHART_RESOLUTIONS_MS[-1]
+
+
+def lttb_indices(times, values, threshold):
+    """Largest-Triangle-Three-Buckets，返回保留点的下标（升序）。
+
+    values 中的 None 不参与三角形面积计算，但首尾点始终保留。
+    """
+    count = len(times)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+
+    valid = [index for index in range(count) if values[index] is not None]
+    if len(valid) <= threshold:
+        return valid or [0, count - 1]
+
+    selected = [valid[0]]
+    bucket_size = (len(valid) - 2) / (threshold - 2)
+    previous = valid[0]
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(valid))
+        if next_start >= next_end:
+            next_indices = [valid[-1]]
+        else:
+            next_indices = valid[next_start:next_end]
+        avg_time = sum(times[index] for index in next_indices) / len(next_indices)
+        avg_value = sum(values[index] for index in next_indices) / len(next_indices)
+
+        previous_time = times[previous]
+        previous_value = values[previous]
+        best_index = valid[start]
+        best_area = -1.0
+        for index in valid[start:end]:
+            area = abs(
+                (previous_time - avg_time) * (values[index] - previous_value)
+                - (previous_time - times[index]) * (avg_value - previous_value)
+            )
+            if area > best_area:
+                best_area = area
+                best_index = index
+        selected.append(best_index)
+        previous = best_index
+    selected.append(valid[-1])
+    return selected
+
+
+def min_max_indices(values, threshold):
+    """把序列等分为 threshold/2 个桶，每桶保留最小值和最大值的下标（升序）。"""
+    count = len(values)
+    if threshold >= count or threshold < 2:
+        return list(range(count))
+
+    bucket_count = max(1, threshold // 2)
+    bucket_size = count / bucket_count
+    selected = []
+    for bucket in range(bucket_count):
+        start = int(bucket * bucket_size)
+        end = int((bucket + 1) * bucket_size) if bucket < bucket_count - 1 else count
+        candidates = [index for index in range(start, end) if values[index] is not None]
+        if not candidates:
+            continue
+        low = min(candidates, key=lambda index: values[index])
+        high = max(candidates, key=lambda index: values[index])
+        selected.extend(sorted({low, high}))
+    return selected
+
+
+def _merge_groups(points, threshold, sum_fields, time_field='time'):
+    """把相邻点合并为 threshold 组，sum_fields 求和，时间取组内第一个点。"""
+    count = len(points)
+    if threshold >= count or threshold < 1:
+        return points
+    group_size = count / threshold
+    merged = []
+    for group in range(threshold):
+        start = int(group * group_size)
+        end = int((group + 1) * group_size) if group < threshold - 1 else count
+        if start >= end:
+            continue
+        item = {time_field: points[start][time_field]}
+        for field_name in sum_fields:
+            values = [point[field_name] for point in points[start:end] if point.get(field_name) is not None]
+            item[field_name] = sum(values) if values else None
+        merged.append(item)
+    return merged
+
+
+def _bucket(column, resolution_ms):
+    if resolution_ms <= FIVE_MINUTES_MS:
+        return column
+    # 以字面量渲染桶宽，保证 SELECT 与 GROUP BY 中的表达式文本一致
+    return column - column % literal_column(str(int(resolution_ms)))
+
+
+def _load_anchor_time(db, symbol):
+    subqueries = [
+        select(func.max(time_column)).where(symbol_column == symbol, period_column == '5m').scalar_subquery()
+        for time_column, symbol_column, period_column in (
+            (MarketKline.open_time, MarketKline.symbol, MarketKline.period),
+            (MarketOpenInterestHist.event_time, MarketOpenInterestHist.symbol, MarketOpenInterestHist.period),
+            (MarketTakerBuySellVol.event_time, MarketTakerBuySellVol.symbol, MarketTakerBuySellVol.period),
+        )
+    ]
+    row = db.execute(select(*subqueries)).first()
+    return max((int(value) for value in (row or ()) if value is not None), default=None)
+
+
+def _load_kline_rows(db, symbol, cutoff, anchor, resolution_ms):
+    """返回 (exchange, time, close_price, volume) 列表。"""
+    window = and_(
+        MarketKline.symbol == symbol,
+        MarketKline.period == '5m',
+        MarketKline.open_time >= cutoff,
+        MarketKline.open_time <= anchor,
+    )
+    if resolution_ms <= FIVE_MINUTES_MS:
+        return db.execute(
+            select(MarketKline.exchange, MarketKline.open_time, MarketKline.close_price, MarketKline.volume).where(window)
+        ).all()
+
+    bucket = _bucket(MarketKline.open_time, resolution_ms)
+    grouped = select(
+        MarketKline.exchange.label('exchange'),
+        bucket.label('bucket_time'),
+        func.max(MarketKline.open_time).label('last_time'),
+        func.sum(MarketKline.volume).label('volume'),
+    ).where(window).group_by(MarketKline.exchange, bucket).subquery()
+    return db.execute(
+        select(grouped.c.exchange, grouped.c.bucket_time, MarketKline.close_price, grouped.c.volume).join(
+            MarketKline,
+            and_(
+                MarketKline.exchange == grouped.c.exchange,
+                MarketKline.symbol == symbol,
+                MarketKline.period == '5m',
+                MarketKline.open_time == grouped.c.last_time,
+            ),
+        )
+    ).all()
+
+
+def _load_open_interest_rows(db, symbol, cutoff, anchor, resolution_ms):
+    """返回 (time, sum_open_interest, sum_open_interest_value) 列表。"""
+    window = and_(
+        MarketOpenInterestHist.symbol == symbol,
+        MarketOpenInterestHist.period == '5m',
+        MarketOpenInterestHist.event_time >= cutoff,
+        MarketOpenInterestHist.event_time <= anchor,
+    )
+    if resolution_ms <= FIVE_MINUTES_MS:
+        return db.execute(
+            select(
+                MarketOpenInterestHist.event_time,
+                MarketOpenInterestHist.sum_open_interest,
+                MarketOpenInterestHist.sum_open_interest_value,
+            ).where(window)
+        ).all()
+
+    bucket = _bucket(MarketOpenInterestHist.event_time, resolution_ms)
+    grouped = select(
+        MarketOpenInterestHist.exchange.label('exchange'),
+        bucket.label('bucket_time'),
+        func.max(MarketOpenInterestHist.event_time).label('last_time'),
+    ).where(window).group_by(MarketOpenInterestHist.exchange, bucket).subquery()
+    return db.execute(
+        select(
+            grouped.c.bucket_time,
+            MarketOpenInterestHist.sum_open_interest,
+            MarketOpenInterestHist.sum_open_interest_value,
+        ).join(
+            MarketOpenInterestHist,
+            and_(
+                MarketOpenInterestHist.exchange == grouped.c.exchange,
+                MarketOpenInterestHist.symbol == symbol,
+                MarketOpenInterestHist.period == '5m',
+                MarketOpenInterestHist.event_time == grouped.c.last_time,
+            ),
+        )
+    ).all()
+
+
+def _load_flow_rows(db, symbol, cutoff, anchor, resolution_ms):
+    """返回按时间聚合所有交易所后的 (time, buy_vol, sell_vol) 列表。"""
+    bucket = _bucket(MarketTakerBuySellVol.event_time, resolution_ms)
+    return db.execute(
+        select(
+            bucket.label('bucket_time'),
+            func.sum(MarketTakerBuySellVol.buy_vol),
+            func.sum(MarketTakerBuySellVol.sell_vol),
+        ).where(
+            MarketTakerBuySellVol.symbol == symbol,
+            MarketTakerBuySellVol.period == '5m',
+            MarketTakerBuySellVol.event_time >= cutoff,
+            MarketTakerBuySellVol.event_time <= anchor,
+        ).group_by(bucket).order_by(bucket)
+    ).all()
+
+
+def _load_funding_rows(db, symbol, cutoff, anchor, resolution_ms):
+    """返回 (event_time, funding_rate, predicted_rate) 列表；资金费率点数少，保持原始粒度。"""
+    return db.execute(
+        select(MarketFundingRate.event_time, MarketFundingRate.funding_rate, MarketFundingRate.predicted_rate).where(
+            MarketFundingRate.symbol == symbol,
+            MarketFundingRate.period == '5m',
+            MarketFundingRate.event_time >= cutoff,
+            MarketFundingRate.event_time <= anchor,
+        ).order_by(MarketFundingRate.event_time)
+    ).all()
+
+
+CHART_SERIES_LOADERS = (
+    ('klines', _load_kline_rows),
+    ('open_interest', _load_open_interest_rows),
+    ('flow', _load_flow_rows),
+    ('funding', _load_funding_rows),
+)
+
+
+def _run_with_own_session(loader, *args):
+    db = get_session()
+    try:
+        return loader(db, *args)
+    finally:
+        db.close()
+
+
+def _load_series_rows(session, symbol, cutoff, anchor, resolution_ms):
+    args = (symbol, cutoff, anchor, resolution_ms)
+    if session is not None:
+        return {name: loader(session, *args) for name, loader in CHART_SERIES_LOADERS}
+
+    with ThreadPoolExecutor(max_workers=CHART_SERIES_MAX_WORKERS) as executor:
+        futures = {
+            name: executor.submit(_run_with_own_session, loader, *args)
+            for name, loader in CHART_SERIES_LOADERS
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _build_market_points(kline_rows, oi_rows):
+    prices = {}
+    volumes = {}
+    for exchange, timestamp, close_price, volume in kline_rows:
+        timestamp = int(timestamp)
+        current = prices.get(timestamp)
+        if current is None or exchange == 'binance':
+            prices[timestamp] = (_float(close_price), exchange)
+        if volume is not None:
+            volumes[timestamp] = volumes.get(timestamp, 0.0) + float(volume)
+
+    oi = {}
+    for timestamp, open_interest, open_interest_value in oi_rows:
+        item = oi.setdefault(int(timestamp), [None, None])
+        if open_interest_value is not None:
+            item[0] = (item[0] or 0.0) + float(open_interest_value)
+        if open_interest is not None:
+            item[1] = (item[1] or 0.0) + float(open_interest)
+
+    market = []
+    for timestamp in sorted(set(prices) | set(volumes) | set(oi)):
+        open_interest_value, open_interest = oi.get(timestamp, (None, None))
+        market.append({
+            'time': timestamp,
+            'price': (prices.get(timestamp) or (None, None))[0],
+            'volume': volumes.get(timestamp),
+            'open_interest_value': open_interest_value,
+            'open_interest': open_interest,
+        })
+    return market
+
+
+def _downsample_market(market, max_points):
+    """按价格做 LTTB，并补上持仓价值的 LTTB 点；成交量改为相邻保留点之间的累计值。"""
+    if len(market) <= max_points:
+        return market
+    times = [point['time'] for point in market]
+    price_points = max_points // 2 if max_points >= 6 else max_points
+    selected = set(lttb_indices(times, [point['price'] for point in market], price_points))
+    if max_points >= 6:
+        selected.update(lttb_indices(times, [point['open_interest_value'] for point in market], max_points - price_points))
+
+    result = []
+    previous_index = -1
+    for index in sorted(selected):
+        item = dict(market[index])
+        volumes = [point['volume'] for point in market[previous_index + 1:index + 1] if point['volume'] is not None]
+        item['volume'] = sum(volumes) if volumes else None
+        result.append(item)
+        previous_index = index
+    return result
+
+
+def load_contract_chart_series(symbol, range_key='24h', session=None, max_points=300):
+    """Load stored 5m series, roll them up for long ranges and downsample to max_points."""
+    started_at = time.perf_counter()
+    hours = RANGE_HOURS[range_key]
+    own_session = session is None
+    db = session or get_session()
+    try:
+        anchor = _load_anchor_time(db, symbol)
+    finally:
+        if own_session:
+            db.close()
+    if anchor is None:
+        return {'range': range_key, 'anchor_time': None, 'resolution_ms': None, 'market': [], 'flow': [], 'funding_rate': []}
+
+    resolution_ms = select_chart_resolution(hours, max_points)
+    cutoff = anchor - hours * 60 * 60 * 1000
+    if resolution_ms > FIVE_MINUTES_MS:
+        # 与桶边界对齐，避免第一个桶只含部分数据
+        cutoff -= cutoff % resolution_ms
+    rows = _load_series_rows(session, symbol, cutoff, anchor, resolution_ms)
+
+    market = _build_market_points(rows['klines'], rows['open_interest'])
+    flow = [
+        {
+            'time': int(timestamp),
+            'buy_volume': float(buy_volume or 0),
+            'sell_volume': float(sell_volume or 0),
+            'net_inflow': float(buy_volume or 0) - float(sell_volume or 0),
+        }
+        for timestamp, buy_volume, sell_volume in rows['flow']
+    ]
+    funding = [
+        {'time': int(event_time), 'funding_rate': _float(funding_rate), 'predicted_rate': _float(predicted_rate)}
+        for event_time, funding_rate, predicted_rate in rows['funding']
+    ]
+
+    market = _downsample_market(market, max_points)
+    if len(flow) > max_points:
+        flow = _merge_groups(flow, max_points, ('buy_volume', 'sell_volume', 'net_inflow'))
+    if len(funding) > max_points:
+        funding = [funding[index] for index in min_max_indices([item['funding_rate'] for item in funding], max_points)]
+
+    logger.info(
+        '合约趋势序列加载完成: symbol=%s range=%s resolution=%dm market=%d flow=%d funding=%d 耗时=%.2fs',
+        symbol,
+        range_key,
+        resolution_ms // 60000,
+        len(market),
+        len(flow),
+        len(funding),
+        time.perf_counter() - started_at,
+    )
+    return {
+        'range': range_key,
+        'anchor_time': anchor,
+        'resolution_ms': resolution_ms,
+        'market': market,
+        'flow': flow,
+        'funding_rate': funding,
+    }
@@ -0,0 +1,262 @@
+"""Web 进程与独立采集进程之间的指令与任务状态交接。
+
+PROCESS_ROLE=web 时 Web 进程不运行调度器，也不应直接访问交易所：手动补齐、行情榜刷新
+与任务控制写入 collector_commands 表，采集进程的 collector_command_job 领取后执行并回写结果；
+任务管理页展示的任务状态由采集进程定期写入 collector_job_states 表。
+"""
+import threading
+import time
+
+from coinx.database import get_session
+from coinx.models import CollectorCommand, CollectorJobState
+from coinx.utils import logger
+
+
+COMMAND_HOMEPAGE_REFRESH = 'homepage_refresh'
+COMMAND_MARKET_STRUCTURE_REFRESH = 'market_structure_refresh'
+COMMAND_MARKET_RANK_REFRESH = 'market_rank_refresh'
+COMMAND_JOB_ACTION = 'job_action'
+
+COMMAND_STATUS_PENDING = 'pending'
+COMMAND_STATUS_RUNNING = 'running'
+COMMAND_STATUS_SUCCESS = 'success'
+COMMAND_STATUS_ERROR = 'error'
+COMMAND_ACTIVE_STATUSES = (COMMAND_STATUS_PENDING, COMMAND_STATUS_RUNNING)
+
+COLLECTOR_COMMAND_RETENTION_MS = 86400 * 1000
+COLLECTOR_COMMAND_ERROR_MAX_LENGTH = 500
+# 采集进程自身状态行（调度器是否运行、交易所预算队列），与任务行存放在同一张表
+COLLECTOR_STATE_ROW_ID = '__collector__'
+# 状态行超过该时长未更新即视为采集进程不在线
+COLLECTOR_STATE_STALE_MS = 120 * 1000
+
+COLLECTOR_CONTROL_LOCK = threading.Lock()
+_COLLECTOR_CONTROL_STATE = {'tables_ready': False}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _ensure_tables(db):
+    if _COLLECTOR_CONTROL_STATE['tables_ready']:
+        return
+    bind = db.get_bind()
+    CollectorCommand.__table__.create(bind=bind, checkfirst=True)
+    CollectorJobState.__table__.create(bind=bind, checkfirst=True)
+    _COLLECTOR_CONTROL_STATE['tables_ready'] = True
+
+
+def compact_summary(value):
+    """去掉摘要中逐币种的 results 明细，只保留计数与耗时分类，便于写入 JSON 列。"""
+    if isinstance(value, dict):
+        return {key: compact_summary(item) for key, item in value.items() if key != 'results'}
+    if isinstance(value, (list, tuple)):
+        return [compact_summary(item) for item in value]
+    return value
+
+
+def _command_to_dict(row):
+    return {
+        'id': row.id,
+        'command': row.command,
+        'payload': row.payload_json or {},
+        'status': row.status,
+        'created_at': row.created_at,
+        'claimed_by': row.claimed_by,
+        'started_at': row.started_at,
+        'finished_at': row.finished_at,
+        'result': row.result_json,
+        'error': row.error_message,
+    }
+
+
+def enqueue_collector_command(command, payload=None, dedupe_ms=None, session=None, now_ms=None):
+    """写入一条待执行指令；dedupe_ms 内已有同名指令未完成时直接返回那一条，避免重复点击堆积。"""
+    now = _now_ms() if now_ms is None else int(now_ms)
+    own_session = session is None
+    db = session or get_session()
+    try:
+        with COLLECTOR_CONTROL_LOCK:
+            _ensure_tables(db)
+            if dedupe_ms:
+                existing = (
+                    db.query(CollectorCommand)
+                    .filter(
+                        CollectorCommand.command == command,
+                        CollectorCommand.status.in_(COMMAND_ACTIVE_STATUSES),
+                        CollectorCommand.created_at >= now - int(dedupe_ms),
+                    )
+                    .order_by(CollectorCommand.id.desc())
+                    .first()
+                )
+                if existing is not None and (existing.payload_json or {}) == (payload or {}):
+                    return {**_command_to_dict(existing), 'reused': True}
+            row = CollectorCommand(
+                command=command,
+                payload_json=payload or {},
+                status=COMMAND_STATUS_PENDING,
+                created_at=now,
+            )
+            db.add(row)
+            db.commit()
+            return {**_command_to_dict(row), 'reused': False}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def claim_collector_commands(node_id, limit=10, session=None, now_ms=None):
+    """按创建顺序领取待执行指令；多个采集节点并发领取时以条件更新的行数判断归属。"""
+    now = _now_ms() if now_ms is None else int(now_ms)
+    own_session = session is None
+    db = session or get_session()
+    try:
+        with COLLECTOR_CONTROL_LOCK:
+            _ensure_tables(db)
+            candidates = (
+                db.query(CollectorCommand.id)
+                .filter(CollectorCommand.status == COMMAND_STATUS_PENDING)
+                .order_by(CollectorCommand.id.asc())
+                .limit(limit)
+                .all()
+            )
+            claimed_ids = []
+            for (command_id,) in candidates:
+                updated = (
+                    db.query(CollectorCommand)
+                    .filter(CollectorCommand.id == command_id, CollectorCommand.status == COMMAND_STATUS_PENDING)
+                    .update(
+                        {'status': COMMAND_STATUS_RUNNING, 'claimed_by': node_id, 'started_at': now},
+                        synchronize_session=False,
+                    )
+                )
+                if updated:
+                    claimed_ids.append(command_id)
+            db.commit()
+            if not claimed_ids:
+                return []
+            rows = db.query(CollectorCommand).filter(CollectorCommand.id.in_(claimed_ids)).order_by(CollectorCommand.id.asc()).all()
+            return [_command_to_dict(row) for row in rows]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def finish_collector_command(command_id, status, result=None, error=None, session=None, now_ms=None):
+    """回写指令结果，并顺带清理超过保留期的已完成指令。"""
+    now = _now_ms() if now_ms is None else int(now_ms)
+    own_session = session is None
+    db = session or get_session()
+    try:
+        with COLLECTOR_CONTROL_LOCK:
+            _ensure_tables(db)
+            db.query(CollectorCommand).filter(CollectorCommand.id == command_id).update(
+                {
+                    'status': status,
+                    'finished_at': now,
+                    'result_json': compact_summary(result) if result is not None else None,
+                    'error_message': str(error)[:COLLECTOR_COMMAND_ERROR_MAX_LENGTH] if error else None,
+                },
+                synchronize_session=False,
+            )
+            deleted = (
+                db.query(CollectorCommand)
+                .filter(CollectorCommand.finished_at < now - COLLECTOR_COMMAND_RETENTION_MS)
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+        if deleted:
+            logger.info('清理过期采集进程指令: 删除=%d', deleted)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def get_collector_command(command_id, session=None):
+    own_session = session is None
+    db = session or get_session()
+    try:
+        with COLLECTOR_CONTROL_LOCK:
+            _ensure_tables(db)
+        row = db.query(CollectorCommand).filter(CollectorCommand.id == command_id).first()
+        return _command_to_dict(row) if row is not None else None
+    finally:
+        if own_session:
+            db.close()
+
+
+def wait_for_collector_command(command_id, timeout_seconds, poll_interval=0.5):
+    """轮询等待指令完成，超时返回最后一次读到的状态（status 仍为 pending/running）。"""
+    deadline = time.time() + max(0, timeout_seconds)
+    while True:
+        command = get_collector_command(command_id)
+        if command is None or command['status'] not in COMMAND_ACTIVE_STATUSES:
+            return command
+        if time.time() >= deadline:
+            return command
+        time.sleep(poll_interval)
+
+
+def save_collector_job_states(job_states, collector_state, node_id=None, session=None, now_ms=None):
+    """整体替换任务状态：写入当前注册的任务与采集进程状态行，删除已不存在的任务。"""
+    now = _now_ms() if now_ms is None else int(now_ms)
+    rows = dict(job_states)
+    rows[COLLECTOR_STATE_ROW_ID] = collector_state
+    own_session = session is None
+    db = session or get_session()
+    try:
+        with COLLECTOR_CONTROL_LOCK:
+            _ensure_tables(db)
+            db.query(CollectorJobState).filter(CollectorJobState.job_id.notin_(list(rows))).delete(synchronize_session=False)
+            for job_id, state in rows.items():
+                db.merge(CollectorJobState(job_id=job_id, node_id=node_id, state_json=state, updated_at=now))
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def load_collector_job_states(session=None, now_ms=None):
+    """返回 (任务状态列表, 采集进程状态)；采集进程状态带 online 与 updated_at 字段。"""
+    now = _now_ms() if now_ms is None else int(now_ms)
+    own_session = session is None
+    db = session or get_session()
+    try:
+        with COLLECTOR_CONTROL_LOCK:
+            _ensure_tables(db)
+        rows = db.query(CollectorJobState).order_by(CollectorJobState.job_id.asc()).all()
+    finally:
+        if own_session:
+            db.close()
+
+    job_states = []
+    collector_state = {'online': False, 'updated_at': None, 'node_id': None}
+    for row in rows:
+        if row.job_id == COLLECTOR_STATE_ROW_ID:
+            collector_state = {
+                **(row.state_json or {}),
+                'online': now - row.updated_at <= COLLECTOR_STATE_STALE_MS,
+                'updated_at': row.updated_at,
+                'node_id': row.node_id,
+            }
+            continue
+        job_states.append({**(row.state_json or {}), 'id': row.job_id, 'updated_at': row.updated_at})
+    return job_states, collector_state
+
+
+def reset_collector_control_state():
+    with COLLECTOR_CONTROL_LOCK:
+        _COLLECTOR_CONTROL_STATE.update(tables_ready=False)
@@ -0,0 +1,216 @@
+"""合约详情页按 (类型, symbol, range, 锚点) 缓存的结果。
+
+详情、趋势序列和结构评分都只依赖已落库数据，在同一个 5m 锚点内结果不变。
+进入新锚点时旧锚点的条目整体失效；同一个键并发请求只计算一次。
+滚动修补写入新数据后清空缓存，并在后台线程按成交额预热前 N 个币种：同进程运行时由调度器在
+任务结束后触发；Web 与采集分进程运行时，由 Web 进程发现采集进程发布了新的 market_series
+交接版本后自行清空并预热，缓存始终在处理详情请求的进程里预热。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from coinx.cache_handoff import get_cache_version
+from coinx.collector.exchange_repair import latest_closed_5m_open_time
+from coinx.config import CONTRACT_DETAIL_CACHE_SIZE, CONTRACT_DETAIL_PREWARM_RANGES, CONTRACT_DETAIL_PREWARM_TOP_N
+from coinx.repositories.chart_series import load_contract_chart_series
+from coinx.repositories.contract_detail import get_contract_detail, get_contract_structure_score
+from coinx.repositories.market_tickers import get_market_ticker_symbols
+from coinx.utils import logger
+
+
+CONTRACT_DETAIL_CACHE_LOCK = threading.Lock()
+CONTRACT_DETAIL_CACHE = OrderedDict()
+CONTRACT_DETAIL_CACHE_STATS = {'hits': 0, 'misses': 0}
+_CONTRACT_DETAIL_LOAD_LOCKS = {}
+_CONTRACT_DETAIL_STATE = {'anchor_time': None, 'generation': 0, 'handoff_version': None}
+CONTRACT_DETAIL_PREWARM_LOCK = threading.Lock()
+
+
+def _current_anchor(now_ms=None):
+    current_time_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    return latest_closed_5m_open_time(int(current_time_ms))
+
+
+def _advance_anchor_locked(anchor_time):
+    """进入新锚点时丢弃旧锚点条目（调用方持有 CONTRACT_DETAIL_CACHE_LOCK）。"""
+    current = _CONTRACT_DETAIL_STATE['anchor_time']
+    if current is not None and anchor_time <= current:
+        return
+    _CONTRACT_DETAIL_STATE['anchor_time'] = anchor_time
+    for key in [key for key in CONTRACT_DETAIL_CACHE if key[-1] < anchor_time]:
+        del CONTRACT_DETAIL_CACHE[key]
+
+
+def sync_contract_detail_handoff():
+    """采集进程发布了新的行情序列版本时清空缓存并在后台预热；返回是否发生了清空。"""
+    version = get_cache_version('market_series')
+    if version is None:
+        return False
+    with CONTRACT_DETAIL_CACHE_LOCK:
+        if _CONTRACT_DETAIL_STATE['handoff_version'] == version:
+            return False
+        _CONTRACT_DETAIL_STATE['handoff_version'] = version
+        _CONTRACT_DETAIL_STATE['generation'] += 1
+        CONTRACT_DETAIL_CACHE.clear()
+    start_contract_detail_prewarm_async()
+    return True
+
+
+def _release_load_lock_locked(key, load_lock):
+    """移除本次计算的单飞锁（调用方持有 CONTRACT_DETAIL_CACHE_LOCK）。"""
+    if _CONTRACT_DETAIL_LOAD_LOCKS.get(key) is load_lock:
+        del _CONTRACT_DETAIL_LOAD_LOCKS[key]
+
+
+def get_or_load_contract_value(kind, symbol, loader, range_key=None, now_ms=None):
+    """按 (kind, symbol, range_key, 当前锚点) 读取缓存，未命中时调用 loader 计算。
+
+    loader 返回 None 时不缓存（数据可能稍后补齐）。计算期间缓存被清空的结果不写回。
+    """
+    sync_contract_detail_handoff()
+    anchor_time = _current_anchor(now_ms)
+    key = (kind, symbol, range_key, anchor_time)
+
+    with CONTRACT_DETAIL_CACHE_LOCK:
+        _advance_anchor_locked(anchor_time)
+        if key in CONTRACT_DETAIL_CACHE:
+            CONTRACT_DETAIL_CACHE.move_to_end(key)
+            CONTRACT_DETAIL_CACHE_STATS['hits'] += 1
+            return CONTRACT_DETAIL_CACHE[key]
+        load_lock = _CONTRACT_DETAIL_LOAD_LOCKS.setdefault(key, threading.Lock())
+
+    with load_lock:
+        with CONTRACT_DETAIL_CACHE_LOCK:
+            if key in CONTRACT_DETAIL_CACHE:
+                CONTRACT_DETAIL_CACHE.move_to_end(key)
+                CONTRACT_DETAIL_CACHE_STATS['hits'] += 1
+                return CONTRACT_DETAIL_CACHE[key]
+            CONTRACT_DETAIL_CACHE_STATS['misses'] += 1
+            generation = _CONTRACT_DETAIL_STATE['generation']
+
+        try:
+            value = loader()
+        except Exception:
+            with CONTRACT_DETAIL_CACHE_LOCK:
+                _release_load_lock_locked(key, load_lock)
+            raise
+
+        # 写回缓存与释放单飞锁在同一临界区内完成，后来者要么命中缓存，要么拿到新的锁重新计算
+        with CONTRACT_DETAIL_CACHE_LOCK:
+            if (
+                value is not None
+                and generation == _CONTRACT_DETAIL_STATE['generation']
+                and anchor_time >= (_CONTRACT_DETAIL_STATE['anchor_time'] or anchor_time)
+            ):
+                CONTRACT_DETAIL_CACHE[key] = value
+                CONTRACT_DETAIL_CACHE.move_to_end(key)
+                while len(CONTRACT_DETAIL_CACHE) > CONTRACT_DETAIL_CACHE_SIZE:
+                    CONTRACT_DETAIL_CACHE.popitem(last=False)
+            _release_load_lock_locked(key, load_lock)
+        return value
+
+
+def get_cached_contract_detail(symbol, loader=None, now_ms=None):
+    loader = loader or get_contract_detail
+    return get_or_load_contract_value('detail', symbol, lambda: loader(symbol), now_ms=now_ms)
+
+
+def get_cached_contract_chart_series(symbol, range_key='24h', loader=None, now_ms=None):
+    loader = loader or load_contract_chart_series
+    return get_or_load_contract_value('series', symbol, lambda: loader(symbol, range_key=range_key), range_key=range_key, now_ms=now_ms)
+
+
+def get_cached_contract_structure_score(symbol, loader=None, now_ms=None):
+    loader = loader or get_contract_structure_score
+    return get_or_load_contract_value('structure_score', symbol, lambda: loader(symbol), now_ms=now_ms)
+
+
+def invalidate_contract_detail_cache(symbols=None):
+    """清空缓存；传入 symbols 时只清这些币种。"""
+    with CONTRACT_DETAIL_CACHE_LOCK:
+        _CONTRACT_DETAIL_STATE['generation'] += 1
+        if symbols is None:
+            CONTRACT_DETAIL_CACHE.clear()
+            return
+        symbol_set = set(symbols)
+        for key in [key for key in CONTRACT_DETAIL_CACHE if key[1] in symbol_set]:
+            del CONTRACT_DETAIL_CACHE[key]
+
+
+def get_contract_detail_cache_stats():
+    with CONTRACT_DETAIL_CACHE_LOCK:
+        return {
+            'size': len(CONTRACT_DETAIL_CACHE),
+            'capacity': CONTRACT_DETAIL_CACHE_SIZE,
+            'anchor_time': _CONTRACT_DETAIL_STATE['anchor_time'],
+            **CONTRACT_DETAIL_CACHE_STATS,
+        }
+
+
+def reset_contract_detail_cache():
+    with CONTRACT_DETAIL_CACHE_LOCK:
+        CONTRACT_DETAIL_CACHE.clear()
+        _CONTRACT_DETAIL_LOAD_LOCKS.clear()
+        CONTRACT_DETAIL_CACHE_STATS.update(hits=0, misses=0)
+        _CONTRACT_DETAIL_STATE.update(anchor_time=None, generation=0, handoff_version=None)
+
+
+def prewarm_contract_detail_cache(top_n, symbols=None, ranges=None):
+    """清空旧结果后为成交额前 top_n 个币种预先计算详情、趋势序列与结构评分。"""
+    started_at = time.perf_counter()
+    invalidate_contract_detail_cache()
+    if top_n <= 0:
+        return {'status': 'skipped', 'symbols': 0}
+
+    target_symbols = list(symbols) if symbols is not None else get_market_ticker_symbols(rank_type='quote_volume', limit=top_n)
+    target_symbols = target_symbols[:top_n]
+    target_ranges = list(ranges if ranges is not None else CONTRACT_DETAIL_PREWARM_RANGES)
+    failure_count = 0
+    for symbol in target_symbols:
+        try:
+            get_cached_contract_detail(symbol)
+            get_cached_contract_structure_score(symbol)
+            for range_key in target_ranges:
+                get_cached_contract_chart_series(symbol, range_key=range_key)
+        except Exception as exc:
+            failure_count += 1
+            logger.warning('合约详情缓存预热失败: symbol=%s error=%s', symbol, exc)
+
+    duration_ms = round((time.perf_counter() - started_at) * 1000, 2)
+    logger.info(
+        '合约详情缓存预热完成: symbols=%d ranges=%s failure=%d 耗时=%.2fms',
+        len(target_symbols),
+        ','.join(target_ranges),
+        failure_count,
+        duration_ms,
+    )
+    return {
+        'status': 'success' if failure_count == 0 else 'partial',
+        'symbols': len(target_symbols),
+        'failure_count': failure_count,
+        'duration_ms': duration_ms,
+    }
+
+
+def _run_contract_detail_prewarm(top_n):
+    if not CONTRACT_DETAIL_PREWARM_LOCK.acquire(blocking=False):
+        return None
+    try:
+        return prewarm_contract_detail_cache(top_n)
+    except Exception as exc:
+        logger.error('合约详情缓存预热失败: %s', exc)
+        logger.exception(exc)
+        return None
+    finally:
+        CONTRACT_DETAIL_PREWARM_LOCK.release()
+
+
+def start_contract_detail_prewarm_async(top_n=None):
+    """在后台线程预热，不阻塞调用方；未开启预热或已有预热在运行时返回 False。"""
+    top_n = CONTRACT_DETAIL_PREWARM_TOP_N if top_n is None else top_n
+    if top_n <= 0 or CONTRACT_DETAIL_PREWARM_LOCK.locked():
+        return False
+    prewarm_thread = threading.Thread(target=_run_contract_detail_prewarm, args=(top_n,), daemon=True)
+    prewarm_thread.start()
+    return True
@@ -6,9 +6,20 @@ from sqlalchemy.dialects.mysql import insert as mysql_insert
 
 from coinx.collector.binance.funding_rate import fetch_all_premium_index
 from coinx.collector.binance.client import get_session as get_http_session
-from coinx.config import DB_TYPE
+from coinx.config import DB_TYPE, ENABLED_EXCHANGES
 from coinx.database import get_session
 from coinx.models import MarketFundingRate
+from coinx.repositories.funding_rate_cache import (
+    normalize_binance_funding_records,
+    publish_funding_rates,
+    refresh_exchange_funding_rates,
+)
+from coinx.repositories.funding_rate_page import (
+    FUNDING_RATE_PAGE_PERIOD,
+    get_cached_funding_rate_sparklines,
+    get_funding_rate_page_snapshot,
+    publish_funding_rate_page,
+)
 from coinx.utils import logger
 
 
@@ -148,7 +159,24 @@ def load_latest_funding_rate_page(
     period='5m',
     session=None,
 ):
-    """Load latest funding-rate rows, stats, and paging with one SQL query."""
+    """Load latest funding-rate rows, stats, and paging.
+
+    Without an explicit session the in-memory latest snapshot serves the
+    request; the SQL below is the fallback and the explicit-session path.
+    """
+    if session is None and period == FUNDING_RATE_PAGE_PERIOD:
+        snapshot = get_funding_rate_page_snapshot()
+        if snapshot is not None:
+            return snapshot.page(
+                keyword=keyword,
+                show_abnormal_only=show_abnormal_only,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                page=page,
+                page_size=page_size,
+                threshold=threshold,
+            )
+
     own_session = session is None
     db = session or get_session()
 
@@ -386,6 +414,7 @@ def load_funding_rate_sparklines(symbols, hours=1, exchange='binance', session=N
     批量加载所有币种的资金费率走势数据（用于缩略图）
 
     单次查询，按 symbol 分组返回近 N 小时的 predicted_rate 序列。
+    未传入 session 时按资金费率快照版本缓存，新数据发布前不重复查询。
 
     Args:
         symbols: 交易对列表
@@ -399,6 +428,17 @@ def load_funding_rate_sparklines(symbols, hours=1, exchange='binance', session=N
     if not symbols:
         return {}
 
+    if session is None:
+        return get_cached_funding_rate_sparklines(
+            symbols,
+            hours,
+            exchange,
+            lambda: _query_funding_rate_sparklines(symbols, hours, exchange),
+        )
+    return _query_funding_rate_sparklines(symbols, hours, exchange, session=session)
+
+
+def _query_funding_rate_sparklines(symbols, hours, exchange, session=None):
     own_session = session is None
     db = session or get_session()
 
@@ -431,26 +471,35 @@ def load_funding_rate_sparklines(symbols, hours=1, exchange='binance', session=N
             db.close()
 
 
-def collect_funding_rates(symbols=None, max_workers=4, http_session=None, db_session=None):
+def collect_funding_rates(symbols=None, max_workers=4, http_session=None, db_session=None, exchanges=None):
     """
     采集资金费率数据（使用批量 API 一次性获取所有币种）
 
+    Binance 全量快照写入历史表，同时与其余已启用交易所的全量资金费率一起
+    发布到最新资金费率缓存（评分与首页只读该缓存）。
+
     Args:
-        symbols: 币种列表（可选，用于过滤）
+        symbols: 币种列表（可选，用于过滤写入历史表的 Binance 记录）
         max_workers: 未使用（保留兼容性）
         http_session: HTTP session（可选）
         db_session: 数据库 session（可选）
+        exchanges: 需要刷新缓存的交易所（可选，默认 ENABLED_EXCHANGES）
 
     Returns:
-        int: 成功保存的记录数
+        int: 成功保存的 Binance 历史记录数
     """
     own_db = db_session is None
     db = db_session or get_session()
+    target_exchanges = [
+        (exchange or '').strip().lower()
+        for exchange in (ENABLED_EXCHANGES if exchanges is None else exchanges)
+    ]
 
     try:
         sess = http_session or get_http_session()
 
         # 使用批量 API 一次性获取所有币种
+        fetched_time = int(time.time() * 1000)
         all_records = fetch_all_premium_index(session=sess)
 
         # 如果指定了 symbols，过滤出需要的
@@ -466,6 +515,22 @@ def collect_funding_rates(symbols=None, max_workers=4, http_session=None, db_ses
 
         if records:
             save_funding_rates(records, session=db)
+            publish_funding_rate_page(records, fetched_time)
+
+        if 'binance' in target_exchanges and all_records:
+            try:
+                publish_funding_rates(
+                    'binance',
+                    normalize_binance_funding_records(all_records),
+                    fetched_time=fetched_time,
+                    session=db,
+                )
+            except Exception as exc:
+                logger.warning('资金费率缓存刷新失败: exchange=binance error=%s', exc)
+
+        exchange_counts = refresh_exchange_funding_rates(target_exchanges, session=db)
+        if exchange_counts:
+            logger.info('多交易所资金费率缓存刷新完成: %s', exchange_counts)
         return len(records)
 
     finally:
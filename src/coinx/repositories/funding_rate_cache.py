@@ -0,0 +1,306 @@
+"""各交易所最新资金费率缓存。
+
+资金费率定时任务负责拉取各交易所全量资金费率，写入 market_funding_rate_latest
+并同步到进程内存；评分与首页只读这里，不在 Web 请求内访问交易所接口。
+内存快照缺失时回读数据库，超过 FUNDING_RATE_CACHE_TTL_SECONDS 未刷新的交易所视为无数据。
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from coinx.collector.bybit.series import get_all_funding_rates as get_all_bybit_funding_rates
+from coinx.collector.gate.series import get_all_funding_rates as get_all_gate_funding_rates
+from coinx.collector.okx.series import get_all_funding_rates as get_all_okx_funding_rates
+from coinx.collector.rate_limit import bind_request_class
+from coinx.cache_handoff import get_cache_version, publish_cache_version
+from coinx.config import FUNDING_RATE_CACHE_TTL_SECONDS
+from coinx.database import get_session
+from coinx.models import MarketFundingRateLatest
+from coinx.utils import logger
+
+
+FUNDING_RATE_CACHE_MAX_WORKERS = 4
+# 采集任务可能在其他进程运行，内存快照超过该时长后回读数据库确认是否有更新
+FUNDING_RATE_CACHE_RELOAD_SECONDS = 60
+FUNDING_RATE_CACHE_FIELDS = (
+    'funding_rate',
+    'predicted_rate',
+    'next_funding_time',
+    'mark_price',
+    'event_time',
+)
+# Binance 全量资金费率由 collect_funding_rates 拉取并入库，这里只刷新其余交易所
+EXCHANGE_FUNDING_LOADERS = {
+    'okx': get_all_okx_funding_rates,
+    'bybit': get_all_bybit_funding_rates,
+    'gate': get_all_gate_funding_rates,
+}
+
+FUNDING_RATE_CACHE_LOCK = threading.Lock()
+FUNDING_RATE_SNAPSHOTS = {}
+
+
+@dataclass(frozen=True, slots=True)
+class FundingRateSnapshot:
+    exchange: str
+    fetched_time: int
+    loaded_time: int
+    records: MappingProxyType
+
+    def is_fresh(self, now_ms, max_age_seconds):
+        return now_ms - self.fetched_time <= max_age_seconds * 1000
+
+    def needs_reload(self, now_ms, handoff_version=None):
+        if handoff_version is not None and handoff_version > self.fetched_time:
+            return True
+        return now_ms - self.loaded_time > FUNDING_RATE_CACHE_RELOAD_SECONDS * 1000
+
+
+def _safe_float(value):
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _safe_int(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_record(symbol, funding_rate=None, predicted_rate=None, next_funding_time=None, mark_price=None, event_time=None):
+    return {
+        'symbol': symbol,
+        'funding_rate': _safe_float(funding_rate),
+        'predicted_rate': _safe_float(predicted_rate),
+        'next_funding_time': _safe_int(next_funding_time),
+        'mark_price': _safe_float(mark_price),
+        'event_time': _safe_int(event_time),
+    }
+
+
+def normalize_exchange_funding_rates(raw_map):
+    """把各交易所 get_all_funding_rates 的返回值统一为缓存记录列表。"""
+    records = []
+    for symbol, payload in (raw_map or {}).items():
+        if not symbol or not isinstance(payload, dict):
+            continue
+        funding_rate = payload.get('lastFundingRate')
+        if funding_rate is None:
+            funding_rate = payload.get('fundingRate')
+        next_funding_time = payload.get('nextFundingTime')
+        if next_funding_time is None:
+            next_funding_time = payload.get('fundingTime')
+        records.append(_build_record(
+            symbol,
+            funding_rate=funding_rate,
+            next_funding_time=next_funding_time,
+            mark_price=payload.get('markPrice'),
+            event_time=payload.get('time'),
+        ))
+    return records
+
+
+def normalize_binance_funding_records(records):
+    """把 fetch_all_premium_index 的入库记录转为缓存记录列表。"""
+    return [
+        _build_record(
+            record['symbol'],
+            funding_rate=record.get('funding_rate'),
+            predicted_rate=record.get('predicted_rate'),
+            next_funding_time=record.get('next_funding_time'),
+            mark_price=record.get('mark_price'),
+            event_time=record.get('event_time'),
+        )
+        for record in records or []
+        if record.get('symbol')
+    ]
+
+
+def _store_snapshot(exchange, records_by_symbol, fetched_time):
+    snapshot = FundingRateSnapshot(
+        exchange=exchange,
+        fetched_time=int(fetched_time),
+        loaded_time=int(time.time() * 1000),
+        records=MappingProxyType(records_by_symbol),
+    )
+    with FUNDING_RATE_CACHE_LOCK:
+        current = FUNDING_RATE_SNAPSHOTS.get(exchange)
+        if current is None or current.fetched_time <= snapshot.fetched_time:
+            FUNDING_RATE_SNAPSHOTS[exchange] = snapshot
+    return snapshot
+
+
+def save_funding_rate_cache(exchange, records, fetched_time, session=None):
+    """按交易所整体覆盖写入最新资金费率缓存表，返回写入行数。"""
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        table = MarketFundingRateLatest.__table__
+        rows = [
+            {
+                'exchange': exchange,
+                'symbol': record['symbol'],
+                'fetched_time': int(fetched_time),
+                **{field_name: record.get(field_name) for field_name in FUNDING_RATE_CACHE_FIELDS},
+            }
+            for record in records
+        ]
+        db.execute(table.delete().where(table.c.exchange == exchange))
+        if rows:
+            db.execute(table.insert(), rows)
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def publish_funding_rates(exchange, records, fetched_time=None, session=None):
+    """写入数据库缓存并替换内存快照，返回写入行数。"""
+    exchange = (exchange or '').strip().lower()
+    fetched_time = int(fetched_time if fetched_time is not None else time.time() * 1000)
+    records_by_symbol = {
+        record['symbol']: _build_record(record['symbol'], **{field_name: record.get(field_name) for field_name in FUNDING_RATE_CACHE_FIELDS})
+        for record in records
+        if record.get('symbol')
+    }
+    saved_count = save_funding_rate_cache(exchange, list(records_by_symbol.values()), fetched_time, session=session)
+    _store_snapshot(exchange, records_by_symbol, fetched_time)
+    publish_cache_version(f'funding_rate:{exchange}', fetched_time)
+    return saved_count
+
+
+def refresh_exchange_funding_rates(exchanges, session=None):
+    """并发拉取非 Binance 交易所的全量资金费率并发布到缓存，返回 {exchange: count}。
+
+    单个交易所失败只记录告警，保留上一次的缓存，由 TTL 决定何时失效。
+    """
+    targets = [
+        exchange
+        for exchange in dict.fromkeys((exchange or '').strip().lower() for exchange in exchanges or [])
+        if exchange in EXCHANGE_FUNDING_LOADERS
+    ]
+    if not targets:
+        return {}
+
+    def _fetch_single_exchange(exchange):
+        started_at = time.perf_counter()
+        records = normalize_exchange_funding_rates(EXCHANGE_FUNDING_LOADERS[exchange]())
+        return exchange, records, int(time.time() * 1000), time.perf_counter() - started_at
+
+    counts = {}
+    max_workers = min(FUNDING_RATE_CACHE_MAX_WORKERS, len(targets))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(bind_request_class(_fetch_single_exchange), exchange): exchange for exchange in targets}
+        for future in as_completed(futures):
+            exchange = futures[future]
+            try:
+                exchange, records, fetched_time, duration = future.result()
+                if not records:
+                    logger.warning('交易所资金费率为空，保留旧缓存: exchange=%s', exchange)
+                    counts[exchange] = 0
+                    continue
+                counts[exchange] = publish_funding_rates(exchange, records, fetched_time=fetched_time, session=session)
+                logger.info('资金费率缓存刷新完成: exchange=%s count=%d 耗时=%.2fs', exchange, counts[exchange], duration)
+            except Exception as exc:
+                logger.warning('资金费率缓存刷新失败: exchange=%s error=%s', exchange, exc)
+                counts[exchange] = 0
+    return counts
+
+
+def _load_snapshot_from_db(db, exchange):
+    rows = db.query(
+        MarketFundingRateLatest.symbol,
+        MarketFundingRateLatest.funding_rate,
+        MarketFundingRateLatest.predicted_rate,
+        MarketFundingRateLatest.next_funding_time,
+        MarketFundingRateLatest.mark_price,
+        MarketFundingRateLatest.event_time,
+        MarketFundingRateLatest.fetched_time,
+    ).filter(MarketFundingRateLatest.exchange == exchange).all()
+    if not rows:
+        return None
+
+    records_by_symbol = {
+        row.symbol: _build_record(
+            row.symbol,
+            funding_rate=row.funding_rate,
+            predicted_rate=row.predicted_rate,
+            next_funding_time=row.next_funding_time,
+            mark_price=row.mark_price,
+            event_time=row.event_time,
+        )
+        for row in rows
+    }
+    return _store_snapshot(exchange, records_by_symbol, min(int(row.fetched_time) for row in rows))
+
+
+def get_funding_rate_snapshot(exchange, session=None, now_ms=None, max_age_seconds=None):
+    """读取交易所资金费率快照：内存优先，缺失或过期时回读数据库；仍过期返回 None。"""
+    exchange = (exchange or '').strip().lower()
+    current_time_ms = int(now_ms if now_ms is not None else time.time() * 1000)
+    max_age = FUNDING_RATE_CACHE_TTL_SECONDS if max_age_seconds is None else max_age_seconds
+
+    with FUNDING_RATE_CACHE_LOCK:
+        snapshot = FUNDING_RATE_SNAPSHOTS.get(exchange)
+    handoff_version = get_cache_version(f'funding_rate:{exchange}')
+    if (
+        snapshot is not None
+        and snapshot.is_fresh(current_time_ms, max_age)
+        and not snapshot.needs_reload(current_time_ms, handoff_version)
+    ):
+        return snapshot
+
+    own_session = session is None
+    db = session or get_session()
+    try:
+        snapshot = _load_snapshot_from_db(db, exchange)
+    except Exception as exc:
+        logger.warning('读取资金费率缓存失败: exchange=%s error=%s', exchange, exc)
+        snapshot = None
+    finally:
+        if own_session:
+            db.close()
+
+    if snapshot is None or not snapshot.is_fresh(current_time_ms, max_age):
+        return None
+    return snapshot
+
+
+def load_cached_funding_rates(exchange, symbols=None, session=None, now_ms=None):
+    """返回 {symbol: record}；缓存缺失或过期时返回空字典。"""
+    snapshot = get_funding_rate_snapshot(exchange, session=session, now_ms=now_ms)
+    if snapshot is None:
+        return {}
+    if symbols is None:
+        return dict(snapshot.records)
+    return {symbol: snapshot.records[symbol] for symbol in symbols if symbol in snapshot.records}
+
+
+def load_cached_funding_rate_maps(exchanges, symbols=None, session=None, now_ms=None):
+    """返回 {exchange: {symbol: funding_rate}}，供评分使用。"""
+    funding_maps = {}
+    for exchange in exchanges:
+        if not exchange:
+            continue
+        records = load_cached_funding_rates(exchange, symbols=symbols, session=session, now_ms=now_ms)
+        funding_maps[exchange] = {symbol: record['funding_rate'] for symbol, record in records.items()}
+    return funding_maps
+
+
+def reset_funding_rate_cache():
+    with FUNDING_RATE_CACHE_LOCK:
+        FUNDING_RATE_SNAPSHOTS.clear()
@@ -0,0 +1,320 @@
+"""资金费率排行页的最新快照与走势缩略图缓存。
+
+排行页原先每次请求都对整张 market_funding_rate 做 GROUP BY symbol, period 取最新一行，
+再在 SQL 中过滤、排序与分页。这里把最新一行物化为内存快照：collect_funding_rates
+写入后直接合并发布，快照内为每种 sort_by × sort_order 预先排好下标数组，
+分页、关键字过滤与统计都在内存中完成。
+
+采集任务可能运行在其他进程，快照每 FUNDING_RATE_PAGE_RECHECK_SECONDS 秒比对一次
+market_funding_rate_latest 中 Binance 的 fetched_time，变化后才回读数据库。
+走势缩略图按快照版本缓存，新数据发布前同一组币种只查询一次。
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import func, text
+
+from coinx.cache_handoff import get_cache_version, publish_cache_version
+from coinx.database import get_session
+from coinx.models import MarketFundingRateLatest
+from coinx.utils import logger
+
+
+FUNDING_RATE_PAGE_PERIOD = '5m'
+FUNDING_RATE_PAGE_RECHECK_SECONDS = 30
+FUNDING_RATE_PAGE_SORT_KEYS = ('predicted_rate', 'abs_predicted_rate', 'funding_rate', 'abs_funding_rate')
+FUNDING_RATE_PAGE_DEFAULT_SORT = 'predicted_rate'
+FUNDING_RATE_SPARKLINE_CACHE_SIZE = 256
+
+FUNDING_RATE_PAGE_LOCK = threading.Lock()
+# 单飞回读锁：回读数据库与合并发布新数据时持有，不阻塞只读取内存快照的请求
+FUNDING_RATE_PAGE_RELOAD_LOCK = threading.Lock()
+_FUNDING_RATE_PAGE_STATE = {'snapshot': None, 'checked_at': 0.0, 'handoff_version': None}
+FUNDING_RATE_SPARKLINE_CACHE_LOCK = threading.Lock()
+FUNDING_RATE_SPARKLINE_CACHE = OrderedDict()
+
+
+def _sort_value(row, sort_by):
+    if sort_by == 'abs_predicted_rate':
+        return abs(row['predicted_rate']) if row['predicted_rate'] is not None else None
+    if sort_by == 'abs_funding_rate':
+        return abs(row['funding_rate']) if row['funding_rate'] is not None else None
+    return row[sort_by]
+
+
+def _sorted_indices(rows, sort_by, descending):
+    """与 ORDER BY col {dir}, symbol ASC 一致：空值升序时排最前，降序时排最后。"""
+    present = [index for index, row in enumerate(rows) if _sort_value(row, sort_by) is not None]
+    missing = sorted(
+        (index for index, row in enumerate(rows) if _sort_value(row, sort_by) is None),
+        key=lambda index: rows[index]['symbol'],
+    )
+    if descending:
+        present.sort(key=lambda index: (-_sort_value(rows[index], sort_by), rows[index]['symbol']))
+        return tuple(present + missing)
+    present.sort(key=lambda index: (_sort_value(rows[index], sort_by), rows[index]['symbol']))
+    return tuple(missing + present)
+
+
+def _check_rate(row):
+    """与 ABS(COALESCE(predicted_rate, funding_rate, 0)) 一致。"""
+    if row['predicted_rate'] is not None:
+        return abs(row['predicted_rate'])
+    if row['funding_rate'] is not None:
+        return abs(row['funding_rate'])
+    return 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class FundingRatePageSnapshot:
+    source_time: Optional[int]
+    rows: tuple
+    orders: dict
+    upper_symbols: tuple
+    check_rates: tuple
+    stats_by_threshold: dict = field(default_factory=dict)
+
+    def _stats(self, indices, threshold):
+        abnormal_count = positive_count = negative_count = 0
+        for index in indices:
+            funding_rate = self.rows[index]['funding_rate']
+            if self.check_rates[index] >= threshold:
+                abnormal_count += 1
+            if funding_rate is not None and funding_rate > 0:
+                positive_count += 1
+            elif funding_rate is not None and funding_rate < 0:
+                negative_count += 1
+        return {
+            'total': len(indices),
+            'abnormal': abnormal_count,
+            'positive': positive_count,
+            'negative': negative_count,
+        }
+
+    def page(self, keyword='', show_abnormal_only=False, sort_by='funding_rate', sort_order='desc', page=1, page_size=50, threshold=0.001):
+        """返回与 load_latest_funding_rate_page 相同结构的分页结果。"""
+        sort_key = sort_by if sort_by in FUNDING_RATE_PAGE_SORT_KEYS else FUNDING_RATE_PAGE_DEFAULT_SORT
+        order = self.orders[(sort_key, 'asc' if sort_order == 'asc' else 'desc')]
+        keyword_upper = (keyword or '').upper()
+
+        if not keyword_upper and not show_abnormal_only:
+            matches = order
+            stats = self.stats_by_threshold.get(threshold)
+            if stats is None:
+                stats = self._stats(order, threshold)
+                self.stats_by_threshold[threshold] = stats
+        else:
+            matches = [
+                index for index in order
+                if (not keyword_upper or keyword_upper in self.upper_symbols[index])
+                and (not show_abnormal_only or self.check_rates[index] >= threshold)
+            ]
+            stats = self._stats(matches, threshold)
+
+        offset = max(page - 1, 0) * page_size
+        data = [
+            {**self.rows[index], 'is_abnormal': self.check_rates[index] >= threshold}
+            for index in matches[offset:offset + page_size]
+        ]
+        return {'data': data, 'total_count': stats['total'], 'stats': dict(stats)}
+
+
+def build_funding_rate_page_snapshot(rows, source_time=None):
+    """由最新资金费率记录构建不可变快照；rows 为 load_latest_funding_rates 同结构的字典。"""
+    page_rows = tuple(
+        {
+            'symbol': row['symbol'],
+            'predicted_rate': row.get('predicted_rate'),
+            'funding_rate': row.get('funding_rate'),
+            'next_funding_time': row.get('next_funding_time'),
+            'mark_price': row.get('mark_price'),
+            'event_time': row.get('event_time'),
+        }
+        for row in sorted(rows, key=lambda item: item['symbol'])
+        if row.get('symbol')
+    )
+    orders = {
+        (sort_key, sort_order): _sorted_indices(page_rows, sort_key, sort_order == 'desc')
+        for sort_key in FUNDING_RATE_PAGE_SORT_KEYS
+        for sort_order in ('asc', 'desc')
+    }
+    return FundingRatePageSnapshot(
+        source_time=source_time,
+        rows=page_rows,
+        orders=orders,
+        upper_symbols=tuple(row['symbol'].upper() for row in page_rows),
+        check_rates=tuple(_check_rate(row) for row in page_rows),
+    )
+
+
+def _to_float(value):
+    return float(value) if value is not None else None
+
+
+def _to_int(value):
+    return int(value) if value is not None else None
+
+
+def _load_latest_rows(db, period):
+    rows = db.execute(text("""
+        SELECT m.symbol, m.event_time, m.funding_rate, m.predicted_rate, m.next_funding_time, m.mark_price
+        FROM market_funding_rate m
+        JOIN (
+            SELECT symbol, period, MAX(event_time) AS event_time
+            FROM market_funding_rate
+            WHERE period = :period
+            GROUP BY symbol, period
+        ) t ON m.symbol = t.symbol AND m.period = t.period AND m.event_time = t.event_time
+        WHERE m.period = :period
+    """), {'period': period}).mappings().all()
+    return [
+        {
+            'symbol': row['symbol'],
+            'predicted_rate': _to_float(row['predicted_rate']),
+            'funding_rate': _to_float(row['funding_rate']),
+            'next_funding_time': _to_int(row['next_funding_time']),
+            'mark_price': _to_float(row['mark_price']),
+            'event_time': _to_int(row['event_time']),
+        }
+        for row in rows
+    ]
+
+
+def _load_source_time(db):
+    value = db.query(func.max(MarketFundingRateLatest.fetched_time)).filter(
+        MarketFundingRateLatest.exchange == 'binance',
+    ).scalar()
+    return int(value) if value is not None else None
+
+
+def _snapshot_is_fresh_locked(now, handoff_version):
+    """调用方持有 FUNDING_RATE_PAGE_LOCK。"""
+    return (
+        _FUNDING_RATE_PAGE_STATE['snapshot'] is not None
+        and now - _FUNDING_RATE_PAGE_STATE['checked_at'] < FUNDING_RATE_PAGE_RECHECK_SECONDS
+        and handoff_version == _FUNDING_RATE_PAGE_STATE['handoff_version']
+    )
+
+
+def get_funding_rate_page_snapshot(session=None, force=False):
+    """返回最新资金费率快照；读取失败返回 None，由调用方回退到 SQL 查询。
+
+    读库与构建快照在 FUNDING_RATE_PAGE_LOCK 之外进行，由 FUNDING_RATE_PAGE_RELOAD_LOCK
+    保证同一时间只有一个线程回读；回读期间其他请求继续使用旧快照，冷启动时等待回读完成。
+    """
+    now = time.monotonic()
+    handoff_version = get_cache_version('funding_rate_page')
+    with FUNDING_RATE_PAGE_LOCK:
+        snapshot = _FUNDING_RATE_PAGE_STATE['snapshot']
+        if not force and _snapshot_is_fresh_locked(now, handoff_version):
+            return snapshot
+
+    if not force and snapshot is not None:
+        if not FUNDING_RATE_PAGE_RELOAD_LOCK.acquire(blocking=False):
+            return snapshot
+    else:
+        FUNDING_RATE_PAGE_RELOAD_LOCK.acquire()
+    try:
+        with FUNDING_RATE_PAGE_LOCK:
+            snapshot = _FUNDING_RATE_PAGE_STATE['snapshot']
+            if not force and _snapshot_is_fresh_locked(now, handoff_version):
+                return snapshot
+
+        own_session = session is None
+        db = session or get_session()
+        try:
+            started_at = time.perf_counter()
+            source_time = _load_source_time(db)
+            if (
+                force
+                or snapshot is None
+                or source_time is None
+                or snapshot.source_time != source_time
+            ):
+                snapshot = build_funding_rate_page_snapshot(_load_latest_rows(db, FUNDING_RATE_PAGE_PERIOD), source_time)
+                logger.info(
+                    '资金费率排行快照已加载: source_time=%s rows=%d 耗时=%.2fms',
+                    source_time,
+                    len(snapshot.rows),
+                    (time.perf_counter() - started_at) * 1000,
+                )
+            with FUNDING_RATE_PAGE_LOCK:
+                _FUNDING_RATE_PAGE_STATE.update(snapshot=snapshot, checked_at=now, handoff_version=handoff_version)
+            return snapshot
+        except Exception as exc:
+            logger.warning('加载资金费率排行快照失败: %s', exc)
+            return None
+        finally:
+            if own_session:
+                db.close()
+    finally:
+        FUNDING_RATE_PAGE_RELOAD_LOCK.release()
+
+
+def publish_funding_rate_page(records, source_time):
+    """把刚写入历史表的记录合并进内存快照（同一币种只保留 event_time 最新的一行）。
+
+    尚未加载过快照时不做任何事，首个请求会从数据库完整加载。合并与排序在
+    FUNDING_RATE_PAGE_RELOAD_LOCK 下进行，与回读互斥，FUNDING_RATE_PAGE_LOCK 只在替换快照时持有。
+    """
+    publish_cache_version('funding_rate_page', source_time)
+    with FUNDING_RATE_PAGE_RELOAD_LOCK:
+        with FUNDING_RATE_PAGE_LOCK:
+            snapshot = _FUNDING_RATE_PAGE_STATE['snapshot']
+        if snapshot is None:
+            return None
+
+        rows_by_symbol = {row['symbol']: row for row in snapshot.rows}
+        for record in records:
+            if record.get('period', FUNDING_RATE_PAGE_PERIOD) != FUNDING_RATE_PAGE_PERIOD or not record.get('symbol'):
+                continue
+            event_time = _to_int(record.get('event_time'))
+            current = rows_by_symbol.get(record['symbol'])
+            if current is not None and event_time is not None and (current['event_time'] or 0) > event_time:
+                continue
+            rows_by_symbol[record['symbol']] = {
+                'symbol': record['symbol'],
+                'predicted_rate': _to_float(record.get('predicted_rate')),
+                'funding_rate': _to_float(record.get('funding_rate')),
+                'next_funding_time': _to_int(record.get('next_funding_time')),
+                'mark_price': _to_float(record.get('mark_price')),
+                'event_time': event_time,
+            }
+
+        snapshot = build_funding_rate_page_snapshot(rows_by_symbol.values(), source_time)
+        with FUNDING_RATE_PAGE_LOCK:
+            _FUNDING_RATE_PAGE_STATE.update(snapshot=snapshot, checked_at=time.monotonic())
+        return snapshot
+
+
+def get_cached_funding_rate_sparklines(symbols, hours, exchange, loader):
+    """按 (快照版本, 交易所, 小时数, 币种组合) 缓存走势缩略图；快照版本未知时不缓存。"""
+    snapshot = get_funding_rate_page_snapshot()
+    anchor = snapshot.source_time if snapshot is not None else None
+    if anchor is None:
+        return loader()
+
+    key = (anchor, exchange, hours, tuple(symbols))
+    with FUNDING_RATE_SPARKLINE_CACHE_LOCK:
+        if key in FUNDING_RATE_SPARKLINE_CACHE:
+            FUNDING_RATE_SPARKLINE_CACHE.move_to_end(key)
+            return FUNDING_RATE_SPARKLINE_CACHE[key]
+
+    result = loader()
+    with FUNDING_RATE_SPARKLINE_CACHE_LOCK:
+        for stale_key in [stale_key for stale_key in FUNDING_RATE_SPARKLINE_CACHE if stale_key[0] != anchor]:
+            del FUNDING_RATE_SPARKLINE_CACHE[stale_key]
+        FUNDING_RATE_SPARKLINE_CACHE[key] = result
+        while len(FUNDING_RATE_SPARKLINE_CACHE) > FUNDING_RATE_SPARKLINE_CACHE_SIZE:
+            FUNDING_RATE_SPARKLINE_CACHE.popitem(last=False)
+    return result
+
+
+def reset_funding_rate_page_cache():
+    with FUNDING_RATE_PAGE_LOCK:
+        _FUNDING_RATE_PAGE_STATE.update(snapshot=None, checked_at=0.0, handoff_version=None)
+    with FUNDING_RATE_SPARKLINE_CACHE_LOCK:
+        FUNDING_RATE_SPARKLINE_CACHE.clear()
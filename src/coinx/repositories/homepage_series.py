@@ -18,13 +18,16 @@ from coinx.models import (
 )
 from coinx.collector.exchange_repair import latest_closed_5m_open_time
 from .funding_rate import load_latest_funding_rates
+from .funding_rate_cache import load_cached_funding_rates
+from .series_frame import load_series_frame
+from .time_slots import TimeSlotSeries, group_points_by_symbol, latest_common_time, union_times
 
 
 FIVE_MINUTES_MS = 5 * 60 * 1000
 HOMEPAGE_REQUIRED_SERIES_TYPES = ('klines', 'open_interest_hist', 'taker_buy_sell_vol')
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HomepageOpenInterestPoint:
     symbol: str
     event_time: int
@@ -32,7 +35,7 @@ class HomepageOpenInterestPoint:
     sum_open_interest_value: Optional[float]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HomepageKlinePoint:
     symbol: str
     open_time: int
@@ -43,7 +46,7 @@ class HomepageKlinePoint:
     taker_buy_quote_volume: Optional[float]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HomepageTakerBuySellVolPoint:
     symbol: str
     event_time: int
@@ -471,11 +474,10 @@ def _has_required_change_coverage(oi_by_time, kline_by_time, current_time):
 
 
 def _has_complete_homepage_coverage(oi_by_time, kline_by_time):
-    common_times = sorted(set(oi_by_time).intersection(kline_by_time))
-    if not common_times:
+    current_time = latest_common_time(oi_by_time, kline_by_time)
+    if current_time is None:
         return False
 
-    current_time = common_times[-1]
     return _has_required_change_coverage(oi_by_time, kline_by_time, current_time)
 
 
@@ -732,10 +734,7 @@ def _normalize_exchange_list(exchanges):
 
 
 def _get_exchange_common_time(oi_by_time, kline_by_time):
-    common_times = sorted(set(oi_by_time).intersection(kline_by_time))
-    if not common_times:
-        return None
-    return common_times[-1]
+    return latest_common_time(oi_by_time, kline_by_time)
 
 
 def _exchange_supports_homepage_anchor(exchange, oi_by_time, kline_by_time, anchor_time):
@@ -863,10 +862,11 @@ def _load_open_interest_model_map(session, model, symbols, upper_bound=None, exc
     if upper_bound is not None:
         query = query.filter(model.event_time <= upper_bound)
 
-    records_by_symbol = {symbol: {} for symbol in symbols}
-    for row in query.all():
-        point = _build_open_interest_point(row)
-        records_by_symbol.setdefault(point.symbol, {})[point.event_time] = point
+    records_by_symbol = group_points_by_symbol(
+        (_build_open_interest_point(row) for row in query.all()),
+        'event_time',
+        symbols,
+    )
 
     total_ms = (_time.time() - func_start) * 1000
     total_records = sum(len(v) for v in records_by_symbol.values())
@@ -938,46 +938,82 @@ def _load_kline_model_map(session, model, symbols, symbol_latest=None, upper_bou
     if upper_bound is not None:
         query = query.filter(model.open_time <= upper_bound)
 
-    records_by_symbol = {symbol: {} for symbol in symbols}
-    for row in query.all():
-        point = _build_kline_point(row)
-        records_by_symbol.setdefault(point.symbol, {})[point.open_time] = point
+    records_by_symbol = group_points_by_symbol(
+        (_build_kline_point(row) for row in query.all()),
+        'open_time',
+        symbols,
+    )
 
     total_ms = (_time.time() - func_start) * 1000
     logger.info(_fmt('Kline查询完成：', exchange=exchange, symbols=len(symbols), records=sum(len(v) for v in records_by_symbol.values()), duration=f'{total_ms:.0f}ms'))
     return records_by_symbol, symbol_latest
 
 
+def _homepage_target_times(latest_time):
+    target_times = {latest_time}
+    for interval in TIME_INTERVALS:
+        target_times.add(latest_time - _interval_to_ms(interval))
+    return sorted(t for t in target_times if t > 0)
+
+
+def _homepage_maps_from_frame(frame, symbols):
+    """从共享序列帧中取出首页需要的目标时间点，结构与按目标时间点查库的结果一致。"""
+    oi_map = {}
+    kline_map = {}
+    symbol_latest = {}
+    for symbol in symbols:
+        symbol_series = frame.get(symbol)
+        latest_time = symbol_series.latest_open_interest_time if symbol_series is not None else None
+        if latest_time is None:
+            oi_map[symbol] = TimeSlotSeries()
+            kline_map[symbol] = TimeSlotSeries()
+            continue
+        symbol_latest[symbol] = latest_time
+        target_times = _homepage_target_times(latest_time)
+        oi_map[symbol] = TimeSlotSeries((t, symbol_series.open_interest.get(t)) for t in target_times)
+        kline_map[symbol] = TimeSlotSeries((t, symbol_series.klines.get(t)) for t in target_times)
+    return oi_map, kline_map, symbol_latest
+
+
 def _load_exchange_homepage_maps(session, exchange, symbols, upper_bound=None):
     exchange = exchange.lower()
 
     start_time = __import__('time').perf_counter()
     logger.debug(_fmt('交易所加载开始：', exchange=exchange, symbols=len(symbols)))
 
-    oi_start = __import__('time').perf_counter()
-    oi_map, symbol_latest = _load_open_interest_model_map(
-        session,
-        MarketOpenInterestHist,
-        symbols,
-        upper_bound=upper_bound,
-        exchange=exchange,
-    )
-    oi_elapsed = __import__('time').perf_counter() - oi_start
-    if oi_elapsed >= 0.1:
-        logger.info(_fmt('OI 加载完成：', exchange=exchange, symbols=len(symbols), duration=f'{oi_elapsed:.2f}s'))
-
-    kline_start = __import__('time').perf_counter()
-    kline_map, kline_latest = _load_kline_model_map(
-        session,
-        MarketKline,
-        symbols,
-        symbol_latest=symbol_latest,
-        upper_bound=upper_bound,
-        exchange=exchange,
-    )
-    kline_elapsed = __import__('time').perf_counter() - kline_start
-    if kline_elapsed >= 0.1:
-        logger.info(_fmt('Kline 加载完成：', exchange=exchange, symbols=len(symbols), duration=f'{kline_elapsed:.2f}s'))
+    if upper_bound is not None:
+        frame_start = __import__('time').perf_counter()
+        frame = load_series_frame(session, exchange, symbols, upper_bound)
+        oi_map, kline_map, symbol_latest = _homepage_maps_from_frame(frame, symbols)
+        kline_latest = dict(symbol_latest)
+        frame_elapsed = __import__('time').perf_counter() - frame_start
+        if frame_elapsed >= 0.1:
+            logger.info(_fmt('序列帧读取完成：', exchange=exchange, symbols=len(symbols), duration=f'{frame_elapsed:.2f}s'))
+    else:
+        oi_start = __import__('time').perf_counter()
+        oi_map, symbol_latest = _load_open_interest_model_map(
+            session,
+            MarketOpenInterestHist,
+            symbols,
+            upper_bound=upper_bound,
+            exchange=exchange,
+        )
+        oi_elapsed = __import__('time').perf_counter() - oi_start
+        if oi_elapsed >= 0.1:
+            logger.info(_fmt('OI 加载完成：', exchange=exchange, symbols=len(symbols), duration=f'{oi_elapsed:.2f}s'))
+
+        kline_start = __import__('time').perf_counter()
+        kline_map, kline_latest = _load_kline_model_map(
+            session,
+            MarketKline,
+            symbols,
+            symbol_latest=symbol_latest,
+            upper_bound=upper_bound,
+            exchange=exchange,
+        )
+        kline_elapsed = __import__('time').perf_counter() - kline_start
+        if kline_elapsed >= 0.1:
+            logger.info(_fmt('Kline 加载完成：', exchange=exchange, symbols=len(symbols), duration=f'{kline_elapsed:.2f}s'))
 
     net_inflow_start = __import__('time').perf_counter()
     if _has_unreliable_taker_source(exchange):
@@ -1418,9 +1454,8 @@ def _aggregate_homepage_series_maps(session, symbols, upper_bound=None):
         price_exchange = primary_exchange if primary_exchange in included_exchanges else included_exchanges[0]
         selected_kline_map[symbol] = exchange_maps[price_exchange][1].get(symbol, {})
 
-        oi_times = sorted(
-            set().union(*(snapshot['oi_by_time'].keys() for snapshot in symbol_exchange_snapshots.values()))
-        )
+        oi_times = union_times(*(snapshot['oi_by_time'] for snapshot in symbol_exchange_snapshots.values()))
+        merged_points = []
         for event_time in oi_times:
             exchange_points = {}
             for exchange in included_exchanges:
@@ -1435,7 +1470,8 @@ def _aggregate_homepage_series_maps(session, symbols, upper_bound=None):
             merged_point = _merge_time_points(*exchange_points.values())
             if merged_point is not None:
                 coverage_map[symbol]['open_interest_by_exchange'][event_time] = exchange_points
-                aggregate_oi_map[symbol][event_time] = merged_point
+                merged_points.append(merged_point)
+        aggregate_oi_map[symbol] = TimeSlotSeries.from_points(merged_points, 'event_time')
 
         # 从 SQL 结果累计净流入
         for interval in TIME_INTERVALS:
@@ -1483,20 +1519,34 @@ def _load_homepage_series_maps(session, symbols, upper_bound=None):
     aggregate_oi_map, selected_kline_map, _, coverage_map = _aggregate_homepage_series_maps(
         session, symbols, upper_bound=upper_bound
     )
-    funding_rate_map = load_latest_funding_rates(symbols, session=session)
+    funding_rate_map = _load_homepage_funding_rates(symbols, session)
     return aggregate_oi_map, selected_kline_map, coverage_map, funding_rate_map
 
 
+def _load_homepage_funding_rates(symbols, session):
+    """首页资金费率只读最新资金费率缓存；缓存表尚未写入时回退历史表最新记录。"""
+    funding_rate_map = load_cached_funding_rates('binance', symbols=symbols, session=session)
+    if funding_rate_map:
+        return funding_rate_map
+    return load_latest_funding_rates(symbols, session=session)
+
+
+def _latest_series_time(records_by_time):
+    if isinstance(records_by_time, TimeSlotSeries):
+        return records_by_time.latest_time()
+    return max(records_by_time) if records_by_time else None
+
+
 def _build_coin_payload(symbol, oi, kline_by_time, coverage=None, funding_rate=None):
-    common_times = sorted(set(oi).intersection(kline_by_time))
-    oi_times = sorted(oi)
+    common_time = latest_common_time(oi, kline_by_time)
+    latest_oi_time = _latest_series_time(oi)
     included_exchanges = list((coverage or {}).get('included_exchanges') or (coverage or {}).get('source_exchanges') or [])
     missing_exchanges = list((coverage or {}).get('missing_exchanges') or [])
     status = (coverage or {}).get('status')
     if status not in ('complete', 'partial', 'empty'):
         status = 'complete' if included_exchanges and not missing_exchanges else ('partial' if included_exchanges else 'empty')
 
-    if not common_times and not oi_times:
+    if common_time is None and latest_oi_time is None:
         empty_changes = {interval: _empty_change() for interval in TIME_INTERVALS}
         return {
             'symbol': symbol,
@@ -1528,7 +1578,7 @@ def _build_coin_payload(symbol, oi, kline_by_time, coverage=None, funding_rate=N
             'next_funding_time_formatted': 'N/A',
         }
 
-    current_time = common_times[-1] if common_times else oi_times[-1]
+    current_time = common_time if common_time is not None else latest_oi_time
     net_inflow = dict((coverage or {}).get('net_inflow') or {})
     net_inflow_value = dict((coverage or {}).get('net_inflow_value') or {})
 
@@ -1724,12 +1774,10 @@ def should_refresh_homepage_series(symbols=None, now_ms=None, session=None):
         for symbol in target_symbols:
             oi_by_time = recent_open_interest_map.get(symbol, {})
             kline_by_time = recent_klines_map.get(symbol, {})
-            common_times = sorted(set(oi_by_time).intersection(kline_by_time))
-
-            if not common_times:
+            current_symbol_time = latest_common_time(oi_by_time, kline_by_time)
+            if current_symbol_time is None:
                 return True
 
-            current_symbol_time = common_times[-1]
             if current_symbol_time < target_time:
                 return True
 
@@ -0,0 +1,191 @@
+"""定时任务运行历史的持久化与耗时分位统计。
+
+调度器每次任务结束后写入一行 job_runs：状态、总耗时，以及从修补摘要中提取的
+耗时分类（stages 为整体，exchanges 为各交易所），只保留非零项并取整到毫秒。
+任务管理页按时间窗口读取这些记录，计算每个任务与每个耗时分类的 p50/p95。
+"""
+import math
+import threading
+import time
+
+from sqlalchemy import inspect
+
+from coinx import config
+from coinx.collector.timing import DURATION_BREAKDOWN_KEYS, add_duration_breakdown, empty_duration_breakdown
+from coinx.database import get_session
+from coinx.models import JobRun
+from coinx.utils import logger
+
+
+JOB_RUN_PRUNE_INTERVAL_MS = 3600 * 1000
+JOB_RUN_ERROR_MAX_LENGTH = 500
+
+JOB_RUN_LOCK = threading.Lock()
+_JOB_RUN_STATE = {'table_ready': False, 'pruned_at': 0}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _compact_breakdown(breakdown):
+    return {key: int(round(value)) for key, value in breakdown.items() if value and round(value) > 0}
+
+
+def extract_duration_breakdowns(summary):
+    """从任务摘要提取 {'stages': {...}, 'exchanges': {exchange: {...}}}；多阶段任务按阶段累加。"""
+    if not isinstance(summary, dict):
+        return None
+    parts = [item for item in summary.get('stages') or [] if isinstance(item, dict)] or [summary]
+    total = None
+    exchanges = {}
+    for part in parts:
+        if part.get('duration_breakdown_ms'):
+            total = add_duration_breakdown(total, part['duration_breakdown_ms'])
+        for exchange, breakdown in (part.get('duration_breakdown_by_exchange') or {}).items():
+            exchanges[exchange] = add_duration_breakdown(exchanges.get(exchange), breakdown)
+    if total is None and not exchanges:
+        return None
+    return {
+        'stages': _compact_breakdown(total or empty_duration_breakdown()),
+        'exchanges': {
+            exchange: _compact_breakdown(breakdown)
+            for exchange, breakdown in sorted(exchanges.items())
+            if exchange
+        },
+    }
+
+
+def _ensure_table(db):
+    if _JOB_RUN_STATE['table_ready']:
+        return
+    bind = db.get_bind()
+    if config.DB_TYPE == 'starrocks':
+        # StarRocks 的主键模型与分桶只能由 sql/schema_starrocks.sql 建表，运行时不自动建表
+        if not inspect(bind).has_table(JobRun.__tablename__):
+            raise RuntimeError('StarRocks 缺少 job_runs 表，请先执行 sql/schema_starrocks.sql')
+    else:
+        JobRun.__table__.create(bind=bind, checkfirst=True)
+    _JOB_RUN_STATE['table_ready'] = True
+
+
+def _prune_locked(db, now_ms):
+    if now_ms - _JOB_RUN_STATE['pruned_at'] < JOB_RUN_PRUNE_INTERVAL_MS:
+        return 0
+    _JOB_RUN_STATE['pruned_at'] = now_ms
+    cutoff = now_ms - max(1, int(config.JOB_RUN_HISTORY_RETENTION_DAYS)) * 86400 * 1000
+    deleted = db.query(JobRun).filter(JobRun.finished_at < cutoff).delete(synchronize_session=False)
+    if deleted:
+        logger.info('清理过期任务运行历史: 删除=%d', deleted)
+    return deleted
+
+
+def record_job_run(
+    job_id,
+    status,
+    finished_at_ms=None,
+    started_at_ms=None,
+    duration_ms=None,
+    summary=None,
+    error=None,
+    node_id=None,
+    session=None,
+):
+    """写入一次任务运行记录；未开启运行历史时返回 None。"""
+    if not config.JOB_RUN_HISTORY_ENABLED:
+        return None
+    finished_at_ms = _now_ms() if finished_at_ms is None else int(finished_at_ms)
+    own_session = session is None
+    db = session or get_session()
+    try:
+        with JOB_RUN_LOCK:
+            _ensure_table(db)
+            row = JobRun(
+                job_id=job_id,
+                node_id=node_id,
+                status=status or 'success',
+                started_at=started_at_ms,
+                finished_at=finished_at_ms,
+                duration_ms=int(round(duration_ms)) if duration_ms is not None else None,
+                breakdown_json=extract_duration_breakdowns(summary),
+                error_message=str(error)[:JOB_RUN_ERROR_MAX_LENGTH] if error else None,
+            )
+            db.add(row)
+            _prune_locked(db, finished_at_ms)
+            db.commit()
+        return row.id
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def percentile(values, pct):
+    """最近秩法分位数；空序列返回 None。"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _percentiles(values):
+    return {'p50_ms': percentile(values, 50), 'p95_ms': percentile(values, 95)}
+
+
+def _stage_percentiles(breakdowns):
+    if not breakdowns:
+        return {}
+    return {
+        key: _percentiles([breakdown.get(key, 0) for breakdown in breakdowns])
+        for key in DURATION_BREAKDOWN_KEYS
+        if any(breakdown.get(key) for breakdown in breakdowns)
+    }
+
+
+def get_job_run_stats(window_hours, session=None, now_ms=None):
+    """按任务统计窗口内的运行次数、失败次数与总耗时/各耗时分类/各交易所耗时分类的 p50/p95。"""
+    now = _now_ms() if now_ms is None else int(now_ms)
+    cutoff = now - int(float(window_hours) * 3600 * 1000)
+    own_session = session is None
+    db = session or get_session()
+    try:
+        rows = db.query(
+            JobRun.job_id,
+            JobRun.status,
+            JobRun.duration_ms,
+            JobRun.breakdown_json,
+        ).filter(JobRun.finished_at >= cutoff).all()
+    finally:
+        if own_session:
+            db.close()
+
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.job_id, []).append(row)
+
+    stats = {}
+    for job_id, job_rows in sorted(grouped.items()):
+        breakdowns = [row.breakdown_json for row in job_rows if row.breakdown_json]
+        exchange_breakdowns = {}
+        for breakdown in breakdowns:
+            for exchange, values in (breakdown.get('exchanges') or {}).items():
+                exchange_breakdowns.setdefault(exchange, []).append(values)
+        stats[job_id] = {
+            'run_count': len(job_rows),
+            'error_count': sum(1 for row in job_rows if row.status == 'error'),
+            **_percentiles([row.duration_ms for row in job_rows if row.duration_ms is not None]),
+            'stages': _stage_percentiles([breakdown.get('stages') or {} for breakdown in breakdowns]),
+            'exchanges': {
+                exchange: _stage_percentiles(values)
+                for exchange, values in sorted(exchange_breakdowns.items())
+            },
+        }
+    return stats
+
+
+def reset_job_run_state():
+    with JOB_RUN_LOCK:
+        _JOB_RUN_STATE.update(table_ready=False, pruned_at=0)
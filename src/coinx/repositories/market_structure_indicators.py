@@ -0,0 +1,445 @@
+"""合约市场结构评分的向量化指标引擎。
+
+把 (symbol, exchange, anchor) 的 K 线窗口排成 行 × 时间槽 的矩阵，
+一次性计算 EMA / ATR / 成交量比率 和 交易所权重，语义与
+market_structure_score 中的 `_ema` / `_atr` / `_build_metric_weights` 逐项一致。
+
+每个 (exchange, symbol) 另外保留一份增量指标状态：新锚点只多一根 5m K 线时
+按 O(1) 滑动更新，遇到缺口、K 线被改写或累计更新过多时回退到整窗重算。
+"""
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Mapping, Optional, Tuple
+
+import numpy as np
+
+from coinx.repositories.time_slots import TimeSlotSeries
+
+
+FIVE_MINUTES_MS = 5 * 60 * 1000
+# 滑动更新累计一定次数后整窗重算一次，避免浮点误差累积
+INDICATOR_STATE_REBUILD_UPDATES = 288
+
+INDICATOR_STATE_LOCK = threading.Lock()
+INDICATOR_STATES = {}
+
+
+@dataclass(frozen=True)
+class IndicatorRow:
+    """一行指标输入：某交易所某币种在 anchor_time 处的 K 线窗口。"""
+    kline_by_time: Mapping[int, Any]
+    anchor_time: int
+    quote_volume_24h: Optional[float] = None
+    key: Optional[Tuple[str, str]] = None
+
+
+@dataclass
+class IndicatorState:
+    """单个 (exchange, symbol) 截至 last_time 的增量指标状态。
+
+    closes 保存最近 slow_period 根连续 K 线收盘价，true_ranges 保存最近
+    atr_period 个真实波幅；只有末尾连续完整 K 线足够长时才会建立状态，
+    此时窗口内“最近 N 个有效值”恰好等于“最近 N 根 K 线”。
+    """
+    last_time: int
+    last_bar: Tuple[float, float, float]
+    closes: Deque[float]
+    true_ranges: Deque[float]
+    true_range_sum: float
+    ema_fast: float
+    ema_slow: float
+    updates: int = field(default=0)
+
+
+def _to_float(value):
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_optional(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _iter_window_columns(kline_by_time, anchor_time, width, step_ms):
+    if isinstance(kline_by_time, TimeSlotSeries) and kline_by_time.step_ms == step_ms:
+        for column, point in enumerate(kline_by_time.slot_points(anchor_time, width)):
+            if point is not None:
+                yield column, point
+        return
+
+    for timestamp, point in (kline_by_time or {}).items():
+        distance = anchor_time - int(timestamp)
+        if distance < 0 or distance % step_ms:
+            continue
+        offset = distance // step_ms
+        if offset < width:
+            yield width - 1 - offset, point
+
+
+def build_kline_matrices(rows, lookback_points, step_ms=FIVE_MINUTES_MS):
+    """按 anchor 右对齐构造 K 线矩阵，列从旧到新，最后一列即 anchor。
+
+    Returns:
+        tuple: (exists, high, low, close, quote_volume)，缺失值为 NaN，exists 为布尔矩阵
+    """
+    width = max(1, int(lookback_points))
+    shape = (len(rows), width)
+    exists = np.zeros(shape, dtype=bool)
+    high = np.full(shape, np.nan)
+    low = np.full(shape, np.nan)
+    close = np.full(shape, np.nan)
+    quote_volume = np.full(shape, np.nan)
+
+    for row_index, row in enumerate(rows):
+        for column, point in _iter_window_columns(row.kline_by_time, int(row.anchor_time), width, step_ms):
+            exists[row_index, column] = True
+            high[row_index, column] = _to_float(getattr(point, 'high_price', None))
+            low[row_index, column] = _to_float(getattr(point, 'low_price', None))
+            close[row_index, column] = _to_float(getattr(point, 'close_price', None))
+            quote_volume[row_index, column] = _to_float(getattr(point, 'quote_volume', None))
+
+    return exists, high, low, close, quote_volume
+
+
+def _right_align(values, valid):
+    """把每行的有效值稳定地挪到右侧，保持原有先后顺序。"""
+    order = np.argsort(valid, axis=1, kind='stable')
+    return np.take_along_axis(values, order, axis=1), valid.sum(axis=1)
+
+
+def ema_last(values, valid, period, min_count=2):
+    """对每行最近 period 个有效值计算 EMA，以窗口首值为种子。
+
+    有效值少于 min_count 的行返回 NaN。
+    """
+    rows, width = values.shape
+    result = np.full(rows, np.nan)
+    if rows == 0 or width == 0:
+        return result
+
+    compact, counts = _right_align(values, valid)
+    start = width - np.minimum(counts, period)
+    multiplier = 2 / (period + 1)
+    for column in range(max(width - period, 0), width):
+        current = compact[:, column]
+        result = np.where(start == column, current, result)
+        result = np.where(start < column, ((current - result) * multiplier) + result, result)
+
+    result[counts < min_count] = np.nan
+    return result
+
+
+def atr_last(exists, high, low, close, period):
+    """对每行相邻已存在 K 线计算真实波幅，返回最近 period 个的均值。"""
+    rows, width = exists.shape
+    result = np.full(rows, np.nan)
+    if rows == 0 or width < 2:
+        return result
+
+    order = np.argsort(exists, axis=1, kind='stable')
+    high_c = np.take_along_axis(high, order, axis=1)
+    low_c = np.take_along_axis(low, order, axis=1)
+    close_c = np.take_along_axis(close, order, axis=1)
+    point_counts = exists.sum(axis=1)
+
+    current_high = high_c[:, 1:]
+    current_low = low_c[:, 1:]
+    previous_close = close_c[:, :-1]
+    columns = np.arange(1, width)
+    has_previous = columns[None, :] > (width - point_counts)[:, None]
+
+    with np.errstate(invalid='ignore'):
+        spread = current_high - current_low
+        true_range = np.where(
+            np.isnan(previous_close),
+            spread,
+            np.maximum(spread, np.maximum(np.abs(current_high - previous_close), np.abs(current_low - previous_close))),
+        )
+    tr_valid = has_previous & ~np.isnan(current_high) & ~np.isnan(current_low)
+
+    tr_compact, tr_counts = _right_align(np.where(tr_valid, true_range, 0.0), tr_valid)
+    take = np.minimum(tr_counts, period)
+    tr_width = tr_compact.shape[1]
+    recent_mask = np.arange(tr_width)[None, :] >= (tr_width - take)[:, None]
+    totals = np.where(recent_mask, tr_compact, 0.0).sum(axis=1)
+
+    usable = (point_counts >= 2) & (take > 0)
+    result[usable] = totals[usable] / take[usable]
+    return result
+
+
+def volume_ratio(quote_volume, quote_volume_24h, lookback_points):
+    """当前 5m 成交额与 24h 平均 5m 成交额之比。"""
+    quote_volume = np.asarray(quote_volume, dtype=float)
+    quote_volume_24h = np.asarray(quote_volume_24h, dtype=float)
+    result = np.full(quote_volume.shape, np.nan)
+    usable = ~np.isnan(quote_volume) & ~np.isnan(quote_volume_24h) & (quote_volume_24h != 0)
+    result[usable] = quote_volume[usable] / (quote_volume_24h[usable] / lookback_points)
+    return result
+
+
+def compute_indicator_rows(
+    rows,
+    lookback_points,
+    fast_period,
+    slow_period,
+    atr_period,
+    volume_lookback_points,
+    step_ms=FIVE_MINUTES_MS,
+):
+    """批量计算每行的 ema_fast / ema_slow / atr / volume_ratio。
+
+    Returns:
+        list[dict]: 与 rows 一一对应，缺失指标为 None
+    """
+    if not rows:
+        return []
+
+    exists, high, low, close, quote_volume = build_kline_matrices(rows, lookback_points, step_ms=step_ms)
+    close_valid = exists & ~np.isnan(close)
+    ema_fast = ema_last(close, close_valid, fast_period)
+    ema_slow = ema_last(close, close_valid, slow_period)
+    atr = atr_last(exists, high, low, close, atr_period)
+    ratios = volume_ratio(
+        quote_volume[:, -1],
+        [_to_float(row.quote_volume_24h) for row in rows],
+        volume_lookback_points,
+    )
+
+    return [
+        {
+            'ema_fast': _to_optional(ema_fast[index]),
+            'ema_slow': _to_optional(ema_slow[index]),
+            'atr': _to_optional(atr[index]),
+            'volume_ratio': _to_optional(ratios[index]),
+        }
+        for index in range(len(rows))
+    ]
+
+
+def metric_weight_matrix(open_interest_values, present):
+    """按持仓价值计算 symbols × exchanges 的权重矩阵。
+
+    某行持仓价值合计不大于 0 时，在该行已纳入的交易所间平均分配。
+    """
+    values = np.where(present, np.nan_to_num(np.asarray(open_interest_values, dtype=float), nan=0.0), 0.0)
+    totals = values.sum(axis=1)
+    counts = present.sum(axis=1)
+
+    weights = np.zeros(values.shape)
+    weighted_rows = totals > 0
+    weights[weighted_rows] = values[weighted_rows] / totals[weighted_rows, None]
+    equal_rows = ~weighted_rows & (counts > 0)
+    weights[equal_rows] = present[equal_rows] / counts[equal_rows, None]
+    return weights
+
+
+def build_metric_weight_maps(metrics_by_symbol):
+    """对每个币种的交易所指标一次性计算权重，返回 {symbol: {exchange: weight}}。"""
+    symbols = list(metrics_by_symbol)
+    exchanges = list(dict.fromkeys(
+        metric['exchange']
+        for symbol in symbols
+        for metric in metrics_by_symbol[symbol]
+    ))
+    if not symbols or not exchanges:
+        return {symbol: {} for symbol in symbols}
+
+    exchange_index = {exchange: index for index, exchange in enumerate(exchanges)}
+    values = np.zeros((len(symbols), len(exchanges)))
+    present = np.zeros((len(symbols), len(exchanges)), dtype=bool)
+    for row_index, symbol in enumerate(symbols):
+        for metric in metrics_by_symbol[symbol]:
+            column = exchange_index[metric['exchange']]
+            present[row_index, column] = True
+            values[row_index, column] = float(metric.get('open_interest_value') or 0)
+
+    weights = metric_weight_matrix(values, present)
+    return {
+        symbol: {
+            metric['exchange']: float(weights[row_index, exchange_index[metric['exchange']]])
+            for metric in metrics_by_symbol[symbol]
+        }
+        for row_index, symbol in enumerate(symbols)
+    }
+
+
+def _bar_fingerprint(point):
+    """返回 (close, high, low)；任一缺失时返回 None，表示该 K 线不能用于增量更新。"""
+    if point is None:
+        return None
+    values = tuple(
+        _to_float(getattr(point, field_name, None))
+        for field_name in ('close_price', 'high_price', 'low_price')
+    )
+    if any(np.isnan(value) for value in values):
+        return None
+    return values
+
+
+def _seeded_ema(values, period):
+    multiplier = 2 / (period + 1)
+    ema = values[0]
+    for value in values[1:]:
+        ema = ((value - ema) * multiplier) + ema
+    return ema
+
+
+def _slide_ema(ema, period, dropped, new_first, appended):
+    """窗口长度固定为 period 的首值种子 EMA，右移一格后的精确递推。"""
+    decay = 1 - 2 / (period + 1)
+    return decay * ema + (1 - decay) * appended + (decay ** period) * (new_first - dropped)
+
+
+def build_indicator_state(kline_by_time, anchor_time, fast_period, slow_period, atr_period, step_ms=FIVE_MINUTES_MS):
+    """从 K 线窗口建立增量状态；末尾连续完整 K 线不足 slow_period 根时返回 None。"""
+    required = max(slow_period, atr_period + 1)
+    bars = []
+    timestamp = int(anchor_time)
+    while len(bars) < required:
+        fingerprint = _bar_fingerprint((kline_by_time or {}).get(timestamp))
+        if fingerprint is None:
+            return None
+        bars.append(fingerprint)
+        timestamp -= step_ms
+    bars.reverse()
+
+    closes = deque((bar[0] for bar in bars[-slow_period:]), maxlen=slow_period)
+    true_ranges = deque(maxlen=atr_period)
+    for previous, current in zip(bars[-atr_period - 1:-1], bars[-atr_period:]):
+        previous_close, (_, high, low) = previous[0], current
+        true_ranges.append(max(high - low, abs(high - previous_close), abs(low - previous_close)))
+
+    return IndicatorState(
+        last_time=int(anchor_time),
+        last_bar=bars[-1],
+        closes=closes,
+        true_ranges=true_ranges,
+        true_range_sum=sum(true_ranges),
+        ema_fast=_seeded_ema(list(closes)[-fast_period:], fast_period),
+        ema_slow=_seeded_ema(list(closes), slow_period),
+    )
+
+
+def advance_indicator_state(state, bar_time, fingerprint, fast_period, slow_period):
+    """把状态推进一根 K 线，O(1)。调用方保证 bar_time 紧接 last_time 且 fingerprint 完整。"""
+    close, high, low = fingerprint
+    closes = state.closes
+    state.ema_fast = _slide_ema(state.ema_fast, fast_period, closes[-fast_period], closes[-fast_period + 1], close)
+    state.ema_slow = _slide_ema(state.ema_slow, slow_period, closes[0], closes[1], close)
+    closes.append(close)
+
+    previous_close = state.last_bar[0]
+    true_range = max(high - low, abs(high - previous_close), abs(low - previous_close))
+    if len(state.true_ranges) == state.true_ranges.maxlen:
+        state.true_range_sum -= state.true_ranges[0]
+    state.true_ranges.append(true_range)
+    state.true_range_sum += true_range
+
+    state.last_time = int(bar_time)
+    state.last_bar = fingerprint
+    state.updates += 1
+    return state
+
+
+def _state_values(state):
+    return {
+        'ema_fast': state.ema_fast,
+        'ema_slow': state.ema_slow,
+        'atr': state.true_range_sum / len(state.true_ranges),
+    }
+
+
+def reset_indicator_states():
+    with INDICATOR_STATE_LOCK:
+        INDICATOR_STATES.clear()
+
+
+def resolve_indicator_rows(
+    rows,
+    lookback_points,
+    fast_period,
+    slow_period,
+    atr_period,
+    volume_lookback_points,
+    step_ms=FIVE_MINUTES_MS,
+):
+    """优先用增量状态给出每行指标，无法增量的行批量整窗重算并重建状态。
+
+    Returns:
+        tuple: (与 rows 一一对应的指标列表, {'reused', 'advanced', 'recomputed'} 计数)
+    """
+    values = [None] * len(rows)
+    stats = {'reused': 0, 'advanced': 0, 'recomputed': 0}
+    pending = []
+
+    with INDICATOR_STATE_LOCK:
+        for index, row in enumerate(rows):
+            state = INDICATOR_STATES.get(row.key) if row.key is not None else None
+            if state is None or state.updates >= INDICATOR_STATE_REBUILD_UPDATES:
+                pending.append(index)
+                continue
+            kline_by_time = row.kline_by_time or {}
+            anchor_time = int(row.anchor_time)
+            if state.last_time == anchor_time and _bar_fingerprint(kline_by_time.get(anchor_time)) == state.last_bar:
+                values[index] = _state_values(state)
+                stats['reused'] += 1
+                continue
+            fingerprint = _bar_fingerprint(kline_by_time.get(anchor_time))
+            if (
+                state.last_time == anchor_time - step_ms
+                and fingerprint is not None
+                and _bar_fingerprint(kline_by_time.get(state.last_time)) == state.last_bar
+            ):
+                advance_indicator_state(state, anchor_time, fingerprint, fast_period, slow_period)
+                values[index] = _state_values(state)
+                stats['advanced'] += 1
+                continue
+            pending.append(index)
+
+    if pending:
+        pending_rows = [rows[index] for index in pending]
+        recomputed = compute_indicator_rows(
+            pending_rows,
+            lookback_points=lookback_points,
+            fast_period=fast_period,
+            slow_period=slow_period,
+            atr_period=atr_period,
+            volume_lookback_points=volume_lookback_points,
+            step_ms=step_ms,
+        )
+        new_states = {}
+        for index, row, row_values in zip(pending, pending_rows, recomputed):
+            values[index] = row_values
+            if row.key is not None:
+                new_states[row.key] = build_indicator_state(
+                    row.kline_by_time,
+                    row.anchor_time,
+                    fast_period,
+                    slow_period,
+                    atr_period,
+                    step_ms=step_ms,
+                )
+        stats['recomputed'] = len(pending)
+        with INDICATOR_STATE_LOCK:
+            for key, state in new_states.items():
+                current = INDICATOR_STATES.get(key)
+                if state is None:
+                    INDICATOR_STATES.pop(key, None)
+                elif current is None or current.last_time <= state.last_time:
+                    INDICATOR_STATES[key] = state
+
+    ratios = volume_ratio(
+        [_to_float(getattr((row.kline_by_time or {}).get(int(row.anchor_time)), 'quote_volume', None)) for row in rows],
+        [_to_float(row.quote_volume_24h) for row in rows],
+        volume_lookback_points,
+    )
+    for index, row_values in enumerate(values):
+        values[index] = {**row_values, 'volume_ratio': _to_optional(ratios[index])}
+    return values, stats
@@ -4,16 +4,14 @@ from typing import Optional
 import time
 
 from coinx.coin_manager import get_active_coins
-from coinx.collector.binance.market import get_all_funding_rates as get_all_binance_funding_rates
-from coinx.collector.bybit.series import get_all_funding_rates as get_all_bybit_funding_rates
 from coinx.collector.exchange_repair import latest_closed_5m_open_time
 from coinx.collector.exchange_adapters import get_exchange_adapter, get_supported_exchange_ids
-from coinx.collector.gate.series import get_all_funding_rates as get_all_gate_funding_rates
-from coinx.collector.okx.series import get_all_funding_rates as get_all_okx_funding_rates
 from coinx.config import ENABLED_EXCHANGES, FETCH_COINS_TOP_VOLUME_COUNT
 from coinx.database import get_session
+from coinx.repositories.funding_rate_cache import load_cached_funding_rate_maps
 from coinx.repositories.market_tickers import get_market_ticker_symbols
 from coinx.repositories.market_structure_series import load_market_structure_exchange_maps
+from coinx.repositories.time_slots import TimeSlotSeries, latest_common_time
 from coinx.utils import logger
 
 
@@ -31,12 +29,6 @@ FUNDING_COLD_THRESHOLD = -0.0008
 PRICE_MOVE_RISK_THRESHOLD = 0.02
 ATR_RISK_THRESHOLD = 0.02
 MARKET_STRUCTURE_EXCHANGE_MAX_WORKERS = 4
-EXCHANGE_FUNDING_LOADERS = {
-    'binance': get_all_binance_funding_rates,
-    'okx': get_all_okx_funding_rates,
-    'bybit': get_all_bybit_funding_rates,
-    'gate': get_all_gate_funding_rates,
-}
 EXCHANGE_DIAGNOSTIC_REASON_LABELS = {
     'included': '已纳入',
     'missing_oi': '缺少 OI',
@@ -50,7 +42,7 @@ EXCHANGE_DIAGNOSTIC_REASON_LABELS = {
 }
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SeriesPoint:
     time: int
     open_price: Optional[float] = None
@@ -141,6 +133,8 @@ def _estimate_open_interest_value(open_interest, reference_price, open_interest_
 def _get_latest_time(records_by_time, upper_bound=None):
     if not records_by_time:
         return None
+    if isinstance(records_by_time, TimeSlotSeries):
+        return records_by_time.latest_time(upper_bound=upper_bound)
     available_times = [timestamp for timestamp in records_by_time if upper_bound is None or timestamp <= upper_bound]
     if not available_times:
         return None
@@ -148,6 +142,8 @@ def _get_latest_time(records_by_time, upper_bound=None):
 
 
 def _get_time_series(records_by_time, anchor_time, lookback_points, step_ms=5 * 60 * 1000):
+    if isinstance(records_by_time, TimeSlotSeries) and records_by_time.step_ms == step_ms:
+        return records_by_time.window(anchor_time, lookback_points)
     times = []
     current_time = int(anchor_time)
     for offset in range(max(1, lookback_points)):
@@ -309,54 +305,14 @@ def _weighted_metric_value(exchange_metrics, field_name, weight_field='weight'):
     return sum(weighted_values) / total_weight
 
 
-def _load_exchange_funding_rate_maps(exchanges, target_symbols):
-    funding_maps = {}
-    symbol_set = set(target_symbols or [])
+def _load_exchange_funding_rate_maps(exchanges, target_symbols, session=None):
+    """从最新资金费率缓存读取各交易所费率，缓存缺失或过期的交易所得到空字典。"""
     normalized_exchanges = [exchange for exchange in exchanges if exchange]
-
-    def _load_single_exchange(exchange):
-        loader = EXCHANGE_FUNDING_LOADERS.get((exchange or '').strip().lower())
-        if loader is None:
-            return exchange, {}
-
-        started_at = time.perf_counter()
-        raw_map = {}
-        try:
-            raw_map = loader() or {}
-        except Exception as exc:
-            logger.warning('批量加载交易所资金费率失败: exchange=%s error=%s', exchange, exc)
-            raw_map = {}
-
-        filtered_map = {}
-        for symbol, payload in raw_map.items():
-            if symbol_set and symbol not in symbol_set:
-                continue
-            if not isinstance(payload, dict):
-                continue
-            rate = _safe_float(payload.get('lastFundingRate'))
-            if rate is None:
-                rate = _safe_float(payload.get('fundingRate'))
-            filtered_map[symbol] = rate
-
-        logger.info(
-            '评分资金费率加载完成: exchange=%s total=%d matched=%d 耗时=%.2fs',
-            exchange,
-            len(raw_map),
-            len(filtered_map),
-            time.perf_counter() - started_at,
-        )
-        return exchange, filtered_map
-
-    max_workers = min(MARKET_STRUCTURE_EXCHANGE_MAX_WORKERS, len(normalized_exchanges) or 1)
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_exchange = {
-            executor.submit(_load_single_exchange, exchange): exchange
-            for exchange in normalized_exchanges
-        }
-        for future in as_completed(future_to_exchange):
-            exchange, filtered_map = future.result()
-            funding_maps[exchange] = filtered_map
-
+    funding_maps = load_cached_funding_rate_maps(normalized_exchanges, symbols=target_symbols, session=session)
+    logger.info(
+        '评分资金费率缓存读取完成: %s',
+        {exchange: len(funding_maps.get(exchange) or {}) for exchange in normalized_exchanges},
+    )
     return funding_maps
 
 
@@ -399,13 +355,13 @@ def _build_symbol_exchange_diagnostics(exchange_maps, symbol, symbol_anchor_time
         oi_map, kline_map, _, _ = exchange_maps.get(exchange, ({}, {}, {}, {}))
         symbol_oi = oi_map.get(symbol, {})
         symbol_kline = kline_map.get(symbol, {})
-        latest_oi_time = max(symbol_oi) if symbol_oi else None
-        latest_kline_time = max(symbol_kline) if symbol_kline else None
-        common_times = sorted(set(symbol_oi).intersection(symbol_kline))
+        latest_oi_time = _get_latest_time(symbol_oi)
+        latest_kline_time = _get_latest_time(symbol_kline)
+        common_time = latest_common_time(symbol_oi, symbol_kline)
         detail = {
             'latest_oi_time': latest_oi_time,
             'latest_kline_time': latest_kline_time,
-            'latest_common_time': common_times[-1] if common_times else None,
+            'latest_common_time': common_time,
             'symbol_anchor_time': symbol_anchor_time,
         }
 
@@ -422,7 +378,7 @@ def _build_symbol_exchange_diagnostics(exchange_maps, symbol, symbol_anchor_time
         if not symbol_kline:
             diagnostics.append(_build_exchange_diagnostic(exchange, False, 'missing_kline', detail=detail))
             continue
-        if not common_times:
+        if common_time is None:
             diagnostics.append(_build_exchange_diagnostic(exchange, False, 'no_common_anchor', detail=detail))
             continue
 
@@ -453,12 +409,12 @@ def _build_exchange_metric(
     anchor_time,
     funding_rate=None,
     quote_volume_24h=None,
+    indicators=None,
 ):
-    common_times = sorted(set(oi_by_time).intersection(kline_by_time))
     if anchor_time is None:
-        if not common_times:
+        anchor_time = latest_common_time(oi_by_time, kline_by_time)
+        if anchor_time is None:
             return None
-        anchor_time = common_times[-1]
     elif anchor_time not in oi_by_time or anchor_time not in kline_by_time:
         return None
 
@@ -471,11 +427,16 @@ def _build_exchange_metric(
     if current_kline is None or current_oi is None:
         return None
 
-    kline_points = _get_time_series(kline_by_time, anchor_time, SCORE_HISTORY_POINTS)
-    closes = [point.close_price for point in kline_points if point.close_price is not None]
-    ema_fast = _ema(closes[-EMA_FAST_PERIOD:], EMA_FAST_PERIOD) if len(closes) >= 2 else None
-    ema_slow = _ema(closes[-EMA_SLOW_PERIOD:], EMA_SLOW_PERIOD) if len(closes) >= 2 else None
-    atr_value = _atr(kline_points, period=ATR_PERIOD)
+    if indicators is not None:
+        ema_fast = indicators.get('ema_fast')
+        ema_slow = indicators.get('ema_slow')
+        atr_value = indicators.get('atr')
+    else:
+        kline_points = _get_time_series(kline_by_time, anchor_time, SCORE_HISTORY_POINTS)
+        closes = [point.close_price for point in kline_points if point.close_price is not None]
+        ema_fast = _ema(closes[-EMA_FAST_PERIOD:], EMA_FAST_PERIOD) if len(closes) >= 2 else None
+        ema_slow = _ema(closes[-EMA_SLOW_PERIOD:], EMA_SLOW_PERIOD) if len(closes) >= 2 else None
+        atr_value = _atr(kline_points, period=ATR_PERIOD)
 
     current_price = _safe_float(current_kline.close_price)
     previous_price = _safe_float(previous_kline.close_price) if previous_kline is not None else None
@@ -517,7 +478,9 @@ def _build_exchange_metric(
         taker_net_pressure_ratio = taker_net_pressure / quote_volume
 
     volume_ratio = None
-    if quote_volume is not None and quote_volume_24h not in (None, 0):
+    if indicators is not None:
+        volume_ratio = indicators.get('volume_ratio')
+    elif quote_volume is not None and quote_volume_24h not in (None, 0):
         avg_volume = quote_volume_24h / VOLUME_RATIO_LOOKBACK_POINTS
         if avg_volume:
             volume_ratio = quote_volume / avg_volume
@@ -583,12 +546,13 @@ def _build_exchange_metric(
     return exchange_metric
 
 
-def _aggregate_weighted_scores(exchange_metrics, sentiment_score, sentiment_state, risk_score, risk_level, risk_reasons):
+def _aggregate_weighted_scores(exchange_metrics, sentiment_score, sentiment_state, risk_score, risk_level, risk_reasons, weights=None):
     valid_metrics = [metric for metric in exchange_metrics if metric is not None]
     if not valid_metrics:
         return None
 
-    weights = _build_metric_weights(valid_metrics)
+    if weights is None:
+        weights = _build_metric_weights(valid_metrics)
 
     for metric in valid_metrics:
         metric_weight = weights.get(metric['exchange'], 0)
@@ -672,14 +636,15 @@ def _aggregate_weighted_scores(exchange_metrics, sentiment_score, sentiment_stat
     }
 
 
-def _build_symbol_report(symbol, exchange_metrics, funding_rate, anchor_time, exchange_diagnostics=None):
+def _build_symbol_report(symbol, exchange_metrics, funding_rate, anchor_time, exchange_diagnostics=None, weights=None):
     valid_metrics = [metric for metric in exchange_metrics if metric is not None]
     if not valid_metrics:
         return None
 
     sentiment_score, sentiment_state = 0, '中性'
 
-    weights = _build_metric_weights(valid_metrics)
+    if weights is None:
+        weights = _build_metric_weights(valid_metrics)
     for metric in valid_metrics:
         metric['weight'] = weights.get(metric['exchange'], 0)
         metric['weight_percent'] = metric['weight'] * 100
@@ -699,6 +664,7 @@ def _build_symbol_report(symbol, exchange_metrics, funding_rate, anchor_time, ex
         risk_score=risk_score,
         risk_level=risk_level,
         risk_reasons=risk_reasons,
+        weights=weights,
     )
     if aggregate is None:
         return None
@@ -764,7 +730,81 @@ def _build_symbol_report(symbol, exchange_metrics, funding_rate, anchor_time, ex
     }
 
 
+def _empty_score_summary():
+    return {
+        'total_symbols': 0,
+        'complete_symbols': 0,
+        'partial_symbols': 0,
+        'empty_symbols': 0,
+        'strong_long_count': 0,
+        'long_count': 0,
+        'neutral_count': 0,
+        'short_count': 0,
+        'strong_short_count': 0,
+        'low_risk_count': 0,
+        'medium_risk_count': 0,
+        'high_risk_count': 0,
+    }
+
+
+def _count_report_in_summary(summary, report):
+    summary['total_symbols'] += 1
+    if report['status'] == 'complete':
+        summary['complete_symbols'] += 1
+    elif report['status'] == 'partial':
+        summary['partial_symbols'] += 1
+    else:
+        summary['empty_symbols'] += 1
+
+    if report['risk_level'] == '低':
+        summary['low_risk_count'] += 1
+    elif report['risk_level'] == '中':
+        summary['medium_risk_count'] += 1
+    elif report['risk_level'] == '高':
+        summary['high_risk_count'] += 1
+
+    signal_key = report['trade_signal']
+    if signal_key == '强多':
+        summary['strong_long_count'] += 1
+    elif signal_key == '偏多':
+        summary['long_count'] += 1
+    elif signal_key == '震荡':
+        summary['neutral_count'] += 1
+    elif signal_key == '偏空':
+        summary['short_count'] += 1
+    elif signal_key == '强空':
+        summary['strong_short_count'] += 1
+
+
+def build_market_structure_score_summary(reports, empty_symbols=0):
+    summary = _empty_score_summary()
+    summary['empty_symbols'] = empty_symbols
+    for report in reports:
+        _count_report_in_summary(summary, report)
+    return summary
+
+
+def rank_market_structure_reports(reports):
+    reports.sort(
+        key=lambda item: (
+            -(item.get('total_score') or 0),
+            -(item.get('current_open_interest_value') or 0),
+            item.get('symbol') or '',
+        )
+    )
+    for index, item in enumerate(reports, start=1):
+        item['rank_index'] = index
+    return reports
+
+
 def get_market_structure_score_snapshot(symbols=None, session=None, now_ms=None, exchanges=None):
+    # 指标计算依赖 numpy，延迟到真正计算评分时导入，Web 进程启动不加载 numpy
+    from coinx.repositories.market_structure_indicators import (
+        IndicatorRow,
+        build_metric_weight_maps,
+        resolve_indicator_rows,
+    )
+
     target_symbols = symbols if symbols is not None else get_market_structure_score_symbols(session=session)
     target_exchanges = _normalize_exchange_list(exchanges or ENABLED_EXCHANGES)
     if not target_symbols or not target_exchanges:
@@ -826,7 +866,7 @@ def get_market_structure_score_snapshot(symbols=None, session=None, now_ms=None,
         )
 
         funding_start = time.perf_counter()
-        exchange_funding_maps = _load_exchange_funding_rate_maps(exchange_maps.keys(), target_symbols)
+        exchange_funding_maps = _load_exchange_funding_rate_maps(exchange_maps.keys(), target_symbols, session=db)
         funding_duration = time.perf_counter() - funding_start
         logger.info(
             '评分资金费率批量加载完成: exchanges=%d 耗时=%.2fs',
@@ -835,102 +875,98 @@ def get_market_structure_score_snapshot(symbols=None, session=None, now_ms=None,
         )
 
         data = []
-        summary = {
-            'total_symbols': 0,
-            'complete_symbols': 0,
-            'partial_symbols': 0,
-            'empty_symbols': 0,
-            'strong_long_count': 0,
-            'long_count': 0,
-            'neutral_count': 0,
-            'short_count': 0,
-            'strong_short_count': 0,
-            'low_risk_count': 0,
-            'medium_risk_count': 0,
-            'high_risk_count': 0,
-        }
+        summary = _empty_score_summary()
         symbol_collect_duration = 0.0
         symbol_align_duration = 0.0
         symbol_report_duration = 0.0
-        symbol_total_duration = 0.0
 
-        for index, symbol in enumerate(target_symbols, start=1):
-            symbol_start = time.perf_counter()
-
-            collect_start = time.perf_counter()
-            per_exchange_metrics = []
-            per_exchange_current_times = []
-
-            for exchange, (oi_map, kline_map, taker_maps_by_period, quote_volume_24h_map) in exchange_maps.items():
+        # 先确定每个币种的共同锚点：各交易所最新的 OI/K 线共同时间点取最小值
+        collect_start = time.perf_counter()
+        aligned_candidates = {}
+        indicator_rows = []
+        for symbol in target_symbols:
+            exchange_anchor_times = []
+            for exchange, (oi_map, kline_map, _, _) in exchange_maps.items():
                 symbol_oi = oi_map.get(symbol, {})
                 symbol_kline = kline_map.get(symbol, {})
                 if not symbol_oi or not symbol_kline:
                     continue
+                common_time = latest_common_time(symbol_oi, symbol_kline)
+                if common_time is not None:
+                    exchange_anchor_times.append(common_time)
 
-                current_times = sorted(set(symbol_oi).intersection(symbol_kline))
-                if not current_times:
-                    continue
-                exchange_anchor_time = current_times[-1]
-                exchange_funding_rate = (exchange_funding_maps.get(exchange) or {}).get(symbol)
-                exchange_quote_volume_24h = (quote_volume_24h_map or {}).get(symbol)
-                metric = _build_exchange_metric(
-                    exchange=exchange,
-                    symbol=symbol,
-                    oi_by_time=symbol_oi,
-                    kline_by_time=symbol_kline,
-                    taker_maps_by_period={
-                        period: period_map.get(symbol, {})
-                        for period, period_map in (taker_maps_by_period or {}).items()
-                    },
-                    anchor_time=exchange_anchor_time,
-                    funding_rate=exchange_funding_rate,
-                    quote_volume_24h=exchange_quote_volume_24h,
-                )
-                if metric is not None:
-                    per_exchange_metrics.append(metric)
-                    per_exchange_current_times.append(exchange_anchor_time)
-
-            collect_duration = time.perf_counter() - collect_start
-            symbol_collect_duration += collect_duration
-
-            if not per_exchange_metrics:
+            if not exchange_anchor_times:
                 summary['empty_symbols'] += 1
                 continue
 
-            align_start = time.perf_counter()
-            symbol_anchor_time = min(per_exchange_current_times) if per_exchange_current_times else anchor_time
-            aligned_metrics = []
-            for metric in per_exchange_metrics:
-                exchange = metric['exchange']
-                oi_map, kline_map, taker_maps_by_period, quote_volume_24h_map = exchange_maps.get(exchange, ({}, {}, {}, {}))
+            symbol_anchor_time = min(exchange_anchor_times)
+            candidates = []
+            for exchange, (oi_map, kline_map, _, quote_volume_24h_map) in exchange_maps.items():
                 symbol_oi = oi_map.get(symbol, {})
                 symbol_kline = kline_map.get(symbol, {})
                 if symbol_anchor_time not in symbol_oi or symbol_anchor_time not in symbol_kline:
                     continue
+                candidates.append((exchange, len(indicator_rows)))
+                indicator_rows.append(
+                    IndicatorRow(
+                        kline_by_time=symbol_kline,
+                        anchor_time=symbol_anchor_time,
+                        quote_volume_24h=(quote_volume_24h_map or {}).get(symbol),
+                        key=(exchange, symbol),
+                    )
+                )
+            aligned_candidates[symbol] = (symbol_anchor_time, candidates)
+        symbol_collect_duration = time.perf_counter() - collect_start
+
+        # 指标优先走增量状态，其余按 行 × 时间槽 矩阵一次性重算，再逐个交易所组装评分明细
+        align_start = time.perf_counter()
+        indicator_values, indicator_stats = resolve_indicator_rows(
+            indicator_rows,
+            lookback_points=SCORE_HISTORY_POINTS,
+            fast_period=EMA_FAST_PERIOD,
+            slow_period=EMA_SLOW_PERIOD,
+            atr_period=ATR_PERIOD,
+            volume_lookback_points=VOLUME_RATIO_LOOKBACK_POINTS,
+        )
+        aligned_metrics_by_symbol = {}
+        for symbol, (symbol_anchor_time, candidates) in aligned_candidates.items():
+            aligned_metrics = []
+            for exchange, row_index in candidates:
+                oi_map, kline_map, taker_maps_by_period, quote_volume_24h_map = exchange_maps[exchange]
                 aligned_metric = _build_exchange_metric(
                     exchange=exchange,
                     symbol=symbol,
-                    oi_by_time=symbol_oi,
-                    kline_by_time=symbol_kline,
+                    oi_by_time=oi_map.get(symbol, {}),
+                    kline_by_time=kline_map.get(symbol, {}),
                     taker_maps_by_period={
                         period: period_map.get(symbol, {})
                         for period, period_map in (taker_maps_by_period or {}).items()
                     },
                     anchor_time=symbol_anchor_time,
-                    funding_rate=metric.get('funding_rate'),
+                    funding_rate=(exchange_funding_maps.get(exchange) or {}).get(symbol),
                     quote_volume_24h=(quote_volume_24h_map or {}).get(symbol),
+                    indicators=indicator_values[row_index],
                 )
                 if aligned_metric is not None:
                     aligned_metrics.append(aligned_metric)
-
-            align_duration = time.perf_counter() - align_start
-            symbol_align_duration += align_duration
-
             if not aligned_metrics:
                 summary['empty_symbols'] += 1
                 continue
+            aligned_metrics_by_symbol[symbol] = aligned_metrics
+        weights_by_symbol = build_metric_weight_maps(aligned_metrics_by_symbol)
+        symbol_align_duration = time.perf_counter() - align_start
+        logger.info(
+            '评分指标计算完成: rows=%d reused=%d advanced=%d recomputed=%d 耗时=%.2fs',
+            len(indicator_rows),
+            indicator_stats['reused'],
+            indicator_stats['advanced'],
+            indicator_stats['recomputed'],
+            symbol_align_duration,
+        )
 
-            report_start = time.perf_counter()
+        report_start = time.perf_counter()
+        for symbol, aligned_metrics in aligned_metrics_by_symbol.items():
+            symbol_anchor_time = aligned_candidates[symbol][0]
             exchange_diagnostics = _build_symbol_exchange_diagnostics(
                 exchange_maps=exchange_maps,
                 symbol=symbol,
@@ -944,54 +980,18 @@ def get_market_structure_score_snapshot(symbols=None, session=None, now_ms=None,
                 funding_rate=None,
                 anchor_time=symbol_anchor_time,
                 exchange_diagnostics=exchange_diagnostics,
+                weights=weights_by_symbol.get(symbol),
             )
             if report is None:
                 summary['empty_symbols'] += 1
                 continue
 
-            report_duration = time.perf_counter() - report_start
-            symbol_report_duration += report_duration
-
             data.append(report)
-            summary['total_symbols'] += 1
-            if report['status'] == 'complete':
-                summary['complete_symbols'] += 1
-            elif report['status'] == 'partial':
-                summary['partial_symbols'] += 1
-            else:
-                summary['empty_symbols'] += 1
+            _count_report_in_summary(summary, report)
+        symbol_report_duration = time.perf_counter() - report_start
+        symbol_total_duration = symbol_collect_duration + symbol_align_duration + symbol_report_duration
 
-            if report['risk_level'] == '低':
-                summary['low_risk_count'] += 1
-            elif report['risk_level'] == '中':
-                summary['medium_risk_count'] += 1
-            elif report['risk_level'] == '高':
-                summary['high_risk_count'] += 1
-
-            signal_key = report['trade_signal']
-            if signal_key == '强多':
-                summary['strong_long_count'] += 1
-            elif signal_key == '偏多':
-                summary['long_count'] += 1
-            elif signal_key == '震荡':
-                summary['neutral_count'] += 1
-            elif signal_key == '偏空':
-                summary['short_count'] += 1
-            elif signal_key == '强空':
-                summary['strong_short_count'] += 1
-
-            symbol_duration = time.perf_counter() - symbol_start
-            symbol_total_duration += symbol_duration
-
-        data.sort(
-            key=lambda item: (
-                -(item.get('total_score') or 0),
-                -(item.get('current_open_interest_value') or 0),
-                item.get('symbol') or '',
-            )
-        )
-        for index, item in enumerate(data, start=1):
-            item['rank_index'] = index
+        rank_market_structure_reports(data)
 
         overall_duration = time.perf_counter() - overall_start
         logger.info(
@@ -0,0 +1,284 @@
+"""合约市场结构评分快照的持久化与读取。
+
+调度器在滚动修补之后按 5m 锚点计算一次评分并落库，接口优先读取最新快照，
+快照缺失或过旧时才回退为实时计算。
+"""
+import time
+
+from sqlalchemy import func
+
+from coinx.collector.exchange_repair import latest_closed_5m_open_time
+from coinx.config import (
+    DB_TYPE,
+    MARKET_STRUCTURE_SCORE_MAX_STALE_SECONDS,
+    MARKET_STRUCTURE_SCORE_RETENTION_HOURS,
+)
+from coinx.database import get_session
+from coinx.models import MarketStructureScore
+from coinx.repositories.market_structure_score import (
+    build_market_structure_score_summary,
+    get_market_structure_score_snapshot,
+    get_market_structure_score_symbols,
+    rank_market_structure_reports,
+)
+from coinx.utils import logger
+
+
+SCORE_HISTORY_FIELDS = (
+    'total_score',
+    'trend_score',
+    'momentum_score',
+    'position_score',
+    'sentiment_score',
+    'risk_score',
+)
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+def _build_score_row(report, anchor_time):
+    return {
+        'symbol': report['symbol'],
+        'anchor_time': int(anchor_time),
+        'rank_index': report.get('rank_index'),
+        'status': report.get('status'),
+        'total_score': report.get('total_score'),
+        'trend_score': report.get('trend_score'),
+        'momentum_score': report.get('momentum_score'),
+        'position_score': report.get('position_score'),
+        'sentiment_score': report.get('sentiment_score'),
+        'risk_score': report.get('risk_score'),
+        'trade_signal': report.get('trade_signal'),
+        'risk_level': report.get('risk_level'),
+        'current_price': report.get('current_price'),
+        'current_open_interest_value': report.get('current_open_interest_value'),
+        'report_json': report,
+    }
+
+
+def save_market_structure_score_snapshot(snapshot, session=None):
+    """按锚点整体覆盖写入评分快照，返回写入行数。"""
+    anchor_time = (snapshot or {}).get('cache_update_time')
+    reports = (snapshot or {}).get('data') or []
+    if anchor_time is None or not reports:
+        return 0
+
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        rows = [_build_score_row(report, anchor_time) for report in reports]
+        table = MarketStructureScore.__table__
+        db.execute(table.delete().where(table.c.anchor_time == int(anchor_time)))
+        db.execute(table.insert(), rows)
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def get_latest_market_structure_score_anchor(session=None):
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        latest = db.query(func.max(MarketStructureScore.anchor_time)).scalar()
+        return int(latest) if latest is not None else None
+    finally:
+        if own_session:
+            db.close()
+
+
+def load_market_structure_score_snapshot(symbols=None, session=None, now_ms=None, max_stale_seconds=None, allow_partial=False):
+    """读取最新锚点的评分快照，结构与 get_market_structure_score_snapshot 一致。
+
+    无快照或快照锚点落后当前锚点超过 max_stale_seconds 时返回 None。
+    传入 symbols 时只返回这些币种，并在结果内重新排名和汇总；快照缺少其中部分币种时返回 None，
+    allow_partial=True 时改为返回已有部分，并在 missing_symbols 中列出缺少的币种。
+    """
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        anchor_time = get_latest_market_structure_score_anchor(session=db)
+        if anchor_time is None:
+            return None
+
+        current_time_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        stale_seconds = MARKET_STRUCTURE_SCORE_MAX_STALE_SECONDS if max_stale_seconds is None else max_stale_seconds
+        if latest_closed_5m_open_time(int(current_time_ms)) - anchor_time > stale_seconds * 1000:
+            return None
+
+        query = db.query(MarketStructureScore.report_json).filter(MarketStructureScore.anchor_time == anchor_time)
+        if symbols is not None:
+            if not symbols:
+                return None
+            query = query.filter(MarketStructureScore.symbol.in_(list(symbols)))
+        reports = [dict(row.report_json) for row in query.all() if row.report_json]
+        if symbols is not None and not reports:
+            return None
+
+        missing_symbols = []
+        if symbols is not None:
+            stored_symbols = {report['symbol'] for report in reports}
+            missing_symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol not in stored_symbols]
+            if missing_symbols and not allow_partial:
+                return None
+
+        rank_market_structure_reports(reports)
+        snapshot = {
+            'data': reports,
+            'cache_update_time': anchor_time,
+            'summary': build_market_structure_score_summary(reports, empty_symbols=len(missing_symbols)),
+        }
+        if allow_partial:
+            snapshot['missing_symbols'] = missing_symbols
+        return snapshot
+    finally:
+        if own_session:
+            db.close()
+
+
+def load_stored_market_structure_score(symbols=None):
+    """读取评分快照，快照缺少的币种（如新进入榜单）单独实时计算后合并重排。
+
+    无可用快照或读取失败（如表尚未创建）时记录告警并返回 None，由调用方整体回退。
+    """
+    try:
+        snapshot = load_market_structure_score_snapshot(symbols=symbols, allow_partial=True)
+    except Exception as exc:
+        logger.warning('读取评分快照失败，回退实时计算: symbols=%d error=%s', len(symbols or []), exc)
+        return None
+    if snapshot is None:
+        return None
+    missing_symbols = snapshot.pop('missing_symbols')
+    if not missing_symbols:
+        return snapshot
+
+    computed = get_market_structure_score_snapshot(symbols=missing_symbols)
+    reports = snapshot['data'] + list(computed.get('data') or [])
+    rank_market_structure_reports(reports)
+    logger.info('评分快照缺少部分币种，已实时补算: missing=%d', len(missing_symbols))
+    return {
+        'data': reports,
+        'cache_update_time': snapshot['cache_update_time'],
+        'summary': build_market_structure_score_summary(
+            reports,
+            empty_symbols=len(missing_symbols) - len(computed.get('data') or []),
+        ),
+    }
+
+
+def load_market_structure_score_or_compute(symbols=None):
+    """优先读取已落库的评分快照，缺失或过旧时实时计算。"""
+    snapshot = load_stored_market_structure_score(symbols=symbols)
+    if snapshot is not None:
+        return snapshot
+    return get_market_structure_score_snapshot(symbols=symbols)
+
+
+def load_market_structure_score_history(symbol, hours=24, session=None, now_ms=None):
+    """加载单个币种的评分时间序列（只读紧凑列，不解析明细 JSON）。"""
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        current_time_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        cutoff_time = current_time_ms - int(hours) * 60 * 60 * 1000
+        rows = db.query(
+            MarketStructureScore.anchor_time,
+            MarketStructureScore.rank_index,
+            MarketStructureScore.status,
+            MarketStructureScore.total_score,
+            MarketStructureScore.trend_score,
+            MarketStructureScore.momentum_score,
+            MarketStructureScore.position_score,
+            MarketStructureScore.sentiment_score,
+            MarketStructureScore.risk_score,
+            MarketStructureScore.trade_signal,
+            MarketStructureScore.risk_level,
+            MarketStructureScore.current_price,
+        ).filter(
+            MarketStructureScore.symbol == symbol,
+            MarketStructureScore.anchor_time >= cutoff_time,
+        ).order_by(MarketStructureScore.anchor_time.asc()).all()
+
+        history = []
+        for row in rows:
+            item = {
+                'time': int(row.anchor_time),
+                'rank_index': row.rank_index,
+                'status': row.status,
+                'trade_signal': row.trade_signal,
+                'risk_level': row.risk_level,
+                'current_price': _float(row.current_price),
+            }
+            for field_name in SCORE_HISTORY_FIELDS:
+                item[field_name] = _float(getattr(row, field_name))
+            history.append(item)
+        return history
+    finally:
+        if own_session:
+            db.close()
+
+
+def delete_old_market_structure_scores(retention_hours=MARKET_STRUCTURE_SCORE_RETENTION_HOURS, session=None, now_ms=None):
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        current_time_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        cutoff_time = current_time_ms - int(retention_hours) * 60 * 60 * 1000
+        if DB_TYPE == 'starrocks':
+            result = db.execute(
+                MarketStructureScore.__table__.delete().where(MarketStructureScore.anchor_time < cutoff_time)
+            )
+            deleted = result.rowcount
+        else:
+            deleted = db.query(MarketStructureScore).filter(MarketStructureScore.anchor_time < cutoff_time).delete()
+        db.commit()
+        return deleted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def refresh_market_structure_score_snapshot(now_ms=None, symbols=None, force=False):
+    """为当前 5m 锚点计算并保存一次评分快照；同一锚点已保存时默认跳过。"""
+    started_at = time.perf_counter()
+    current_time_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    anchor_time = latest_closed_5m_open_time(int(current_time_ms))
+
+    if not force and get_latest_market_structure_score_anchor() == anchor_time:
+        logger.info('评分快照已存在，跳过重复计算: anchor_time=%s', anchor_time)
+        return {'status': 'skipped', 'message': 'score snapshot already stored', 'anchor_time': anchor_time, 'saved_count': 0}
+
+    target_symbols = symbols if symbols is not None else get_market_structure_score_symbols()
+    snapshot = get_market_structure_score_snapshot(symbols=target_symbols, now_ms=current_time_ms)
+    saved_count = save_market_structure_score_snapshot(snapshot)
+    deleted_count = delete_old_market_structure_scores(now_ms=current_time_ms)
+    duration_ms = round((time.perf_counter() - started_at) * 1000, 2)
+    logger.info(
+        '评分快照保存完成: anchor_time=%s symbols=%d saved=%d deleted=%d 耗时=%.2fms',
+        snapshot.get('cache_update_time'),
+        len(target_symbols or []),
+        saved_count,
+        deleted_count,
+        duration_ms,
+    )
+    return {
+        'status': 'success',
+        'anchor_time': snapshot.get('cache_update_time'),
+        'saved_count': saved_count,
+        'deleted_count': deleted_count,
+        'duration_ms': duration_ms,
+    }
@@ -14,6 +14,8 @@ from coinx.models import (
     MarketTakerBuySellVol,
 )
 from coinx.utils import logger
+from .series_frame import load_series_frame
+from .time_slots import group_points_by_symbol
 
 
 FIVE_MINUTES_MS = 5 * 60 * 1000
@@ -23,7 +25,7 @@ MARKET_STRUCTURE_COMPONENT_MAX_WORKERS = 4
 MARKET_STRUCTURE_KLINE_POINTS = 80
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarketStructureOpenInterestPoint:
     symbol: str
     event_time: int
@@ -31,7 +33,7 @@ class MarketStructureOpenInterestPoint:
     sum_open_interest_value: Optional[float]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarketStructureKlinePoint:
     symbol: str
     open_time: int
@@ -42,7 +44,7 @@ class MarketStructureKlinePoint:
     taker_buy_quote_volume: Optional[float]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarketStructureTakerBuySellVolPoint:
     symbol: str
     event_time: int
@@ -174,7 +176,7 @@ def _load_open_interest_model_map(session, model, symbols, upper_bound=None, exc
         return {}
 
     if len(symbols) <= MARKET_STRUCTURE_BULK_QUERY_THRESHOLD:
-        records_by_symbol = {symbol: {} for symbol in symbols}
+        points = []
         for symbol in symbols:
             target_times = _build_change_target_times(
                 _get_recent_time_candidates(
@@ -204,10 +206,8 @@ def _load_open_interest_model_map(session, model, symbols, upper_bound=None, exc
             query = query.filter(model.event_time.in_(target_times))
 
             rows = query.all()
-            for row in rows:
-                point = _build_open_interest_point(row)
-                records_by_symbol.setdefault(point.symbol, {})[point.event_time] = point
-        return records_by_symbol
+            points.extend(_build_open_interest_point(row) for row in rows)
+        return group_points_by_symbol(points, 'event_time', symbols)
 
     lower_bound = _get_recent_lower_bound(
         session=session,
@@ -232,11 +232,7 @@ def _load_open_interest_model_map(session, model, symbols, upper_bound=None, exc
     if lower_bound is not None:
         query = query.filter(model.event_time >= lower_bound)
 
-    records_by_symbol = {symbol: {} for symbol in symbols}
-    for row in query.all():
-        point = _build_open_interest_point(row)
-        records_by_symbol.setdefault(point.symbol, {})[point.event_time] = point
-    return records_by_symbol
+    return group_points_by_symbol((_build_open_interest_point(row) for row in query.all()), 'event_time', symbols)
 
 
 def _load_kline_model_map(session, model, symbols, upper_bound=None, exchange=None, lookback_ms=None):
@@ -244,7 +240,7 @@ def _load_kline_model_map(session, model, symbols, upper_bound=None, exchange=No
         return {}
 
     if len(symbols) <= MARKET_STRUCTURE_BULK_QUERY_THRESHOLD:
-        records_by_symbol = {symbol: {} for symbol in symbols}
+        points = []
         for symbol in symbols:
             target_times = _build_change_target_times(
                 _get_recent_time_candidates(
@@ -277,10 +273,8 @@ def _load_kline_model_map(session, model, symbols, upper_bound=None, exchange=No
             query = query.filter(model.open_time.in_(target_times))
 
             rows = query.all()
-            for row in rows:
-                point = _build_kline_point(row)
-                records_by_symbol.setdefault(point.symbol, {})[point.open_time] = point
-        return records_by_symbol
+            points.extend(_build_kline_point(row) for row in rows)
+        return group_points_by_symbol(points, 'open_time', symbols)
 
     lower_bound = _get_recent_lower_bound(
         session=session,
@@ -307,11 +301,7 @@ def _load_kline_model_map(session, model, symbols, upper_bound=None, exchange=No
     if lower_bound is not None:
         query = query.filter(model.open_time >= lower_bound)
 
-    records_by_symbol = {symbol: {} for symbol in symbols}
-    for row in query.all():
-        point = _build_kline_point(row)
-        records_by_symbol.setdefault(point.symbol, {})[point.open_time] = point
-    return records_by_symbol
+    return group_points_by_symbol((_build_kline_point(row) for row in query.all()), 'open_time', symbols)
 
 
 def _load_taker_vol_model_map(session, model, symbols, upper_bound=None, exchange=None, period='5m', lookback_ms=None):
@@ -319,7 +309,7 @@ def _load_taker_vol_model_map(session, model, symbols, upper_bound=None, exchang
         return {}
 
     if len(symbols) <= MARKET_STRUCTURE_BULK_QUERY_THRESHOLD:
-        records_by_symbol = {symbol: {} for symbol in symbols}
+        points = []
         for symbol in symbols:
             query = session.query(
                 model.symbol,
@@ -337,10 +327,8 @@ def _load_taker_vol_model_map(session, model, symbols, upper_bound=None, exchang
                 query = query.filter(model.event_time <= upper_bound)
 
             rows = query.order_by(model.event_time.desc()).limit(_REQUIRED_POINTS).all()
-            for row in rows:
-                point = _build_taker_buy_sell_vol_point(row)
-                records_by_symbol.setdefault(point.symbol, {})[point.event_time] = point
-        return records_by_symbol
+            points.extend(_build_taker_buy_sell_vol_point(row) for row in rows)
+        return group_points_by_symbol(points, 'event_time', symbols)
 
     lower_bound = _get_recent_lower_bound(
         session=session,
@@ -366,11 +354,7 @@ def _load_taker_vol_model_map(session, model, symbols, upper_bound=None, exchang
     if lower_bound is not None:
         query = query.filter(model.event_time >= lower_bound)
 
-    records_by_symbol = {symbol: {} for symbol in symbols}
-    for row in query.all():
-        point = _build_taker_buy_sell_vol_point(row)
-        records_by_symbol.setdefault(point.symbol, {})[point.event_time] = point
-    return records_by_symbol
+    return group_points_by_symbol((_build_taker_buy_sell_vol_point(row) for row in query.all()), 'event_time', symbols)
 
 
 def _load_quote_volume_24h_map(session, model, symbols, upper_bound=None, exchange=None):
@@ -400,6 +384,21 @@ def _load_quote_volume_24h_map(session, model, symbols, upper_bound=None, exchan
     }
 
 
+def _score_maps_from_frame(frame, symbols, upper_bound):
+    """按评分的查询窗口从序列帧中切出 OI / K 线和 24h 成交额，结果与逐项查库一致。"""
+    upper_bound = int(upper_bound)
+    oi_map = {symbol: {} for symbol in symbols}
+    oi_map.update(frame.open_interest_since(symbols, max(0, upper_bound - _MARKET_STRUCTURE_CONTEXT_LOOKBACK_MS)))
+    kline_map = {symbol: {} for symbol in symbols}
+    kline_map.update(frame.klines_since(symbols, max(0, upper_bound - _MARKET_STRUCTURE_KLINE_LOOKBACK_MS)))
+    quote_volume_24h_map = {}
+    for symbol in symbols:
+        quote_volume_24h = frame.quote_volume_sum(symbol, VOLUME_RATIO_LOOKBACK_POINTS)
+        if quote_volume_24h is not None:
+            quote_volume_24h_map[symbol] = quote_volume_24h
+    return oi_map, kline_map, quote_volume_24h_map
+
+
 def load_market_structure_exchange_maps(session, exchange, symbols, upper_bound=None):
     exchange = exchange.lower()
     try:
@@ -484,12 +483,26 @@ def load_market_structure_exchange_maps(session, exchange, symbols, upper_bound=
         component_durations['quote_volume_24h'] = duration
         return result
 
-    component_loaders = {
-        'oi': _load_oi,
-        'kline': _load_kline,
-        'taker': _load_taker_period_map,
-        'quote_volume_24h': _load_quote_volume_24h,
-    }
+    def _load_frame(worker_session):
+        started_at = time.perf_counter()
+        frame = load_series_frame(worker_session, exchange, symbols, upper_bound)
+        component_durations['frame'] = time.perf_counter() - started_at
+        return frame
+
+    # 全量评分与首页共用同一锚点的序列帧，只有 taker 仍单独查询
+    use_frame = upper_bound is not None and len(symbols) > MARKET_STRUCTURE_BULK_QUERY_THRESHOLD
+    if use_frame:
+        component_loaders = {
+            'frame': _load_frame,
+            'taker': _load_taker_period_map,
+        }
+    else:
+        component_loaders = {
+            'oi': _load_oi,
+            'kline': _load_kline,
+            'taker': _load_taker_period_map,
+            'quote_volume_24h': _load_quote_volume_24h,
+        }
     component_results = {}
     max_workers = min(MARKET_STRUCTURE_COMPONENT_MAX_WORKERS, len(component_loaders))
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
@@ -501,10 +514,14 @@ def load_market_structure_exchange_maps(session, exchange, symbols, upper_bound=
             name = future_to_name[future]
             component_results[name] = future.result()
 
-    oi_map = component_results['oi']
-    kline_map = component_results['kline']
+    if use_frame:
+        frame = component_results['frame']
+        oi_map, kline_map, quote_volume_24h_map = _score_maps_from_frame(frame, symbols, upper_bound)
+    else:
+        oi_map = component_results['oi']
+        kline_map = component_results['kline']
+        quote_volume_24h_map = component_results['quote_volume_24h']
     taker_maps_by_period = component_results['taker']
-    quote_volume_24h_map = component_results['quote_volume_24h']
 
     total_duration = time.perf_counter() - start_time
     slowest_component = 'N/A'
@@ -512,11 +529,12 @@ def load_market_structure_exchange_maps(session, exchange, symbols, upper_bound=
     if component_durations:
         slowest_component, slowest_duration = max(component_durations.items(), key=lambda item: item[1])
     logger.info(
-        '评分映射加载汇总: exchange=%s total=%.2fs slowest=%s(%.2fs) oi=%.2fs kline=%.2fs taker=%.2fs quote24h=%.2fs',
+        '评分映射加载汇总: exchange=%s total=%.2fs slowest=%s(%.2fs) frame=%.2fs oi=%.2fs kline=%.2fs taker=%.2fs quote24h=%.2fs',
         exchange,
         total_duration,
         slowest_component,
         slowest_duration,
+        component_durations.get('frame', 0.0),
         component_durations.get('oi', 0.0),
         component_durations.get('kline', 0.0),
         component_durations.get('taker', 0.0),
@@ -0,0 +1,201 @@
+"""行情榜最新快照的内存排序索引。
+
+market_tickers 只在 refresh_market_tickers 写入新快照时变化。刷新后整份快照读入内存，
+并为每种 rank_type × direction 预先排好下标数组；排行查询只是切片，
+数据库只在快照变化（或冷启动）时读取一次。
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import func
+
+from coinx.cache_handoff import get_cache_version, publish_cache_version
+from coinx.database import get_session
+from coinx.models import MarketTickers
+from coinx.utils import logger
+
+
+# 其他进程（独立采集进程）写入新快照时，最多延迟该时长被发现
+MARKET_TICKER_INDEX_RECHECK_SECONDS = 30
+MARKET_TICKER_INDEX_LOCK = threading.Lock()
+# 单飞重建锁：持有期间读库并构建索引，不阻塞只读取内存索引的请求
+MARKET_TICKER_INDEX_RELOAD_LOCK = threading.Lock()
+_MARKET_TICKER_INDEX_STATE = {'index': None, 'checked_at': 0.0, 'handoff_version': None}
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class MarketTickerRow:
+    symbol: str
+    price_change: Optional[float]
+    price_change_percent: Optional[float]
+    weighted_avg_price: Optional[float]
+    last_price: Optional[float]
+    last_qty: Optional[float]
+    open_price: Optional[float]
+    high_price: Optional[float]
+    low_price: Optional[float]
+    volume: Optional[float]
+    quote_volume: Optional[float]
+    open_time: Optional[int]
+    close_time: Optional[int]
+    first_id: Optional[int]
+    last_id: Optional[int]
+    count: Optional[int]
+    created_at: object = None
+
+
+MARKET_TICKER_ROW_FIELDS = MarketTickerRow.__slots__
+MARKET_TICKER_FLOAT_FIELDS = (
+    'price_change',
+    'price_change_percent',
+    'weighted_avg_price',
+    'last_price',
+    'last_qty',
+    'open_price',
+    'high_price',
+    'low_price',
+    'volume',
+    'quote_volume',
+)
+
+
+def _sorted_indices(rows, field_name, descending):
+    """与数据库排序一致：空值在升序时排最前，降序时排最后；同值按 symbol 稳定排序。"""
+    present = [index for index, row in enumerate(rows) if getattr(row, field_name) is not None]
+    missing = [index for index, row in enumerate(rows) if getattr(row, field_name) is None]
+    present.sort(key=lambda index: (getattr(rows[index], field_name), rows[index].symbol), reverse=descending)
+    return tuple(present + missing) if descending else tuple(missing + present)
+
+
+@dataclass(frozen=True, slots=True)
+class MarketTickerIndex:
+    close_time: int
+    rows: tuple
+    orders: dict
+
+    def rank(self, rank_type='price_change', direction='down', limit=100):
+        """与 get_market_tickers 的排序规则一致：只有涨跌幅区分方向，成交量/成交额始终降序。"""
+        if rank_type == 'price_change':
+            order = self.orders[('price_change', 'down' if direction == 'down' else 'up')]
+        elif rank_type in ('volume', 'quote_volume'):
+            order = self.orders[(rank_type, 'down')]
+        else:
+            order = self.orders[('price_change', 'down')]
+        rows = self.rows
+        return [rows[index] for index in order[:max(0, int(limit))]]
+
+    def rank_symbols(self, rank_type='price_change', direction='down', limit=100):
+        return [row.symbol for row in self.rank(rank_type, direction, limit) if row.symbol]
+
+
+def build_market_ticker_index(rows, close_time):
+    """由快照行构建不可变索引；rows 为带 MarketTickers 同名属性的对象。"""
+    ticker_rows = tuple(
+        MarketTickerRow(**{
+            field_name: (
+                _float(getattr(row, field_name, None))
+                if field_name in MARKET_TICKER_FLOAT_FIELDS
+                else getattr(row, field_name, None)
+            )
+            for field_name in MARKET_TICKER_ROW_FIELDS
+        })
+        for row in rows
+    )
+    orders = {
+        ('price_change', 'down'): _sorted_indices(ticker_rows, 'price_change_percent', descending=False),
+        ('price_change', 'up'): _sorted_indices(ticker_rows, 'price_change_percent', descending=True),
+        ('volume', 'down'): _sorted_indices(ticker_rows, 'volume', descending=True),
+        ('quote_volume', 'down'): _sorted_indices(ticker_rows, 'quote_volume', descending=True),
+    }
+    orders[('volume', 'up')] = orders[('volume', 'down')]
+    orders[('quote_volume', 'up')] = orders[('quote_volume', 'down')]
+    return MarketTickerIndex(close_time=int(close_time), rows=ticker_rows, orders=orders)
+
+
+def _load_index_from_db(db, close_time):
+    columns = [getattr(MarketTickers, field_name) for field_name in MARKET_TICKER_ROW_FIELDS]
+    rows = db.query(*columns).filter(MarketTickers.close_time == close_time).all()
+    return build_market_ticker_index(rows, close_time)
+
+
+def _index_is_fresh_locked(now, handoff_version):
+    """调用方持有 MARKET_TICKER_INDEX_LOCK。"""
+    return (
+        _MARKET_TICKER_INDEX_STATE['index'] is not None
+        and now - _MARKET_TICKER_INDEX_STATE['checked_at'] < MARKET_TICKER_INDEX_RECHECK_SECONDS
+        and handoff_version == _MARKET_TICKER_INDEX_STATE['handoff_version']
+    )
+
+
+def _publish_index(index, checked_at, handoff_version):
+    with MARKET_TICKER_INDEX_LOCK:
+        _MARKET_TICKER_INDEX_STATE.update(index=index, checked_at=checked_at, handoff_version=handoff_version)
+
+
+def get_market_ticker_index(session=None, force=False):
+    """返回最新快照的排序索引；没有快照时返回 None。
+
+    内存中已有索引时，最多每 MARKET_TICKER_INDEX_RECHECK_SECONDS 秒查一次 MAX(close_time)，
+    只有快照时间变化才重新读取整份快照。数据库读取与建索引在 MARKET_TICKER_INDEX_LOCK 之外进行，
+    由 MARKET_TICKER_INDEX_RELOAD_LOCK 保证同一时间只有一个线程重建；其他线程在重建期间
+    继续使用旧索引，冷启动时等待重建完成。
+    """
+    now = time.monotonic()
+    handoff_version = get_cache_version('market_tickers')
+    with MARKET_TICKER_INDEX_LOCK:
+        index = _MARKET_TICKER_INDEX_STATE['index']
+        if not force and _index_is_fresh_locked(now, handoff_version):
+            return index
+
+    if not force and index is not None:
+        if not MARKET_TICKER_INDEX_RELOAD_LOCK.acquire(blocking=False):
+            return index
+    else:
+        MARKET_TICKER_INDEX_RELOAD_LOCK.acquire()
+    try:
+        with MARKET_TICKER_INDEX_LOCK:
+            index = _MARKET_TICKER_INDEX_STATE['index']
+            if not force and _index_is_fresh_locked(now, handoff_version):
+                return index
+
+        own_session = session is None
+        db = session or get_session()
+        try:
+            started_at = time.perf_counter()
+            close_time = db.query(func.max(MarketTickers.close_time)).scalar()
+            if close_time is None:
+                _publish_index(None, now, handoff_version)
+                return None
+            if index is None or index.close_time != int(close_time):
+                index = _load_index_from_db(db, close_time)
+                logger.info(
+                    '行情榜排序索引已更新: close_time=%s rows=%d 耗时=%.2fms',
+                    index.close_time,
+                    len(index.rows),
+                    (time.perf_counter() - started_at) * 1000,
+                )
+            _publish_index(index, now, handoff_version)
+            return index
+        finally:
+            if own_session:
+                db.close()
+    finally:
+        MARKET_TICKER_INDEX_RELOAD_LOCK.release()
+
+
+def refresh_market_ticker_index(session=None):
+    """新快照写入后立即重建索引，避免第一个请求承担加载开销；独立采集进程同时通知 Web 进程。"""
+    index = get_market_ticker_index(session=session, force=True)
+    publish_cache_version('market_tickers', index.close_time if index is not None else None)
+    return index
+
+
+def reset_market_ticker_index():
+    with MARKET_TICKER_INDEX_LOCK:
+        _MARKET_TICKER_INDEX_STATE.update(index=None, checked_at=0.0, handoff_version=None)
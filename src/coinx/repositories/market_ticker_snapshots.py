@@ -0,0 +1,323 @@
+"""行情快照的列式压缩存储。
+
+每次刷新行情榜写入一行：各字段按列打包为数组，JSON 序列化后 zlib 压缩、base64 编码存入 payload。
+market_tickers 明细表只保留最近几个快照，供排行与通知的 SQL 查询使用；
+历史由本模块解码重建，尚未迁移的旧明细行在读取历史时一并合并。
+"""
+import base64
+import json
+import time
+import zlib
+
+from coinx.database import get_session
+from coinx.models import MarketTickers, MarketTickerSnapshot
+from coinx.utils import logger
+
+
+MARKET_TICKER_SNAPSHOT_ENCODING = 'zlib-json-v1'
+MARKET_TICKER_DECIMAL_FIELDS = (
+    'price_change',
+    'price_change_percent',
+    'weighted_avg_price',
+    'last_price',
+    'last_qty',
+    'open_price',
+    'high_price',
+    'low_price',
+    'volume',
+    'quote_volume',
+)
+MARKET_TICKER_INTEGER_FIELDS = ('open_time', 'first_id', 'last_id', 'count')
+MARKET_TICKER_SNAPSHOT_FIELDS = MARKET_TICKER_DECIMAL_FIELDS + MARKET_TICKER_INTEGER_FIELDS
+MARKET_TICKER_MIGRATION_BATCH_SIZE = 50
+
+
+def _safe_float(value):
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _safe_int(value):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _record_value(record, field_name):
+    if isinstance(record, dict):
+        return record.get(field_name)
+    return getattr(record, field_name, None)
+
+
+def encode_market_ticker_snapshot(records):
+    """把一组行情记录按列打包压缩，返回 (symbol_count, payload)。"""
+    rows = [record for record in records if _record_value(record, 'symbol')]
+    columns = {'symbol': [_record_value(record, 'symbol') for record in rows]}
+    for field_name in MARKET_TICKER_DECIMAL_FIELDS:
+        columns[field_name] = [_safe_float(_record_value(record, field_name)) for record in rows]
+    for field_name in MARKET_TICKER_INTEGER_FIELDS:
+        columns[field_name] = [_safe_int(_record_value(record, field_name)) for record in rows]
+    raw = json.dumps(columns, separators=(',', ':')).encode('utf-8')
+    return len(rows), base64.b64encode(zlib.compress(raw, 6)).decode('ascii')
+
+
+def decode_market_ticker_snapshot(payload, close_time=None, encoding=MARKET_TICKER_SNAPSHOT_ENCODING):
+    """解码 payload，返回与 market_tickers 明细行同字段的字典列表。"""
+    if encoding != MARKET_TICKER_SNAPSHOT_ENCODING:
+        raise ValueError(f'unsupported market ticker snapshot encoding: {encoding}')
+    columns = json.loads(zlib.decompress(base64.b64decode(payload)).decode('utf-8'))
+    symbols = columns.get('symbol') or []
+    records = []
+    for position, symbol in enumerate(symbols):
+        record = {'symbol': symbol, 'close_time': close_time}
+        for field_name in MARKET_TICKER_SNAPSHOT_FIELDS:
+            values = columns.get(field_name) or []
+            record[field_name] = values[position] if position < len(values) else None
+        records.append(record)
+    return records
+
+
+def write_market_ticker_snapshot(db, records, close_time):
+    """在调用方事务内写入（覆盖）一个压缩快照，不提交，返回币种数量。"""
+    symbol_count, payload = encode_market_ticker_snapshot(records)
+    table = MarketTickerSnapshot.__table__
+    db.execute(table.delete().where(table.c.close_time == int(close_time)))
+    db.execute(table.insert(), [{
+        'close_time': int(close_time),
+        'symbol_count': symbol_count,
+        'encoding': MARKET_TICKER_SNAPSHOT_ENCODING,
+        'payload': payload,
+    }])
+    return symbol_count
+
+
+def save_market_ticker_snapshot(records, close_time, session=None):
+    """写入一个压缩快照并提交，返回币种数量。"""
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        symbol_count = write_market_ticker_snapshot(db, records, close_time)
+        db.commit()
+        return symbol_count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def load_market_ticker_snapshot(close_time=None, session=None):
+    """读取指定（默认最新）压缩快照，返回记录列表；没有快照时返回空列表。"""
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        query = db.query(
+            MarketTickerSnapshot.close_time,
+            MarketTickerSnapshot.encoding,
+            MarketTickerSnapshot.payload,
+        )
+        if close_time is None:
+            row = query.order_by(MarketTickerSnapshot.close_time.desc()).first()
+        else:
+            row = query.filter(MarketTickerSnapshot.close_time == int(close_time)).first()
+        if row is None:
+            return []
+        return decode_market_ticker_snapshot(row.payload, close_time=int(row.close_time), encoding=row.encoding)
+    finally:
+        if own_session:
+            db.close()
+
+
+def _row_to_record(row):
+    record = {'symbol': row.symbol, 'close_time': int(row.close_time)}
+    for field_name in MARKET_TICKER_DECIMAL_FIELDS:
+        record[field_name] = _safe_float(getattr(row, field_name))
+    for field_name in MARKET_TICKER_INTEGER_FIELDS:
+        record[field_name] = _safe_int(getattr(row, field_name))
+    return record
+
+
+def _snapshot_close_times(db, start_time=None, end_time=None):
+    query = db.query(MarketTickerSnapshot.close_time)
+    if start_time is not None:
+        query = query.filter(MarketTickerSnapshot.close_time >= int(start_time))
+    if end_time is not None:
+        query = query.filter(MarketTickerSnapshot.close_time <= int(end_time))
+    return {int(row.close_time) for row in query.all()}
+
+
+def get_market_ticker_history(symbol, start_time=None, end_time=None, session=None):
+    """重建单个币种的行情快照历史，按 close_time 升序返回记录列表。
+
+    压缩快照与尚未迁移的旧明细行合并；同一 close_time 以压缩快照为准。
+    """
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        snapshot_query = db.query(
+            MarketTickerSnapshot.close_time,
+            MarketTickerSnapshot.encoding,
+            MarketTickerSnapshot.payload,
+        )
+        if start_time is not None:
+            snapshot_query = snapshot_query.filter(MarketTickerSnapshot.close_time >= int(start_time))
+        if end_time is not None:
+            snapshot_query = snapshot_query.filter(MarketTickerSnapshot.close_time <= int(end_time))
+
+        history = {}
+        for row in snapshot_query.all():
+            for record in decode_market_ticker_snapshot(row.payload, close_time=int(row.close_time), encoding=row.encoding):
+                if record['symbol'] == symbol:
+                    history[record['close_time']] = record
+                    break
+
+        snapshot_times = _snapshot_close_times(db, start_time, end_time)
+        row_columns = [MarketTickers.symbol, MarketTickers.close_time] + [
+            getattr(MarketTickers, field_name) for field_name in MARKET_TICKER_SNAPSHOT_FIELDS
+        ]
+        row_query = db.query(*row_columns).filter(MarketTickers.symbol == symbol)
+        if start_time is not None:
+            row_query = row_query.filter(MarketTickers.close_time >= int(start_time))
+        if end_time is not None:
+            row_query = row_query.filter(MarketTickers.close_time <= int(end_time))
+        for row in row_query.all():
+            if row.close_time is None or int(row.close_time) in snapshot_times:
+                continue
+            history[int(row.close_time)] = _row_to_record(row)
+
+        return [history[close_time] for close_time in sorted(history)]
+    finally:
+        if own_session:
+            db.close()
+
+
+def prune_market_ticker_rows(keep_snapshots, session=None):
+    """删除 market_tickers 中较旧的明细行，返回删除行数。
+
+    只保留最近 keep_snapshots 个 close_time；已有压缩快照的 close_time 才会删除，未迁移的历史不受影响。
+    """
+    if keep_snapshots <= 0:
+        return 0
+
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        row_times = [
+            int(row.close_time)
+            for row in db.query(MarketTickers.close_time)
+            .filter(MarketTickers.close_time.isnot(None))
+            .distinct()
+            .order_by(MarketTickers.close_time.desc())
+            .all()
+        ]
+        candidates = row_times[keep_snapshots:]
+        if not candidates:
+            return 0
+        snapshot_times = _snapshot_close_times(db, start_time=min(candidates), end_time=max(candidates))
+        removable = [close_time for close_time in candidates if close_time in snapshot_times]
+        if not removable:
+            return 0
+
+        table = MarketTickers.__table__
+        deleted_count = db.execute(table.delete().where(table.c.close_time.in_(removable))).rowcount or 0
+        db.commit()
+        return deleted_count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def migrate_market_tickers_to_snapshots(batch_size=MARKET_TICKER_MIGRATION_BATCH_SIZE, keep_row_snapshots=None, session=None):
+    """把 market_tickers 中尚无压缩快照的历史按 close_time 打包迁移，可选随后清理明细行。
+
+    按批提交，可重复执行；返回迁移摘要。
+    """
+    own_session = session is None
+    db = session or get_session()
+    started_at = time.perf_counter()
+
+    try:
+        existing_times = _snapshot_close_times(db)
+        pending_times = [
+            int(row.close_time)
+            for row in db.query(MarketTickers.close_time)
+            .filter(MarketTickers.close_time.isnot(None))
+            .distinct()
+            .order_by(MarketTickers.close_time.asc())
+            .all()
+            if int(row.close_time) not in existing_times
+        ]
+
+        row_columns = [MarketTickers.symbol, MarketTickers.close_time] + [
+            getattr(MarketTickers, field_name) for field_name in MARKET_TICKER_SNAPSHOT_FIELDS
+        ]
+        migrated_rows = 0
+        for offset in range(0, len(pending_times), max(1, batch_size)):
+            batch_times = pending_times[offset:offset + max(1, batch_size)]
+            grouped = {close_time: [] for close_time in batch_times}
+            for row in db.query(*row_columns).filter(MarketTickers.close_time.in_(batch_times)).all():
+                grouped[int(row.close_time)].append(row)
+            for close_time, rows in grouped.items():
+                migrated_rows += write_market_ticker_snapshot(db, rows, close_time)
+            db.commit()
+            logger.info('行情快照迁移进度: %d/%d', offset + len(batch_times), len(pending_times))
+
+        pruned_rows = 0
+        if keep_row_snapshots is not None:
+            pruned_rows = prune_market_ticker_rows(keep_row_snapshots, session=db)
+
+        summary = {
+            'snapshots': len(pending_times),
+            'rows': migrated_rows,
+            'pruned_rows': pruned_rows,
+            'duration_ms': round((time.perf_counter() - started_at) * 1000, 2),
+        }
+        logger.info(
+            '行情快照迁移完成: snapshots=%d rows=%d pruned=%d 耗时=%.2fms',
+            summary['snapshots'],
+            summary['rows'],
+            summary['pruned_rows'],
+            summary['duration_ms'],
+        )
+        return summary
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+
+def delete_old_market_ticker_snapshots(days=7, session=None):
+    """删除指定天数之前的压缩快照，返回删除行数。"""
+    own_session = session is None
+    db = session or get_session()
+
+    try:
+        cutoff_time = int(time.time() * 1000) - (days * 24 * 60 * 60 * 1000)
+        table = MarketTickerSnapshot.__table__
+        deleted_count = db.execute(table.delete().where(table.c.close_time < cutoff_time)).rowcount or 0
+        db.commit()
+        return deleted_count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
+
@@ -5,10 +5,15 @@ from sqlalchemy import func, desc, asc
 from coinx.config import DB_TYPE
 from coinx.database import get_session
 from coinx.models import MarketTickers
+from coinx.repositories.market_ticker_index import get_market_ticker_index
+from coinx.repositories.market_ticker_snapshots import write_market_ticker_snapshot
 
 
 def save_market_tickers(records: List[dict], collect_time: int = None, session=None) -> int:
-    """批量保存行情快照数据"""
+    """批量保存行情快照数据
+
+    明细行与列式压缩快照在同一事务内写入；较旧明细行与过期快照由调度器的 market_ticker_retention_job 定期清理。
+    """
     if not records:
         return 0
 
@@ -22,12 +27,13 @@ def save_market_tickers(records: List[dict], collect_time: int = None, session=N
             record['close_time'] = timestamp
 
         dialect = db.bind.dialect.name
+        insert_cols = [c.name for c in MarketTickers.__table__.columns if c.name != 'id']
+        values = [{k: r.get(k) for k in insert_cols if k in r} for r in records]
         if DB_TYPE == 'starrocks' and dialect == 'mysql':
-            insert_cols = [c.name for c in MarketTickers.__table__.columns]
-            values = [{k: v for k, v in r.items() if k in insert_cols} for r in records]
             db.execute(MarketTickers.__table__.insert().values(values))
         else:
-            db.add_all([MarketTickers(**record) for record in records])
+            db.execute(MarketTickers.__table__.insert(), values)
+        write_market_ticker_snapshot(db, records, timestamp)
         db.commit()
         return len(records)
     except Exception:
@@ -45,7 +51,14 @@ def get_market_tickers(
     close_time: Optional[int] = None,
     session=None,
 ) -> List:
-    """获取行情快照数据（按指定维度排序）"""
+    """获取行情快照数据（按指定维度排序）
+
+    未指定 close_time 与 session 时读取内存排序索引，只在快照变化时访问数据库。
+    """
+    if close_time is None and session is None:
+        index = get_market_ticker_index()
+        return index.rank(rank_type, direction, limit) if index is not None else []
+
     own_session = session is None
     db = session or get_session()
 
@@ -104,6 +117,10 @@ def get_market_ticker_symbols(
     session=None,
 ) -> List[str]:
     """获取行情快照中的币种列表，只读取 symbol 列。"""
+    if close_time is None and session is None:
+        index = get_market_ticker_index()
+        return index.rank_symbols(rank_type, direction, limit) if index is not None else []
+
     own_session = session is None
     db = session or get_session()
 
@@ -137,6 +154,10 @@ def get_market_ticker_symbols(
 
 def get_latest_close_time(session=None) -> Optional[int]:
     """获取最新的快照时间"""
+    if session is None:
+        index = get_market_ticker_index()
+        return index.close_time if index is not None else None
+
     own_session = session is None
     db = session or get_session()
 
@@ -0,0 +1,185 @@
+"""通知价格放量规则使用的增量指标。
+
+每个币种在内存中保留最近 PRICE_VOLUME_WINDOW_POINTS 根 Binance 5m K 线的开收盘价与成交额，
+K 线写入（upsert_series_records）时只更新受影响的币种并重算指标：
+
+- price_change: 最新一根 K 线的涨跌幅；
+- volume_ratio: 最新成交额 / 之前 288 根的平均成交额。
+
+规则评估按币种直接读取指标；进程内尚未见过的币种（或最新 K 线落后锚点的币种）
+用一次按时间范围的简单查询补齐，不再执行窗口函数。
+"""
+import threading
+from dataclasses import dataclass
+
+from coinx.models import MarketKline
+from coinx.utils import logger
+from .series_frame import SERIES_FRAME_WINDOW_POINTS
+
+
+PRICE_VOLUME_EXCHANGE = 'binance'
+PRICE_VOLUME_PERIOD = '5m'
+# 最新一根 + 之前 288 根
+PRICE_VOLUME_WINDOW_POINTS = SERIES_FRAME_WINDOW_POINTS
+# 26 小时范围内最多约 312 根，足够覆盖 289 根的窗口
+PRICE_VOLUME_LOOKBACK_MS = 26 * 60 * 60 * 1000
+
+PRICE_VOLUME_METRICS_LOCK = threading.Lock()
+_PRICE_VOLUME_WINDOWS = {}
+
+
+@dataclass(frozen=True, slots=True)
+class PriceVolumeMetric:
+    open_time: object
+    price_change: object
+    volume_ratio: object
+    kline_count: int
+    historical_volume_count: int
+
+    def as_dict(self):
+        return {
+            'open_time': self.open_time,
+            'price_change': self.price_change,
+            'volume_ratio': self.volume_ratio,
+            'kline_count': self.kline_count,
+            'historical_volume_count': self.historical_volume_count,
+        }
+
+
+EMPTY_PRICE_VOLUME_METRIC = PriceVolumeMetric(None, None, None, 0, 0)
+
+
+class _SymbolWindow:
+    __slots__ = ('bars', 'metric', 'seeded', 'checked_anchor')
+
+    def __init__(self):
+        self.bars = {}
+        self.metric = EMPTY_PRICE_VOLUME_METRIC
+        self.seeded = False
+        self.checked_anchor = None
+
+    def latest_open_time(self):
+        return max(self.bars) if self.bars else None
+
+    def recompute(self):
+        """裁剪到最新 K 线前 26h 内最近的 289 根，并重算指标。"""
+        if not self.bars:
+            self.metric = EMPTY_PRICE_VOLUME_METRIC
+            return
+        open_times = sorted(self.bars, reverse=True)
+        cutoff_time = open_times[0] - PRICE_VOLUME_LOOKBACK_MS
+        kept = [open_time for open_time in open_times if open_time >= cutoff_time][:PRICE_VOLUME_WINDOW_POINTS]
+        self.bars = {open_time: self.bars[open_time] for open_time in kept}
+
+        latest_open, latest_close, latest_volume = self.bars[kept[0]]
+        historical_volumes = [self.bars[open_time][2] for open_time in kept[1:] if self.bars[open_time][2] is not None]
+        average_volume = sum(historical_volumes) / len(historical_volumes) if historical_volumes else None
+        price_change = None
+        if latest_open not in (None, 0) and latest_close is not None:
+            price_change = (latest_close - latest_open) / latest_open
+        volume_ratio = None
+        if latest_volume is not None and average_volume not in (None, 0):
+            volume_ratio = latest_volume / average_volume
+        self.metric = PriceVolumeMetric(
+            open_time=kept[0],
+            price_change=price_change,
+            volume_ratio=volume_ratio,
+            kline_count=len(kept),
+            historical_volume_count=len(historical_volumes),
+        )
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+def _bar(record):
+    return (_float(record.get('open_price')), _float(record.get('close_price')), _float(record.get('quote_volume')))
+
+
+def apply_kline_records(exchange, records):
+    """K 线写入后调用：合并 Binance 5m K 线并重算受影响币种的指标。"""
+    if exchange != PRICE_VOLUME_EXCHANGE or not records:
+        return 0
+
+    touched = set()
+    with PRICE_VOLUME_METRICS_LOCK:
+        for record in records:
+            symbol = record.get('symbol')
+            open_time = record.get('open_time')
+            if not symbol or open_time is None or record.get('period', PRICE_VOLUME_PERIOD) != PRICE_VOLUME_PERIOD:
+                continue
+            window = _PRICE_VOLUME_WINDOWS.get(symbol)
+            if window is None:
+                window = _PRICE_VOLUME_WINDOWS[symbol] = _SymbolWindow()
+            window.bars[int(open_time)] = _bar(record)
+            touched.add(symbol)
+        for symbol in touched:
+            _PRICE_VOLUME_WINDOWS[symbol].recompute()
+    return len(touched)
+
+
+def _seed_windows(db, symbols, anchor_time, since_time):
+    """从数据库补齐窗口；内存中已有的 K 线来自写入，比本次读取更新，优先保留。"""
+    rows = db.query(
+        MarketKline.symbol,
+        MarketKline.open_time,
+        MarketKline.open_price,
+        MarketKline.close_price,
+        MarketKline.quote_volume,
+    ).filter(
+        MarketKline.exchange == PRICE_VOLUME_EXCHANGE,
+        MarketKline.period == PRICE_VOLUME_PERIOD,
+        MarketKline.symbol.in_(symbols),
+        MarketKline.open_time >= since_time,
+    ).all()
+
+    loaded = {symbol: {} for symbol in symbols}
+    for row in rows:
+        loaded[row.symbol][int(row.open_time)] = (
+            _float(row.open_price), _float(row.close_price), _float(row.quote_volume),
+        )
+
+    with PRICE_VOLUME_METRICS_LOCK:
+        for symbol, bars in loaded.items():
+            window = _PRICE_VOLUME_WINDOWS.get(symbol)
+            if window is None:
+                window = _PRICE_VOLUME_WINDOWS[symbol] = _SymbolWindow()
+            window.bars = {**bars, **window.bars}
+            window.seeded = True
+            window.checked_anchor = anchor_time
+            window.recompute()
+
+
+def load_price_volume_metrics(db, symbols, anchor_time, since_time=None):
+    """返回 {symbol: metric dict}（按 symbol 排序），字段与窗口函数查询的结果一致。
+
+    已同步且最新 K 线不早于锚点的币种直接读内存；其余币种每个锚点最多补查一次数据库，
+    补查范围为 open_time >= since_time（默认锚点前 26 小时）。
+    """
+    if since_time is None:
+        since_time = anchor_time - PRICE_VOLUME_LOOKBACK_MS
+    target_symbols = sorted(dict.fromkeys(symbol for symbol in symbols if symbol))
+    with PRICE_VOLUME_METRICS_LOCK:
+        stale_symbols = []
+        for symbol in target_symbols:
+            window = _PRICE_VOLUME_WINDOWS.get(symbol)
+            if window is None or not window.seeded:
+                stale_symbols.append(symbol)
+            elif (window.latest_open_time() or 0) < anchor_time and window.checked_anchor != anchor_time:
+                stale_symbols.append(symbol)
+
+    if stale_symbols:
+        _seed_windows(db, stale_symbols, anchor_time, since_time)
+        logger.info('价格放量指标窗口已补齐: symbols=%d anchor=%s', len(stale_symbols), anchor_time)
+
+    with PRICE_VOLUME_METRICS_LOCK:
+        return {
+            symbol: _PRICE_VOLUME_WINDOWS[symbol].metric.as_dict()
+            for symbol in target_symbols
+        }
+
+
+def reset_price_volume_metrics():
+    with PRICE_VOLUME_METRICS_LOCK:
+        _PRICE_VOLUME_WINDOWS.clear()
@@ -6,7 +6,10 @@ from sqlalchemy import text
 
 from coinx.config import DB_TYPE
 from coinx.database import get_session
+from coinx.metrics import inc_counter, set_gauge
 from coinx.models import MarketFundingRate, MarketKline, MarketOpenInterestHist, MarketTakerBuySellVol
+from coinx.repositories.price_volume_metrics import apply_kline_records
+from coinx.repositories.series_frame import invalidate_series_frames
 from coinx.utils import logger
 
 
@@ -24,6 +27,9 @@ SERIES_KEY_FIELDS = {
     'funding_rate': ('exchange', 'symbol', 'period', 'event_time'),
 }
 
+# 写入这些序列后需要失效共享序列帧中对应的币种
+SERIES_FRAME_TYPES = ('klines', 'open_interest_hist')
+
 MYSQL_DEADLOCK_ERROR_CODE = 1213
 MYSQL_LOCK_WAIT_TIMEOUT_ERROR_CODE = 1205
 MYSQL_DEADLOCK_MAX_RETRIES = 3
@@ -257,6 +263,20 @@ def _upsert_values_on_mysql_compatible(model, exchange, series_type, values_list
             time.sleep(MYSQL_DEADLOCK_RETRY_DELAY_SECONDS * attempt)
 
 
+def _invalidate_series_frames(exchange, series_type, records):
+    if series_type in SERIES_FRAME_TYPES:
+        invalidate_series_frames(exchange, {record.get('symbol') for record in records})
+    if series_type == 'klines':
+        apply_kline_records(exchange, records)
+
+
+def _record_upsert_metrics(series_type, row_count, elapsed_seconds):
+    inc_counter('coinx_series_upsert_rows_total', row_count, series_type=series_type)
+    inc_counter('coinx_series_upsert_seconds_total', elapsed_seconds, series_type=series_type)
+    if elapsed_seconds > 0:
+        set_gauge('coinx_series_upsert_rows_per_second', row_count / elapsed_seconds, series_type=series_type)
+
+
 def upsert_series_records_in_batches(exchange, series_type, records, batch_size, session=None):
     if not records:
         return 0
@@ -265,6 +285,7 @@ def upsert_series_records_in_batches(exchange, series_type, records, batch_size,
     own_session = session is None
     db = session or get_session()
     effective_batch_size = max(1, int(batch_size or 1))
+    started_at = time.perf_counter()
 
     try:
         if series_type == 'open_interest_hist':
@@ -290,12 +311,14 @@ def upsert_series_records_in_batches(exchange, series_type, records, batch_size,
                     connection.rollback()
                     raise
 
-            return _with_write_lock(db, exchange, series_type, _write_batches)
-
-        affected = 0
-        for index in range(0, len(records), effective_batch_size):
-            batch_records = records[index:index + effective_batch_size]
-            affected += upsert_series_records(exchange, series_type, batch_records, session=db)
+            affected = _with_write_lock(db, exchange, series_type, _write_batches)
+            _invalidate_series_frames(exchange, series_type, records)
+        else:
+            affected = 0
+            for index in range(0, len(records), effective_batch_size):
+                batch_records = records[index:index + effective_batch_size]
+                affected += upsert_series_records(exchange, series_type, batch_records, session=db)
+        _record_upsert_metrics(series_type, len(records), time.perf_counter() - started_at)
         return affected
     except Exception:
         db.rollback()
@@ -336,7 +359,9 @@ def upsert_series_records(exchange, series_type, records, session=None):
                     connection.rollback()
                     raise
 
-            return _with_write_lock(db, exchange, series_type, _write_records)
+            affected = _with_write_lock(db, exchange, series_type, _write_records)
+            _invalidate_series_frames(exchange, series_type, records)
+            return affected
 
         # SQLite 等不支持 ON DUPLICATE KEY UPDATE 的方言，走 ORM 读改写
         key_fields_list = list(key_fields)
@@ -371,6 +396,7 @@ def upsert_series_records(exchange, series_type, records, session=None):
             affected += 1
 
         db.commit()
+        _invalidate_series_frames(exchange, series_type, records)
         return affected
     except Exception:
         db.rollback()
@@ -0,0 +1,376 @@
+"""按 (exchange, anchor_time) 共享的只读序列帧。
+
+首页、评分和通知在同一个 5m 锚点上读取的 OI / K 线高度重叠，
+这里每个锚点每个交易所只按币种查一次库，结果以不可变帧缓存复用：
+
+- 锚点前 SERIES_FRAME_DETAIL_POINTS 根 K 线 / OI 保留完整点位（评分窗口、首页短周期变化）；
+- 锚点前 SERIES_FRAME_WINDOW_POINTS 根 K 线只保留成交额列（24h 成交额、通知量比）；
+- 以各币种最新 OI 时间为基准的 TIME_INTERVALS 目标点（首页长周期变化）。
+
+后请求的币种不在帧内时只补查缺失的币种；K 线 / OI 写入后按交易所和币种失效。
+"""
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from sqlalchemy import and_, func, or_
+
+from coinx.cache_handoff import get_cache_version, publish_cache_version
+from coinx.config import TIME_INTERVALS
+from coinx.metrics import observe, record_cache_lookup
+from coinx.models import MarketKline, MarketOpenInterestHist
+from coinx.utils import logger
+from .time_slots import FIVE_MINUTES_MS, TimeSlotSeries, group_points_by_symbol
+
+
+# 24h 成交额与通知量比需要锚点在内的 289 根 5m K 线
+SERIES_FRAME_WINDOW_POINTS = 289
+# 评分最长的明细窗口：K 线 80 根、OI 6h
+SERIES_FRAME_DETAIL_POINTS = 80
+SERIES_FRAME_CACHE_SIZE = 8
+
+SERIES_FRAME_LOCK = threading.Lock()
+SERIES_FRAMES = OrderedDict()
+_SERIES_FRAME_LOAD_LOCKS = {}
+# 每次失效递增；加载期间发生过写入的结果只返回给调用方，不进入缓存
+_SERIES_FRAME_GENERATION = [0]
+# Web 进程最近一次应用的采集进程失效版本
+_SERIES_FRAME_HANDOFF_VERSION = [None]
+
+
+@dataclass(frozen=True, slots=True)
+class SeriesOpenInterestPoint:
+    symbol: str
+    event_time: int
+    sum_open_interest: Optional[float]
+    sum_open_interest_value: Optional[float]
+
+
+@dataclass(frozen=True, slots=True)
+class SeriesKlinePoint:
+    symbol: str
+    open_time: int
+    open_price: Optional[float]
+    high_price: Optional[float]
+    low_price: Optional[float]
+    close_price: Optional[float]
+    quote_volume: Optional[float]
+    taker_buy_quote_volume: Optional[float]
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolSeries:
+    """单个币种在帧内的数据；quote_volumes 按槽位从旧到新，缺失为 NaN，window_kline_rows 为窗口内 K 线行数。"""
+    latest_open_interest_time: Optional[int]
+    open_interest: TimeSlotSeries
+    klines: TimeSlotSeries
+    quote_volumes: array
+    window_kline_rows: int = 0
+
+
+@dataclass(frozen=True)
+class SeriesFrame:
+    exchange: str
+    anchor_time: int
+    series: Mapping[str, SymbolSeries]
+
+    @property
+    def window_start(self):
+        return self.anchor_time - (SERIES_FRAME_WINDOW_POINTS - 1) * FIVE_MINUTES_MS
+
+    def get(self, symbol):
+        return self.series.get(symbol)
+
+    def covers(self, symbols):
+        return all(symbol in self.series for symbol in symbols)
+
+    def open_interest_since(self, symbols, lower_bound):
+        return {
+            symbol: self.series[symbol].open_interest.between(lower_bound, self.anchor_time)
+            for symbol in symbols
+            if symbol in self.series
+        }
+
+    def klines_since(self, symbols, lower_bound):
+        return {
+            symbol: self.series[symbol].klines.between(lower_bound, self.anchor_time)
+            for symbol in symbols
+            if symbol in self.series
+        }
+
+    def recent_quote_volumes(self, symbol, points):
+        """返回锚点前 points 个槽位的成交额（从旧到新），缺失为 None。"""
+        symbol_series = self.series.get(symbol)
+        if symbol_series is None:
+            return []
+        values = symbol_series.quote_volumes[-max(1, int(points)):]
+        return [None if math.isnan(value) else value for value in values]
+
+    def quote_volume_sum(self, symbol, points):
+        values = [value for value in self.recent_quote_volumes(symbol, points) if value is not None]
+        return float(sum(values)) if values else None
+
+
+def _interval_to_ms(interval):
+    if interval.endswith('m'):
+        return int(interval[:-1]) * 60 * 1000
+    if interval.endswith('h'):
+        return int(interval[:-1]) * 60 * 60 * 1000
+    if interval.endswith('d'):
+        return int(interval[:-1]) * 24 * 60 * 60 * 1000
+    raise ValueError(f'不支持的时间周期: {interval}')
+
+
+def _float_or_none(value):
+    return float(value) if value is not None else None
+
+
+def _build_target_times(latest_time, window_start, anchor_time):
+    target_times = {latest_time}
+    for interval in TIME_INTERVALS:
+        target_times.add(latest_time - _interval_to_ms(interval))
+    return sorted(
+        timestamp
+        for timestamp in target_times
+        if timestamp > 0 and not window_start <= timestamp <= anchor_time
+    )
+
+
+def _load_latest_open_interest_times(session, exchange, symbols, anchor_time):
+    rows = session.query(
+        MarketOpenInterestHist.symbol,
+        func.max(MarketOpenInterestHist.event_time).label('latest_time'),
+    ).filter(
+        MarketOpenInterestHist.exchange == exchange,
+        MarketOpenInterestHist.symbol.in_(symbols),
+        MarketOpenInterestHist.period == '5m',
+        MarketOpenInterestHist.event_time <= anchor_time,
+    ).group_by(MarketOpenInterestHist.symbol).all()
+    return {row.symbol: int(row.latest_time) for row in rows if row.latest_time is not None}
+
+
+def _series_conditions(time_column, symbol_column, symbols, target_times_by_symbol, window_start, anchor_time):
+    conditions = [
+        and_(
+            symbol_column.in_(symbols),
+            time_column >= window_start,
+            time_column <= anchor_time,
+        )
+    ]
+    for symbol, target_times in target_times_by_symbol.items():
+        if target_times:
+            conditions.append(and_(symbol_column == symbol, time_column.in_(target_times)))
+    return or_(*conditions)
+
+
+def _load_symbol_series(session, exchange, symbols, anchor_time):
+    anchor_time = int(anchor_time)
+    window_start = anchor_time - (SERIES_FRAME_WINDOW_POINTS - 1) * FIVE_MINUTES_MS
+    detail_start = anchor_time - (SERIES_FRAME_DETAIL_POINTS - 1) * FIVE_MINUTES_MS
+    latest_times = _load_latest_open_interest_times(session, exchange, symbols, anchor_time)
+    target_times_by_symbol = {
+        symbol: _build_target_times(latest_time, detail_start, anchor_time)
+        for symbol, latest_time in latest_times.items()
+    }
+
+    oi_rows = session.query(
+        MarketOpenInterestHist.symbol,
+        MarketOpenInterestHist.event_time,
+        MarketOpenInterestHist.sum_open_interest,
+        MarketOpenInterestHist.sum_open_interest_value,
+    ).filter(
+        MarketOpenInterestHist.exchange == exchange,
+        MarketOpenInterestHist.period == '5m',
+        _series_conditions(
+            MarketOpenInterestHist.event_time,
+            MarketOpenInterestHist.symbol,
+            symbols,
+            target_times_by_symbol,
+            detail_start,
+            anchor_time,
+        ),
+    ).all()
+    oi_map = group_points_by_symbol(
+        (
+            SeriesOpenInterestPoint(
+                symbol=row.symbol,
+                event_time=int(row.event_time),
+                sum_open_interest=_float_or_none(row.sum_open_interest),
+                sum_open_interest_value=_float_or_none(row.sum_open_interest_value),
+            )
+            for row in oi_rows
+        ),
+        'event_time',
+        symbols,
+    )
+
+    kline_rows = session.query(
+        MarketKline.symbol,
+        MarketKline.open_time,
+        MarketKline.open_price,
+        MarketKline.high_price,
+        MarketKline.low_price,
+        MarketKline.close_price,
+        MarketKline.quote_volume,
+        MarketKline.taker_buy_quote_volume,
+    ).filter(
+        MarketKline.exchange == exchange,
+        MarketKline.period == '5m',
+        _series_conditions(
+            MarketKline.open_time,
+            MarketKline.symbol,
+            symbols,
+            target_times_by_symbol,
+            window_start,
+            anchor_time,
+        ),
+    ).all()
+
+    quote_volumes = {symbol: array('d', [math.nan]) * SERIES_FRAME_WINDOW_POINTS for symbol in symbols}
+    window_kline_rows = {}
+    detail_points = []
+    for row in kline_rows:
+        open_time = int(row.open_time)
+        if window_start <= open_time <= anchor_time and not (open_time - window_start) % FIVE_MINUTES_MS:
+            window_kline_rows[row.symbol] = window_kline_rows.get(row.symbol, 0) + 1
+            if row.quote_volume is not None:
+                quote_volumes.setdefault(row.symbol, array('d', [math.nan]) * SERIES_FRAME_WINDOW_POINTS)[
+                    (open_time - window_start) // FIVE_MINUTES_MS
+                ] = float(row.quote_volume)
+            if open_time < detail_start and open_time not in target_times_by_symbol.get(row.symbol, ()):
+                continue
+        detail_points.append(
+            SeriesKlinePoint(
+                symbol=row.symbol,
+                open_time=open_time,
+                open_price=_float_or_none(row.open_price),
+                high_price=_float_or_none(row.high_price),
+                low_price=_float_or_none(row.low_price),
+                close_price=_float_or_none(row.close_price),
+                quote_volume=_float_or_none(row.quote_volume),
+                taker_buy_quote_volume=_float_or_none(row.taker_buy_quote_volume),
+            )
+        )
+    kline_map = group_points_by_symbol(detail_points, 'open_time', symbols)
+
+    return {
+        symbol: SymbolSeries(
+            latest_open_interest_time=latest_times.get(symbol),
+            open_interest=oi_map.get(symbol) or TimeSlotSeries(),
+            klines=kline_map.get(symbol) or TimeSlotSeries(),
+            quote_volumes=quote_volumes.get(symbol) or array('d', [math.nan]) * SERIES_FRAME_WINDOW_POINTS,
+            window_kline_rows=window_kline_rows.get(symbol, 0),
+        )
+        for symbol in symbols
+    }, len(oi_rows) + len(kline_rows)
+
+
+def _frame_key(exchange, anchor_time):
+    return (exchange or '').strip().lower(), int(anchor_time)
+
+
+def _store_frame_locked(key, frame):
+    SERIES_FRAMES[key] = frame
+    SERIES_FRAMES.move_to_end(key)
+    while len(SERIES_FRAMES) > SERIES_FRAME_CACHE_SIZE:
+        evicted_key, _ = SERIES_FRAMES.popitem(last=False)
+        _SERIES_FRAME_LOAD_LOCKS.pop(evicted_key, None)
+
+
+def _apply_handoff():
+    """采集进程写入了新的 K 线 / OI 时，整体丢弃本进程的帧（无法得知具体币种）。"""
+    version = get_cache_version('series_frames')
+    if version is None:
+        return
+    with SERIES_FRAME_LOCK:
+        if _SERIES_FRAME_HANDOFF_VERSION[0] == version:
+            return
+        _SERIES_FRAME_HANDOFF_VERSION[0] = version
+        _SERIES_FRAME_GENERATION[0] += 1
+        SERIES_FRAMES.clear()
+
+
+def get_cached_series_frame(exchange, anchor_time, symbols=None):
+    """只读缓存：帧不存在或不包含全部 symbols 时返回 None，不访问数据库。"""
+    _apply_handoff()
+    key = _frame_key(exchange, anchor_time)
+    with SERIES_FRAME_LOCK:
+        frame = SERIES_FRAMES.get(key)
+        if frame is not None:
+            SERIES_FRAMES.move_to_end(key)
+    if frame is None or (symbols is not None and not frame.covers(symbols)):
+        return None
+    return frame
+
+
+def load_series_frame(session, exchange, symbols, anchor_time):
+    """返回覆盖 symbols 的序列帧，只为帧内缺失的币种查库；同一键的并发加载只执行一次。"""
+    _apply_handoff()
+    key = _frame_key(exchange, anchor_time)
+    symbols = list(dict.fromkeys(symbols or []))
+    with SERIES_FRAME_LOCK:
+        load_lock = _SERIES_FRAME_LOAD_LOCKS.setdefault(key, threading.Lock())
+
+    with load_lock:
+        with SERIES_FRAME_LOCK:
+            frame = SERIES_FRAMES.get(key)
+        missing_symbols = [symbol for symbol in symbols if frame is None or symbol not in frame.series]
+        record_cache_lookup('series_frame', not missing_symbols)
+        if not missing_symbols:
+            if frame is None:
+                frame = SeriesFrame(exchange=key[0], anchor_time=key[1], series=MappingProxyType({}))
+            return frame
+
+        started_at = time.perf_counter()
+        with SERIES_FRAME_LOCK:
+            generation = _SERIES_FRAME_GENERATION[0]
+        loaded, row_count = _load_symbol_series(session, key[0], missing_symbols, key[1])
+        merged = dict(frame.series) if frame is not None else {}
+        merged.update(loaded)
+        frame = SeriesFrame(exchange=key[0], anchor_time=key[1], series=MappingProxyType(merged))
+        with SERIES_FRAME_LOCK:
+            if generation == _SERIES_FRAME_GENERATION[0]:
+                _store_frame_locked(key, frame)
+        observe('coinx_cache_build_duration_seconds', time.perf_counter() - started_at, cache='series_frame')
+        logger.info(
+            '序列帧加载完成: exchange=%s anchor_time=%s symbols=%d rows=%d cached_symbols=%d 耗时=%.2fs',
+            key[0],
+            key[1],
+            len(missing_symbols),
+            row_count,
+            len(merged),
+            time.perf_counter() - started_at,
+        )
+        return frame
+
+
+def invalidate_series_frames(exchange=None, symbols=None):
+    """K 线 / OI 写入后失效对应交易所帧内的币种；不传 symbols 时整帧丢弃。"""
+    exchange = (exchange or '').strip().lower() or None
+    symbol_set = set(symbols) if symbols is not None else None
+    with SERIES_FRAME_LOCK:
+        _SERIES_FRAME_GENERATION[0] += 1
+        for key in list(SERIES_FRAMES):
+            if exchange is not None and key[0] != exchange:
+                continue
+            if symbol_set is None:
+                SERIES_FRAMES.pop(key, None)
+                continue
+            frame = SERIES_FRAMES[key]
+            if symbol_set.isdisjoint(frame.series):
+                continue
+            remaining = {symbol: value for symbol, value in frame.series.items() if symbol not in symbol_set}
+            SERIES_FRAMES[key] = replace(frame, series=MappingProxyType(remaining))
+    publish_cache_version('series_frames')
+
+
+def reset_series_frames():
+    with SERIES_FRAME_LOCK:
+        SERIES_FRAMES.clear()
+        _SERIES_FRAME_LOAD_LOCKS.clear()
+        _SERIES_FRAME_HANDOFF_VERSION[0] = None
@@ -0,0 +1,213 @@
+"""按 5m 时间槽稠密存储的只读时间序列。
+
+首页与评分加载器原先为每个 (symbol, exchange) 构造 `{timestamp: point}` 字典，
+这里改为以 5m 槽位为下标的列表：按时间取点只需一次减法和下标访问，
+求最新共同时间点、取回看窗口都按槽位下标遍历，不再反复构造集合和排序。
+对外仍表现为 `Mapping[int, point]`，原有按字典使用的代码无需改动。
+"""
+from collections.abc import Mapping
+
+
+FIVE_MINUTES_MS = 5 * 60 * 1000
+# 时间跨度远大于点数时（如零散的极旧数据）退化为字典存储，避免稀疏大数组
+TIME_SLOT_MAX_SPARSE_RATIO = 16
+TIME_SLOT_MIN_DENSE_SLOTS = 64
+
+
+class TimeSlotSeries(Mapping):
+    """以 step_ms 槽位为下标的只读序列，缺失槽位为 None。
+
+    不落在槽位边界上的时间点放在 _extra 字典中，保证任意输入都能按原时间取回。
+    """
+
+    __slots__ = ('step_ms', 'start_slot', '_slots', '_count', '_extra')
+
+    def __init__(self, items=(), step_ms=FIVE_MINUTES_MS):
+        self.step_ms = int(step_ms)
+        self.start_slot = None
+        self._slots = []
+        self._count = 0
+        self._extra = {}
+
+        aligned = []
+        for timestamp, point in items:
+            if point is None:
+                continue
+            timestamp = int(timestamp)
+            if timestamp % self.step_ms:
+                self._extra[timestamp] = point
+            else:
+                aligned.append((timestamp // self.step_ms, point))
+        if not aligned:
+            return
+
+        first_slot = min(slot for slot, _ in aligned)
+        span = max(slot for slot, _ in aligned) - first_slot + 1
+        if span > max(TIME_SLOT_MIN_DENSE_SLOTS, len(aligned) * TIME_SLOT_MAX_SPARSE_RATIO):
+            for slot, point in aligned:
+                self._extra[slot * self.step_ms] = point
+            return
+
+        slots = [None] * span
+        for slot, point in aligned:
+            index = slot - first_slot
+            if slots[index] is None:
+                self._count += 1
+            slots[index] = point
+        self.start_slot = first_slot
+        self._slots = slots
+
+    @classmethod
+    def from_points(cls, points, time_attr, step_ms=FIVE_MINUTES_MS):
+        return cls(((getattr(point, time_attr), point) for point in points), step_ms=step_ms)
+
+    def _index(self, timestamp):
+        if self.start_slot is None:
+            return None
+        try:
+            timestamp = int(timestamp)
+        except (TypeError, ValueError):
+            return None
+        if timestamp % self.step_ms:
+            return None
+        index = timestamp // self.step_ms - self.start_slot
+        if 0 <= index < len(self._slots):
+            return index
+        return None
+
+    def get(self, timestamp, default=None):
+        index = self._index(timestamp)
+        if index is not None:
+            point = self._slots[index]
+            return default if point is None else point
+        if self._extra:
+            return self._extra.get(timestamp, default)
+        return default
+
+    def __getitem__(self, timestamp):
+        point = self.get(timestamp)
+        if point is None:
+            raise KeyError(timestamp)
+        return point
+
+    def __contains__(self, timestamp):
+        return self.get(timestamp) is not None
+
+    def _dense_times(self):
+        if self.start_slot is None:
+            return
+        base = self.start_slot
+        step_ms = self.step_ms
+        for index, point in enumerate(self._slots):
+            if point is not None:
+                yield (base + index) * step_ms
+
+    def __iter__(self):
+        if not self._extra:
+            return self._dense_times()
+        return iter(sorted([*self._dense_times(), *self._extra]))
+
+    def __len__(self):
+        return self._count + len(self._extra)
+
+    def __repr__(self):
+        return f'TimeSlotSeries(points={len(self)}, step_ms={self.step_ms})'
+
+    def latest_time(self, upper_bound=None):
+        """返回不晚于 upper_bound 的最新时间点，没有则返回 None。"""
+        latest_extra = None
+        if self._extra:
+            candidates = [timestamp for timestamp in self._extra if upper_bound is None or timestamp <= upper_bound]
+            latest_extra = max(candidates) if candidates else None
+
+        latest_dense = None
+        if self.start_slot is not None:
+            last_index = len(self._slots) - 1
+            if upper_bound is not None:
+                last_index = min(last_index, int(upper_bound) // self.step_ms - self.start_slot)
+            for index in range(last_index, -1, -1):
+                if self._slots[index] is not None:
+                    latest_dense = (self.start_slot + index) * self.step_ms
+                    break
+
+        if latest_extra is None:
+            return latest_dense
+        if latest_dense is None:
+            return latest_extra
+        return max(latest_dense, latest_extra)
+
+    def between(self, lower_bound=None, upper_bound=None):
+        """返回 [lower_bound, upper_bound] 内的子序列。"""
+        return TimeSlotSeries(
+            (
+                (timestamp, self.get(timestamp))
+                for timestamp in self
+                if (lower_bound is None or timestamp >= lower_bound) and (upper_bound is None or timestamp <= upper_bound)
+            ),
+            step_ms=self.step_ms,
+        )
+
+    def slot_points(self, anchor_time, points):
+        """返回以 anchor_time 结尾、长度为 points 的槽位列表（从旧到新），缺失为 None。"""
+        width = max(1, int(points))
+        anchor_time = int(anchor_time)
+        if self._extra or anchor_time % self.step_ms:
+            return [self.get(anchor_time - offset * self.step_ms) for offset in range(width - 1, -1, -1)]
+
+        result = [None] * width
+        if self.start_slot is None:
+            return result
+        anchor_index = anchor_time // self.step_ms - self.start_slot
+        first_index = anchor_index - width + 1
+        source_start = max(first_index, 0)
+        source_end = min(anchor_index + 1, len(self._slots))
+        if source_start < source_end:
+            result[source_start - first_index:source_end - first_index] = self._slots[source_start:source_end]
+        return result
+
+    def window(self, anchor_time, points):
+        """返回以 anchor_time 结尾的 points 个槽位中实际存在的点（从旧到新）。"""
+        return [point for point in self.slot_points(anchor_time, points) if point is not None]
+
+
+def group_points_by_symbol(points, time_attr, symbols=(), step_ms=FIVE_MINUTES_MS):
+    """把查询出的点按 symbol 分组为 TimeSlotSeries，symbols 中没有数据的币种得到空序列。"""
+    grouped = {symbol: [] for symbol in symbols}
+    for point in points:
+        grouped.setdefault(point.symbol, []).append(point)
+    return {
+        symbol: TimeSlotSeries.from_points(symbol_points, time_attr, step_ms=step_ms)
+        for symbol, symbol_points in grouped.items()
+    }
+
+
+def latest_common_time(left, right):
+    """两个按时间索引的序列最新的共同时间点，没有则返回 None。"""
+    if not left or not right:
+        return None
+    if (
+        isinstance(left, TimeSlotSeries)
+        and isinstance(right, TimeSlotSeries)
+        and not left._extra
+        and not right._extra
+        and left.step_ms == right.step_ms
+    ):
+        start_slot = max(left.start_slot, right.start_slot)
+        slot = min(left.start_slot + len(left._slots), right.start_slot + len(right._slots)) - 1
+        while slot >= start_slot:
+            if left._slots[slot - left.start_slot] is not None and right._slots[slot - right.start_slot] is not None:
+                return slot * left.step_ms
+            slot -= 1
+        return None
+
+    common_times = set(left).intersection(right)
+    return max(common_times) if common_times else None
+
+
+def union_times(*series):
+    """多个按时间索引的序列所有时间点的并集，升序。"""
+    times = set()
+    for records_by_time in series:
+        if records_by_time:
+            times.update(records_by_time)
+    return sorted(times)
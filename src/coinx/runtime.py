@@ -2,15 +2,33 @@ import threading
 import time
 
 from coinx.coin_manager import get_active_coins
-from coinx.config import HOMEPAGE_SERIES_REPAIR_ENABLED, SCHEDULER_ENABLED
+from coinx.collector.rate_limit import REQUEST_CLASS_ROLLING, use_request_class
+from coinx import config
+from coinx.cache_handoff import PROCESS_ROLE_WEB
+from coinx.config import HOMEPAGE_SERIES_REPAIR_ENABLED, NOTIFICATIONS_ENABLED, SCHEDULER_ENABLED
+from coinx.database import get_session
+from coinx.notifications import ensure_alert_state_version
 from coinx.scheduler import scheduler, start_scheduler
 from coinx.utils import logger
+from coinx.warm_start import restore_warm_start_snapshot
 
 # 条件性导入主页序列修复函数
 if HOMEPAGE_SERIES_REPAIR_ENABLED:
     from coinx.scheduler import scheduled_repair_market_rolling
 
 
+def upgrade_database_schema():
+    """为早期部署补齐新增列；Web 与采集进程启动时各执行一次，请求处理与告警评估中不再做 DDL。"""
+    db = get_session()
+    try:
+        ensure_alert_state_version(db)
+    except Exception as e:
+        logger.error('数据库结构升级失败: %s', e)
+        logger.exception(e)
+    finally:
+        db.close()
+
+
 def log_startup_self_check():
     tracked_coins = get_active_coins()
     logger.info(
@@ -23,24 +41,41 @@ def log_startup_self_check():
     return tracked_coins
 
 
+def _run_startup_repair():
+    # 启动期补采与定时滚动修补同属 rolling 级别，排在交互请求之后、历史补齐之前
+    with use_request_class(REQUEST_CLASS_ROLLING):
+        scheduled_repair_market_rolling()
+
+
 def start_startup_repair():
     if not HOMEPAGE_SERIES_REPAIR_ENABLED:
         logger.info('主页序列修复任务已禁用，跳过启动修复')
         return None
     logger.info('启动启动期首页序列补全任务')
-    repair_thread = threading.Thread(target=scheduled_repair_market_rolling, daemon=True)
+    repair_thread = threading.Thread(target=_run_startup_repair, daemon=True)
     repair_thread.start()
     return repair_thread
 
 
+def _idle_runtime():
+    return {
+        'scheduler_thread': None,
+        'repair_thread': None,
+        'delivery_dispatcher': None,
+        'tracked_coins': [],
+    }
+
+
 def start_runtime_services(with_startup_repair=True, startup_delay_seconds=1):
+    upgrade_database_schema()
+    # 先恢复上次保存的首页、评分与支持币种缓存，Web 不必等第一轮修补完成才有数据
+    restore_warm_start_snapshot()
+    if config.PROCESS_ROLE == PROCESS_ROLE_WEB:
+        logger.info('当前为 Web 进程（PROCESS_ROLE=web），定时任务由独立采集进程 coinx-collector 运行')
+        return _idle_runtime()
     if not SCHEDULER_ENABLED:
         logger.info('调度器已禁用（SCHEDULER_ENABLED=false），跳过启动运行时服务')
-        return {
-            'scheduler_thread': None,
-            'repair_thread': None,
-            'tracked_coins': [],
-        }
+        return _idle_runtime()
     logger.info('开始启动运行时服务')
     scheduler_thread = threading.Thread(target=start_scheduler, daemon=True)
     scheduler_thread.start()
@@ -50,6 +85,12 @@ def start_runtime_services(with_startup_repair=True, startup_delay_seconds=1):
 
     tracked_coins = log_startup_self_check()
 
+    delivery_dispatcher = None
+    if NOTIFICATIONS_ENABLED:
+        from coinx.notification_delivery import start_notification_delivery
+
+        delivery_dispatcher = start_notification_delivery()
+
     repair_thread = None
     if with_startup_repair:
         repair_thread = start_startup_repair()
@@ -57,5 +98,6 @@ def start_runtime_services(with_startup_repair=True, startup_delay_seconds=1):
     return {
         'scheduler_thread': scheduler_thread,
         'repair_thread': repair_thread,
+        'delivery_dispatcher': delivery_dispatcher,
         'tracked_coins': tracked_coins,
     }
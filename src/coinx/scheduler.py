@@ -1,5 +1,7 @@
+import functools
 import threading
 import time
+from datetime import datetime, timezone
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
@@ -10,32 +12,76 @@ from .collector import (
     run_history_repair_job,
 )
 from .collector.exchange_repair import resolve_repair_worker_count
+from .collector.rate_limit import (
+    REQUEST_CLASS_FUNDING,
+    REQUEST_CLASS_HISTORY,
+    REQUEST_CLASS_INTERACTIVE,
+    REQUEST_CLASS_ROLLING,
+    exchange_budget,
+    use_request_class,
+)
+from .cache_handoff import PROCESS_ROLE_COLLECTOR, publish_cache_version
+from .cluster import get_node_id, heartbeat, is_job_leader, shard_symbols
 from .coin_manager import get_active_coins, update_coins_config
+from . import config
 from .config import (
+    CLUSTER_ENABLED,
+    CLUSTER_LEASE_SECONDS,
+    COLLECTOR_COMMAND_POLL_SECONDS,
+    CONTRACT_DETAIL_PREWARM_TOP_N,
     FETCH_COINS_ENABLED,
     FETCH_COINS_INTERVAL,
     FETCH_COINS_TOP_VOLUME_COUNT,
     FUNDING_RATE_COLLECT_ENABLED,
     ENABLED_EXCHANGES,
+    EXCHANGE_PUBLISH_LAG_SECONDS,
     HOMEPAGE_SERIES_REPAIR_ENABLED,
+    MARKET_STRUCTURE_SCORE_PERSIST_ENABLED,
+    MARKET_TICKER_RETENTION_INTERVAL,
+    MARKET_TICKER_SNAPSHOT_RETENTION_DAYS,
+    MARKET_TICKERS_KEEP_ROW_SNAPSHOTS,
     REPAIR_HISTORY_COVERAGE_HOURS,
     SCHEDULER_ENABLED,
     UPDATE_INTERVAL,
     REPAIR_HISTORY_ENABLED,
     REPAIR_HISTORY_INTERVAL,
+    REPAIR_ROLLING_ALIGN_TO_BAR_CLOSE,
     REPAIR_ROLLING_POINTS,
     REPAIR_TRACKED_INTERVAL,
 )
+from .metrics import observe
+from .shutdown import is_shutting_down
+from .repositories.collector_control import (
+    COMMAND_HOMEPAGE_REFRESH,
+    COMMAND_JOB_ACTION,
+    COMMAND_MARKET_RANK_REFRESH,
+    COMMAND_MARKET_STRUCTURE_REFRESH,
+    COMMAND_STATUS_ERROR,
+    COMMAND_STATUS_SUCCESS,
+    claim_collector_commands,
+    compact_summary,
+    finish_collector_command,
+    save_collector_job_states,
+)
+from .repositories.contract_detail_cache import start_contract_detail_prewarm_async
 from .repositories.funding_rate import collect_funding_rates
 from .repositories.homepage_series import HOMEPAGE_REQUIRED_SERIES_TYPES
+from .repositories.job_runs import record_job_run
 from .repositories.market_structure_score import get_market_structure_score_symbols
+from .repositories.market_structure_score_store import refresh_market_structure_score_snapshot
+from .repositories.market_ticker_snapshots import delete_old_market_ticker_snapshots, prune_market_ticker_rows
 from .collector.timing import format_duration_ms
 from .utils import logger
+from .warm_start import request_warm_start_save
 
 
 scheduler = BackgroundScheduler()
 JOB_METADATA_LOCK = threading.Lock()
 JOB_METADATA = {}
+# 采集进程发布给 Web 进程的任务状态；内容不变时按该间隔刷新一次在线时间
+COLLECTOR_JOB_STATE_REFRESH_MS = 30 * 1000
+JOB_STATE_PUBLISH_LOCK = threading.Lock()
+_JOB_STATE_PUBLISH = {'job_states': None, 'published_at': 0}
 
 
 def scheduled_job(*args, **kwargs):
@@ -45,6 +91,27 @@ def scheduled_job(*args, **kwargs):
     return lambda func: func
 
 
+def coordinated_job(job_id, sharded=False, request_class=REQUEST_CLASS_HISTORY):
+    """多节点部署时只让任务 leader 执行；sharded 任务在开启分片后所有节点都执行，各自处理自己的币种。
+
+    任务内发出的交易所请求按 request_class 参与预算仲裁，未标注的后台任务按最低优先级处理。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if is_shutting_down():
+                logger.info('进程正在关闭，跳过任务: job=%s', job_id)
+                return None
+            if not (sharded and config.CLUSTER_SHARDING_ENABLED) and not is_job_leader(job_id):
+                _update_job_metadata(job_id, cluster_role='follower')
+                logger.info('本节点不是任务 leader，跳过: job=%s', job_id)
+                return None
+            with use_request_class(request_class):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
 def _update_job_metadata(job_id, **fields):
     with JOB_METADATA_LOCK:
         metadata = JOB_METADATA.setdefault(job_id, {})
@@ -80,6 +147,10 @@ def _mark_job_finished(job_id, status='success', summary=None, error=None, start
         last_summary=summary,
         last_error=str(error) if error else None,
     )
+    if duration_ms is not None:
+        observe('coinx_job_duration_seconds', duration_ms / 1000, job=job_id, status=status)
+    _record_job_run(job_id, metadata)
+    request_warm_start_save()
     try:
         from .notifications import EVENT_JOB_FAILURE, evaluate_scheduled_rules
         evaluate_scheduled_rules(EVENT_JOB_FAILURE, metadata=get_all_job_runtime_metadata())
@@ -88,6 +159,22 @@ def _mark_job_finished(job_id, status='success', summary=None, error=None, start
     return metadata
 
 
+def _record_job_run(job_id, metadata):
+    try:
+        record_job_run(
+            job_id,
+            metadata.get('last_status'),
+            finished_at_ms=metadata.get('last_finished_at_ms'),
+            started_at_ms=metadata.get('last_started_at_ms'),
+            duration_ms=metadata.get('last_duration_ms'),
+            summary=metadata.get('last_summary'),
+            error=metadata.get('last_error'),
+            node_id=get_node_id() if config.CLUSTER_ENABLED else None,
+        )
+    except Exception as e:
+        logger.warning('任务运行历史写入失败: job_id=%s error=%s', job_id, e)
+
+
 def _evaluate_market_notifications(event_type):
     try:
         from .notifications import (
@@ -106,6 +193,24 @@ def _evaluate_market_notifications(event_type):
     return None
 
 
+def _persist_market_structure_scores(symbols=None):
+    if not MARKET_STRUCTURE_SCORE_PERSIST_ENABLED:
+        return None
+    try:
+        return refresh_market_structure_score_snapshot(symbols=symbols)
+    except Exception as e:
+        logger.error('合约市场结构评分快照保存失败: %s', e)
+        logger.exception(e)
+        return {'status': 'error', 'message': str(e)}
+
+
+def _start_contract_detail_prewarm():
+    # 预热只对处理详情请求的进程有意义：采集进程发布 market_series 版本后由 Web 进程自行预热
+    if config.PROCESS_ROLE == PROCESS_ROLE_COLLECTOR:
+        return False
+    return start_contract_detail_prewarm_async(CONTRACT_DETAIL_PREWARM_TOP_N)
+
+
 def get_job_runtime_metadata(job_id):
     with JOB_METADATA_LOCK:
         return dict(JOB_METADATA.get(job_id) or {})
@@ -116,6 +221,114 @@ def get_all_job_runtime_metadata():
         return {job_id: dict(metadata) for job_id, metadata in JOB_METADATA.items()}
 
 
+def _job_state(job, runtime):
+    next_run_time = getattr(job, 'next_run_time', None)
+    return {
+        'name': job.name,
+        'trigger': str(job.trigger),
+        'executor': getattr(job, 'executor', None),
+        'max_instances': getattr(job, 'max_instances', None),
+        'coalesce': getattr(job, 'coalesce', None),
+        'misfire_grace_time': getattr(job, 'misfire_grace_time', None),
+        'next_run_time_ms': int(next_run_time.timestamp() * 1000) if next_run_time else None,
+        'paused': bool(scheduler.running) and next_run_time is None,
+        'runtime': compact_summary(runtime or {}),
+    }
+
+
+def publish_job_states(force=False):
+    """采集进程把任务状态写入 collector_job_states，供 Web 进程的任务管理页读取；非采集进程直接返回 False。"""
+    if config.PROCESS_ROLE != PROCESS_ROLE_COLLECTOR:
+        return False
+    runtime_by_id = get_all_job_runtime_metadata()
+    job_states = {job.id: _job_state(job, runtime_by_id.get(job.id)) for job in scheduler.get_jobs()}
+    collector_state = {
+        'scheduler_running': bool(scheduler.running),
+        'exchange_budget': exchange_budget.queue_depths(),
+    }
+    now_ms = int(time.time() * 1000)
+    with JOB_STATE_PUBLISH_LOCK:
+        if (
+            not force
+            and job_states == _JOB_STATE_PUBLISH['job_states']
+            and now_ms - _JOB_STATE_PUBLISH['published_at'] < COLLECTOR_JOB_STATE_REFRESH_MS
+        ):
+            return False
+        try:
+            save_collector_job_states(job_states, collector_state, node_id=get_node_id(), now_ms=now_ms)
+        except Exception as e:
+            logger.warning('任务状态发布失败: %s', e)
+            return False
+        _JOB_STATE_PUBLISH.update(job_states=job_states, published_at=now_ms)
+    return True
+
+
+def _apply_job_action(job_id, action):
+    job = scheduler.get_job(job_id)
+    if job is None:
+        raise LookupError(f'job not found: {job_id}')
+    if action == 'run':
+        scheduler.modify_job(job_id, next_run_time=datetime.now())
+        scheduler.wakeup()
+    elif action == 'pause':
+        job.pause()
+    elif action == 'resume':
+        job.resume()
+    else:
+        raise ValueError(f'unsupported action: {action}')
+    return {'status': 'success', 'job_id': job_id, 'action': action}
+
+
+def _execute_collector_command(command, payload):
+    payload = payload or {}
+    if command == COMMAND_HOMEPAGE_REFRESH:
+        summary = repair_rolling_tracked_symbols(
+            symbols=payload.get('symbols') or [],
+            series_types=payload.get('series_types') or list(HOMEPAGE_REQUIRED_SERIES_TYPES),
+            points=2 if payload.get('latest_only') else REPAIR_ROLLING_POINTS,
+            max_workers=resolve_repair_worker_count(ENABLED_EXCHANGES),
+        )
+        publish_cache_version('market_series')
+        return summary
+    if command == COMMAND_MARKET_STRUCTURE_REFRESH:
+        summary = repair_rolling_tracked_symbols(
+            symbols=payload.get('symbols') or [],
+            series_types=payload.get('series_types'),
+            exchanges=payload.get('exchanges') or list(ENABLED_EXCHANGES),
+        )
+        publish_cache_version('market_series')
+        return summary
+    if command == COMMAND_MARKET_RANK_REFRESH:
+        return refresh_market_tickers()
+    if command == COMMAND_JOB_ACTION:
+        return _apply_job_action(payload.get('job_id'), payload.get('action'))
+    raise ValueError(f'unsupported collector command: {command}')
+
+
+def run_collector_commands():
+    """领取并依次执行 Web 进程提交的指令，回写结果后发布最新任务状态。"""
+    try:
+        commands = claim_collector_commands(get_node_id())
+    except Exception as e:
+        logger.warning('领取 Web 进程指令失败: %s', e)
+        commands = []
+    for command in commands:
+        logger.info('开始执行 Web 进程指令: id=%s command=%s', command['id'], command['command'])
+        status, result, error = COMMAND_STATUS_SUCCESS, None, None
+        try:
+            result = _execute_collector_command(command['command'], command['payload'])
+        except Exception as e:
+            status, error = COMMAND_STATUS_ERROR, e
+            logger.error('Web 进程指令执行失败: id=%s command=%s error=%s', command['id'], command['command'], e)
+            logger.exception(e)
+        try:
+            finish_collector_command(command['id'], status, result=result, error=error)
+        except Exception as e:
+            logger.warning('Web 进程指令结果回写失败: id=%s error=%s', command['id'], e)
+    publish_job_states(force=bool(commands))
+    return len(commands)
+
+
 def _merge_repair_summaries(stage_summaries):
     summaries = [summary for summary in stage_summaries if summary]
     status = 'success'
@@ -142,6 +355,7 @@ def _merge_repair_summaries(stage_summaries):
     max_instances=1,
     coalesce=True
 )
+@coordinated_job('market_rank_refresh_job', request_class=REQUEST_CLASS_ROLLING)
 def scheduled_market_rank_refresh():
     """定时刷新行情榜快照数据"""
     started_at = time.perf_counter()
@@ -168,14 +382,90 @@ def scheduled_market_rank_refresh():
         logger.exception(e)
 
 
+def run_market_ticker_retention(session=None):
+    """清理已有压缩快照的较旧明细行，并删除超过保留天数的压缩快照。"""
+    started_at = time.perf_counter()
+    pruned_rows = prune_market_ticker_rows(MARKET_TICKERS_KEEP_ROW_SNAPSHOTS, session=session)
+    deleted_snapshots = 0
+    if MARKET_TICKER_SNAPSHOT_RETENTION_DAYS > 0:
+        deleted_snapshots = delete_old_market_ticker_snapshots(days=MARKET_TICKER_SNAPSHOT_RETENTION_DAYS, session=session)
+    return {
+        'status': 'success',
+        'pruned_rows': pruned_rows,
+        'deleted_snapshots': deleted_snapshots,
+        'duration_ms': round((time.perf_counter() - started_at) * 1000, 2),
+    }
+
+
+@scheduled_job(
+    'interval',
+    seconds=max(60, MARKET_TICKER_RETENTION_INTERVAL),
+    id='market_ticker_retention_job',
+    max_instances=1,
+    coalesce=True
+)
+@coordinated_job('market_ticker_retention_job', request_class=REQUEST_CLASS_HISTORY)
+def scheduled_market_ticker_retention():
+    """定期清理行情明细行与过期压缩快照，不占用每次行情保存的耗时"""
+    started_at = time.perf_counter()
+    _mark_job_started('market_ticker_retention_job')
+    try:
+        summary = run_market_ticker_retention()
+        _mark_job_finished('market_ticker_retention_job', status='success', summary=summary, started_at=started_at)
+        logger.info(
+            '行情快照清理完成: 明细行=%d 过期快照=%d 耗时=%.2fms',
+            summary['pruned_rows'],
+            summary['deleted_snapshots'],
+            summary['duration_ms'],
+        )
+    except Exception as e:
+        _mark_job_finished('market_ticker_retention_job', status='error', error=e, started_at=started_at)
+        logger.error('行情快照清理任务失败: %s', e)
+        logger.exception(e)
+
+
+ROLLING_REPAIR_BAR_SECONDS = 300
+
+
+def _aligned_rolling_repair_interval(interval):
+    """对齐收盘时间隔须整除 300 秒或为其整数倍，否则触发点会逐渐偏离收盘；不满足时取最接近的 300 整数倍。"""
+    interval = int(interval)
+    if interval > 0 and (
+        ROLLING_REPAIR_BAR_SECONDS % interval == 0 or interval % ROLLING_REPAIR_BAR_SECONDS == 0
+    ):
+        return interval
+    aligned = max(1, round(interval / ROLLING_REPAIR_BAR_SECONDS)) * ROLLING_REPAIR_BAR_SECONDS
+    logger.warning(
+        'REPAIR_TRACKED_INTERVAL=%s 无法对齐 5m K 线收盘，滚动修补改用 %d 秒间隔',
+        interval,
+        aligned,
+    )
+    return aligned
+
+
+def _rolling_repair_trigger_args():
+    """对齐收盘时，间隔起点取 Unix 纪元 + 最小发布延迟，每次触发都落在 K 线收盘之后。"""
+    if not REPAIR_ROLLING_ALIGN_TO_BAR_CLOSE:
+        return {'seconds': REPAIR_TRACKED_INTERVAL}
+    lead_seconds = min(
+        (max(0, EXCHANGE_PUBLISH_LAG_SECONDS.get(exchange, 0)) for exchange in ENABLED_EXCHANGES),
+        default=0,
+    )
+    return {
+        'seconds': _aligned_rolling_repair_interval(REPAIR_TRACKED_INTERVAL),
+        'start_date': datetime.fromtimestamp(lead_seconds, tz=timezone.utc),
+    }
+
+
 if HOMEPAGE_SERIES_REPAIR_ENABLED:
     @scheduled_job(
         'interval',
-        seconds=REPAIR_TRACKED_INTERVAL,
         id='repair_market_rolling_job',
         max_instances=1,
-        coalesce=True
+        coalesce=True,
+        **_rolling_repair_trigger_args()
     )
+    @coordinated_job('repair_market_rolling_job', sharded=True, request_class=REQUEST_CLASS_ROLLING)
     def scheduled_repair_market_rolling():
         """轻量滚动修补市场币种所需的多交易所最新序列"""
         started_at = time.perf_counter()
@@ -185,6 +475,9 @@ if HOMEPAGE_SERIES_REPAIR_ENABLED:
             score_symbols = get_market_structure_score_symbols()
             tracked_symbol_set = set(tracked_symbols)
             top_symbols = [symbol for symbol in score_symbols if symbol not in tracked_symbol_set]
+            # 先在完整列表上去重再分片，同一币种在所有节点上归属一致
+            tracked_symbols = shard_symbols(tracked_symbols)
+            top_symbols = shard_symbols(top_symbols)
             worker_count = resolve_repair_worker_count(ENABLED_EXCHANGES)
             if not tracked_symbols and not top_symbols:
                 _mark_job_finished(
@@ -208,6 +501,7 @@ if HOMEPAGE_SERIES_REPAIR_ENABLED:
                     series_types=list(HOMEPAGE_REQUIRED_SERIES_TYPES),
                     points=REPAIR_ROLLING_POINTS,
                     max_workers=worker_count,
+                    align_to_bar_close=REPAIR_ROLLING_ALIGN_TO_BAR_CLOSE,
                 )
             else:
                 tracked_summary = {'status': 'success', 'message': 'no tracked symbols', 'symbols': []}
@@ -233,6 +527,7 @@ if HOMEPAGE_SERIES_REPAIR_ENABLED:
                     series_types=list(HOMEPAGE_REQUIRED_SERIES_TYPES),
                     points=REPAIR_ROLLING_POINTS,
                     max_workers=worker_count,
+                    align_to_bar_close=REPAIR_ROLLING_ALIGN_TO_BAR_CLOSE,
                 )
             else:
                 top_summary = {'status': 'success', 'message': 'no top symbols', 'symbols': []}
@@ -246,8 +541,19 @@ if HOMEPAGE_SERIES_REPAIR_ENABLED:
                 format_duration_ms(top_summary.get('duration_ms', 0.0)),
             )
             summary = _merge_repair_summaries([tracked_summary, top_summary])
+            # 分片运行时评分快照与通知覆盖全部币种，只由 leader 执行一次
+            is_leader = is_job_leader('repair_market_rolling_job')
+            if is_leader:
+                score_summary = _persist_market_structure_scores(symbols=score_symbols)
+                if score_summary is not None:
+                    summary['score_snapshot'] = score_summary
+            # Web 进程据此清空首页与合约详情缓存
+            publish_cache_version('market_series')
             _mark_job_finished('repair_market_rolling_job', status=summary.get('status') or 'success', summary=summary, started_at=started_at)
-            _evaluate_market_notifications('price_volume')
+            if is_leader:
+                _evaluate_market_notifications('price_volume')
+            # 任务结束、通知评估之后再在后台预热，不拖慢任务耗时与价格异动通知
+            _start_contract_detail_prewarm()
             precheck_complete = summary.get('precheck_skipped_count', 0)
             task_total = (
                 (summary.get('success_count', 0) or 0)
@@ -279,6 +585,7 @@ if REPAIR_HISTORY_ENABLED:
         max_instances=1,
         coalesce=True
     )
+    @coordinated_job('repair_market_history_job', sharded=True, request_class=REQUEST_CLASS_HISTORY)
     def scheduled_repair_market_history():
         """Low-frequency historical gap repair."""
         started_at = time.perf_counter()
@@ -302,6 +609,8 @@ if REPAIR_HISTORY_ENABLED:
                     top_symbols = [symbol for symbol in top_volume_symbols if symbol not in tracked_symbol_set]
                 else:
                     logger.warning('低频历史补齐获取成交额排行失败，仅修补跟踪币种')
+            tracked_symbols = shard_symbols(tracked_symbols)
+            top_symbols = shard_symbols(top_symbols)
             logger.info(
                 '历史修补阶段 1/2: 开始修补跟踪币种全类型: symbols=%d series_types=%s coverage_hours=%s max_workers=%s',
                 len(tracked_symbols),
@@ -351,6 +660,7 @@ if REPAIR_HISTORY_ENABLED:
                 format_duration_ms(top_summary.get('duration_ms', 0.0)),
             )
             summary = _merge_repair_summaries([tracked_summary, top_summary])
+            publish_cache_version('market_series')
             _mark_job_finished('repair_market_history_job', status=summary.get('status') or 'success', summary=summary, started_at=started_at)
             logger.info(
                 '低频历史补齐任务完成: status=%s symbols=%d success=%d failure=%d skipped=%d duration=%s',
@@ -375,8 +685,9 @@ if FUNDING_RATE_COLLECT_ENABLED:
         max_instances=1,
         coalesce=True
     )
+    @coordinated_job('collect_funding_rates_job', request_class=REQUEST_CLASS_FUNDING)
     def scheduled_collect_funding_rates():
-        """定时采集资金费率快照（全量 Binance USDT 永续）"""
+        """定时采集资金费率快照（全量 Binance USDT 永续），并刷新各交易所最新资金费率缓存"""
         started_at = time.perf_counter()
         _mark_job_started('collect_funding_rates_job')
         try:
@@ -395,6 +706,7 @@ if FUNDING_RATE_COLLECT_ENABLED:
 
 
 @scheduled_job('cron', hour=0, minute=0, id='update_coins_config_job')
+@coordinated_job('update_coins_config_job', request_class=REQUEST_CLASS_HISTORY)
 def scheduled_coins_config_update():
     """Refresh tracked coin configuration once per day."""
     started_at = time.perf_counter()
@@ -415,6 +727,40 @@ def scheduled_coins_config_update():
         logger.exception(e)
 
 
+if CLUSTER_ENABLED:
+    @scheduled_job(
+        'interval',
+        seconds=max(5, CLUSTER_LEASE_SECONDS // 3),
+        id='cluster_heartbeat_job',
+        max_instances=1,
+        coalesce=True
+    )
+    def scheduled_cluster_heartbeat():
+        """续期采集节点租约，保证长间隔任务之间本节点仍参与分片"""
+        try:
+            heartbeat(force=True)
+        except Exception as e:
+            logger.warning('采集节点心跳失败: %s', e)
+
+
+if config.PROCESS_ROLE == PROCESS_ROLE_COLLECTOR:
+    @scheduled_job(
+        'interval',
+        seconds=max(1, COLLECTOR_COMMAND_POLL_SECONDS),
+        id='collector_command_job',
+        max_instances=1,
+        coalesce=True
+    )
+    @coordinated_job('collector_command_job', request_class=REQUEST_CLASS_INTERACTIVE)
+    def scheduled_collector_commands():
+        """执行 Web 进程提交的手动补齐、刷新与任务控制指令（由用户触发，按交互请求参与预算仲裁）"""
+        try:
+            run_collector_commands()
+        except Exception as e:
+            logger.error('Web 进程指令处理失败: %s', e)
+            logger.exception(e)
+
+
 def start_scheduler():
     """Start the background scheduler."""
     if not SCHEDULER_ENABLED:
@@ -424,6 +770,7 @@ def start_scheduler():
     try:
         scheduler.start()
         logger.info('调度器启动成功')
+        publish_job_states(force=True)
     except Exception as e:
         logger.error('调度器启动失败: %s', e)
         logger.exception(e)
@@ -0,0 +1,156 @@
+"""进程退出前的有序关闭。
+
+收到 SIGTERM/SIGINT 后按顺序执行，总耗时不超过 SHUTDOWN_TIMEOUT_SECONDS：
+1. 置位 SHUTDOWN_EVENT 并关闭调度器，不再触发新任务；修补任务看到该标记后不再开始新的
+   币种任务，分页拉取在当前页之后停止，已拉到的数据照常批量写库；
+2. 等待正在运行的定时任务与手动刷新结束（即写库完成），超过截止时间则放弃等待；
+3. 停止通知投递线程，释放集群任务锁并删除心跳；
+4. 保存启动预热快照（含低频历史修补的币种游标），关闭数据库连接池。
+
+每一步只使用剩余的时间预算，某一步失败只记录告警，不影响后续步骤。
+"""
+import sys
+import threading
+import time
+
+from coinx import config
+from coinx.utils import logger
+
+
+SHUTDOWN_EVENT = threading.Event()
+SHUTDOWN_LOCK = threading.Lock()
+SHUTDOWN_POLL_SECONDS = 0.2
+_SHUTDOWN_STATE = {'summary': None}
+
+
+def is_shutting_down():
+    return SHUTDOWN_EVENT.is_set()
+
+
+def _running_work():
+    """返回仍在运行、可能正在写库的任务名。"""
+    running = []
+    scheduler_module = sys.modules.get('coinx.scheduler')
+    if scheduler_module is not None:
+        running.extend(
+            job_id
+            for job_id, metadata in scheduler_module.get_all_job_runtime_metadata().items()
+            if metadata.get('running')
+        )
+    api_data = sys.modules.get('coinx.web.routes.api_data')
+    if api_data is not None:
+        if api_data.HOME_PAGE_REFRESH_LOCK.locked():
+            running.append('homepage_refresh')
+        if api_data.MARKET_STRUCTURE_REFRESH_LOCK.locked():
+            running.append('market_structure_refresh')
+    return sorted(running)
+
+
+def _stop_scheduler(remaining):
+    scheduler_module = sys.modules.get('coinx.scheduler')
+    if scheduler_module is not None and scheduler_module.scheduler.running:
+        # wait=False：只停止触发新任务，正在运行的任务在下一步等待
+        scheduler_module.scheduler.shutdown(wait=False)
+
+
+def _drain_running_jobs(remaining):
+    deadline = time.monotonic() + remaining()
+    running = _running_work()
+    if running:
+        logger.info('等待运行中的任务结束: jobs=%s', ','.join(running))
+    while running and time.monotonic() < deadline:
+        time.sleep(SHUTDOWN_POLL_SECONDS)
+        running = _running_work()
+    if running:
+        logger.warning('关闭截止时间已到，仍有任务未结束: jobs=%s', ','.join(running))
+    return running
+
+
+def _stop_notifications(remaining):
+    if 'coinx.notification_delivery' not in sys.modules:
+        return
+    from coinx.notification_delivery import stop_notification_delivery
+
+    stop_notification_delivery(timeout=remaining())
+
+
+def _leave_cluster(remaining):
+    if not config.CLUSTER_ENABLED:
+        return
+    from coinx.cluster import leave_cluster
+
+    leave_cluster()
+
+
+def _save_warm_start(remaining):
+    from coinx.warm_start import save_warm_start_snapshot
+
+    return save_warm_start_snapshot()
+
+
+def _dispose_engine(remaining):
+    from coinx.database import get_engine, is_engine_created
+
+    if is_engine_created():
+        get_engine().dispose()
+
+
+SHUTDOWN_STEPS = (
+    ('stop_scheduler', _stop_scheduler),
+    ('drain_jobs', _drain_running_jobs),
+    ('stop_notifications', _stop_notifications),
+    ('leave_cluster', _leave_cluster),
+    ('save_warm_start', _save_warm_start),
+    ('dispose_engine', _dispose_engine),
+)
+
+
+def graceful_shutdown(timeout_seconds=None):
+    """执行一次有序关闭并返回各步骤耗时与结果；重复调用直接返回第一次的结果。"""
+    with SHUTDOWN_LOCK:
+        if _SHUTDOWN_STATE['summary'] is not None:
+            return _SHUTDOWN_STATE['summary']
+        SHUTDOWN_EVENT.set()
+        timeout = config.SHUTDOWN_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+        started_at = time.monotonic()
+        deadline = started_at + max(0.0, float(timeout))
+
+        def remaining():
+            return max(0.0, deadline - time.monotonic())
+
+        logger.info('开始有序关闭: 截止=%.1fs', float(timeout))
+        steps = {}
+        for name, step in SHUTDOWN_STEPS:
+            step_started_at = time.monotonic()
+            try:
+                result = step(remaining)
+                status = 'success'
+            except Exception as exc:
+                result = None
+                status = 'error'
+                logger.warning('有序关闭步骤失败: step=%s error=%s', name, exc)
+            steps[name] = {
+                'status': status,
+                'duration_ms': round((time.monotonic() - step_started_at) * 1000, 2),
+            }
+            if result:
+                steps[name]['result'] = result
+        summary = {
+            'duration_ms': round((time.monotonic() - started_at) * 1000, 2),
+            'unfinished_jobs': steps['drain_jobs'].get('result') or [],
+            'steps': steps,
+        }
+        _SHUTDOWN_STATE['summary'] = summary
+    logger.info(
+        '有序关闭完成: 耗时=%.0fms 未结束任务=%s 步骤=%s',
+        summary['duration_ms'],
+        ','.join(summary['unfinished_jobs']) or '无',
+        ','.join(f"{name}:{item['status']}" for name, item in steps.items()),
+    )
+    return summary
+
+
+def reset_shutdown_state():
+    with SHUTDOWN_LOCK:
+        SHUTDOWN_EVENT.clear()
+        _SHUTDOWN_STATE['summary'] = None
@@ -0,0 +1,285 @@
+"""启动预热快照：重启后先用上次的首页、评分与交易所支持币种缓存提供服务。
+
+运行中每隔 WARM_START_SAVE_INTERVAL_SECONDS 把这些内存缓存写入本地文件 WARM_START_FILE
+（写临时文件后原子替换），进程启动时在运行时服务启动前读回。首页与评分快照只在
+WARM_START_MAX_AGE_SECONDS 内有效，命中后由后台重建真正的缓存；支持币种缓存保留原
+加载时间，过了交易所模块自己的 TTL 就不再恢复；低频历史修补的币种游标不受有效期限制。
+
+每个分段由当前进程能导出的模块负责：Web 进程导出首页与评分，采集进程导出支持币种；
+写文件时保留文件中本进程未导出的分段，Web 与采集进程分开部署时可以共用同一个文件；
+读取、合并与替换在同目录的 .lock 文件上持有 fcntl 排他锁，避免两个进程互相覆盖对方的分段
+（Windows 没有 fcntl，只支持单进程部署，不加跨进程锁）。
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from coinx import config
+from coinx.utils import logger
+
+
+WARM_START_FORMAT_VERSION = 1
+SECTION_DASHBOARD = 'dashboard'
+SECTION_SYMBOL_SUPPORT = 'symbol_support'
+SECTION_HISTORY_CURSOR = 'history_cursor'
+
+DASHBOARD_MODULE = 'coinx.web.routes.api_data'
+SYMBOL_SUPPORT_MODULES = (
+    ('okx', 'coinx.collector.okx.series'),
+    ('bybit', 'coinx.collector.bybit.series'),
+    ('gate', 'coinx.collector.gate.series'),
+)
+SYMBOL_SUPPORT_EXTRA_FIELDS = ('contract_values', 'quanto_multipliers')
+HISTORY_CURSOR_MODULE = 'coinx.collector.exchange_repair'
+
+WARM_START_LOCK = threading.Lock()
+_WARM_START_STATE = {'saved_at': 0.0, 'saving': False}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _loaded_module(name):
+    # 只处理当前进程已经加载的模块，采集进程不会为了导出首页快照去加载 Web 路由
+    return sys.modules.get(name)
+
+
+def _dump_dashboard():
+    api_data = _loaded_module(DASHBOARD_MODULE)
+    if api_data is None:
+        return None
+    return api_data.export_warm_start_payloads() or None
+
+
+def _restore_dashboard(data, saved_at_ms):
+    api_data = _loaded_module(DASHBOARD_MODULE)
+    if api_data is None:
+        return 0
+    return api_data.restore_warm_start_payloads(data, saved_at_ms)
+
+
+def _dump_symbol_support():
+    caches = {}
+    for exchange, module_name in SYMBOL_SUPPORT_MODULES:
+        module = _loaded_module(module_name)
+        cache = getattr(module, '_supported_symbols_cache', None) if module else None
+        if not cache or cache.get('symbols') is None:
+            continue
+        item = {'loaded_at': cache.get('loaded_at') or 0, 'symbols': sorted(cache['symbols'])}
+        for field in SYMBOL_SUPPORT_EXTRA_FIELDS:
+            if field in cache:
+                item[field] = dict(cache[field] or {})
+        caches[exchange] = item
+    return caches or None
+
+
+def _restore_symbol_support(data, saved_at_ms):
+    restored = 0
+    now = time.time()
+    for exchange, module_name in SYMBOL_SUPPORT_MODULES:
+        item = (data or {}).get(exchange)
+        module = _loaded_module(module_name)
+        if not item or module is None:
+            continue
+        cache = module._supported_symbols_cache
+        loaded_at = float(item.get('loaded_at') or 0)
+        if cache.get('symbols') is not None or now - loaded_at >= module._SUPPORTED_SYMBOLS_TTL_SECONDS:
+            continue
+        cache['symbols'] = set(item.get('symbols') or [])
+        for field in SYMBOL_SUPPORT_EXTRA_FIELDS:
+            if field in item:
+                cache[field] = dict(item[field])
+        cache['loaded_at'] = loaded_at
+        restored += 1
+    return restored
+
+
+def _dump_history_cursor():
+    exchange_repair = _loaded_module(HISTORY_CURSOR_MODULE)
+    if exchange_repair is None:
+        return None
+    cursor = exchange_repair.get_history_cursor()
+    if not cursor.get('index') and cursor.get('next_symbol') is None:
+        return None
+    return cursor
+
+
+def _restore_history_cursor(data, saved_at_ms):
+    exchange_repair = _loaded_module(HISTORY_CURSOR_MODULE)
+    if exchange_repair is None or not data:
+        return 0
+    exchange_repair.restore_history_cursor(data.get('index') or 0, data.get('next_symbol'))
+    return 1
+
+
+# (分段名, 导出函数, 恢复函数, 是否受 WARM_START_MAX_AGE_SECONDS 限制)
+WARM_START_SECTIONS = (
+    (SECTION_DASHBOARD, _dump_dashboard, _restore_dashboard, True),
+    (SECTION_SYMBOL_SUPPORT, _dump_symbol_support, _restore_symbol_support, True),
+    (SECTION_HISTORY_CURSOR, _dump_history_cursor, _restore_history_cursor, False),
+)
+
+
+def _snapshot_path():
+    return config.WARM_START_FILE
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, encoding='utf-8') as fh:
+            snapshot = json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning('启动预热快照读取失败: path=%s error=%s', path, exc)
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != WARM_START_FORMAT_VERSION:
+        return None
+    return snapshot
+
+
+def _write_snapshot(path, snapshot):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.warm_start.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(snapshot, fh, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def _snapshot_file_lock(path):
+    """在 <path>.lock 上持有跨进程排他锁，覆盖读取-合并-替换的全过程。"""
+    if fcntl is None:
+        yield
+        return
+    lock_path = f'{path}.lock'
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def save_warm_start_snapshot(path=None):
+    """把当前进程能导出的缓存写入快照文件，返回写入的分段名；未开启时返回空列表。"""
+    if not config.WARM_START_ENABLED:
+        return []
+    path = path or _snapshot_path()
+    saved_at_ms = _now_ms()
+    # 先在锁外导出，持锁期间只做文件读写
+    exported = {}
+    for name, dump, _, _ in WARM_START_SECTIONS:
+        try:
+            data = dump()
+        except Exception as exc:
+            logger.warning('启动预热快照导出失败: section=%s error=%s', name, exc)
+            continue
+        if data is None:
+            continue
+        exported[name] = {'saved_at': saved_at_ms, 'data': data}
+    if not exported:
+        return []
+    written = list(exported)
+    with _snapshot_file_lock(path):
+        existing = _read_snapshot(path) or {}
+        sections = {**(existing.get('sections') or {}), **exported}
+        _write_snapshot(path, {'version': WARM_START_FORMAT_VERSION, 'pid': os.getpid(), 'sections': sections})
+    with WARM_START_LOCK:
+        _WARM_START_STATE['saved_at'] = time.time()
+    logger.info('启动预热快照已保存: path=%s sections=%s', path, ','.join(written))
+    return written
+
+
+def restore_warm_start_snapshot(path=None):
+    """读取快照文件并恢复各分段，返回 {分段名: 恢复条数}；文件不存在或已过期的分段跳过。"""
+    if not config.WARM_START_ENABLED:
+        return {}
+    path = path or _snapshot_path()
+    started_at = time.perf_counter()
+    snapshot = _read_snapshot(path)
+    if snapshot is None:
+        return {}
+    max_age_ms = max(0, int(config.WARM_START_MAX_AGE_SECONDS)) * 1000
+    now_ms = _now_ms()
+    sections = snapshot.get('sections') or {}
+    restored = {}
+    for name, _, restore, expires in WARM_START_SECTIONS:
+        section = sections.get(name)
+        if not isinstance(section, dict):
+            continue
+        saved_at_ms = int(section.get('saved_at') or 0)
+        if expires and now_ms - saved_at_ms > max_age_ms:
+            logger.info('启动预热快照分段已过期，跳过: section=%s age=%ds', name, (now_ms - saved_at_ms) // 1000)
+            continue
+        try:
+            count = restore(section.get('data'), saved_at_ms)
+        except Exception as exc:
+            logger.warning('启动预热快照恢复失败: section=%s error=%s', name, exc)
+            continue
+        if count:
+            restored[name] = count
+    with WARM_START_LOCK:
+        # 刚恢复的内容与文件一致，等一个保存间隔后再写
+        _WARM_START_STATE['saved_at'] = time.time()
+    logger.info(
+        '启动预热快照恢复完成: path=%s restored=%s 耗时=%.2fms',
+        path,
+        restored,
+        (time.perf_counter() - started_at) * 1000,
+    )
+    return restored
+
+
+def _save_in_background(path):
+    try:
+        save_warm_start_snapshot(path)
+    except Exception as exc:
+        logger.warning('启动预热快照保存失败: %s', exc)
+    finally:
+        with WARM_START_LOCK:
+            _WARM_START_STATE['saving'] = False
+
+
+def request_warm_start_save(now=None):
+    """距上次保存超过 WARM_START_SAVE_INTERVAL_SECONDS 时在后台线程保存一次快照。"""
+    if not config.WARM_START_ENABLED:
+        return False
+    now = time.time() if now is None else now
+    with WARM_START_LOCK:
+        if _WARM_START_STATE['saving']:
+            return False
+        if now - _WARM_START_STATE['saved_at'] < config.WARM_START_SAVE_INTERVAL_SECONDS:
+            return False
+        _WARM_START_STATE.update(saving=True, saved_at=now)
+    threading.Thread(
+        target=_save_in_background,
+        args=(_snapshot_path(),),
+        daemon=True,
+        name='warm-start-save',
+    ).start()
+    return True
+
+
+def reset_warm_start_state():
+    with WARM_START_LOCK:
+        _WARM_START_STATE.update(saved_at=0.0, saving=False)
@@ -1,7 +1,8 @@
 import os
 import sys
+import time
 
-from flask import Flask, request
+from flask import Flask, g, request
 from flask_jwt_extended import JWTManager
 
 # 添加项目根目录到路径
@@ -12,6 +13,7 @@ if project_root not in sys.path:
 
 from coinx.config import WEB_AUTH_DISABLED, WEB_DEBUG, WEB_HOST, WEB_PORT
 from coinx.database import db_session
+from coinx.metrics import inc_counter, observe
 from coinx.runtime import start_runtime_services
 from coinx.utils import logger
 from coinx.web.auth import configure_app, is_authenticated, log_startup_credentials, unauthorized_response
@@ -26,6 +28,7 @@ try:
     from coinx.web.routes.api_config import api_config_bp
     from coinx.web.routes.api_funding_rate import api_funding_rate_bp
     from coinx.web.routes.api_notifications import api_notifications_bp
+    from coinx.web.routes.metrics import is_metrics_request_authorized, metrics_bp
 except ImportError:
     # 如果在当前目录运行，可能需要使用相对导入路径
     from routes.auth import auth_bp
@@ -34,6 +37,7 @@ except ImportError:
     from routes.api_config import api_config_bp
     from routes.api_funding_rate import api_funding_rate_bp
     from routes.api_notifications import api_notifications_bp
+    from routes.metrics import is_metrics_request_authorized, metrics_bp
 
 
 def create_app():
@@ -53,11 +57,16 @@ def create_app():
     app.register_blueprint(api_config_bp)
     app.register_blueprint(api_funding_rate_bp)
     app.register_blueprint(api_notifications_bp)
+    app.register_blueprint(metrics_bp)
 
     @app.teardown_appcontext
     def shutdown_session(exception=None):
         db_session.remove()
 
+    @app.before_request
+    def start_request_timer():
+        g.request_started_at = time.perf_counter()
+
     @app.before_request
     def require_login():
         if WEB_AUTH_DISABLED:
@@ -66,6 +75,8 @@ def create_app():
         endpoint = request.endpoint or ''
         if endpoint in {'auth.login', 'auth.logout', 'auth.refresh', 'static'}:
             return None
+        if endpoint == 'metrics.metrics' and is_metrics_request_authorized():
+            return None
         if is_authenticated():
             return None
         return unauthorized_response()
@@ -91,6 +102,16 @@ def create_app():
         logger.debug('响应状态: %s', response.status)
         return response
 
+    @app.after_request
+    def record_request_metrics(response):
+        # 用路由模板而不是实际路径作为标签，避免币种等路径参数撑大指标基数
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        inc_counter('coinx_http_requests_total', method=request.method, endpoint=endpoint, status=response.status_code)
+        started_at = g.get('request_started_at')
+        if started_at is not None:
+            observe('coinx_http_request_duration_seconds', time.perf_counter() - started_at, endpoint=endpoint)
+        return response
+
     return app
 
 
@@ -1,4 +1,5 @@
 import secrets
+import threading
 from datetime import timedelta
 from urllib.parse import urlsplit
 
@@ -26,7 +27,9 @@ from coinx.utils import logger
 
 _resolved_password = WEB_PASSWORD or secrets.token_urlsafe(12)
 _password_source = '环境变量' if WEB_PASSWORD else '自动生成'
-_password_hash = generate_password_hash(_resolved_password)
+# scrypt 哈希要上百毫秒，推迟到第一次登录校验时计算，不拖慢进程启动
+_PASSWORD_HASH_LOCK = threading.Lock()
+_password_hash_state = {'hash': None}
 
 # JWT 密钥：优先使用配置，未配置时自动生成
 _jwt_secret_key = WEB_JWT_SECRET_KEY or secrets.token_urlsafe(64)
@@ -88,8 +91,15 @@ def clear_auth_cookies(response):
     return response
 
 
+def _get_password_hash():
+    with _PASSWORD_HASH_LOCK:
+        if _password_hash_state['hash'] is None:
+            _password_hash_state['hash'] = generate_password_hash(_resolved_password)
+        return _password_hash_state['hash']
+
+
 def verify_password(password):
-    return check_password_hash(_password_hash, password or '')
+    return check_password_hash(_get_password_hash(), password or '')
 
 
 def verify_username(username):
@@ -109,7 +119,8 @@ def build_login_redirect():
 
 
 def unauthorized_response():
-    if request.path.startswith('/api/'):
+    # 接口与 /metrics 的调用方不是浏览器，返回 401 而不是跳转登录页
+    if request.path.startswith('/api/') or request.path == '/metrics':
         return jsonify({'status': 'error', 'message': '需要先登录'}), 401
     return build_login_redirect()
 
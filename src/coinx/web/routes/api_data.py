@@ -13,11 +13,24 @@ from coinx.collector import (
     repair_tracked_symbols,
 )
 from coinx.collector.exchange_repair import resolve_repair_worker_count
+from coinx.collector.rate_limit import REQUEST_CLASS_INTERACTIVE, exchange_budget, use_request_class
 from coinx.repositories.market_tickers import get_market_tickers, get_latest_close_time
-from coinx.repositories.contract_detail import RANGE_HOURS, get_contract_detail, get_contract_structure_score, load_contract_chart_series
+from coinx.repositories.chart_series import RANGE_HOURS, load_contract_chart_series
+from coinx.repositories.contract_detail import get_contract_detail, get_contract_structure_score
+from coinx.repositories.contract_detail_cache import (
+    get_cached_contract_chart_series,
+    get_cached_contract_detail,
+    get_cached_contract_structure_score,
+    sync_contract_detail_handoff,
+)
+from coinx import config
+from coinx.cache_handoff import PROCESS_ROLE_WEB, get_cache_version
 from coinx.config import (
+    COLLECTOR_COMMAND_TIMEOUT_SECONDS,
     ENABLED_EXCHANGES,
     HOMEPAGE_SERIES_REPAIR_ENABLED,
+    JOB_RUN_HISTORY_RETENTION_DAYS,
+    JOB_RUN_STATS_WINDOWS_HOURS,
     REPAIR_HISTORY_COVERAGE_HOURS,
     REPAIR_HISTORY_ENABLED,
     REPAIR_HISTORY_INTERVAL,
@@ -26,6 +39,7 @@ from coinx.config import (
     SCHEDULER_ENABLED,
     TIME_INTERVALS,
 )
+from coinx.metrics import observe, record_cache_lookup
 from coinx.repositories.homepage_series import (
     HOMEPAGE_REQUIRED_SERIES_TYPES,
     get_homepage_series_data,
@@ -34,15 +48,32 @@ from coinx.repositories.homepage_series import (
     latest_closed_5m_open_time,
     should_refresh_homepage_series,
 )
+from coinx.repositories.collector_control import (
+    COMMAND_HOMEPAGE_REFRESH,
+    COMMAND_JOB_ACTION,
+    COMMAND_MARKET_RANK_REFRESH,
+    COMMAND_MARKET_STRUCTURE_REFRESH,
+    COMMAND_STATUS_ERROR,
+    COMMAND_STATUS_SUCCESS,
+    enqueue_collector_command,
+    load_collector_job_states,
+    wait_for_collector_command,
+)
+from coinx.repositories.job_runs import get_job_run_stats
 from coinx.repositories.market_structure_score import (
     get_market_structure_score_snapshot,
     get_market_structure_score_symbols,
 )
+from coinx.repositories.market_structure_score_store import (
+    load_market_structure_score_history,
+    load_stored_market_structure_score,
+)
 from coinx.scheduler import (
     get_all_job_runtime_metadata,
     scheduler,
 )
 from coinx.utils import logger
+from coinx.warm_start import request_warm_start_save
 
 
 api_data_bp = Blueprint('api_data', __name__)
@@ -50,6 +81,11 @@ HOME_PAGE_REFRESH_LOCK = threading.Lock()
 MARKET_STRUCTURE_REFRESH_LOCK = threading.Lock()
 HOMEPAGE_SNAPSHOT_CACHE_LOCK = threading.Lock()
 HOMEPAGE_SNAPSHOT_CACHE = {}
+HOMEPAGE_CACHE_BUILD_LOCK = threading.Lock()
+# 启动预热快照恢复的首页/评分数据，以及最近一次评分列表结果（供下次保存快照）
+WARM_START_PAYLOADS_LOCK = threading.Lock()
+WARM_START_PAYLOADS = {}
+MARKET_STRUCTURE_LAST_SNAPSHOT = {}
 HOME_PAGE_LAST_REFRESH_SUMMARY = None
 MARKET_STRUCTURE_LAST_REFRESH_SUMMARY = None
 
@@ -62,10 +98,23 @@ MARKET_STRUCTURE_MARKET_SERIES_TYPES = {
 TASK_JOB_ACTIONS = {'run', 'pause', 'resume'}
 TASK_JOB_LABELS = {
     'market_rank_refresh_job': '行情榜快照刷新',
+    'market_ticker_retention_job': '行情快照清理',
     'repair_market_rolling_job': '市场滚动补齐',
     'repair_market_history_job': '低频历史补齐',
     'update_coins_config_job': '币种配置刷新',
+    'collector_command_job': 'Web 指令处理',
 }
+# 任务控制只是修改调度计划，采集进程正忙时不必让页面一直等待
+TASK_JOB_ACTION_WAIT_SECONDS = 10
+
+
+@api_data_bp.before_request
+def _sync_collector_handoff():
+    # 分进程运行时采集进程写入新数据后，由 Web 进程清空并在后台预热合约详情缓存；同进程运行时直接返回
+    try:
+        sync_contract_detail_handoff()
+    except Exception as e:
+        logger.warning('合约详情缓存交接检查失败: %s', e)
 
 
 def _default_exchange_repair_workers(exchanges=None):
@@ -101,6 +150,74 @@ def _list_scheduler_jobs():
     return jobs
 
 
+def _delegates_to_collector():
+    """Web 与采集分进程运行时，需要访问交易所或调度器的操作都交给采集进程执行。"""
+    return config.PROCESS_ROLE == PROCESS_ROLE_WEB
+
+
+def _list_collector_jobs():
+    """读取采集进程发布的任务状态，返回与 _list_scheduler_jobs 相同结构的任务列表与采集进程状态。"""
+    job_states, collector_state = load_collector_job_states()
+    scheduler_running = bool(collector_state.get('online') and collector_state.get('scheduler_running'))
+    jobs = []
+    for state in job_states:
+        jobs.append(
+            {
+                **state,
+                'display_name': TASK_JOB_LABELS.get(state['id'], state.get('name')),
+                'registered': True,
+                'paused': scheduler_running and bool(state.get('paused')),
+                'scheduler_running': scheduler_running,
+                'runtime': state.get('runtime') or {},
+            }
+        )
+    return jobs, collector_state
+
+
+def _collector_command_summary(command):
+    if command['status'] == COMMAND_STATUS_SUCCESS:
+        summary = dict(command.get('result') or {'status': 'success'})
+    elif command['status'] == COMMAND_STATUS_ERROR:
+        summary = {'status': 'error', 'message': command.get('error') or 'collector command failed'}
+    else:
+        summary = {'status': 'pending', 'message': 'collector command has not finished yet'}
+    summary['collector_command_id'] = command['id']
+    return summary
+
+
+def _submit_collector_command(command, payload):
+    """提交给采集进程执行；同样的指令尚未完成时复用那一条。"""
+    submitted = enqueue_collector_command(command, payload, dedupe_ms=COLLECTOR_COMMAND_TIMEOUT_SECONDS * 1000)
+    logger.info('已提交采集进程指令: id=%s command=%s reused=%s', submitted['id'], command, submitted['reused'])
+    return submitted
+
+
+def _run_collector_command(command, payload, timeout_seconds=None):
+    """提交指令并等待采集进程执行完成；超时返回 status=pending 的摘要。"""
+    submitted = _submit_collector_command(command, payload)
+    if timeout_seconds is None:
+        timeout_seconds = COLLECTOR_COMMAND_TIMEOUT_SECONDS
+    finished = wait_for_collector_command(submitted['id'], timeout_seconds)
+    return _collector_command_summary(finished or submitted)
+
+
+def _resolve_run_stats_window_hours(value):
+    if value in (None, ''):
+        return JOB_RUN_STATS_WINDOWS_HOURS[0] if JOB_RUN_STATS_WINDOWS_HOURS else 24
+    window_hours = float(value)
+    if not 0 < window_hours <= JOB_RUN_HISTORY_RETENTION_DAYS * 24:
+        raise ValueError(f'window_hours must be within (0, {JOB_RUN_HISTORY_RETENTION_DAYS * 24}]')
+    return int(window_hours) if window_hours.is_integer() else window_hours
+
+
+def _load_job_run_stats(window_hours):
+    try:
+        return get_job_run_stats(window_hours)
+    except Exception as e:
+        logger.warning('加载任务运行历史统计失败: %s', e)
+        return {}
+
+
 def _log_market_structure_refresh_component(component_name, summary):
     if not summary:
         logger.info('市场结构评分补齐组件跳过: component=%s', component_name)
@@ -150,6 +267,11 @@ def _summarize_market_structure_refresh_results(summary):
 
 def _run_homepage_refresh(symbols, series_types, latest_only=False):
     global HOME_PAGE_LAST_REFRESH_SUMMARY
+    if _delegates_to_collector():
+        return _run_collector_command(
+            COMMAND_HOMEPAGE_REFRESH,
+            {'symbols': list(symbols or []), 'series_types': list(series_types or []), 'latest_only': bool(latest_only)},
+        )
     if not HOME_PAGE_REFRESH_LOCK.acquire(blocking=False):
         logger.info('首页历史序列补全正在执行，跳过重复触发')
         return {
@@ -165,12 +287,14 @@ def _run_homepage_refresh(symbols, series_types, latest_only=False):
 
     try:
         points = 2 if latest_only else REPAIR_ROLLING_POINTS
-        summary = repair_rolling_tracked_symbols(
-            symbols=symbols,
-            series_types=series_types,
-            points=points,
-            max_workers=_default_exchange_repair_workers(),
-        )
+        # 手动触发的补齐（含后台线程）按交互请求参与交易所预算仲裁
+        with use_request_class(REQUEST_CLASS_INTERACTIVE):
+            summary = repair_rolling_tracked_symbols(
+                symbols=symbols,
+                series_types=series_types,
+                points=points,
+                max_workers=_default_exchange_repair_workers(),
+            )
         HOME_PAGE_LAST_REFRESH_SUMMARY = summary
 
         return summary
@@ -216,6 +340,16 @@ def _is_complete_homepage_payload(coins_data):
 def _start_homepage_refresh_async(symbols, series_types=None, latest_only=False):
     if not symbols:
         return False
+    if _delegates_to_collector():
+        _submit_collector_command(
+            COMMAND_HOMEPAGE_REFRESH,
+            {
+                'symbols': list(symbols),
+                'series_types': list(series_types or HOMEPAGE_REQUIRED_SERIES_TYPES),
+                'latest_only': bool(latest_only),
+            },
+        )
+        return True
 
     refresh_thread = threading.Thread(
         target=_run_homepage_refresh,
@@ -233,6 +367,16 @@ def _start_homepage_refresh_async(symbols, series_types=None, latest_only=False)
 def _start_market_structure_refresh_async(symbols, series_types=None, exchanges=None):
     if not symbols:
         return False
+    if _delegates_to_collector():
+        _submit_collector_command(
+            COMMAND_MARKET_STRUCTURE_REFRESH,
+            {
+                'symbols': list(symbols),
+                'series_types': _normalize_series_types(series_types or sorted(MARKET_STRUCTURE_MARKET_SERIES_TYPES)),
+                'exchanges': list(exchanges or ENABLED_EXCHANGES),
+            },
+        )
+        return True
 
     refresh_thread = threading.Thread(
         target=_run_market_structure_refresh,
@@ -268,6 +412,19 @@ def _wait_for_refresh_completion(refresh_lock, summary_getter, message, poll_int
 
 def _run_market_structure_refresh(symbols, series_types, exchanges=None):
     global MARKET_STRUCTURE_LAST_REFRESH_SUMMARY
+    if _delegates_to_collector():
+        return _run_collector_command(
+            COMMAND_MARKET_STRUCTURE_REFRESH,
+            {
+                'symbols': list(symbols or []),
+                'series_types': [
+                    series_type
+                    for series_type in _normalize_series_types(series_types)
+                    if series_type in MARKET_STRUCTURE_MARKET_SERIES_TYPES
+                ],
+                'exchanges': list(exchanges or ENABLED_EXCHANGES),
+            },
+        )
     if not MARKET_STRUCTURE_REFRESH_LOCK.acquire(blocking=False):
         logger.info('市场结构评分补齐正在执行，跳过重复触发')
         return {
@@ -301,11 +458,12 @@ def _run_market_structure_refresh(symbols, series_types, exchanges=None):
 
         if market_series_types:
             market_started_at = time.perf_counter()
-            market_summary = repair_rolling_tracked_symbols(
-                symbols=symbols,
-                series_types=market_series_types,
-                exchanges=exchanges,
-            )
+            with use_request_class(REQUEST_CLASS_INTERACTIVE):
+                market_summary = repair_rolling_tracked_symbols(
+                    symbols=symbols,
+                    series_types=market_series_types,
+                    exchanges=exchanges,
+                )
             logger.info(
                 '市场结构评分行情序列补齐耗时=%.2fs',
                 time.perf_counter() - market_started_at,
@@ -377,7 +535,8 @@ def _get_homepage_cache_anchor():
 
 def _get_homepage_cache_key(symbols, anchor_time):
     # 测试中会 monkeypatch 仓储函数，把函数 id 放入 key 可避免跨测试串缓存。
-    return (tuple(symbols or []), anchor_time, id(get_homepage_series_snapshot))
+    # 分进程运行时带上采集进程发布的行情序列版本，采集进程写入新数据后本进程缓存随之失效。
+    return (tuple(symbols or []), anchor_time, id(get_homepage_series_snapshot), get_cache_version('market_series'))
 
 
 def _get_cached_homepage_payload(cache_key):
@@ -396,6 +555,70 @@ def _clear_homepage_snapshot_cache():
         HOMEPAGE_SNAPSHOT_CACHE.clear()
 
 
+def export_warm_start_payloads():
+    """导出当前首页缓存与最近一次评分列表，供启动预热快照保存；还没有重建的分段沿用恢复的快照。"""
+    payloads = {}
+    with WARM_START_PAYLOADS_LOCK:
+        for name, entry in WARM_START_PAYLOADS.items():
+            payloads[name] = {'symbols': list(entry['symbols']), 'payload': entry['payload']}
+        if MARKET_STRUCTURE_LAST_SNAPSHOT:
+            payloads['market_structure_score'] = {
+                'symbols': list(MARKET_STRUCTURE_LAST_SNAPSHOT['symbols']),
+                'payload': MARKET_STRUCTURE_LAST_SNAPSHOT['payload'],
+            }
+    with HOMEPAGE_SNAPSHOT_CACHE_LOCK:
+        for cache_key, payload in HOMEPAGE_SNAPSHOT_CACHE.items():
+            payloads['homepage'] = {'symbols': list(cache_key[0]), 'payload': payload}
+    return payloads
+
+
+def restore_warm_start_payloads(payloads, saved_at_ms):
+    restored = 0
+    with WARM_START_PAYLOADS_LOCK:
+        for name in ('homepage', 'market_structure_score'):
+            entry = (payloads or {}).get(name)
+            if not entry or not entry.get('payload'):
+                continue
+            WARM_START_PAYLOADS[name] = {
+                'symbols': tuple(entry.get('symbols') or []),
+                'payload': entry['payload'],
+                'saved_at': int(saved_at_ms),
+            }
+            restored += 1
+    return restored
+
+
+def _get_warm_start_payload(name, symbols):
+    """返回与 symbols 一致且未超过 WARM_START_MAX_AGE_SECONDS 的预热数据，过期的顺带丢弃。"""
+    with WARM_START_PAYLOADS_LOCK:
+        entry = WARM_START_PAYLOADS.get(name)
+        if entry is None:
+            return None
+        if time.time() * 1000 - entry['saved_at'] > config.WARM_START_MAX_AGE_SECONDS * 1000:
+            WARM_START_PAYLOADS.pop(name, None)
+            return None
+        if entry['symbols'] != tuple(symbols or []):
+            return None
+        return entry['payload']
+
+
+def _discard_warm_start_payload(name):
+    with WARM_START_PAYLOADS_LOCK:
+        WARM_START_PAYLOADS.pop(name, None)
+
+
+def _remember_market_structure_snapshot(symbols, snapshot):
+    with WARM_START_PAYLOADS_LOCK:
+        MARKET_STRUCTURE_LAST_SNAPSHOT.update(symbols=tuple(symbols or []), payload=snapshot)
+    request_warm_start_save()
+
+
+def _clear_warm_start_payloads():
+    with WARM_START_PAYLOADS_LOCK:
+        WARM_START_PAYLOADS.clear()
+        MARKET_STRUCTURE_LAST_SNAPSHOT.clear()
+
+
 def _format_homepage_coins_payload(coins_data):
     formatted_data = []
     for coin in coins_data:
@@ -491,7 +714,21 @@ def get_market_structure_score():
             except Exception:
                 symbols = symbols[:100]
 
-        snapshot = get_market_structure_score_snapshot(symbols=symbols)
+        snapshot = load_stored_market_structure_score(symbols=symbols)
+        record_cache_lookup('market_structure_score', snapshot is not None)
+        if snapshot is not None:
+            _discard_warm_start_payload('market_structure_score')
+        else:
+            # 重启后评分快照还没刷新时先用预热快照，避免首个请求同步计算全部评分
+            snapshot = _get_warm_start_payload('market_structure_score', symbols)
+            if snapshot is not None:
+                logger.info('合约市场结构评分命中启动预热快照: symbols=%d', len(symbols))
+        if snapshot is None:
+            build_started_at = time.perf_counter()
+            snapshot = get_market_structure_score_snapshot(symbols=symbols)
+            observe('coinx_cache_build_duration_seconds', time.perf_counter() - build_started_at, cache='market_structure_score')
+        if not symbol:
+            _remember_market_structure_snapshot(symbols, snapshot)
         return jsonify(
             {
                 'status': 'success',
@@ -552,6 +789,51 @@ def refresh_market_structure_score():
         return jsonify({'status': 'error', 'message': f'failed to trigger market structure refresh: {str(e)}'}), 500
 
 
+def _build_homepage_payload(active_coins, cache_key):
+    snapshot_start = time.perf_counter()
+    snapshot = get_homepage_series_snapshot(active_coins)
+    snapshot_ms = (time.perf_counter() - snapshot_start) * 1000
+    observe('coinx_cache_build_duration_seconds', snapshot_ms / 1000, cache='homepage')
+
+    if active_coins and not _is_complete_homepage_payload(snapshot.get('data') or []):
+        logger.info('首页历史序列不完整，跳过后台补全，返回现有数据')
+
+    payload = {
+        'status': 'success',
+        'message': 'homepage data loaded',
+        'data': _format_homepage_coins_payload(snapshot['data']),
+        'cache_update_time': snapshot['cache_update_time'],
+        'homepage_complete': _is_complete_homepage_payload(snapshot.get('data') or []),
+    }
+    _set_cached_homepage_payload(cache_key, payload)
+    _discard_warm_start_payload('homepage')
+    request_warm_start_save()
+    return payload, snapshot_ms
+
+
+def _run_homepage_cache_build(active_coins, cache_key):
+    if not HOMEPAGE_CACHE_BUILD_LOCK.acquire(blocking=False):
+        return
+    try:
+        _build_homepage_payload(active_coins, cache_key)
+    except Exception as exc:
+        logger.warning('后台重建首页缓存失败: %s', exc)
+    finally:
+        HOMEPAGE_CACHE_BUILD_LOCK.release()
+
+
+def _start_homepage_cache_build_async(active_coins, cache_key):
+    if HOMEPAGE_CACHE_BUILD_LOCK.locked():
+        return False
+    build_thread = threading.Thread(
+        target=_run_homepage_cache_build,
+        kwargs={'active_coins': active_coins, 'cache_key': cache_key},
+    )
+    build_thread.daemon = True
+    build_thread.start()
+    return True
+
+
 @api_data_bp.route('/api/coins')
 def get_coins():
     request_start = time.perf_counter()
@@ -565,33 +847,25 @@ def get_coins():
         force_refresh = request.args.get('nocache', '').lower() == '1'
         if not force_refresh:
             cached_payload = _get_cached_homepage_payload(cache_key)
+            record_cache_lookup('homepage', cached_payload is not None)
             if cached_payload is not None:
                 elapsed_ms = (time.perf_counter() - request_start) * 1000
                 logger.info(f'首页数据命中缓存: 币种数={len(active_coins)}, 锚点={cache_anchor}, 耗时={elapsed_ms:.2f}ms')
                 return jsonify(cached_payload)
+
+            warm_payload = _get_warm_start_payload('homepage', active_coins)
+            if warm_payload is not None:
+                _start_homepage_cache_build_async(active_coins, cache_key)
+                logger.info(f'首页数据命中启动预热快照，后台重建缓存: 币种数={len(active_coins)}, 锚点={cache_anchor}')
+                return jsonify({**warm_payload, 'warm_start': True})
         else:
             logger.info('强制跳过缓存')
 
-        snapshot_start = time.perf_counter()
-        snapshot = get_homepage_series_snapshot(active_coins)
-        snapshot_ms = (time.perf_counter() - snapshot_start) * 1000
-
-        if active_coins and not _is_complete_homepage_payload(snapshot.get('data') or []):
-            logger.info('首页历史序列不完整，跳过后台补全，返回现有数据')
-
-        formatted_data = _format_homepage_coins_payload(snapshot['data'])
-        payload = {
-            'status': 'success',
-            'message': 'homepage data loaded',
-            'data': formatted_data,
-            'cache_update_time': snapshot['cache_update_time'],
-            'homepage_complete': _is_complete_homepage_payload(snapshot.get('data') or []),
-        }
-        _set_cached_homepage_payload(cache_key, payload)
+        payload, snapshot_ms = _build_homepage_payload(active_coins, cache_key)
 
         elapsed_ms = (time.perf_counter() - request_start) * 1000
         logger.info(
-            f'首页数据加载完成: 币种数={len(active_coins)}, 数据行={len(formatted_data)}, '
+            f'首页数据加载完成: 币种数={len(active_coins)}, 数据行={len(payload["data"])}, '
             f'锚点={cache_anchor}, 聚合耗时={snapshot_ms:.2f}ms, 总耗时={elapsed_ms:.2f}ms'
         )
         return jsonify(payload)
@@ -666,7 +940,7 @@ def get_coin_detail(symbol):
 
     logger.info('开始加载合约详情: %s', normalized_symbol)
     try:
-        detail_data = get_contract_detail(normalized_symbol)
+        detail_data = get_cached_contract_detail(normalized_symbol, loader=get_contract_detail)
         if detail_data is None:
             return jsonify({'status': 'error', 'message': 'contract detail not found'}), 404
         return jsonify({'status': 'success', 'message': 'coin detail loaded', 'data': detail_data})
@@ -685,7 +959,7 @@ def get_coin_detail_series(symbol):
     if range_key not in RANGE_HOURS:
         return jsonify({'status': 'error', 'message': 'invalid range'}), 400
     try:
-        data = load_contract_chart_series(normalized_symbol, range_key=range_key)
+        data = get_cached_contract_chart_series(normalized_symbol, range_key=range_key, loader=load_contract_chart_series)
         return jsonify({'status': 'success', 'message': 'contract series loaded', 'data': data})
     except Exception as e:
         logger.error('加载合约趋势失败: %s, 错误: %s', normalized_symbol, e)
@@ -699,7 +973,7 @@ def get_coin_detail_structure_score(symbol):
     if not re.fullmatch(r'[A-Z0-9_-]{2,50}', normalized_symbol):
         return jsonify({'status': 'error', 'message': 'invalid contract symbol'}), 400
     try:
-        data = get_contract_structure_score(normalized_symbol)
+        data = get_cached_contract_structure_score(normalized_symbol, loader=get_contract_structure_score)
         return jsonify({'status': 'success', 'message': 'contract structure score loaded', 'data': data})
     except Exception as e:
         logger.error('加载合约结构评分失败: %s, 错误: %s', normalized_symbol, e)
@@ -707,6 +981,29 @@ def get_coin_detail_structure_score(symbol):
         return jsonify({'status': 'error', 'message': f'failed to load contract structure score: {str(e)}'}), 500
 
 
+@api_data_bp.route('/api/coin-detail/<symbol>/structure-score/history')
+def get_coin_detail_structure_score_history(symbol):
+    normalized_symbol = symbol.strip().upper()
+    range_key = request.args.get('range', '24h')
+    if not re.fullmatch(r'[A-Z0-9_-]{2,50}', normalized_symbol):
+        return jsonify({'status': 'error', 'message': 'invalid contract symbol'}), 400
+    if range_key not in RANGE_HOURS:
+        return jsonify({'status': 'error', 'message': 'invalid range'}), 400
+    try:
+        data = load_market_structure_score_history(normalized_symbol, hours=RANGE_HOURS[range_key])
+        return jsonify(
+            {
+                'status': 'success',
+                'message': 'contract structure score history loaded',
+                'data': {'symbol': normalized_symbol, 'range': range_key, 'history': data},
+            }
+        )
+    except Exception as e:
+        logger.error('加载合约结构评分历史失败: %s, 错误: %s', normalized_symbol, e)
+        logger.exception(e)
+        return jsonify({'status': 'error', 'message': f'failed to load contract structure score history: {str(e)}'}), 500
+
+
 @api_data_bp.route('/api/market-rank')
 def get_market_rank():
     """获取行情排行数据"""
@@ -748,9 +1045,13 @@ def refresh_market_rank():
     """手动触发行情榜快照刷新"""
     logger.info('开始触发行情榜快照刷新')
     try:
-        summary = refresh_market_tickers()
+        if _delegates_to_collector():
+            summary = _run_collector_command(COMMAND_MARKET_RANK_REFRESH, {})
+        else:
+            with use_request_class(REQUEST_CLASS_INTERACTIVE):
+                summary = refresh_market_tickers()
         if summary.get('status') != 'success':
-            status = 409 if summary.get('status') == 'skipped' else 500
+            status = {'skipped': 409, 'pending': 202}.get(summary.get('status'), 500)
             message = summary.get('message', 'market rank refresh failed')
             if summary.get('status') == 'error':
                 message = f'failed to refresh market rank: {message}'
@@ -781,15 +1082,35 @@ def refresh_market_rank():
 @api_data_bp.route('/api/task-jobs')
 def list_task_jobs():
     try:
-        jobs = _list_scheduler_jobs()
+        window_hours = _resolve_run_stats_window_hours(request.args.get('window_hours'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'invalid window_hours: {str(e)}'}), 400
+    try:
+        collector_state = None
+        if _delegates_to_collector():
+            # 调度器运行在采集进程，读取它发布的任务状态与交易所预算队列
+            jobs, collector_state = _list_collector_jobs()
+            scheduler_running = bool(collector_state.get('online') and collector_state.get('scheduler_running'))
+            budget_depths = collector_state.get('exchange_budget') or {}
+        else:
+            jobs = _list_scheduler_jobs()
+            scheduler_running = bool(scheduler.running)
+            budget_depths = exchange_budget.queue_depths()
         return jsonify(
             {
                 'status': 'success',
                 'message': 'scheduler jobs loaded',
                 'data': {
                     'scheduler_enabled': SCHEDULER_ENABLED,
-                    'scheduler_running': bool(scheduler.running),
+                    'scheduler_running': scheduler_running,
+                    'collector': collector_state,
                     'jobs': jobs,
+                    'exchange_budget': budget_depths,
+                    'run_stats': {
+                        'window_hours': window_hours,
+                        'windows_hours': JOB_RUN_STATS_WINDOWS_HOURS,
+                        'jobs': _load_job_run_stats(window_hours),
+                    },
                 },
             }
         )
@@ -807,6 +1128,8 @@ def control_task_job(job_id):
         return jsonify({'status': 'error', 'message': f'unsupported action: {action}'}), 400
     if not SCHEDULER_ENABLED:
         return jsonify({'status': 'error', 'message': 'scheduler is disabled by SCHEDULER_ENABLED=false'}), 409
+    if _delegates_to_collector():
+        return _control_collector_job(job_id, action)
 
     job = scheduler.get_job(job_id)
     if job is None:
@@ -839,3 +1162,38 @@ def control_task_job(job_id):
         logger.error(f'执行任务操作失败: job_id={job_id} action={action} error={e}')
         logger.exception(e)
         return jsonify({'status': 'error', 'message': f'failed to {action} job: {str(e)}'}), 500
+
+
+def _control_collector_job(job_id, action):
+    try:
+        jobs, _ = _list_collector_jobs()
+        if job_id not in {job['id'] for job in jobs}:
+            return jsonify({'status': 'error', 'message': f'job not found: {job_id}'}), 404
+        summary = _run_collector_command(
+            COMMAND_JOB_ACTION,
+            {'job_id': job_id, 'action': action},
+            timeout_seconds=TASK_JOB_ACTION_WAIT_SECONDS,
+        )
+        if summary.get('status') == 'error':
+            return jsonify({'status': 'error', 'message': f'failed to {action} job: {summary.get("message")}'}), 500
+        pending = summary.get('status') == 'pending'
+        message = f'任务操作已提交采集进程: {job_id}' if pending else f'采集进程已执行任务操作: {job_id} {action}'
+        return (
+            jsonify(
+                {
+                    'status': 'success',
+                    'message': message,
+                    'data': {
+                        'job_id': job_id,
+                        'action': action,
+                        'pending': pending,
+                        'jobs': _list_collector_jobs()[0],
+                    },
+                }
+            ),
+            202 if pending else 200,
+        )
+    except Exception as e:
+        logger.error(f'提交任务操作失败: job_id={job_id} action={action} error={e}')
+        logger.exception(e)
+        return jsonify({'status': 'error', 'message': f'failed to {action} job: {str(e)}'}), 500
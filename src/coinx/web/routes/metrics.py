@@ -0,0 +1,19 @@
+from flask import Blueprint, Response, abort, request
+
+from coinx import config
+from coinx.metrics import PROMETHEUS_CONTENT_TYPE, is_metrics_authorization_valid, render_metrics
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def is_metrics_request_authorized():
+    """METRICS_PUBLIC 或 Bearer token 匹配时放行；否则交给登录校验。"""
+    return is_metrics_authorization_valid(request.headers.get('Authorization'))
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    if not config.METRICS_ENABLED:
+        abort(404)
+    return Response(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,5 +1,10 @@
+import atexit
+
 from coinx.runtime import start_runtime_services
+from coinx.shutdown import graceful_shutdown
 from coinx.web.app import app
 
 
 start_runtime_services(with_startup_repair=True, startup_delay_seconds=1)
+# WSGI 服务器负责信号处理，worker 正常退出时再有序关闭后台任务并保存预热快照
+atexit.register(graceful_shutdown)
@@ -19,26 +19,44 @@ from coinx.models import (
     AlertRule,
     AlertRuleChannel,
     AlertState,
+    CoinRegistryVersion,
+    CollectorCommand,
+    CollectorJobState,
+    CollectorNode,
+    JobRun,
     MarketFundingRate,
+    MarketFundingRateLatest,
     MarketKline,
     MarketOpenInterestHist,
+    MarketStructureScore,
     MarketTickers,
+    MarketTickerSnapshot,
     MarketTakerBuySellVol,
     NotificationChannel,
     NotificationDelivery,
+    NotificationOutbox,
 )
 
 TEST_TABLES = [
     MarketFundingRate.__table__,
+    MarketFundingRateLatest.__table__,
     MarketOpenInterestHist.__table__,
     MarketKline.__table__,
     MarketTakerBuySellVol.__table__,
+    CoinRegistryVersion.__table__,
+    CollectorCommand.__table__,
+    CollectorJobState.__table__,
+    CollectorNode.__table__,
+    JobRun.__table__,
     MarketTickers.__table__,
+    MarketTickerSnapshot.__table__,
+    MarketStructureScore.__table__,
     NotificationChannel.__table__,
     AlertRule.__table__,
     AlertRuleChannel.__table__,
     AlertState.__table__,
     NotificationDelivery.__table__,
+    NotificationOutbox.__table__,
     AlertEvaluationRun.__table__,
     AlertEvaluationMetric.__table__,
 ]
@@ -76,6 +94,123 @@ def fresh_market_structure_lock(monkeypatch):
     monkeypatch.setattr('coinx.web.routes.api_data.MARKET_STRUCTURE_REFRESH_LOCK', threading.Lock())
 
 
+@pytest.fixture(autouse=True)
+def fresh_market_structure_indicator_states():
+    """每个测试前清空评分增量指标状态，避免不同测试的同名币种互相复用"""
+    from coinx.repositories.market_structure_indicators import reset_indicator_states
+
+    reset_indicator_states()
+
+
+@pytest.fixture(autouse=True)
+def fresh_series_frames():
+    """每个测试前清空共享序列帧缓存，避免不同测试库的数据被当作同一锚点复用"""
+    from coinx.repositories.series_frame import reset_series_frames
+
+    reset_series_frames()
+
+
+@pytest.fixture(autouse=True)
+def fresh_funding_rate_cache():
+    """每个测试前清空最新资金费率与排行页内存快照"""
+    from coinx.repositories.funding_rate_cache import reset_funding_rate_cache
+    from coinx.repositories.funding_rate_page import reset_funding_rate_page_cache
+
+    reset_funding_rate_cache()
+    reset_funding_rate_page_cache()
+
+
+@pytest.fixture(autouse=True)
+def fresh_contract_detail_cache():
+    """每个测试前清空合约详情缓存，避免同一锚点内命中其他测试写入的结果"""
+    from coinx.repositories.contract_detail_cache import reset_contract_detail_cache
+
+    reset_contract_detail_cache()
+
+
+@pytest.fixture(autouse=True)
+def fresh_market_ticker_index():
+    """每个测试前清空行情榜排序索引，避免读到其他测试数据库的快照"""
+    from coinx.repositories.market_ticker_index import reset_market_ticker_index
+
+    reset_market_ticker_index()
+
+
+@pytest.fixture(autouse=True)
+def fresh_coin_registry():
+    """每个测试前清空跟踪币种缓存，避免沿用其他测试加载的币种列表"""
+    from coinx.coin_manager import invalidate_coin_registry
+
+    invalidate_coin_registry()
+
+
+@pytest.fixture(autouse=True)
+def fresh_price_volume_metrics():
+    """每个测试前清空增量价格放量指标，避免沿用其他测试写入的 K 线窗口"""
+    from coinx.repositories.price_volume_metrics import reset_price_volume_metrics
+
+    reset_price_volume_metrics()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache_handoff():
+    """每个测试前清空缓存交接状态，避免沿用其他测试发布或读取的版本号"""
+    from coinx.cache_handoff import reset_cache_handoff
+
+    reset_cache_handoff()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cluster_state():
+    """每个测试前清空采集节点标识、心跳时间与选主连接"""
+    from coinx.cluster import reset_cluster_state
+
+    reset_cluster_state()
+
+
+@pytest.fixture(autouse=True)
+def fresh_exchange_budget():
+    """每个测试前清空交易所预算仲裁的排队与最近放行记录"""
+    from coinx.collector.rate_limit import exchange_budget
+
+    exchange_budget.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_job_run_state():
+    """每个测试前重置任务运行历史的建表与清理标记"""
+    from coinx.repositories.job_runs import reset_job_run_state
+
+    reset_job_run_state()
+
+
+@pytest.fixture(autouse=True)
+def fresh_collector_control_state():
+    """每个测试前重置采集进程指令与任务状态表的建表标记"""
+    from coinx.repositories.collector_control import reset_collector_control_state
+
+    reset_collector_control_state()
+
+
+@pytest.fixture(autouse=True)
+def fresh_warm_start_state(monkeypatch, tmp_path):
+    """每个测试使用临时的启动预热快照文件，并清空已恢复的首页与评分快照"""
+    from coinx.warm_start import reset_warm_start_state
+    from coinx.web.routes.api_data import _clear_warm_start_payloads
+
+    monkeypatch.setattr('coinx.config.WARM_START_FILE', str(tmp_path / 'warm_start.json'))
+    reset_warm_start_state()
+    _clear_warm_start_payloads()
+
+
+@pytest.fixture(autouse=True)
+def fresh_shutdown_state():
+    """每个测试前清除有序关闭标记"""
+    from coinx.shutdown import reset_shutdown_state
+
+    reset_shutdown_state()
+
+
 @pytest.fixture(autouse=True)
 def patch_get_session(monkeypatch, test_db):
     """将所有 get_session() 调用重定向到测试数据库"""
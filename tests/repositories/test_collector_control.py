@@ -0,0 +1,71 @@
+from coinx.repositories.collector_control import (
+    COLLECTOR_STATE_STALE_MS,
+    COMMAND_STATUS_PENDING,
+    COMMAND_STATUS_RUNNING,
+    COMMAND_STATUS_SUCCESS,
+    claim_collector_commands,
+    enqueue_collector_command,
+    finish_collector_command,
+    get_collector_command,
+    load_collector_job_states,
+    save_collector_job_states,
+)
+
+
+NOW_MS = 1711526400000
+
+
+def test_commands_are_deduplicated_claimed_once_and_finished_with_compact_result(db_session):
+    first = enqueue_collector_command('homepage_refresh', {'symbols': ['BTCUSDT']}, dedupe_ms=60_000, session=db_session, now_ms=NOW_MS)
+    again = enqueue_collector_command('homepage_refresh', {'symbols': ['BTCUSDT']}, dedupe_ms=60_000, session=db_session, now_ms=NOW_MS + 1000)
+    other = enqueue_collector_command('homepage_refresh', {'symbols': ['ETHUSDT']}, dedupe_ms=60_000, session=db_session, now_ms=NOW_MS + 1000)
+
+    assert first['status'] == COMMAND_STATUS_PENDING and first['reused'] is False
+    assert again['id'] == first['id'] and again['reused'] is True
+    assert other['id'] != first['id']
+
+    claimed = claim_collector_commands('node-a', session=db_session, now_ms=NOW_MS + 2000)
+    assert [command['id'] for command in claimed] == [first['id'], other['id']]
+    assert all(command['status'] == COMMAND_STATUS_RUNNING and command['claimed_by'] == 'node-a' for command in claimed)
+    assert claim_collector_commands('node-b', session=db_session, now_ms=NOW_MS + 3000) == []
+
+    finish_collector_command(
+        first['id'],
+        COMMAND_STATUS_SUCCESS,
+        result={'status': 'success', 'success_count': 2, 'results': [{'symbol': 'BTCUSDT'}], 'stages': [{'results': [], 'skipped_count': 1}]},
+        session=db_session,
+        now_ms=NOW_MS + 4000,
+    )
+    finished = get_collector_command(first['id'], session=db_session)
+    assert finished['status'] == COMMAND_STATUS_SUCCESS
+    assert finished['result'] == {'status': 'success', 'success_count': 2, 'stages': [{'skipped_count': 1}]}
+
+    # 已完成的同名指令不再复用
+    fresh = enqueue_collector_command('homepage_refresh', {'symbols': ['BTCUSDT']}, dedupe_ms=60_000, session=db_session, now_ms=NOW_MS + 5000)
+    assert fresh['id'] not in (first['id'], other['id'])
+
+
+def test_job_states_replace_removed_jobs_and_report_collector_liveness(db_session):
+    save_collector_job_states(
+        {'job-a': {'name': 'A', 'paused': False}, 'job-b': {'name': 'B', 'paused': True}},
+        {'scheduler_running': True, 'exchange_budget': {'binance': {'rolling': 1}}},
+        node_id='node-a',
+        session=db_session,
+        now_ms=NOW_MS,
+    )
+    save_collector_job_states(
+        {'job-a': {'name': 'A', 'paused': True}},
+        {'scheduler_running': True, 'exchange_budget': {}},
+        node_id='node-a',
+        session=db_session,
+        now_ms=NOW_MS + 1000,
+    )
+
+    jobs, collector = load_collector_job_states(session=db_session, now_ms=NOW_MS + 2000)
+    assert jobs == [{'name': 'A', 'paused': True, 'id': 'job-a', 'updated_at': NOW_MS + 1000}]
+    assert collector['online'] is True
+    assert collector['scheduler_running'] is True
+    assert collector['node_id'] == 'node-a'
+
+    _, stale = load_collector_job_states(session=db_session, now_ms=NOW_MS + 1000 + COLLECTOR_STATE_STALE_MS + 1)
+    assert stale['online'] is False
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from coinx.repositories import contract_detail_cache
+from coinx.repositories.contract_detail_cache import (
+    get_cached_contract_chart_series,
+    get_cached_contract_detail,
+    get_contract_detail_cache_stats,
+    invalidate_contract_detail_cache,
+    prewarm_contract_detail_cache,
+    start_contract_detail_prewarm_async,
+)
+
+
+ANCHOR_NOW_MS = 1711526400000 + 6 * 60 * 1000
+NEXT_ANCHOR_NOW_MS = ANCHOR_NOW_MS + 5 * 60 * 1000
+
+
+def test_contract_detail_cache_is_single_flight_per_anchor():
+    calls = []
+    started = threading.Event()
+
+    def slow_loader(symbol):
+        calls.append(symbol)
+        started.set()
+        time.sleep(0.05)
+        return {'symbol': symbol, 'call': len(calls)}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get_cached_contract_detail('BTCUSDT', loader=slow_loader, now_ms=ANCHOR_NOW_MS)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['BTCUSDT']
+    assert all(result == {'symbol': 'BTCUSDT', 'call': 1} for result in results)
+
+    get_cached_contract_detail('BTCUSDT', loader=slow_loader, now_ms=NEXT_ANCHOR_NOW_MS)
+    assert len(calls) == 2
+    assert get_contract_detail_cache_stats()['size'] == 1
+
+
+def test_contract_detail_cache_keys_by_range_and_skips_missing_results():
+    calls = []
+
+    def series_loader(symbol, range_key):
+        calls.append(range_key)
+        return {'range': range_key}
+
+    assert get_cached_contract_chart_series('BTCUSDT', '24h', loader=series_loader, now_ms=ANCHOR_NOW_MS) == {'range': '24h'}
+    assert get_cached_contract_chart_series('BTCUSDT', '7d', loader=series_loader, now_ms=ANCHOR_NOW_MS) == {'range': '7d'}
+    get_cached_contract_chart_series('BTCUSDT', '24h', loader=series_loader, now_ms=ANCHOR_NOW_MS)
+    assert calls == ['24h', '7d']
+
+    missing_calls = []
+    for _ in range(2):
+        get_cached_contract_detail('NEWUSDT', loader=lambda symbol: missing_calls.append(symbol), now_ms=ANCHOR_NOW_MS)
+    assert missing_calls == ['NEWUSDT', 'NEWUSDT']
+
+
+def test_contract_detail_cache_drops_results_computed_across_invalidation():
+    def loader(symbol):
+        invalidate_contract_detail_cache()
+        return {'symbol': symbol}
+
+    get_cached_contract_detail('BTCUSDT', loader=loader, now_ms=ANCHOR_NOW_MS)
+
+    assert get_contract_detail_cache_stats()['size'] == 0
+
+
+def test_contract_detail_cache_releases_load_lock_with_result_and_on_error(monkeypatch):
+    def failing_loader(symbol):
+        raise RuntimeError('db unavailable')
+
+    with pytest.raises(RuntimeError):
+        get_cached_contract_detail('BTCUSDT', loader=failing_loader, now_ms=ANCHOR_NOW_MS)
+    assert contract_detail_cache._CONTRACT_DETAIL_LOAD_LOCKS == {}
+
+    def loader(symbol):
+        return {'symbol': symbol}
+
+    original_release = contract_detail_cache._release_load_lock_locked
+
+    def release_after_store(key, load_lock):
+        # 释放单飞锁时结果已经写入缓存
+        assert key in contract_detail_cache.CONTRACT_DETAIL_CACHE
+        original_release(key, load_lock)
+
+    monkeypatch.setattr(contract_detail_cache, '_release_load_lock_locked', release_after_store)
+    assert get_cached_contract_detail('BTCUSDT', loader=loader, now_ms=ANCHOR_NOW_MS) == {'symbol': 'BTCUSDT'}
+    assert contract_detail_cache._CONTRACT_DETAIL_LOAD_LOCKS == {}
+
+
+def test_prewarm_contract_detail_cache_loads_top_symbols(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(contract_detail_cache, 'get_contract_detail', lambda symbol: loaded.append(('detail', symbol)) or {})
+    monkeypatch.setattr(contract_detail_cache, 'get_contract_structure_score', lambda symbol: loaded.append(('score', symbol)) or {})
+    monkeypatch.setattr(
+        contract_detail_cache,
+        'load_contract_chart_series',
+        lambda symbol, range_key: loaded.append(('series', symbol, range_key)) or {},
+    )
+    monkeypatch.setattr(
+        contract_detail_cache,
+        'get_market_ticker_symbols',
+        lambda rank_type, limit: ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'][:limit],
+    )
+
+    summary = prewarm_contract_detail_cache(2, ranges=['24h'])
+
+    assert summary['symbols'] == 2
+    assert loaded == [
+        ('detail', 'BTCUSDT'), ('score', 'BTCUSDT'), ('series', 'BTCUSDT', '24h'),
+        ('detail', 'ETHUSDT'), ('score', 'ETHUSDT'), ('series', 'ETHUSDT', '24h'),
+    ]
+    assert get_contract_detail_cache_stats()['size'] == 6
+
+
+def test_start_contract_detail_prewarm_async_skips_while_running(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def fake_prewarm(top_n):
+        calls.append(top_n)
+        release.wait(1)
+
+    monkeypatch.setattr(contract_detail_cache, 'prewarm_contract_detail_cache', fake_prewarm)
+
+    assert start_contract_detail_prewarm_async(0) is False
+    assert start_contract_detail_prewarm_async(3) is True
+    deadline = time.time() + 1
+    while not calls and time.time() < deadline:
+        time.sleep(0.01)
+    assert start_contract_detail_prewarm_async(3) is False
+    release.set()
+    deadline = time.time() + 1
+    while contract_detail_cache.CONTRACT_DETAIL_PREWARM_LOCK.locked() and time.time() < deadline:
+        time.sleep(0.01)
+    assert calls == [3]
@@ -11,6 +11,7 @@ from coinx.repositories.funding_rate import (
 )
 from coinx.models import MarketFundingRate
 from coinx.repositories import funding_rate as funding_rate_repository
+from coinx.repositories import funding_rate_cache
 
 
 def test_funding_history_cutoff_uses_unix_time_without_timezone_offset(monkeypatch):
@@ -358,6 +359,10 @@ class TestLoadAbnormalFundingRates:
 class TestCollectFundingRates:
     """Test collect_funding_rates function"""
 
+    @pytest.fixture(autouse=True)
+    def skip_other_exchange_refresh(self, monkeypatch):
+        monkeypatch.setattr(funding_rate_repository, 'refresh_exchange_funding_rates', lambda exchanges, session=None: {})
+
     @patch('coinx.repositories.funding_rate.fetch_all_premium_index')
     @patch('coinx.repositories.funding_rate.get_http_session')
     def test_collect_success(self, mock_http_session, mock_fetch_all, db_session):
@@ -422,3 +427,76 @@ class TestCollectFundingRates:
         result = collect_funding_rates(db_session=db_session)
 
         assert result == 2
+
+    @patch('coinx.repositories.funding_rate.fetch_all_premium_index')
+    @patch('coinx.repositories.funding_rate.get_http_session')
+    def test_collect_publishes_all_exchanges_to_cache(self, mock_http_session, mock_fetch_all, db_session, monkeypatch):
+        """Binance full snapshot and other exchanges are published to the latest cache"""
+        mock_fetch_all.return_value = [
+            {
+                'symbol': 'BTCUSDT',
+                'period': '5m',
+                'event_time': 1698768000000,
+                'funding_rate': 0.0001,
+                'predicted_rate': 0.00012,
+                'next_funding_time': 1698796800000,
+                'mark_price': 34000.0,
+            },
+            {
+                'symbol': 'ETHUSDT',
+                'period': '5m',
+                'event_time': 1698768000000,
+                'funding_rate': 0.0002,
+                'predicted_rate': None,
+                'next_funding_time': 1698796800000,
+                'mark_price': 1800.0,
+            },
+        ]
+        monkeypatch.setattr(funding_rate_repository, 'refresh_exchange_funding_rates', funding_rate_cache.refresh_exchange_funding_rates)
+        monkeypatch.setattr(funding_rate_cache, 'EXCHANGE_FUNDING_LOADERS', {
+            'okx': lambda: {'BTCUSDT': {'fundingRate': '0.0003', 'nextFundingTime': '1698796800000'}},
+            'gate': Mock(side_effect=RuntimeError('boom')),
+        })
+
+        result = collect_funding_rates(symbols=['BTCUSDT'], db_session=db_session, exchanges=['binance', 'okx', 'gate'])
+
+        assert result == 1
+        funding_rate_cache.reset_funding_rate_cache()
+        binance_rates = funding_rate_cache.load_cached_funding_rates('binance', session=db_session)
+        assert set(binance_rates) == {'BTCUSDT', 'ETHUSDT'}
+        assert binance_rates['BTCUSDT']['predicted_rate'] == 0.00012
+        assert funding_rate_cache.load_cached_funding_rate_maps(['okx', 'gate'], ['BTCUSDT'], session=db_session) == {
+            'okx': {'BTCUSDT': 0.0003},
+            'gate': {},
+        }
+
+
+def test_homepage_funding_rates_prefer_latest_cache(db_session):
+    from coinx.repositories.homepage_series import _load_homepage_funding_rates
+
+    save_funding_rates([{
+        'symbol': 'BTCUSDT',
+        'period': '5m',
+        'event_time': 1698768000000,
+        'funding_rate': 0.0001,
+        'predicted_rate': 0.0001,
+        'next_funding_time': 1698796800000,
+        'mark_price': 34000.0,
+        'exchange': 'binance',
+    }], session=db_session)
+
+    assert _load_homepage_funding_rates(['BTCUSDT'], db_session)['BTCUSDT']['funding_rate'] == 0.0001
+
+    funding_rate_cache.publish_funding_rates('binance', [
+        {'symbol': 'BTCUSDT', 'funding_rate': 0.0005, 'predicted_rate': 0.0006, 'next_funding_time': 1698796800000},
+    ], session=db_session)
+
+    result = _load_homepage_funding_rates(['BTCUSDT', 'ETHUSDT'], db_session)
+    assert result == {'BTCUSDT': {
+        'symbol': 'BTCUSDT',
+        'funding_rate': 0.0005,
+        'predicted_rate': 0.0006,
+        'next_funding_time': 1698796800000,
+        'mark_price': None,
+        'event_time': None,
+    }}
@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from coinx.repositories import funding_rate as funding_rate_repository
+from coinx.repositories import funding_rate_page
+from coinx.repositories.funding_rate import load_funding_rate_sparklines, load_latest_funding_rate_page, save_funding_rates
+from coinx.repositories.funding_rate_cache import publish_funding_rates
+from coinx.repositories.funding_rate_page import get_funding_rate_page_snapshot, publish_funding_rate_page
+
+
+EVENT_TIME = 1698768000000
+
+
+def funding_record(symbol, funding_rate, predicted_rate, event_time=EVENT_TIME):
+    return {
+        'symbol': symbol,
+        'period': '5m',
+        'exchange': 'binance',
+        'event_time': event_time,
+        'funding_rate': funding_rate,
+        'predicted_rate': predicted_rate,
+        'next_funding_time': event_time + 3600000,
+        'mark_price': 100.0,
+    }
+
+
+@pytest.fixture()
+def seeded_page(db_session, test_db, monkeypatch):
+    save_funding_rates([
+        funding_record('BTCUSDT', 0.0005, 0.0001, EVENT_TIME - 300000),
+        funding_record('BTCUSDT', 0.0001, 0.0002),
+        funding_record('ETHUSDT', -0.0020, None),
+        funding_record('SOLUSDT', 0.0003, -0.0015),
+        funding_record('DOGEUSDT', None, None),
+        funding_record('XRPUSDT', 0.0003, 0.0004),
+    ], session=db_session)
+    publish_funding_rates('binance', [{'symbol': 'BTCUSDT', 'funding_rate': 0.0001}], fetched_time=EVENT_TIME, session=db_session)
+    monkeypatch.setattr(funding_rate_page, 'get_session', sessionmaker(bind=test_db))
+    return db_session
+
+
+@pytest.mark.parametrize('sort_by', ['predicted_rate', 'abs_predicted_rate', 'funding_rate', 'abs_funding_rate', 'unknown'])
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+def test_funding_rate_page_snapshot_matches_sql(seeded_page, sort_by, sort_order):
+    for keyword, abnormal_only, page in [('', False, 1), ('', False, 2), ('usdt', True, 1), ('sol', False, 1)]:
+        kwargs = {
+            'keyword': keyword,
+            'show_abnormal_only': abnormal_only,
+            'sort_by': sort_by,
+            'sort_order': sort_order,
+            'page': page,
+            'page_size': 3,
+            'threshold': 0.001,
+        }
+        assert load_latest_funding_rate_page(**kwargs) == load_latest_funding_rate_page(**kwargs, session=seeded_page)
+
+
+def test_publish_funding_rate_page_merges_new_records_without_reloading(seeded_page, monkeypatch):
+    assert get_funding_rate_page_snapshot().source_time == EVENT_TIME
+
+    def fail_session():
+        raise AssertionError('should not query database')
+
+    monkeypatch.setattr(funding_rate_page, 'get_session', fail_session)
+    publish_funding_rate_page([funding_record('ETHUSDT', 0.0001, 0.0001, EVENT_TIME + 300000)], EVENT_TIME + 300000)
+
+    result = load_latest_funding_rate_page(sort_by='funding_rate', sort_order='asc', page_size=10)
+
+    assert [row['symbol'] for row in result['data']] == ['DOGEUSDT', 'BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT']
+    assert result['stats'] == {'total': 5, 'abnormal': 1, 'positive': 4, 'negative': 0}
+
+
+def test_funding_rate_page_reloads_outside_lock_and_serves_old_snapshot(seeded_page, monkeypatch):
+    old_snapshot = get_funding_rate_page_snapshot()
+    loading = threading.Event()
+    release = threading.Event()
+    load_rows = funding_rate_page._load_latest_rows
+
+    def slow_load(db, period):
+        # 回读数据库期间不持有状态锁
+        assert funding_rate_page.FUNDING_RATE_PAGE_LOCK.acquire(blocking=False)
+        funding_rate_page.FUNDING_RATE_PAGE_LOCK.release()
+        loading.set()
+        release.wait(5)
+        return load_rows(db, period)
+
+    monkeypatch.setattr(funding_rate_page, '_load_latest_rows', slow_load)
+    monkeypatch.setattr(funding_rate_page, 'FUNDING_RATE_PAGE_RECHECK_SECONDS', 0)
+    reloaded = []
+    thread = threading.Thread(target=lambda: reloaded.append(get_funding_rate_page_snapshot(force=True)))
+    thread.start()
+    assert loading.wait(5)
+
+    # 回读期间读请求直接返回旧快照，不排队等待
+    assert get_funding_rate_page_snapshot() is old_snapshot
+
+    release.set()
+    thread.join(5)
+    assert reloaded[0] is not old_snapshot
+    assert reloaded[0].source_time == EVENT_TIME
+
+
+def test_funding_rate_sparklines_cached_per_snapshot(seeded_page, monkeypatch):
+    calls = []
+    original = funding_rate_repository._query_funding_rate_sparklines
+
+    def counting_query(symbols, hours, exchange, session=None):
+        calls.append(tuple(symbols))
+        return original(symbols, hours, exchange, session=seeded_page)
+
+    monkeypatch.setattr(funding_rate_repository, '_query_funding_rate_sparklines', counting_query)
+    monkeypatch.setattr(funding_rate_repository, '_history_cutoff_time_ms', lambda hours: 0)
+
+    first = load_funding_rate_sparklines(['BTCUSDT', 'ETHUSDT'], hours=24)
+    second = load_funding_rate_sparklines(['BTCUSDT', 'ETHUSDT'], hours=24)
+    assert first == second == {'BTCUSDT': [0.0005, 0.0001], 'ETHUSDT': [-0.002]}
+    assert calls == [('BTCUSDT', 'ETHUSDT')]
+
+    publish_funding_rate_page([funding_record('ETHUSDT', 0.0001, 0.0001, EVENT_TIME + 300000)], EVENT_TIME + 300000)
+    load_funding_rate_sparklines(['BTCUSDT', 'ETHUSDT'], hours=24)
+    assert len(calls) == 2
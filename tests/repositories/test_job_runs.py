@@ -0,0 +1,98 @@
+import pytest
+
+from coinx.models import JobRun
+from coinx.repositories.job_runs import (
+    extract_duration_breakdowns,
+    get_job_run_stats,
+    percentile,
+    record_job_run,
+    reset_job_run_state,
+)
+
+
+NOW_MS = 1711526400000
+
+
+def _repair_stage(api_ms, binance_api_ms, okx_api_ms):
+    return {
+        'duration_breakdown_ms': {'api_ms': api_ms, 'db_write_ms': 10.4, 'parse_ms': 0.2},
+        'duration_breakdown_by_exchange': {
+            'binance': {'api_ms': binance_api_ms, 'db_write_ms': 10.4},
+            'okx': {'api_ms': okx_api_ms},
+        },
+    }
+
+
+def test_extract_duration_breakdowns_sums_stages_and_drops_zero_values():
+    summary = {'status': 'success', 'stages': [_repair_stage(100, 60, 40), _repair_stage(50, 30, 20)]}
+
+    assert extract_duration_breakdowns(summary) == {
+        'stages': {'api_ms': 150, 'db_write_ms': 21},
+        'exchanges': {
+            'binance': {'api_ms': 90, 'db_write_ms': 21},
+            'okx': {'api_ms': 60},
+        },
+    }
+    assert extract_duration_breakdowns({'status': 'success', 'count': 3}) is None
+    assert extract_duration_breakdowns(None) is None
+
+
+def test_job_run_stats_report_percentiles_per_job_stage_and_exchange(db_session):
+    for index in range(20):
+        record_job_run(
+            'repair_market_rolling_job',
+            'success' if index else 'error',
+            finished_at_ms=NOW_MS - index * 60_000,
+            duration_ms=(index + 1) * 100,
+            summary=_repair_stage((index + 1) * 10, (index + 1) * 6, (index + 1) * 4),
+            session=db_session,
+        )
+    record_job_run('collect_funding_rates_job', 'success', finished_at_ms=NOW_MS, duration_ms=80, session=db_session)
+    # 窗口外的记录不参与统计
+    record_job_run('collect_funding_rates_job', 'success', finished_at_ms=NOW_MS - 2 * 3600_000, duration_ms=9000, session=db_session)
+
+    stats = get_job_run_stats(1, session=db_session, now_ms=NOW_MS)
+
+    rolling = stats['repair_market_rolling_job']
+    assert rolling['run_count'] == 20
+    assert rolling['error_count'] == 1
+    assert (rolling['p50_ms'], rolling['p95_ms']) == (1000, 1900)
+    assert rolling['stages']['api_ms'] == {'p50_ms': 100, 'p95_ms': 190}
+    assert rolling['exchanges']['okx']['api_ms'] == {'p50_ms': 40, 'p95_ms': 76}
+    assert stats['collect_funding_rates_job'] == {
+        'run_count': 1,
+        'error_count': 0,
+        'p50_ms': 80,
+        'p95_ms': 80,
+        'stages': {},
+        'exchanges': {},
+    }
+    assert db_session.query(JobRun).count() == 22
+
+
+def test_record_job_run_prunes_rows_past_retention(db_session, monkeypatch):
+    monkeypatch.setattr('coinx.config.JOB_RUN_HISTORY_RETENTION_DAYS', 1)
+    db_session.add(JobRun(job_id='old', status='success', finished_at=NOW_MS - 2 * 86400_000))
+    db_session.commit()
+
+    record_job_run('new', 'success', finished_at_ms=NOW_MS, session=db_session)
+
+    assert [row.job_id for row in db_session.query(JobRun).all()] == ['new']
+    assert percentile([], 95) is None
+
+
+def test_job_runs_skip_indexes_and_runtime_create_on_starrocks(db_session, monkeypatch):
+    from sqlalchemy import create_engine, inspect
+
+    monkeypatch.setattr('coinx.config.DB_TYPE', 'starrocks')
+    engine = create_engine('sqlite://')
+    JobRun.__table__.create(bind=engine)
+    assert inspect(engine).get_indexes('job_runs') == []
+
+    # 表已由 schema_starrocks.sql 建好时照常写入
+    assert record_job_run('new', 'success', finished_at_ms=NOW_MS, session=db_session) is not None
+
+    reset_job_run_state()
+    JobRun.__table__.drop(bind=db_session.get_bind())
+    with pytest.raises(RuntimeError, match='schema_starrocks.sql'):
+        record_job_run('new', 'success', finished_at_ms=NOW_MS, session=db_session)
@@ -0,0 +1,148 @@
+"""Tests for market structure score snapshot persistence"""
+from coinx.models import MarketStructureScore
+from coinx.repositories import market_structure_score_store as store
+from coinx.repositories.market_structure_score_store import (
+    delete_old_market_structure_scores,
+    load_market_structure_score_history,
+    load_market_structure_score_snapshot,
+    refresh_market_structure_score_snapshot,
+    save_market_structure_score_snapshot,
+)
+
+
+ANCHOR_TIME = 1711526400000
+STEP_MS = 5 * 60 * 1000
+
+
+def _report(symbol, total_score, status='complete', trade_signal='偏多', risk_level='低'):
+    return {
+        'symbol': symbol,
+        'status': status,
+        'total_score': total_score,
+        'trend_score': 30,
+        'momentum_score': 0,
+        'position_score': 10,
+        'sentiment_score': 0,
+        'risk_score': 0,
+        'trade_signal': trade_signal,
+        'risk_level': risk_level,
+        'current_price': 100.5,
+        'current_open_interest_value': 1_000_000,
+        'exchange_scores': [{'exchange': 'binance', 'weight': 1.0, 'total_score': total_score}],
+        'exchange_diagnostics': [{'exchange': 'okx', 'included': False, 'reason': 'missing_oi'}],
+    }
+
+
+def _snapshot(anchor_time, reports):
+    return {'data': reports, 'cache_update_time': anchor_time, 'summary': {}}
+
+
+def test_save_and_load_latest_snapshot_reranks_requested_symbols(db_session):
+    save_market_structure_score_snapshot(_snapshot(ANCHOR_TIME - STEP_MS, [_report('BTCUSDT', 10)]), session=db_session)
+    save_market_structure_score_snapshot(
+        _snapshot(ANCHOR_TIME, [_report('BTCUSDT', 40), _report('ETHUSDT', 65, trade_signal='强多'), _report('SOLUSDT', -5, trade_signal='震荡')]),
+        session=db_session,
+    )
+
+    assert load_market_structure_score_snapshot(
+        symbols=['SOLUSDT', 'ETHUSDT', 'XRPUSDT'],
+        session=db_session,
+        now_ms=ANCHOR_TIME + 2 * STEP_MS,
+    ) is None
+    snapshot = load_market_structure_score_snapshot(
+        symbols=['SOLUSDT', 'ETHUSDT', 'XRPUSDT'],
+        session=db_session,
+        now_ms=ANCHOR_TIME + 2 * STEP_MS,
+        allow_partial=True,
+    )
+
+    assert snapshot['missing_symbols'] == ['XRPUSDT']
+    assert snapshot['cache_update_time'] == ANCHOR_TIME
+    assert [item['symbol'] for item in snapshot['data']] == ['ETHUSDT', 'SOLUSDT']
+    assert [item['rank_index'] for item in snapshot['data']] == [1, 2]
+    assert snapshot['data'][0]['exchange_diagnostics'][0]['reason'] == 'missing_oi'
+    assert snapshot['summary']['total_symbols'] == 2
+    assert snapshot['summary']['empty_symbols'] == 1
+    assert snapshot['summary']['strong_long_count'] == 1
+
+
+def test_save_snapshot_overwrites_same_anchor(db_session):
+    save_market_structure_score_snapshot(_snapshot(ANCHOR_TIME, [_report('BTCUSDT', 10), _report('ETHUSDT', 20)]), session=db_session)
+    save_market_structure_score_snapshot(_snapshot(ANCHOR_TIME, [_report('BTCUSDT', 30)]), session=db_session)
+
+    rows = db_session.query(MarketStructureScore).all()
+
+    assert len(rows) == 1
+    assert float(rows[0].total_score) == 30
+
+
+def test_load_snapshot_ignores_stale_anchor(db_session):
+    save_market_structure_score_snapshot(_snapshot(ANCHOR_TIME, [_report('BTCUSDT', 10)]), session=db_session)
+
+    snapshot = load_market_structure_score_snapshot(
+        session=db_session,
+        now_ms=ANCHOR_TIME + 10 * STEP_MS,
+        max_stale_seconds=900,
+    )
+
+    assert snapshot is None
+
+
+def test_history_returns_compact_score_series(db_session):
+    for offset, score in enumerate([5, 15, 25]):
+        save_market_structure_score_snapshot(
+            _snapshot(ANCHOR_TIME + offset * STEP_MS, [_report('BTCUSDT', score), _report('ETHUSDT', -score)]),
+            session=db_session,
+        )
+
+    history = load_market_structure_score_history('BTCUSDT', hours=1, session=db_session, now_ms=ANCHOR_TIME + 3 * STEP_MS)
+
+    assert [item['time'] for item in history] == [ANCHOR_TIME, ANCHOR_TIME + STEP_MS, ANCHOR_TIME + 2 * STEP_MS]
+    assert [item['total_score'] for item in history] == [5, 15, 25]
+    assert history[0]['trade_signal'] == '偏多'
+    assert 'exchange_scores' not in history[0]
+
+
+def test_delete_old_scores_keeps_retention_window(db_session):
+    save_market_structure_score_snapshot(_snapshot(ANCHOR_TIME - 3 * 60 * 60 * 1000, [_report('BTCUSDT', 10)]), session=db_session)
+    save_market_structure_score_snapshot(_snapshot(ANCHOR_TIME, [_report('BTCUSDT', 20)]), session=db_session)
+
+    deleted = delete_old_market_structure_scores(retention_hours=2, session=db_session, now_ms=ANCHOR_TIME)
+
+    assert deleted == 1
+    assert db_session.query(MarketStructureScore).count() == 1
+
+
+def test_refresh_skips_anchor_already_stored(monkeypatch):
+    calls = []
+    monkeypatch.setattr(store, 'get_latest_market_structure_score_anchor', lambda: ANCHOR_TIME)
+    monkeypatch.setattr(store, 'get_market_structure_score_snapshot', lambda **kwargs: calls.append(kwargs))
+
+    summary = refresh_market_structure_score_snapshot(now_ms=ANCHOR_TIME + STEP_MS + 1000, symbols=['BTCUSDT'])
+
+    assert summary['status'] == 'skipped'
+    assert calls == []
+
+
+def test_load_stored_score_computes_only_symbols_missing_from_snapshot(db_session, monkeypatch):
+    save_market_structure_score_snapshot(_snapshot(ANCHOR_TIME, [_report('BTCUSDT', 10), _report('ETHUSDT', 30)]), session=db_session)
+    computed = []
+    monkeypatch.setattr(
+        store,
+        'load_market_structure_score_snapshot',
+        lambda symbols=None, allow_partial=False: load_market_structure_score_snapshot(
+            symbols=symbols, session=db_session, now_ms=ANCHOR_TIME + STEP_MS, allow_partial=allow_partial,
+        ),
+    )
+    monkeypatch.setattr(
+        store,
+        'get_market_structure_score_snapshot',
+        lambda symbols=None: computed.append(symbols) or {'data': [_report('SOLUSDT', 20)], 'cache_update_time': ANCHOR_TIME, 'summary': {}},
+    )
+
+    snapshot = store.load_market_structure_score_or_compute(symbols=['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'NEWUSDT'])
+
+    assert computed == [['SOLUSDT', 'NEWUSDT']]
+    assert [(item['symbol'], item['rank_index']) for item in snapshot['data']] == [('ETHUSDT', 1), ('SOLUSDT', 2), ('BTCUSDT', 3)]
+    assert snapshot['summary']['empty_symbols'] == 1
+    assert 'missing_symbols' not in snapshot
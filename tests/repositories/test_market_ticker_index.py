@@ -0,0 +1,103 @@
+import threading
+
+from coinx.models import MarketTickers
+from coinx.repositories import market_ticker_index
+from coinx.repositories.market_ticker_index import (
+    build_market_ticker_index,
+    get_market_ticker_index,
+    refresh_market_ticker_index,
+)
+from coinx.repositories.market_tickers import get_latest_close_time, get_market_ticker_symbols, get_market_tickers
+
+
+CLOSE_TIME = 1711526400000
+
+
+def seed_snapshot(db_session, close_time, count=6):
+    for i in range(count):
+        db_session.add(MarketTickers(
+            symbol=f'COIN{i}USDT',
+            price_change_percent=(-1) ** i * (i + 0.5),
+            last_price=100.0 + i,
+            volume=1000.0 + (i * 37) % 11,
+            quote_volume=10000.0 + (i * 53) % 17,
+            close_time=close_time,
+        ))
+    db_session.commit()
+
+
+def test_market_ticker_index_matches_sql_ranking(db_session):
+    seed_snapshot(db_session, CLOSE_TIME - 300000, count=3)
+    seed_snapshot(db_session, CLOSE_TIME)
+
+    index = refresh_market_ticker_index(session=db_session)
+
+    assert index.close_time == CLOSE_TIME
+    for rank_type in ('price_change', 'volume', 'quote_volume'):
+        for direction in ('down', 'up'):
+            expected = [row.symbol for row in get_market_tickers(rank_type, direction, 4, session=db_session)]
+            assert index.rank_symbols(rank_type, direction, 4) == expected
+
+
+def test_market_ticker_queries_read_index_without_database(db_session, monkeypatch):
+    seed_snapshot(db_session, CLOSE_TIME)
+    refresh_market_ticker_index(session=db_session)
+
+    def fail_session():
+        raise AssertionError('should not query database')
+
+    monkeypatch.setattr(market_ticker_index, 'get_session', fail_session)
+
+    rows = get_market_tickers(rank_type='price_change', direction='up', limit=2)
+    assert [row.symbol for row in rows] == ['COIN4USDT', 'COIN2USDT']
+    assert rows[0].last_price == 104.0
+    assert get_market_ticker_symbols(rank_type='quote_volume', limit=1) == ['COIN5USDT']
+    assert get_latest_close_time() == CLOSE_TIME
+
+
+def test_market_ticker_index_reloads_outside_lock_and_serves_old_index(db_session, monkeypatch):
+    seed_snapshot(db_session, CLOSE_TIME - 300000)
+    old_index = refresh_market_ticker_index(session=db_session)
+    seed_snapshot(db_session, CLOSE_TIME)
+
+    loading = threading.Event()
+    release = threading.Event()
+    load_index = market_ticker_index._load_index_from_db
+
+    def slow_load(db, close_time):
+        # 读库与建索引期间不持有状态锁
+        assert market_ticker_index.MARKET_TICKER_INDEX_LOCK.acquire(blocking=False)
+        market_ticker_index.MARKET_TICKER_INDEX_LOCK.release()
+        loading.set()
+        release.wait(5)
+        return load_index(db, close_time)
+
+    monkeypatch.setattr(market_ticker_index, '_load_index_from_db', slow_load)
+    monkeypatch.setattr(market_ticker_index, 'MARKET_TICKER_INDEX_RECHECK_SECONDS', 0)
+    refreshed = []
+    thread = threading.Thread(target=lambda: refreshed.append(refresh_market_ticker_index(session=db_session)))
+    thread.start()
+    assert loading.wait(5)
+
+    # 重建期间读请求直接返回旧索引，不排队等待
+    assert get_market_ticker_index() is old_index
+
+    release.set()
+    thread.join(5)
+    assert refreshed[0].close_time == CLOSE_TIME
+    monkeypatch.setattr(market_ticker_index, 'MARKET_TICKER_INDEX_RECHECK_SECONDS', 30)
+    assert get_market_ticker_index() is refreshed[0]
+
+
+def test_build_market_ticker_index_orders_missing_values_like_sql():
+    rows = [
+        MarketTickers(symbol='AUSDT', price_change_percent=None, quote_volume=None),
+        MarketTickers(symbol='BUSDT', price_change_percent=2.0, quote_volume=5.0),
+        MarketTickers(symbol='CUSDT', price_change_percent=-1.0, quote_volume=9.0),
+    ]
+
+    index = build_market_ticker_index(rows, CLOSE_TIME)
+
+    assert index.rank_symbols('price_change', 'down', 10) == ['AUSDT', 'CUSDT', 'BUSDT']
+    assert index.rank_symbols('price_change', 'up', 10) == ['BUSDT', 'CUSDT', 'AUSDT']
+    assert index.rank_symbols('quote_volume', 'up', 10) == ['CUSDT', 'BUSDT', 'AUSDT']
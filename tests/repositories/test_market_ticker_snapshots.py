@@ -0,0 +1,118 @@
+import time
+
+from coinx.models import MarketTickers, MarketTickerSnapshot
+from coinx.repositories.market_ticker_snapshots import (
+    decode_market_ticker_snapshot,
+    encode_market_ticker_snapshot,
+    get_market_ticker_history,
+    load_market_ticker_snapshot,
+    migrate_market_tickers_to_snapshots,
+)
+from coinx.repositories.market_tickers import save_market_tickers
+from coinx.scheduler import run_market_ticker_retention
+
+
+CLOSE_TIME = 1711526400000
+STEP_MS = 5 * 60 * 1000
+
+
+def build_records(offset=0.0, count=3):
+    return [
+        {
+            'symbol': f'COIN{i}USDT',
+            'price_change_percent': str(-1.5 + i + offset),
+            'last_price': str(100.25 + i + offset),
+            'quote_volume': 10000.0 + i,
+            'open_time': CLOSE_TIME - 86400000,
+            'count': 100 + i,
+        }
+        for i in range(count)
+    ]
+
+
+def seed_legacy_rows(db_session, close_time, count=2):
+    for i in range(count):
+        db_session.add(MarketTickers(symbol=f'COIN{i}USDT', last_price=50.0 + i, close_time=close_time))
+    db_session.commit()
+
+
+def test_market_ticker_snapshot_round_trips_columnar_payload():
+    symbol_count, payload = encode_market_ticker_snapshot(build_records())
+
+    records = decode_market_ticker_snapshot(payload, close_time=CLOSE_TIME)
+
+    assert symbol_count == 3
+    assert records[1] == {
+        'symbol': 'COIN1USDT',
+        'close_time': CLOSE_TIME,
+        'price_change': None,
+        'price_change_percent': -0.5,
+        'weighted_avg_price': None,
+        'last_price': 101.25,
+        'last_qty': None,
+        'open_price': None,
+        'high_price': None,
+        'low_price': None,
+        'volume': None,
+        'quote_volume': 10001.0,
+        'open_time': CLOSE_TIME - 86400000,
+        'first_id': None,
+        'last_id': None,
+        'count': 101,
+    }
+
+
+def test_retention_job_keeps_recent_rows_and_compact_history(db_session, monkeypatch):
+    monkeypatch.setattr('coinx.scheduler.MARKET_TICKERS_KEEP_ROW_SNAPSHOTS', 2)
+    monkeypatch.setattr('coinx.scheduler.MARKET_TICKER_SNAPSHOT_RETENTION_DAYS', 0)
+
+    for step in range(4):
+        save_market_tickers(build_records(offset=step), collect_time=CLOSE_TIME + step * STEP_MS, session=db_session)
+
+    # 保存本身不再清理明细行
+    assert db_session.query(MarketTickers.close_time).distinct().count() == 4
+    summary = run_market_ticker_retention(session=db_session)
+
+    assert (summary['pruned_rows'], summary['deleted_snapshots']) == (6, 0)
+    row_times = {row.close_time for row in db_session.query(MarketTickers.close_time).distinct()}
+    assert row_times == {CLOSE_TIME + 2 * STEP_MS, CLOSE_TIME + 3 * STEP_MS}
+    assert db_session.query(MarketTickerSnapshot).count() == 4
+    assert [record['symbol'] for record in load_market_ticker_snapshot(session=db_session)] == ['COIN0USDT', 'COIN1USDT', 'COIN2USDT']
+
+    history = get_market_ticker_history('COIN2USDT', session=db_session)
+    assert [record['close_time'] for record in history] == [CLOSE_TIME + step * STEP_MS for step in range(4)]
+    assert [record['last_price'] for record in history] == [102.25, 103.25, 104.25, 105.25]
+
+
+def test_migrate_market_tickers_to_snapshots_is_resumable(db_session):
+    seed_legacy_rows(db_session, CLOSE_TIME)
+    seed_legacy_rows(db_session, CLOSE_TIME + STEP_MS)
+    seed_legacy_rows(db_session, CLOSE_TIME + 2 * STEP_MS)
+
+    assert [record['close_time'] for record in get_market_ticker_history('COIN1USDT', session=db_session)] == [
+        CLOSE_TIME, CLOSE_TIME + STEP_MS, CLOSE_TIME + 2 * STEP_MS,
+    ]
+
+    summary = migrate_market_tickers_to_snapshots(batch_size=2, keep_row_snapshots=1, session=db_session)
+
+    assert summary['snapshots'] == 3
+    assert summary['rows'] == 6
+    assert summary['pruned_rows'] == 4
+    assert db_session.query(MarketTickers).count() == 2
+    history = get_market_ticker_history('COIN1USDT', start_time=CLOSE_TIME + STEP_MS, session=db_session)
+    assert [(record['close_time'], record['last_price']) for record in history] == [
+        (CLOSE_TIME + STEP_MS, 51.0), (CLOSE_TIME + 2 * STEP_MS, 51.0),
+    ]
+    assert migrate_market_tickers_to_snapshots(session=db_session)['snapshots'] == 0
+
+
+def test_retention_job_deletes_snapshots_past_retention_days(db_session, monkeypatch):
+    monkeypatch.setattr('coinx.scheduler.MARKET_TICKER_SNAPSHOT_RETENTION_DAYS', 7)
+    recent_time = int(time.time() * 1000) // STEP_MS * STEP_MS
+    save_market_tickers(build_records(), collect_time=CLOSE_TIME, session=db_session)
+    save_market_tickers(build_records(), collect_time=recent_time, session=db_session)
+
+    summary = run_market_ticker_retention(session=db_session)
+
+    assert summary['deleted_snapshots'] == 1
+    assert [row.close_time for row in db_session.query(MarketTickerSnapshot.close_time).all()] == [recent_time]
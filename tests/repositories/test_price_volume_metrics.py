@@ -0,0 +1,114 @@
+from sqlalchemy import event
+
+from coinx import notifications
+from coinx.models import MarketKline, MarketTickers
+from coinx.repositories.price_volume_metrics import PRICE_VOLUME_WINDOW_POINTS, load_price_volume_metrics
+from coinx.repositories.series import upsert_series_records
+
+
+FIVE_MINUTES_MS = 5 * 60 * 1000
+ANCHOR_TIME = 1711526400000
+
+
+def kline_record(symbol, open_time, close_price=100.0, quote_volume=100.0):
+    return {
+        'symbol': symbol,
+        'period': '5m',
+        'open_time': open_time,
+        'close_time': open_time + FIVE_MINUTES_MS - 1,
+        'open_price': 100.0,
+        'high_price': 110.0,
+        'low_price': 90.0,
+        'close_price': close_price,
+        'volume': 1.0,
+        'quote_volume': quote_volume,
+    }
+
+
+def seed_klines(db_session, symbol, points, anchor_time=ANCHOR_TIME):
+    records = [
+        kline_record(symbol, anchor_time - offset * FIVE_MINUTES_MS, quote_volume=100.0 + offset)
+        for offset in range(points)
+    ]
+    upsert_series_records('binance', 'klines', records, session=db_session)
+
+
+def capture_kline_selects(db_session):
+    statements = []
+
+    def capture(_conn, _cursor, statement, _params, _context, _executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')) and 'market_klines' in statement:
+            statements.append(statement)
+
+    event.listen(db_session.bind, 'before_cursor_execute', capture)
+    return statements, lambda: event.remove(db_session.bind, 'before_cursor_execute', capture)
+
+
+def test_store_matches_window_query_and_follows_writes_without_reading_klines(db_session, monkeypatch):
+    seed_klines(db_session, 'AUSDT', 300)
+    seed_klines(db_session, 'BUSDT', 10)
+    db_session.add_all([
+        MarketTickers(symbol='AUSDT', quote_volume=1000, close_time=ANCHOR_TIME + FIVE_MINUTES_MS),
+        MarketTickers(symbol='BUSDT', quote_volume=900, close_time=ANCHOR_TIME + FIVE_MINUTES_MS),
+        MarketTickers(symbol='CUSDT', quote_volume=800, close_time=ANCHOR_TIME + FIVE_MINUTES_MS),
+    ])
+    db_session.commit()
+    monkeypatch.setattr(notifications, 'latest_closed_5m_open_time', lambda now_ms: ANCHOR_TIME)
+
+    def fail_store(db, scope_limit):
+        raise RuntimeError('store disabled')
+
+    with monkeypatch.context() as patched:
+        patched.setattr(notifications, '_load_price_volume_metrics_from_store', fail_store)
+        expected = notifications._load_price_volume_metrics(db_session, 3)
+
+    actual = notifications._load_price_volume_metrics(db_session, 3)
+
+    assert list(actual) == list(expected) == ['AUSDT', 'BUSDT', 'CUSDT']
+    assert actual['AUSDT']['kline_count'] == PRICE_VOLUME_WINDOW_POINTS
+    assert actual['CUSDT'] == {
+        'open_time': None, 'price_change': None, 'volume_ratio': None, 'kline_count': 0, 'historical_volume_count': 0,
+    }
+    for symbol in actual:
+        for name in ('open_time', 'kline_count', 'historical_volume_count'):
+            assert actual[symbol][name] == expected[symbol][name]
+        for name in ('price_change', 'volume_ratio'):
+            assert (actual[symbol][name] is None) == (expected[symbol][name] is None)
+            if actual[symbol][name] is not None:
+                assert abs(actual[symbol][name] - expected[symbol][name]) < 1e-12
+
+    next_anchor = ANCHOR_TIME + FIVE_MINUTES_MS
+    upsert_series_records('binance', 'klines', [
+        kline_record('AUSDT', next_anchor, close_price=103.0, quote_volume=1000.0),
+    ], session=db_session)
+    monkeypatch.setattr(notifications, 'latest_closed_5m_open_time', lambda now_ms: next_anchor)
+
+    statements, stop = capture_kline_selects(db_session)
+    try:
+        metrics = notifications._load_price_volume_metrics(db_session, 1)
+    finally:
+        stop()
+
+    assert statements == []
+    assert metrics['AUSDT']['open_time'] == next_anchor
+    assert abs(metrics['AUSDT']['price_change'] - 0.03) < 1e-12
+    assert metrics['AUSDT']['kline_count'] == PRICE_VOLUME_WINDOW_POINTS
+    historical = [100.0 + offset for offset in range(PRICE_VOLUME_WINDOW_POINTS - 1)]
+    assert abs(metrics['AUSDT']['volume_ratio'] - 1000.0 / (sum(historical) / len(historical))) < 1e-9
+
+
+def test_lagging_symbol_is_rechecked_once_per_anchor(db_session):
+    seed_klines(db_session, 'AUSDT', 5, anchor_time=ANCHOR_TIME - FIVE_MINUTES_MS)
+
+    statements, stop = capture_kline_selects(db_session)
+    try:
+        first = load_price_volume_metrics(db_session, ['AUSDT'], ANCHOR_TIME)
+        second = load_price_volume_metrics(db_session, ['AUSDT'], ANCHOR_TIME)
+        load_price_volume_metrics(db_session, ['AUSDT'], ANCHOR_TIME + FIVE_MINUTES_MS)
+    finally:
+        stop()
+
+    assert first == second
+    assert first['AUSDT']['open_time'] == ANCHOR_TIME - FIVE_MINUTES_MS
+    assert len(statements) == 2
+    assert db_session.query(MarketKline).count() == 5
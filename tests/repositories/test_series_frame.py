@@ -0,0 +1,134 @@
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from coinx.models import MarketKline, MarketOpenInterestHist
+from coinx.repositories import market_structure_series
+from coinx.repositories.market_structure_series import (
+    _MARKET_STRUCTURE_CONTEXT_LOOKBACK_MS,
+    _MARKET_STRUCTURE_KLINE_LOOKBACK_MS,
+    _load_kline_model_map,
+    _load_open_interest_model_map,
+    _load_quote_volume_24h_map,
+    load_market_structure_exchange_maps,
+)
+from coinx.repositories.series_frame import (
+    get_cached_series_frame,
+    invalidate_series_frames,
+    load_series_frame,
+)
+
+
+FIVE_MINUTES_MS = 5 * 60 * 1000
+ANCHOR_TIME = 1711526400000
+SYMBOLS = [f'C{index}USDT' for index in range(10)]
+
+
+def seed_frame_rows(db_session, symbols=SYMBOLS, points=320, with_gaps=True):
+    for symbol_index, symbol in enumerate(symbols):
+        for offset in range(points):
+            if with_gaps and (offset + symbol_index) % 37 == 5:
+                continue
+            open_time = ANCHOR_TIME - offset * FIVE_MINUTES_MS
+            price = 100.0 + symbol_index + offset * 0.01
+            db_session.add(MarketKline(
+                exchange='binance', symbol=symbol, period='5m', open_time=open_time,
+                close_time=open_time + FIVE_MINUTES_MS - 1, open_price=price - 0.1, high_price=price + 1,
+                low_price=price - 1, close_price=price, quote_volume=1000 + offset, taker_buy_quote_volume=400,
+            ))
+            db_session.add(MarketOpenInterestHist(
+                exchange='binance', symbol=symbol, period='5m', event_time=open_time,
+                sum_open_interest=500 + offset, sum_open_interest_value=(500 + offset) * price,
+            ))
+    db_session.commit()
+
+
+def _as_fields(records_by_symbol, *field_names):
+    return {
+        symbol: {timestamp: tuple(getattr(point, name) for name in field_names) for timestamp, point in records.items()}
+        for symbol, records in records_by_symbol.items()
+    }
+
+
+def test_score_maps_from_series_frame_match_direct_queries(db_session, test_db, monkeypatch):
+    seed_frame_rows(db_session)
+    monkeypatch.setattr(market_structure_series, 'get_session', sessionmaker(bind=test_db))
+
+    oi_map, kline_map, _, quote_volume_24h_map = load_market_structure_exchange_maps(
+        db_session, 'binance', SYMBOLS, upper_bound=ANCHOR_TIME,
+    )
+
+    expected_oi = _load_open_interest_model_map(
+        db_session, MarketOpenInterestHist, SYMBOLS, upper_bound=ANCHOR_TIME, exchange='binance',
+        lookback_ms=_MARKET_STRUCTURE_CONTEXT_LOOKBACK_MS,
+    )
+    expected_kline = _load_kline_model_map(
+        db_session, MarketKline, SYMBOLS, upper_bound=ANCHOR_TIME, exchange='binance',
+        lookback_ms=_MARKET_STRUCTURE_KLINE_LOOKBACK_MS,
+    )
+    expected_quote_volume = _load_quote_volume_24h_map(db_session, MarketKline, SYMBOLS, upper_bound=ANCHOR_TIME, exchange='binance')
+
+    oi_fields = ('event_time', 'sum_open_interest', 'sum_open_interest_value')
+    kline_fields = ('open_time', 'high_price', 'low_price', 'close_price', 'quote_volume', 'taker_buy_quote_volume')
+    assert _as_fields(oi_map, *oi_fields) == _as_fields(expected_oi, *oi_fields)
+    assert _as_fields(kline_map, *kline_fields) == _as_fields(expected_kline, *kline_fields)
+    assert quote_volume_24h_map == expected_quote_volume
+    assert get_cached_series_frame('binance', ANCHOR_TIME, SYMBOLS) is not None
+
+
+def test_series_frame_only_loads_missing_symbols_and_invalidates_on_write(db_session):
+    seed_frame_rows(db_session, points=20)
+    kline_selects = []
+
+    def capture_kline_select(_conn, _cursor, statement, _params, _context, _executemany):
+        if 'FROM market_klines' in statement:
+            kline_selects.append(statement)
+
+    event.listen(db_session.bind, 'before_cursor_execute', capture_kline_select)
+    try:
+        load_series_frame(db_session, 'binance', SYMBOLS[:5], ANCHOR_TIME)
+        frame = load_series_frame(db_session, 'binance', SYMBOLS[:3], ANCHOR_TIME)
+        assert len(kline_selects) == 1
+        assert frame.covers(SYMBOLS[:5])
+
+        frame = load_series_frame(db_session, 'binance', SYMBOLS[3:7], ANCHOR_TIME)
+        assert len(kline_selects) == 2
+        assert frame.covers(SYMBOLS[:7])
+
+        invalidate_series_frames('binance', [SYMBOLS[0]])
+        assert get_cached_series_frame('binance', ANCHOR_TIME, SYMBOLS[:1]) is None
+        assert get_cached_series_frame('binance', ANCHOR_TIME, SYMBOLS[1:7]) is not None
+    finally:
+        event.remove(db_session.bind, 'before_cursor_execute', capture_kline_select)
+
+
+def test_price_volume_metrics_reuse_cached_frame_and_match_sql(db_session, monkeypatch):
+    from coinx import notifications
+    from coinx.models import MarketTickers
+    from coinx.repositories.series_frame import reset_series_frames
+
+    seed_frame_rows(db_session, symbols=['AUSDT'], points=300)
+    seed_frame_rows(db_session, symbols=['BUSDT'], points=300, with_gaps=False)
+    db_session.add_all([
+        MarketTickers(symbol='AUSDT', quote_volume=1000, close_time=ANCHOR_TIME + FIVE_MINUTES_MS),
+        MarketTickers(symbol='BUSDT', quote_volume=900, close_time=ANCHOR_TIME + FIVE_MINUTES_MS),
+    ])
+    db_session.commit()
+    monkeypatch.setattr(notifications, 'latest_closed_5m_open_time', lambda now_ms: ANCHOR_TIME)
+
+    assert notifications._load_price_volume_metrics_from_frame(db_session, 2) is None
+    load_series_frame(db_session, 'binance', ['AUSDT', 'BUSDT'], ANCHOR_TIME)
+    # AUSDT 窗口内有缺口，帧无法保证与 SQL 的最近 289 行一致，整体回退查库
+    assert notifications._load_price_volume_metrics_from_frame(db_session, 2) is None
+
+    db_session.query(MarketTickers).filter_by(symbol='BUSDT').update({'quote_volume': 2000})
+    db_session.commit()
+    reset_series_frames()
+    expected = notifications._load_price_volume_metrics(db_session, 1)
+    load_series_frame(db_session, 'binance', ['BUSDT'], ANCHOR_TIME)
+    actual = notifications._load_price_volume_metrics_from_frame(db_session, 1)
+
+    assert actual.keys() == expected.keys() == {'BUSDT'}
+    for name in ('open_time', 'kline_count', 'historical_volume_count'):
+        assert actual['BUSDT'][name] == expected['BUSDT'][name]
+    for name in ('price_change', 'volume_ratio'):
+        assert abs(actual['BUSDT'][name] - expected['BUSDT'][name]) < 1e-12
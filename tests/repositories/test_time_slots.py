@@ -0,0 +1,87 @@
+import random
+
+from coinx.repositories.homepage_series import HomepageOpenInterestPoint
+from coinx.repositories.market_structure_indicators import IndicatorRow, build_kline_matrices
+from coinx.repositories.market_structure_score import SeriesPoint, _get_time_series
+from coinx.repositories.time_slots import (
+    FIVE_MINUTES_MS,
+    TimeSlotSeries,
+    group_points_by_symbol,
+    latest_common_time,
+    union_times,
+)
+
+
+ANCHOR_TIME = 1711526400000
+
+
+def _random_points(rng, count, missing_ratio=0.2):
+    return {
+        ANCHOR_TIME - offset * FIVE_MINUTES_MS: SeriesPoint(time=ANCHOR_TIME - offset * FIVE_MINUTES_MS, close_price=rng.uniform(1, 2))
+        for offset in range(count)
+        if offset == 0 or rng.random() >= missing_ratio
+    }
+
+
+def test_time_slot_series_behaves_like_time_keyed_dict():
+    rng = random.Random(1)
+    records_by_time = _random_points(rng, 150)
+    records_by_time[ANCHOR_TIME + 1234] = SeriesPoint(time=ANCHOR_TIME + 1234)
+
+    series = TimeSlotSeries(records_by_time.items())
+
+    assert series == records_by_time
+    assert list(series) == sorted(records_by_time)
+    assert len(series) == len(records_by_time)
+    assert series.get(ANCHOR_TIME + FIVE_MINUTES_MS) is None
+    assert (ANCHOR_TIME + 1234) in series
+    assert series.latest_time() == ANCHOR_TIME + 1234
+    assert series.latest_time(upper_bound=ANCHOR_TIME) == ANCHOR_TIME
+
+
+def test_time_slot_series_window_matches_dict_lookups():
+    rng = random.Random(2)
+    records_by_time = _random_points(rng, 200)
+    series = TimeSlotSeries(records_by_time.items())
+
+    for anchor_offset in (0, 3, 150, 199, 260):
+        anchor_time = ANCHOR_TIME - anchor_offset * FIVE_MINUTES_MS
+        assert _get_time_series(series, anchor_time, 120) == _get_time_series(records_by_time, anchor_time, 120)
+
+    rows = [IndicatorRow(kline_by_time=records_by_time, anchor_time=ANCHOR_TIME), IndicatorRow(kline_by_time=series, anchor_time=ANCHOR_TIME)]
+    exists, _, _, close, _ = build_kline_matrices(rows, 120)
+    assert (exists[0] == exists[1]).all()
+    assert (close[0][exists[0]] == close[1][exists[1]]).all()
+
+
+def test_sparse_time_slot_series_falls_back_to_dict_storage():
+    points = [SeriesPoint(time=ANCHOR_TIME), SeriesPoint(time=ANCHOR_TIME - 168 * 12 * FIVE_MINUTES_MS)]
+
+    series = TimeSlotSeries.from_points(points, 'time')
+
+    assert series.start_slot is None
+    assert list(series) == [ANCHOR_TIME - 168 * 12 * FIVE_MINUTES_MS, ANCHOR_TIME]
+    assert series.slot_points(ANCHOR_TIME, 2) == [None, points[0]]
+
+
+def test_latest_common_time_and_union_by_slot_index():
+    oi_by_time = TimeSlotSeries((ANCHOR_TIME - offset * FIVE_MINUTES_MS, offset) for offset in range(0, 20))
+    kline_by_time = TimeSlotSeries((ANCHOR_TIME - offset * FIVE_MINUTES_MS, offset) for offset in range(3, 30, 2))
+
+    assert latest_common_time(oi_by_time, kline_by_time) == ANCHOR_TIME - 3 * FIVE_MINUTES_MS
+    assert latest_common_time(oi_by_time, dict(kline_by_time.items())) == ANCHOR_TIME - 3 * FIVE_MINUTES_MS
+    assert latest_common_time(oi_by_time, TimeSlotSeries()) is None
+    assert union_times(oi_by_time, {}, kline_by_time)[-1] == ANCHOR_TIME
+    assert len(union_times(oi_by_time, kline_by_time)) == 20 + 5
+
+
+def test_group_points_by_symbol_keeps_requested_symbols():
+    points = [
+        HomepageOpenInterestPoint(symbol='BTCUSDT', event_time=ANCHOR_TIME, sum_open_interest=1.0, sum_open_interest_value=2.0),
+        HomepageOpenInterestPoint(symbol='BTCUSDT', event_time=ANCHOR_TIME - FIVE_MINUTES_MS, sum_open_interest=1.0, sum_open_interest_value=2.0),
+    ]
+
+    grouped = group_points_by_symbol(points, 'event_time', symbols=['BTCUSDT', 'ETHUSDT'])
+
+    assert list(grouped['BTCUSDT']) == [ANCHOR_TIME - FIVE_MINUTES_MS, ANCHOR_TIME]
+    assert not grouped['ETHUSDT']
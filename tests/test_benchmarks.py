@@ -0,0 +1,67 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks import datagen
+from benchmarks.run import compare_results, summarize_timings
+
+
+def test_generate_symbol_series_is_deterministic_and_aligned():
+    first = datagen.generate_symbol_series('okx', 'BTCUSDT', 1_800_000, 4)
+    second = datagen.generate_symbol_series('okx', 'BTCUSDT', 1_800_000, 4)
+    other_exchange = datagen.generate_symbol_series('gate', 'BTCUSDT', 1_800_000, 4)
+
+    assert first == second
+    assert first['klines'] != other_exchange['klines']
+    assert [row['open_time'] for row in first['klines']] == [1_800_000, 2_100_000, 2_400_000, 2_700_000]
+    assert [row['event_time'] for row in first['open_interest_hist']] == [1_800_000, 2_100_000, 2_400_000, 2_700_000]
+    assert all(row['low_price'] <= row['close_price'] <= row['high_price'] for row in first['klines'])
+
+
+def test_generate_market_data_fills_every_exchange_and_symbol(test_db):
+    summary = datagen.generate_market_data(test_db, ['BTCUSDT', 'ETHUSDT'], exchanges=('binance', 'okx'), days=0.5, end_time=3_600_000 * 24)
+
+    assert summary['bars_per_series'] == 144
+    assert summary['rows']['market_klines'] == 2 * 2 * 144
+    assert summary['rows']['market_funding_rate'] == 2 * 144
+    assert summary['rows']['market_funding_rate_latest'] == 4
+
+
+def test_compare_results_reports_median_regressions():
+    baseline = {'cases': {'a': summarize_timings([10.0, 10.0]), 'b': summarize_timings([10.0]), 'c': summarize_timings([5.0])}}
+    current = {'cases': {'a': summarize_timings([13.0, 12.0]), 'b': summarize_timings([10.5]), 'new': summarize_timings([1.0])}}
+
+    assert compare_results(baseline, current, max_regression=0.2) == [
+        {'case': 'a', 'baseline_ms': 10.0, 'current_ms': 12.5, 'change': 0.25},
+    ]
+
+
+def test_benchmark_run_writes_json_report(tmp_path):
+    output = tmp_path / 'result.json'
+
+    completed = subprocess.run(
+        [
+            sys.executable, '-m', 'benchmarks.run',
+            '--db-url', f"sqlite:///{tmp_path / 'bench.db'}",
+            '--symbols', '2', '--days', '8', '--repeat', '1',
+            '--cases', 'homepage_series_snapshot,latest_funding_rate_page,repair_rolling_symbols',
+            '--output', str(output),
+        ],
+        cwd=str(PROJECT_ROOT),
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    report = json.loads(output.read_text(encoding='utf-8'))
+    assert report['schema_version'] == 1
+    assert report['database'] == 'sqlite'
+    assert set(report['cases']) == {'homepage_series_snapshot', 'latest_funding_rate_page', 'repair_rolling_symbols'}
+    assert report['cases']['homepage_series_snapshot']['result'] == {'rows': 2, 'complete': 2}
+    assert report['cases']['repair_rolling_symbols']['result']['affected'] > 0
@@ -0,0 +1,184 @@
+from coinx import cache_handoff, config
+from coinx.models import MarketTickers
+from coinx.repositories import market_ticker_index
+from coinx.repositories.market_ticker_index import get_market_ticker_index
+import coinx.runtime as runtime
+
+
+CLOSE_TIME = 1711526400000
+
+
+def seed_snapshot(db_session, close_time):
+    db_session.add(MarketTickers(symbol='BTCUSDT', price_change_percent=1.0, close_time=close_time))
+    db_session.commit()
+
+
+def test_collector_versions_are_visible_to_web_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_HANDOFF_FILE', str(tmp_path / 'cache_handoff.json'))
+
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'all')
+    assert cache_handoff.publish_cache_version('market_tickers', 100) is None
+    assert not (tmp_path / 'cache_handoff.json').exists()
+
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'collector')
+    assert cache_handoff.publish_cache_version('market_tickers', 100) == 100
+    # 同一版本号再次发布也要递增，Web 进程才能看到变化
+    assert cache_handoff.publish_cache_version('market_tickers', 100) == 101
+    assert cache_handoff.publish_cache_version('series_frames', 5) == 5
+    assert cache_handoff.get_cache_version('market_tickers') is None
+
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'web')
+    assert cache_handoff.get_cache_version('market_tickers') == 101
+    assert cache_handoff.get_cache_version('series_frames') == 5
+    assert cache_handoff.get_cache_version('funding_rate_page') is None
+
+
+def test_web_index_reloads_as_soon_as_collector_publishes(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_HANDOFF_FILE', str(tmp_path / 'cache_handoff.json'))
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'web')
+    seed_snapshot(db_session, CLOSE_TIME)
+    assert get_market_ticker_index(session=db_session).close_time == CLOSE_TIME
+
+    seed_snapshot(db_session, CLOSE_TIME + 300000)
+    # 回查间隔内且没有交接版本：继续使用内存索引
+    assert get_market_ticker_index(session=db_session).close_time == CLOSE_TIME
+
+    cache_handoff._write_versions(config.CACHE_HANDOFF_FILE, {'market_tickers': CLOSE_TIME + 300000})
+    assert get_market_ticker_index(session=db_session).close_time == CLOSE_TIME + 300000
+
+    def fail_session():
+        raise AssertionError('should not query database')
+
+    monkeypatch.setattr(market_ticker_index, 'get_session', fail_session)
+    assert get_market_ticker_index().close_time == CLOSE_TIME + 300000
+
+
+def test_web_process_does_not_start_runtime_services(monkeypatch):
+    def fail_start_scheduler():
+        raise AssertionError('web process must not start the scheduler')
+
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'web')
+    monkeypatch.setattr(runtime, 'upgrade_database_schema', lambda: None)
+    monkeypatch.setattr(runtime, 'SCHEDULER_ENABLED', True)
+    monkeypatch.setattr(runtime, 'start_scheduler', fail_start_scheduler)
+
+    result = runtime.start_runtime_services(with_startup_repair=True, startup_delay_seconds=0)
+
+    assert result == {'scheduler_thread': None, 'repair_thread': None, 'delivery_dispatcher': None, 'tracked_coins': []}
+
+
+def _split_roles(monkeypatch, tmp_path, test_db):
+    from sqlalchemy.orm import sessionmaker
+
+    monkeypatch.setattr(config, 'CACHE_HANDOFF_FILE', str(tmp_path / 'cache_handoff.json'))
+    monkeypatch.setattr('coinx.repositories.collector_control.get_session', sessionmaker(bind=test_db))
+
+
+def test_web_refresh_is_executed_by_collector(monkeypatch, tmp_path, test_db):
+    import coinx.scheduler as scheduler_module
+    from coinx.repositories.collector_control import get_collector_command
+    from coinx.web.routes import api_data
+    from tests.test_task_jobs_api import create_test_client
+
+    _split_roles(monkeypatch, tmp_path, test_db)
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'web')
+    monkeypatch.setattr(api_data, 'get_active_coins', lambda: ['BTCUSDT'])
+    monkeypatch.setattr(api_data, 'should_refresh_homepage_series', lambda symbols: True)
+
+    def fail_repair(**kwargs):
+        raise AssertionError('web process must not fetch from exchanges')
+
+    monkeypatch.setattr(api_data, 'repair_rolling_tracked_symbols', fail_repair)
+    client = create_test_client()
+
+    response = client.get('/api/update')
+    assert response.status_code == 200
+    assert response.get_json()['message'] == 'homepage rolling repair triggered'
+    # 重复点击复用同一条未完成指令
+    client.get('/api/update')
+    assert get_collector_command(2) is None
+    assert get_collector_command(1)['status'] == 'pending'
+
+    repair_calls = []
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'collector')
+    monkeypatch.setattr(
+        scheduler_module,
+        'repair_rolling_tracked_symbols',
+        lambda **kwargs: repair_calls.append(kwargs) or {'status': 'success', 'success_count': 1, 'results': [{}]},
+    )
+    assert scheduler_module.run_collector_commands() == 1
+    assert repair_calls[0]['symbols'] == ['BTCUSDT']
+    assert repair_calls[0]['points'] == scheduler_module.REPAIR_ROLLING_POINTS
+
+    command = get_collector_command(1)
+    assert command['status'] == 'success'
+    assert command['result'] == {'status': 'success', 'success_count': 1}
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'web')
+    assert cache_handoff.get_cache_version('market_series') is not None
+
+
+def test_web_task_jobs_read_collector_published_states(monkeypatch, tmp_path, test_db):
+    from types import SimpleNamespace
+
+    import coinx.scheduler as scheduler_module
+    from coinx.repositories.collector_control import claim_collector_commands
+    from coinx.web.routes import api_data
+    from tests.test_task_jobs_api import FakeJob, create_test_client
+
+    _split_roles(monkeypatch, tmp_path, test_db)
+    fake_job = FakeJob(job_id='repair_market_rolling_job')
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'collector')
+    monkeypatch.setattr(scheduler_module, 'scheduler', SimpleNamespace(running=True, get_jobs=lambda: [fake_job]))
+    monkeypatch.setattr(
+        scheduler_module,
+        'get_all_job_runtime_metadata',
+        lambda: {'repair_market_rolling_job': {'last_status': 'success', 'last_summary': {'results': [1], 'success_count': 3}}},
+    )
+    assert scheduler_module.publish_job_states(force=True) is True
+
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'web')
+    monkeypatch.setattr(api_data, 'SCHEDULER_ENABLED', True)
+    monkeypatch.setattr(api_data, 'scheduler', SimpleNamespace(running=False, get_jobs=lambda: [], get_job=lambda job_id: None))
+    monkeypatch.setattr(api_data, 'TASK_JOB_ACTION_WAIT_SECONDS', 0)
+    client = create_test_client()
+
+    data = client.get('/api/task-jobs').get_json()['data']
+    assert data['scheduler_running'] is True
+    assert data['collector']['online'] is True
+    job = data['jobs'][0]
+    assert job['id'] == 'repair_market_rolling_job'
+    assert job['display_name'] == '市场滚动补齐'
+    assert job['paused'] is True
+    assert job['runtime']['last_summary'] == {'success_count': 3}
+
+    response = client.post('/api/task-jobs/repair_market_rolling_job/action', json={'action': 'resume'})
+    assert response.status_code == 202
+    assert response.get_json()['data']['pending'] is True
+    assert claim_collector_commands('node-a')[0]['payload'] == {'job_id': 'repair_market_rolling_job', 'action': 'resume'}
+    assert client.post('/api/task-jobs/missing/action', json={'action': 'run'}).status_code == 404
+
+
+def test_web_detail_and_homepage_caches_follow_market_series_version(monkeypatch, tmp_path):
+    from coinx.repositories import contract_detail_cache
+    from coinx.web.routes import api_data
+
+    monkeypatch.setattr(config, 'CACHE_HANDOFF_FILE', str(tmp_path / 'cache_handoff.json'))
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'web')
+    prewarms = []
+    monkeypatch.setattr(contract_detail_cache, 'start_contract_detail_prewarm_async', lambda: prewarms.append('prewarm'))
+    calls = []
+
+    def loader(symbol):
+        calls.append(symbol)
+        return {'symbol': symbol, 'calls': len(calls)}
+
+    assert contract_detail_cache.get_cached_contract_detail('BTCUSDT', loader=loader)['calls'] == 1
+    assert contract_detail_cache.get_cached_contract_detail('BTCUSDT', loader=loader)['calls'] == 1
+    first_key = api_data._get_homepage_cache_key(['BTCUSDT'], 1)
+
+    cache_handoff._write_versions(config.CACHE_HANDOFF_FILE, {'market_series': 5})
+    assert contract_detail_cache.get_cached_contract_detail('BTCUSDT', loader=loader)['calls'] == 2
+    assert api_data._get_homepage_cache_key(['BTCUSDT'], 1) != first_key
+    assert prewarms == ['prewarm']
+    assert contract_detail_cache.sync_contract_detail_handoff() is False
+    assert prewarms == ['prewarm']
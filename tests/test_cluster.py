@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+from coinx import cluster, config
+from coinx import scheduler as scheduler_module
+from coinx.cluster import build_hash_ring, ring_owner, select_shard, shard_symbols
+from coinx.models import CollectorNode
+
+
+SYMBOLS = [f'COIN{i}USDT' for i in range(300)]
+
+
+def test_consistent_hash_only_moves_symbols_of_departed_node():
+    nodes = ['node-a', 'node-b', 'node-c']
+    shards = {node: select_shard(SYMBOLS, nodes, node) for node in nodes}
+
+    assert sorted(symbol for shard in shards.values() for symbol in shard) == sorted(SYMBOLS)
+    assert all(len(shard) > 50 for shard in shards.values())
+
+    ring = build_hash_ring(['node-a', 'node-b'])
+    for node in ('node-a', 'node-b'):
+        assert all(ring_owner(ring, symbol) == node for symbol in shards[node])
+    assert {ring_owner(ring, symbol) for symbol in shards['node-c']} <= {'node-a', 'node-b'}
+
+
+def test_shard_symbols_uses_live_node_leases(db_session, monkeypatch):
+    monkeypatch.setattr(config, 'CLUSTER_ENABLED', True)
+    monkeypatch.setattr(config, 'CLUSTER_SHARDING_ENABLED', True)
+    monkeypatch.setattr(config, 'CLUSTER_NODE_ID', 'node-a')
+    now = cluster._now_ms()
+    db_session.add(CollectorNode(node_id='node-b', started_at=now, heartbeat_at=now, lease_expires_at=now + 60000))
+    db_session.add(CollectorNode(node_id='node-c', started_at=now, heartbeat_at=now, lease_expires_at=now - 1))
+    db_session.commit()
+
+    shard = shard_symbols(SYMBOLS, session=db_session)
+
+    assert shard == select_shard(SYMBOLS, ['node-a', 'node-b'], 'node-a')
+    assert db_session.get(CollectorNode, 'node-a').lease_expires_at > now
+
+    # node-b 租约过期后，本节点接管全部币种
+    db_session.get(CollectorNode, 'node-b').lease_expires_at = now - 1
+    db_session.commit()
+    assert shard_symbols(SYMBOLS, session=db_session) == SYMBOLS
+
+
+def test_coordinated_job_skips_followers_unless_sharded(monkeypatch):
+    calls = []
+    monkeypatch.setattr(scheduler_module, 'is_job_leader', lambda job_id: False)
+    monkeypatch.setattr(config, 'CLUSTER_SHARDING_ENABLED', True)
+
+    leader_only = scheduler_module.coordinated_job('demo_job')(lambda: calls.append('leader_only'))
+    sharded = scheduler_module.coordinated_job('demo_sharded_job', sharded=True)(lambda: calls.append('sharded'))
+
+    assert leader_only() is None
+    sharded()
+
+    assert calls == ['sharded']
+    assert scheduler_module.get_job_runtime_metadata('demo_job')['cluster_role'] == 'follower'
+
+
+class FakeLockConnection:
+    def __init__(self, lock_error=None, alive=True):
+        self.lock_error = lock_error
+        self.alive = alive
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if sql == 'SELECT 1':
+            if not self.alive:
+                raise RuntimeError('connection lost')
+        elif self.lock_error is not None:
+            raise self.lock_error
+        return SimpleNamespace(scalar=lambda: 1)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _fake_mysql_session(connection):
+    bind = SimpleNamespace(dialect=SimpleNamespace(name='mysql'), connect=lambda: connection)
+    return SimpleNamespace(get_bind=lambda: bind)
+
+
+def test_is_job_leader_runs_jobs_when_named_locks_are_unsupported(monkeypatch):
+    monkeypatch.setattr(config, 'CLUSTER_ENABLED', True)
+    monkeypatch.setattr(config, 'DB_TYPE', 'mysql')
+
+    # 连接本身不可用：本轮跳过
+    assert cluster.is_job_leader('demo_job', session=_fake_mysql_session(FakeLockConnection(lock_error=RuntimeError('gone'), alive=False))) is False
+
+    cluster.reset_cluster_state()
+    unsupported = FakeLockConnection(lock_error=RuntimeError('FUNCTION GET_LOCK does not exist'))
+    assert cluster.is_job_leader('demo_job', session=_fake_mysql_session(unsupported)) is True
+    statements = len(unsupported.statements)
+    assert cluster.is_job_leader('other_job', session=_fake_mysql_session(unsupported)) is True
+    assert len(unsupported.statements) == statements
+
+    cluster.reset_cluster_state()
+    monkeypatch.setattr(config, 'DB_TYPE', 'starrocks')
+    starrocks = FakeLockConnection()
+    assert cluster.is_job_leader('demo_job', session=_fake_mysql_session(starrocks)) is True
+    assert starrocks.statements == []
+    cluster.reset_cluster_state()
@@ -39,3 +39,48 @@ def test_load_coins_config_falls_back_to_defaults_when_no_coins_are_tracked(monk
 
     assert coins == coin_manager.DEFAULT_TRACKED_COINS
     assert added == []
+
+
+def test_get_active_coins_reuses_registry_until_version_changes(monkeypatch):
+    versions = [1]
+    loads = []
+
+    monkeypatch.setattr(coin_manager, 'COIN_REGISTRY_RECHECK_SECONDS', 0)
+    monkeypatch.setattr(coin_manager, '_read_coin_registry_version', lambda: versions[0])
+    monkeypatch.setattr(coin_manager, 'load_coins_config', lambda: loads.append(1) or ['BTCUSDT', 'ETHUSDT'])
+
+    first = coin_manager.get_active_coins()
+    second = coin_manager.get_active_coins()
+
+    assert first == ('BTCUSDT', 'ETHUSDT')
+    assert second is first
+    assert coin_manager.get_active_coins(['ETHUSDT']) == ('ETHUSDT',)
+    assert len(loads) == 1
+
+    versions[0] = 2
+    coin_manager.get_active_coins()
+    assert len(loads) == 2
+    assert coin_manager.get_coin_registry_version() == 2
+
+
+def test_set_coin_tracking_bumps_registry_version(monkeypatch, test_db):
+    from sqlalchemy.orm import scoped_session, sessionmaker
+
+    coin_manager.Coin.__table__.create(bind=test_db)
+    session = scoped_session(sessionmaker(bind=test_db))
+    monkeypatch.setattr(coin_manager, 'db_session', session)
+    monkeypatch.setattr(coin_manager, 'get_engine', lambda: test_db)
+    monkeypatch.setattr(coin_manager, 'DB_TYPE', 'sqlite')
+    monkeypatch.setattr(coin_manager.os.path, 'exists', lambda path: False)
+
+    assert coin_manager.set_coin_tracking('BTCUSDT', True) is True
+    assert coin_manager.get_active_coins() == ('BTCUSDT',)
+    first_version = coin_manager.get_coin_registry_version()
+
+    coin_manager.add_coin('SOLUSDT')
+    assert coin_manager.get_active_coins() == ('BTCUSDT', 'SOLUSDT')
+    assert coin_manager.get_coin_registry_version() > first_version
+
+    coin_manager.remove_coin('BTCUSDT')
+    assert coin_manager.get_active_coins() == ('SOLUSDT',)
+    session.remove()
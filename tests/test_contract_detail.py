@@ -2,7 +2,8 @@ from flask import Flask
 import werkzeug
 
 from coinx.models import MarketFundingRate, MarketKline, MarketOpenInterestHist, MarketTakerBuySellVol
-from coinx.repositories.contract_detail import get_contract_detail, get_contract_structure_score, load_contract_chart_series
+from coinx.repositories.chart_series import load_contract_chart_series, lttb_indices, min_max_indices, select_chart_resolution
+from coinx.repositories.contract_detail import get_contract_detail, get_contract_structure_score
 from coinx.web.routes.api_data import api_data_bp
 
 
@@ -165,7 +166,7 @@ def test_contract_chart_series_aggregates_exchanges(db_session):
 
 
 def test_coin_detail_series_api_validates_range(monkeypatch):
-    response = _client().get('/api/coin-detail/BTCUSDT/series?range=30d')
+    response = _client().get('/api/coin-detail/BTCUSDT/series?range=1y')
     assert response.status_code == 400
 
     monkeypatch.setattr('coinx.web.routes.api_data.load_contract_chart_series', lambda symbol, range_key: {'range': range_key, 'market': []})
@@ -179,3 +180,50 @@ def test_coin_detail_structure_score_api(monkeypatch):
     response = _client().get('/api/coin-detail/BTCUSDT/structure-score')
     assert response.status_code == 200
     assert response.get_json()['data']['structure_score']['total_score'] == 66
+
+
+def test_chart_downsampling_keeps_spikes():
+    values = [1.0] * 1000
+    values[457] = 50.0
+    values[731] = -40.0
+    times = list(range(1000))
+
+    lttb = lttb_indices(times, values, 100)
+    min_max = min_max_indices(values, 100)
+
+    assert len(lttb) == 100 and lttb[0] == 0 and lttb[-1] == 999
+    assert {457, 731} <= set(lttb)
+    assert {457, 731} <= set(min_max)
+    assert len(min_max) <= 100
+    assert select_chart_resolution(24, 300) == 5 * 60 * 1000
+    assert select_chart_resolution(720, 300) == 60 * 60 * 1000
+    assert select_chart_resolution(2160, 300) == 4 * 60 * 60 * 1000
+
+
+def test_contract_chart_series_rolls_up_long_ranges(db_session):
+    hour_ms = 60 * 60 * 1000
+    start = 1711526400000
+    for offset in range(36):
+        open_time = start + offset * 5 * 60 * 1000
+        for exchange, price_shift, oi in (('binance', 0, 10), ('okx', 5, 20)):
+            db_session.add(MarketKline(
+                exchange=exchange, symbol='BTCUSDT', period='5m', open_time=open_time, close_time=open_time + 299999,
+                open_price=100, high_price=200, low_price=50, close_price=100 + offset + price_shift, volume=1,
+            ))
+            db_session.add(MarketOpenInterestHist(
+                exchange=exchange, symbol='BTCUSDT', period='5m', event_time=open_time,
+                sum_open_interest=oi + offset, sum_open_interest_value=(oi + offset) * 100,
+            ))
+        db_session.add(MarketTakerBuySellVol(exchange='binance', symbol='BTCUSDT', period='5m', event_time=open_time, buy_vol=2, sell_vol=1))
+    db_session.commit()
+
+    result = load_contract_chart_series('BTCUSDT', range_key='30d', session=db_session)
+
+    assert result['resolution_ms'] == hour_ms
+    assert [point['time'] for point in result['market']] == [start, start + hour_ms, start + 2 * hour_ms]
+    first = result['market'][0]
+    assert first['price'] == 111.0
+    assert first['volume'] == 24.0
+    assert first['open_interest'] == (10 + 11) + (20 + 11)
+    assert [point['buy_volume'] for point in result['flow']] == [24.0, 24.0, 24.0]
+    assert result['anchor_time'] == start + 35 * 5 * 60 * 1000
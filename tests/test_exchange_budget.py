@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from coinx.collector.rate_limit import (
+    REQUEST_CLASS_FUNDING,
+    REQUEST_CLASS_HISTORY,
+    REQUEST_CLASS_ROLLING,
+    ExchangeBudgetArbiter,
+    RateLimitRegistry,
+    RateLimitUnavailable,
+    bind_request_class,
+    current_request_class,
+    use_request_class,
+)
+
+
+def test_low_priority_request_waits_for_higher_class_and_reports_queue_depth():
+    arbiter = ExchangeBudgetArbiter(hold_seconds=0.2, max_pause_seconds=5)
+    with use_request_class(REQUEST_CLASS_ROLLING):
+        arbiter.admit('okx')
+
+    paused = {}
+
+    def run_history():
+        with use_request_class(REQUEST_CLASS_HISTORY):
+            paused['seconds'] = arbiter.admit('okx')
+
+    worker = threading.Thread(target=run_history)
+    worker.start()
+    time.sleep(0.05)
+    depths = arbiter.queue_depths()
+    worker.join(timeout=5)
+
+    assert depths['okx'][REQUEST_CLASS_HISTORY]['waiting'] == 1
+    assert depths['okx'][REQUEST_CLASS_ROLLING]['admitted'] == 1
+    assert paused['seconds'] >= 0.1
+    assert arbiter.queue_depths()['okx'][REQUEST_CLASS_HISTORY]['waiting'] == 0
+
+    # 其他交易所不受影响
+    with use_request_class(REQUEST_CLASS_HISTORY):
+        assert arbiter.admit('gate') < 0.05
+
+
+def test_history_request_is_preempted_after_max_pause_but_funding_proceeds():
+    arbiter = ExchangeBudgetArbiter(hold_seconds=10, max_pause_seconds=0.05)
+    with use_request_class(REQUEST_CLASS_ROLLING):
+        arbiter.admit('bybit')
+
+    with use_request_class(REQUEST_CLASS_HISTORY):
+        with pytest.raises(RateLimitUnavailable) as exc_info:
+            arbiter.admit('bybit', group='market')
+    assert exc_info.value.reason == 'preempted_by_rolling'
+
+    with use_request_class(REQUEST_CLASS_FUNDING):
+        assert arbiter.admit('bybit') >= 0.05
+    assert arbiter.queue_depths()['bybit'][REQUEST_CLASS_HISTORY]['preempted'] == 1
+
+
+def test_history_request_leaves_reserve_budget_for_other_classes():
+    registry = RateLimitRegistry()
+    registry.update_budget('gate', 'default', limit=100, remain=10, reset_at=time.time() + 60)
+    arbiter = ExchangeBudgetArbiter(hold_seconds=0, max_pause_seconds=0.05, history_reserve_ratio=0.2)
+
+    with use_request_class(REQUEST_CLASS_HISTORY):
+        with pytest.raises(RateLimitUnavailable) as exc_info:
+            arbiter.admit('gate', registry=registry)
+    assert exc_info.value.reason == 'preempted_by_reserve'
+
+    with use_request_class(REQUEST_CLASS_ROLLING):
+        assert arbiter.admit('gate', registry=registry) < 0.05
+
+
+def test_bind_request_class_carries_class_into_executor_threads():
+    # 未标注的线程（启动期补采、手动触发的后台线程等）按最低优先级处理
+    assert current_request_class() == REQUEST_CLASS_HISTORY
+    with use_request_class(REQUEST_CLASS_ROLLING):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            bound = executor.submit(bind_request_class(current_request_class)).result()
+            unbound = executor.submit(current_request_class).result()
+
+    assert bound == REQUEST_CLASS_ROLLING
+    assert unbound == REQUEST_CLASS_HISTORY
+    assert current_request_class() == REQUEST_CLASS_HISTORY
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 import threading
+import time
 
 from coinx.collector.binance.client import (
     BinanceRateLimitUnavailable,
@@ -12,6 +13,7 @@ from coinx.collector.exchange_repair import (
     _flush_group_records,
     repair_history_symbols,
     repair_rolling_symbols,
+    repair_rolling_symbols_to_anchor,
 )
 from coinx.collector.okx.series import OKXRateLimitUnavailable, clear_okx_rate_limit_state
 from coinx.collector.timing import format_duration_breakdown
@@ -1436,3 +1438,103 @@ def test_exchange_history_repair_emits_chinese_precheck_logs(db_session, monkeyp
         and '未命中缺口=' in message
         for message in info_logs
     )
+
+
+def test_anchor_aligned_rolling_repair_waits_for_lag_and_retries_only_missing(db_session, monkeypatch):
+    bar_close = 1_700_000_100_000 - 1_700_000_100_000 % 300000
+    anchor = bar_close - 300000
+    clock = {'now': bar_close + 1000}
+    calls = []
+
+    def fake_repair(symbols=None, series_types=None, exchanges=None, now_ms=None, **kwargs):
+        calls.append((tuple(exchanges), tuple(symbols), now_ms - bar_close))
+        exchange = exchanges[0]
+        published = {'binance': ['BTCUSDT'] if len(calls) == 1 else ['ETHUSDT'], 'okx': ['BTCUSDT']}[exchange]
+        for symbol in published:
+            db_session.add(MarketKline(
+                exchange=exchange, symbol=symbol, period='5m', open_time=anchor, close_time=anchor + 299999,
+                open_price=1, high_price=1, low_price=1, close_price=1,
+            ))
+        db_session.commit()
+        results = [
+            {'exchange': exchange, 'symbol': symbol, 'series_type': 'klines', 'period': '5m', 'status': 'success'}
+            for symbol in symbols
+        ]
+        if exchange == 'okx':
+            results[-1].update(status='skipped', reason='unsupported_symbol')
+        return {'results': results, 'duration_breakdown_ms': {}}
+
+    def fake_sleep(seconds):
+        clock['now'] += int(seconds * 1000)
+
+    monkeypatch.setattr('coinx.collector.exchange_repair.repair_rolling_symbols', fake_repair)
+    monkeypatch.setattr('coinx.collector.exchange_repair.EXCHANGE_PUBLISH_LAG_SECONDS', {'binance': 3, 'okx': 5})
+    monkeypatch.setattr('coinx.collector.exchange_repair.REPAIR_ROLLING_RETRY_SECONDS', 10)
+
+    summary = repair_rolling_symbols_to_anchor(
+        symbols=['BTCUSDT', 'ETHUSDT'],
+        series_types=['klines'],
+        exchanges=['binance', 'okx'],
+        db_session=db_session,
+        now_func=lambda: clock['now'],
+        sleep_func=fake_sleep,
+    )
+
+    assert calls == [
+        (('binance',), ('BTCUSDT', 'ETHUSDT'), 3000),
+        (('okx',), ('BTCUSDT', 'ETHUSDT'), 5000),
+        (('binance',), ('ETHUSDT',), 13000),
+    ]
+    assert summary['anchor_missing_count'] == 0
+    assert [item['retry'] for item in summary['anchor_rounds']] == [False, False, True]
+    assert summary['success_count'] == 3
+
+
+def test_anchor_aligned_rolling_repair_stops_retrying_on_shutdown(db_session, monkeypatch):
+    from coinx.shutdown import SHUTDOWN_EVENT
+
+    bar_close = 1_700_000_100_000 - 1_700_000_100_000 % 300000
+    clock = {'now': bar_close + 1000}
+    calls = []
+    sleeps = []
+
+    def fake_repair(symbols=None, series_types=None, exchanges=None, now_ms=None, **kwargs):
+        calls.append(tuple(exchanges))
+        SHUTDOWN_EVENT.set()
+        results = [
+            {'exchange': exchanges[0], 'symbol': symbol, 'series_type': 'klines', 'period': '5m', 'status': 'skipped', 'reason': 'shutdown'}
+            for symbol in symbols
+        ]
+        return {'results': results, 'duration_breakdown_ms': {}}
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock['now'] += int(seconds * 1000)
+
+    monkeypatch.setattr('coinx.collector.exchange_repair.repair_rolling_symbols', fake_repair)
+    monkeypatch.setattr('coinx.collector.exchange_repair.EXCHANGE_PUBLISH_LAG_SECONDS', {'binance': 3, 'okx': 5})
+    monkeypatch.setattr('coinx.collector.exchange_repair.REPAIR_ROLLING_RETRY_SECONDS', 10)
+
+    summary = repair_rolling_symbols_to_anchor(
+        symbols=['BTCUSDT', 'ETHUSDT'],
+        series_types=['klines'],
+        exchanges=['binance', 'okx'],
+        db_session=db_session,
+        now_func=lambda: clock['now'],
+        sleep_func=fake_sleep,
+    )
+
+    # 关闭后不再开始 okx 首轮，也不把 shutdown 跳过的币种当作缺点重试
+    assert calls == [('binance',)]
+    assert sleeps == [2.0]
+    assert summary['anchor_missing_count'] == 0
+
+    # 默认的等待由关闭信号唤醒，不会睡到发布延迟结束
+    started_at = time.monotonic()
+    monkeypatch.setattr('coinx.collector.exchange_repair.EXCHANGE_PUBLISH_LAG_SECONDS', {'binance': 60})
+    repair_rolling_symbols_to_anchor(
+        symbols=['BTCUSDT'], series_types=['klines'], exchanges=['binance'], db_session=db_session,
+        now_func=lambda: bar_close + 1000,
+    )
+    assert time.monotonic() - started_at < 1
+    assert calls == [('binance',)]
@@ -0,0 +1,162 @@
+import json
+import sys
+from pathlib import Path
+from urllib.request import urlopen
+
+import pytest
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.fake_exchange import (
+    FakeExchange,
+    FakeExchangeSettings,
+    start_fake_exchange,
+    stop_fake_exchange,
+    window_times,
+)
+from coinx.collector.binance import series as binance_series
+from coinx.collector.bybit import series as bybit_series
+from coinx.collector.gate import series as gate_series
+from coinx.collector.okx import series as okx_series
+
+
+NOW_MS = 1_800_000_000_000
+FIVE_MINUTES_MS = 5 * 60 * 1000
+LAST_CLOSED = NOW_MS - NOW_MS % FIVE_MINUTES_MS - FIVE_MINUTES_MS
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+
+
+def _settings(**overrides):
+    values = {'symbols': SYMBOLS, 'now_ms': NOW_MS, 'rate_limits': {}}
+    values.update(overrides)
+    return FakeExchangeSettings(**values)
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    servers = []
+
+    def start(**overrides):
+        server = start_fake_exchange(_settings(**overrides))
+        servers.append(server)
+        urls = server.base_urls()
+        monkeypatch.setattr(binance_series, 'BINANCE_BASE_URL', urls['BINANCE_BASE_URL'])
+        monkeypatch.setattr(okx_series, 'OKX_BASE_URL', urls['OKX_BASE_URL'])
+        monkeypatch.setattr(bybit_series, 'BYBIT_BASE_URL', urls['BYBIT_BASE_URL'])
+        monkeypatch.setattr(gate_series, 'GATE_BASE_URL', urls['GATE_BASE_URL'])
+        for module in (okx_series, bybit_series, gate_series):
+            module.clear_supported_symbols_cache()
+        okx_series.clear_okx_rate_limit_state()
+        bybit_series.clear_bybit_rate_limit_state()
+        gate_series.clear_gate_rate_limit_state()
+        return server
+
+    yield start
+    for server in servers:
+        stop_fake_exchange(server)
+    okx_series.clear_okx_rate_limit_state()
+
+
+def test_window_times_keeps_latest_or_oldest_closed_bars():
+    assert window_times(FIVE_MINUTES_MS, NOW_MS, 3) == [LAST_CLOSED - 2 * FIVE_MINUTES_MS, LAST_CLOSED - FIVE_MINUTES_MS, LAST_CLOSED]
+    assert window_times(FIVE_MINUTES_MS, NOW_MS, 2, start=LAST_CLOSED - 10 * FIVE_MINUTES_MS + 1, oldest_first=True) == [
+        LAST_CLOSED - 9 * FIVE_MINUTES_MS,
+        LAST_CLOSED - 8 * FIVE_MINUTES_MS,
+    ]
+    assert window_times(FIVE_MINUTES_MS, NOW_MS, 5, start=LAST_CLOSED + 1) == []
+
+
+def test_handle_is_deterministic_and_reports_unknown_symbols():
+    params = {'symbol': 'BTCUSDT', 'interval': '5m', 'limit': '4'}
+    status, _, first = FakeExchange(_settings()).handle('/binance/fapi/v1/klines', params)
+    _, _, second = FakeExchange(_settings()).handle('/binance/fapi/v1/klines', params)
+    _, _, other_seed = FakeExchange(_settings(seed=8)).handle('/binance/fapi/v1/klines', params)
+
+    assert status == 200
+    assert first == second
+    assert first != other_seed
+    assert [row[0] for row in first] == [LAST_CLOSED - 3 * FIVE_MINUTES_MS + index * FIVE_MINUTES_MS for index in range(4)]
+    assert FakeExchange(_settings()).handle('/binance/fapi/v1/klines', {'symbol': 'NOPEUSDT'})[:1] == (400,)
+    assert FakeExchange(_settings()).handle('/gate/api/v4/futures/usdt/candlesticks', {'contract': 'NOPE_USDT'})[2]['label'] == 'CONTRACT_NOT_FOUND'
+
+
+def test_series_adapters_parse_fake_exchange_payloads(fake_server):
+    fake_server()
+    start_time = LAST_CLOSED - 9 * FIVE_MINUTES_MS
+    expected_times = [start_time + index * FIVE_MINUTES_MS for index in range(10)]
+
+    for module, series_types in (
+        (binance_series, ('klines', 'open_interest_hist', 'taker_buy_sell_vol')),
+        (okx_series, ('open_interest_hist', 'taker_buy_sell_vol')),
+        (bybit_series, ('klines', 'open_interest_hist')),
+        (gate_series, ('klines', 'open_interest_hist', 'taker_buy_sell_vol')),
+    ):
+        for series_type in series_types:
+            payload = module.fetch_series_payload(series_type, 'ETHUSDT', '5m', 100, start_time=start_time, end_time=LAST_CLOSED)
+            records = module.parse_series_payload(series_type, payload, 'ETHUSDT', '5m')
+            times = sorted(record.get('open_time', record.get('event_time')) for record in records)
+            assert times == expected_times, (module.__name__, series_type)
+
+    assert okx_series.get_supported_symbols() == set(SYMBOLS)
+    assert bybit_series.get_supported_symbols() == set(SYMBOLS)
+    assert gate_series.get_supported_symbols() == set(SYMBOLS)
+    assert set(okx_series.get_all_funding_rates()) == set(SYMBOLS)
+
+
+def test_bybit_instruments_follow_cursor_pages(fake_server):
+    server = fake_server(instrument_page_size=2)
+
+    assert bybit_series.get_supported_symbols() == set(SYMBOLS)
+    endpoint = server.fake.stats()['exchanges']['bybit']['endpoints']['/v5/market/instruments-info']
+    assert endpoint['requests'] == 2
+
+
+def test_okx_rate_limit_puts_client_into_cooldown(fake_server, monkeypatch):
+    monkeypatch.setattr('coinx.collector.binance.client.time.sleep', lambda seconds: None)
+    server = fake_server(rate_limits={('okx', 'default'): (1, 60)})
+
+    okx_series.fetch_klines('BTCUSDT', '5m', 5)
+    with pytest.raises(requests.exceptions.HTTPError):
+        okx_series.fetch_klines('BTCUSDT', '5m', 5)
+    with pytest.raises(okx_series.OKXRateLimitUnavailable):
+        okx_series.fetch_klines('BTCUSDT', '5m', 5)
+
+    okx_stats = server.fake.stats()['exchanges']['okx']
+    assert okx_stats['rate_limited'] >= 1
+    assert okx_stats['endpoints']['/api/v5/market/history-candles']['status']['200'] == 1
+
+
+def test_injected_errors_partial_pages_and_stats_endpoint(fake_server):
+    server = fake_server(inject=[('gate', 503, 1.0)], partial_page_rate=1.0)
+    fake = server.fake
+
+    status, _, body = fake.handle('/binance/fapi/v1/klines', {'symbol': 'BTCUSDT', 'interval': '5m', 'limit': '10'})
+    assert status == 200
+    assert [row[0] for row in body] == [LAST_CLOSED - (9 - index) * FIVE_MINUTES_MS for index in range(5)]
+
+    status, _, body = fake.handle('/gate/api/v4/futures/usdt/contracts', {})
+    assert status == 503
+    assert body['label'] == 'SERVER_ERROR'
+
+    with urlopen(f'{server.base_url}/_stats') as response:
+        stats = json.load(response)
+    assert stats['exchanges']['gate']['injected'] == 1
+    assert stats['exchanges']['binance']['endpoints']['/fapi/v1/klines']['status'] == {'200': 1}
+
+
+def test_rate_limit_headers_follow_each_exchange():
+    fake = FakeExchange(_settings(rate_limits={('binance', 'weight'): (3, 60), ('gate', 'default'): (5, 10)}))
+
+    _, headers, _ = fake.handle('/binance/fapi/v1/klines', {'symbol': 'BTCUSDT', 'limit': '200'})
+    assert headers['X-MBX-USED-WEIGHT-1M'] == '2'
+    status, headers, body = fake.handle('/binance/fapi/v1/klines', {'symbol': 'BTCUSDT', 'limit': '200'})
+    assert status == 429
+    assert int(headers['Retry-After']) >= 1
+    assert body['code'] == -1003
+
+    _, headers, _ = fake.handle('/gate/api/v4/futures/usdt/contracts', {})
+    assert headers['X-Gate-RateLimit-Requests-Remain'] == '4'
+    assert int(headers['X-Gate-RateLimit-Reset-Timestamp']) > 0
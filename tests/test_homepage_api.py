@@ -1,6 +1,7 @@
 from flask import Flask
 import werkzeug
 
+from coinx.collector.rate_limit import current_request_class
 from coinx.repositories.homepage_series import get_homepage_series_snapshot as repository_get_homepage_series_snapshot
 from homepage_contracts import assert_complete_interval_contract, seed_complete_homepage_series
 from coinx.web.routes.api_data import api_data_bp
@@ -229,7 +230,7 @@ def test_update_data_can_wait_for_homepage_series_refresh(monkeypatch):
     import threading
 
     def fake_repair(**kwargs):
-        calls.append(kwargs)
+        calls.append({**kwargs, 'request_class': current_request_class()})
         return {
             'status': 'success',
             'symbols': kwargs['symbols'],
@@ -259,6 +260,7 @@ def test_update_data_can_wait_for_homepage_series_refresh(monkeypatch):
     assert payload['status'] == 'success'
     assert payload['message'] == 'homepage series refresh completed'
     assert calls[0]['points'] == 5
+    assert calls[0]['request_class'] == 'interactive'
 
 
 def test_update_data_waits_for_existing_homepage_refresh(monkeypatch):
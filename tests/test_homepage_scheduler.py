@@ -1,7 +1,13 @@
 import logging
 
+from coinx import config
 from coinx.repositories.homepage_series import HOMEPAGE_REQUIRED_SERIES_TYPES
-from coinx.scheduler import scheduled_repair_market_history, scheduled_repair_market_rolling
+from coinx.scheduler import (
+    _rolling_repair_trigger_args,
+    get_job_runtime_metadata,
+    scheduled_repair_market_history,
+    scheduled_repair_market_rolling,
+)
 
 
 def test_scheduled_repair_market_rolling_repairs_tracked_symbols_before_top_symbols(monkeypatch, caplog):
@@ -58,6 +64,61 @@ def test_scheduled_repair_market_rolling_repairs_tracked_symbols_before_top_symb
     assert tracked_start_index < top_start_index
 
 
+def test_scheduled_repair_market_rolling_persists_score_snapshot_after_repair(monkeypatch):
+    order = []
+
+    def fake_repair(symbols=None, series_types=None, **kwargs):
+        order.append(('repair', tuple(symbols)))
+        return {'status': 'success', 'results': [], 'success_count': 1, 'failure_count': 0, 'skipped_count': 0, 'duration_ms': 1}
+
+    def fake_persist(symbols=None):
+        order.append(('score', tuple(symbols)))
+        return {'status': 'success', 'saved_count': 3}
+
+    monkeypatch.setattr('coinx.scheduler.get_active_coins', lambda: ['BTCUSDT'])
+    monkeypatch.setattr('coinx.scheduler.get_market_structure_score_symbols', lambda: ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'])
+    monkeypatch.setattr('coinx.scheduler.repair_rolling_tracked_symbols', fake_repair)
+    monkeypatch.setattr('coinx.scheduler.refresh_market_structure_score_snapshot', fake_persist)
+    monkeypatch.setattr(
+        'coinx.scheduler.start_contract_detail_prewarm_async',
+        lambda top_n: order.append(('prewarm', top_n, get_job_runtime_metadata('repair_market_rolling_job')['running'])),
+    )
+    monkeypatch.setattr('coinx.scheduler.CONTRACT_DETAIL_PREWARM_TOP_N', 5)
+    monkeypatch.setattr('coinx.scheduler._evaluate_market_notifications', lambda event_type: order.append(('notify', event_type)))
+
+    scheduled_repair_market_rolling()
+
+    assert order == [
+        ('repair', ('BTCUSDT',)),
+        ('repair', ('ETHUSDT', 'SOLUSDT')),
+        ('score', ('BTCUSDT', 'ETHUSDT', 'SOLUSDT')),
+        ('notify', 'price_volume'),
+        ('prewarm', 5, False),
+    ]
+    summary = get_job_runtime_metadata('repair_market_rolling_job')['last_summary']
+    assert summary['score_snapshot']['saved_count'] == 3
+    assert 'detail_cache_prewarm' not in summary
+
+
+def test_scheduled_repair_market_rolling_leaves_detail_prewarm_to_web_in_collector_role(monkeypatch):
+    prewarms = []
+    monkeypatch.setattr(config, 'PROCESS_ROLE', 'collector')
+    monkeypatch.setattr('coinx.scheduler.get_active_coins', lambda: ['BTCUSDT'])
+    monkeypatch.setattr('coinx.scheduler.get_market_structure_score_symbols', lambda: ['BTCUSDT'])
+    monkeypatch.setattr(
+        'coinx.scheduler.repair_rolling_tracked_symbols',
+        lambda **kwargs: {'status': 'success', 'results': [], 'success_count': 1, 'failure_count': 0, 'skipped_count': 0},
+    )
+    monkeypatch.setattr('coinx.scheduler.refresh_market_structure_score_snapshot', lambda symbols=None: {'status': 'success'})
+    monkeypatch.setattr('coinx.scheduler.publish_cache_version', lambda name: None)
+    monkeypatch.setattr('coinx.scheduler.start_contract_detail_prewarm_async', lambda top_n: prewarms.append(top_n))
+    monkeypatch.setattr('coinx.scheduler._evaluate_market_notifications', lambda event_type: None)
+
+    scheduled_repair_market_rolling()
+
+    assert prewarms == []
+
+
 def test_scheduled_repair_market_rolling_skips_when_no_market_symbols(monkeypatch):
     calls = {'repair': 0}
 
@@ -130,3 +191,24 @@ def test_scheduled_repair_market_history_repairs_tracked_symbols_before_top_symb
         if '历史修补阶段 2/2' in message and 'top 榜币种' in message
     )
     assert tracked_start_index < top_start_index
+
+
+def test_rolling_repair_trigger_rounds_unaligned_interval_to_bar_close(monkeypatch, caplog):
+    monkeypatch.setattr('coinx.scheduler.REPAIR_ROLLING_ALIGN_TO_BAR_CLOSE', True)
+    monkeypatch.setattr('coinx.scheduler.ENABLED_EXCHANGES', ['binance', 'okx'])
+    monkeypatch.setattr('coinx.scheduler.EXCHANGE_PUBLISH_LAG_SECONDS', {'binance': 3, 'okx': 5})
+
+    for interval in (60, 300, 900):
+        monkeypatch.setattr('coinx.scheduler.REPAIR_TRACKED_INTERVAL', interval)
+        assert _rolling_repair_trigger_args()['seconds'] == interval
+    assert 'REPAIR_TRACKED_INTERVAL' not in caplog.text
+
+    with caplog.at_level(logging.WARNING):
+        monkeypatch.setattr('coinx.scheduler.REPAIR_TRACKED_INTERVAL', 420)
+        trigger_args = _rolling_repair_trigger_args()
+    assert trigger_args['seconds'] == 300
+    assert trigger_args['start_date'].timestamp() == 3
+    assert 'REPAIR_TRACKED_INTERVAL=420' in caplog.text
+
+    monkeypatch.setattr('coinx.scheduler.REPAIR_ROLLING_ALIGN_TO_BAR_CLOSE', False)
+    assert _rolling_repair_trigger_args() == {'seconds': 420}
@@ -0,0 +1,175 @@
+import math
+import random
+
+import pytest
+
+from coinx.repositories.market_structure_indicators import (
+    IndicatorRow,
+    build_metric_weight_maps,
+    compute_indicator_rows,
+    resolve_indicator_rows,
+)
+from coinx.repositories.market_structure_score import (
+    ATR_PERIOD,
+    EMA_FAST_PERIOD,
+    EMA_SLOW_PERIOD,
+    SCORE_HISTORY_POINTS,
+    VOLUME_RATIO_LOOKBACK_POINTS,
+    SeriesPoint,
+    _build_exchange_metric,
+    _build_metric_weights,
+    _build_symbol_report,
+)
+
+
+STEP_MS = 5 * 60 * 1000
+ANCHOR_TIME = 1711526400000
+
+
+def _random_kline_map(rng, points, missing_ratio=0.1, null_ratio=0.05):
+    kline_by_time = {}
+    price = rng.uniform(10, 1000)
+    for offset in range(points):
+        timestamp = ANCHOR_TIME - offset * STEP_MS
+        if offset and rng.random() < missing_ratio:
+            continue
+        price *= 1 + rng.uniform(-0.01, 0.01)
+        high = price * (1 + rng.uniform(0, 0.01))
+        low = price * (1 - rng.uniform(0, 0.01))
+        kline_by_time[timestamp] = SeriesPoint(
+            time=timestamp,
+            high_price=None if rng.random() < null_ratio else high,
+            low_price=low,
+            close_price=None if offset and rng.random() < null_ratio else price,
+            quote_volume=rng.uniform(1000, 50000),
+        )
+    return kline_by_time
+
+
+def _random_oi_map(rng, kline_by_time):
+    return {
+        timestamp: SeriesPoint(time=timestamp, open_interest=rng.uniform(100, 1000), open_interest_value=rng.uniform(1e5, 1e7))
+        for timestamp in kline_by_time
+    }
+
+
+def _assert_close(actual, expected):
+    if expected is None:
+        assert actual is None
+        return
+    assert actual == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize('points', [1, 2, 15, 61, 80, 130])
+def test_vectorized_indicators_match_scalar_exchange_metric(points):
+    rng = random.Random(points)
+    rows = []
+    expected_metrics = []
+    for _ in range(12):
+        kline_by_time = _random_kline_map(rng, points)
+        oi_by_time = _random_oi_map(rng, kline_by_time)
+        quote_volume_24h = rng.choice([None, 0, rng.uniform(1e5, 1e7)])
+        rows.append(IndicatorRow(kline_by_time=kline_by_time, anchor_time=ANCHOR_TIME, quote_volume_24h=quote_volume_24h))
+        expected_metrics.append(
+            _build_exchange_metric('binance', 'BTCUSDT', oi_by_time, kline_by_time, {}, ANCHOR_TIME, quote_volume_24h=quote_volume_24h)
+        )
+
+    indicator_values = compute_indicator_rows(
+        rows,
+        lookback_points=SCORE_HISTORY_POINTS,
+        fast_period=EMA_FAST_PERIOD,
+        slow_period=EMA_SLOW_PERIOD,
+        atr_period=ATR_PERIOD,
+        volume_lookback_points=VOLUME_RATIO_LOOKBACK_POINTS,
+    )
+
+    for expected, indicators in zip(expected_metrics, indicator_values):
+        _assert_close(indicators['ema_fast'], expected['ema20'])
+        _assert_close(indicators['ema_slow'], expected['ema60'])
+        _assert_close(indicators['atr'], expected['atr'])
+        _assert_close(indicators['volume_ratio'], expected['volume_ratio'])
+
+
+def test_batched_weights_match_symbol_report():
+    rng = random.Random(7)
+    metrics_by_symbol = {}
+    for symbol in ('BTCUSDT', 'ETHUSDT', 'SOLUSDT'):
+        metrics = []
+        for exchange in ('binance', 'okx', 'bybit'):
+            kline_by_time = _random_kline_map(rng, 80, missing_ratio=0)
+            oi_by_time = _random_oi_map(rng, kline_by_time)
+            metric = _build_exchange_metric(exchange, symbol, oi_by_time, kline_by_time, {}, ANCHOR_TIME, funding_rate=0.0001)
+            if symbol == 'SOLUSDT':
+                metric['open_interest_value'] = 0
+            metrics.append(metric)
+        metrics_by_symbol[symbol] = metrics
+
+    weights_by_symbol = build_metric_weight_maps(metrics_by_symbol)
+
+    for symbol, metrics in metrics_by_symbol.items():
+        expected_weights = _build_metric_weights(metrics)
+        assert weights_by_symbol[symbol].keys() == expected_weights.keys()
+        for exchange, weight in expected_weights.items():
+            assert math.isclose(weights_by_symbol[symbol][exchange], weight, rel_tol=1e-12)
+
+        expected = _build_symbol_report(symbol, [dict(metric) for metric in metrics], None, ANCHOR_TIME)
+        actual = _build_symbol_report(symbol, [dict(metric) for metric in metrics], None, ANCHOR_TIME, weights=weights_by_symbol[symbol])
+        assert actual['total_score'] == pytest.approx(expected['total_score'])
+        assert actual['trade_signal'] == expected['trade_signal']
+        assert actual['current_price'] == pytest.approx(expected['current_price'])
+
+
+def _resolve(kline_by_time, anchor_time):
+    rows = [IndicatorRow(kline_by_time=kline_by_time, anchor_time=anchor_time, quote_volume_24h=1e6, key=('binance', 'BTCUSDT'))]
+    kwargs = dict(
+        lookback_points=SCORE_HISTORY_POINTS,
+        fast_period=EMA_FAST_PERIOD,
+        slow_period=EMA_SLOW_PERIOD,
+        atr_period=ATR_PERIOD,
+        volume_lookback_points=VOLUME_RATIO_LOOKBACK_POINTS,
+    )
+    values, stats = resolve_indicator_rows(rows, **kwargs)
+    expected = compute_indicator_rows(rows, **kwargs)[0]
+    for name in ('ema_fast', 'ema_slow', 'atr', 'volume_ratio'):
+        _assert_close(values[0][name], expected[name])
+    return stats
+
+
+def test_indicator_state_advances_one_bar_per_anchor_and_matches_full_recompute():
+    rng = random.Random(11)
+    kline_by_time = _random_kline_map(rng, 200, missing_ratio=0, null_ratio=0)
+    first_anchor = ANCHOR_TIME - 100 * STEP_MS
+
+    assert _resolve(kline_by_time, first_anchor) == {'reused': 0, 'advanced': 0, 'recomputed': 1}
+    assert _resolve(kline_by_time, first_anchor) == {'reused': 1, 'advanced': 0, 'recomputed': 0}
+    for step in range(1, 101):
+        assert _resolve(kline_by_time, first_anchor + step * STEP_MS)['advanced'] == 1
+
+
+def test_indicator_state_recomputes_after_gap_or_rewritten_bar():
+    rng = random.Random(12)
+    kline_by_time = _random_kline_map(rng, 200, missing_ratio=0, null_ratio=0)
+    anchor_time = ANCHOR_TIME - 10 * STEP_MS
+    _resolve(kline_by_time, anchor_time)
+
+    assert _resolve(kline_by_time, anchor_time + 2 * STEP_MS)['recomputed'] == 1
+
+    anchor_time += 2 * STEP_MS
+    point = kline_by_time[anchor_time]
+    kline_by_time[anchor_time] = SeriesPoint(
+        time=anchor_time,
+        high_price=point.high_price,
+        low_price=point.low_price,
+        close_price=point.close_price * 1.01,
+        quote_volume=point.quote_volume,
+    )
+    assert _resolve(kline_by_time, anchor_time + STEP_MS)['recomputed'] == 1
+
+
+def test_indicator_state_is_not_built_for_sparse_windows():
+    rng = random.Random(13)
+    kline_by_time = _random_kline_map(rng, 120, missing_ratio=0.2, null_ratio=0.05)
+
+    _resolve(kline_by_time, ANCHOR_TIME)
+
+    assert _resolve(kline_by_time, ANCHOR_TIME)['recomputed'] == 1
@@ -134,3 +134,47 @@ def test_market_structure_score_refresh_waits_for_existing_run(monkeypatch):
     payload = response.get_json()
     assert payload['status'] == 'success'
     assert payload['message'] == 'existing run finished'
+
+
+def test_market_structure_score_api_prefers_stored_snapshot(monkeypatch):
+    monkeypatch.setattr(
+        'coinx.web.routes.api_data.get_market_structure_score_symbols',
+        lambda: ['BTCUSDT', 'ETHUSDT'],
+    )
+    monkeypatch.setattr(
+        'coinx.web.routes.api_data.load_stored_market_structure_score',
+        lambda symbols=None: {
+            'data': [{'symbol': 'ETHUSDT', 'total_score': 35}],
+            'cache_update_time': 1711526400000,
+            'summary': {'total_symbols': 1},
+        },
+    )
+
+    def fail_snapshot(symbols=None):
+        raise AssertionError('stored snapshot should be served without recomputing')
+
+    monkeypatch.setattr('coinx.web.routes.api_data.get_market_structure_score_snapshot', fail_snapshot)
+
+    response = create_test_client().get('/api/market-structure-score')
+
+    assert response.status_code == 200
+    assert response.get_json()['data'][0]['symbol'] == 'ETHUSDT'
+
+
+def test_coin_detail_structure_score_history_api(monkeypatch):
+    captured = {}
+
+    def fake_history(symbol, hours=24):
+        captured.update({'symbol': symbol, 'hours': hours})
+        return [{'time': 1711526400000, 'total_score': 12.5}]
+
+    monkeypatch.setattr('coinx.web.routes.api_data.load_market_structure_score_history', fake_history)
+    client = create_test_client()
+
+    response = client.get('/api/coin-detail/btcusdt/structure-score/history?range=4h')
+
+    assert response.status_code == 200
+    payload = response.get_json()['data']
+    assert captured == {'symbol': 'BTCUSDT', 'hours': 4}
+    assert payload['history'][0]['total_score'] == 12.5
+    assert client.get('/api/coin-detail/BTCUSDT/structure-score/history?range=2y').status_code == 400
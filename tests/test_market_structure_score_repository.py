@@ -1,3 +1,5 @@
+import time
+
 from coinx.repositories.market_structure_score import (
     _atr,
     _build_symbol_exchange_diagnostics,
@@ -13,6 +15,7 @@ from coinx.repositories.market_structure_score import (
     get_market_structure_score_symbols,
     SeriesPoint,
 )
+from coinx.repositories.funding_rate_cache import publish_funding_rates, reset_funding_rate_cache
 from coinx.repositories.homepage_series import HomepageOpenInterestPoint
 
 
@@ -300,42 +303,33 @@ def test_build_symbol_report_uses_weighted_exchange_funding_rate_for_risk():
     assert report['risk_score'] == -10
 
 
-def test_load_exchange_funding_rate_maps_filters_to_target_symbols(monkeypatch):
-    monkeypatch.setattr(
-        'coinx.repositories.market_structure_score.EXCHANGE_FUNDING_LOADERS',
-        {
-            'binance': lambda: {
-                'BTCUSDT': {'lastFundingRate': '0.0010'},
-                'ETHUSDT': {'lastFundingRate': '0.0005'},
-            },
-            'okx': lambda: {
-                'BTCUSDT': {'fundingRate': '0.0008'},
-                'SOLUSDT': {'fundingRate': '-0.0002'},
-            },
-        },
-    )
-
-    result = _load_exchange_funding_rate_maps(['binance', 'okx'], ['BTCUSDT'])
-
+def test_load_exchange_funding_rate_maps_filters_to_target_symbols(db_session):
+    publish_funding_rates('binance', [
+        {'symbol': 'BTCUSDT', 'funding_rate': 0.001},
+        {'symbol': 'ETHUSDT', 'funding_rate': 0.0005},
+    ], session=db_session)
+    publish_funding_rates('okx', [
+        {'symbol': 'BTCUSDT', 'funding_rate': 0.0008},
+        {'symbol': 'SOLUSDT', 'funding_rate': -0.0002},
+    ], session=db_session)
+
+    result = _load_exchange_funding_rate_maps(['binance', 'okx'], ['BTCUSDT'], session=db_session)
+
     assert result == {
         'binance': {'BTCUSDT': 0.001},
         'okx': {'BTCUSDT': 0.0008},
     }
 
 
-def test_load_exchange_funding_rate_maps_supports_gate(monkeypatch):
-    monkeypatch.setattr(
-        'coinx.repositories.market_structure_score.EXCHANGE_FUNDING_LOADERS',
-        {
-            'gate': lambda: {
-                'BTCUSDT': {'fundingRate': '0.0006'},
-                'ETHUSDT': {'fundingRate': '0.0003'},
-            },
-        },
-    )
+def test_load_exchange_funding_rate_maps_reads_db_cache_and_skips_stale(db_session):
+    fetched_time = int(time.time() * 1000)
+    publish_funding_rates('gate', [{'symbol': 'BTCUSDT', 'funding_rate': 0.0006}], fetched_time=fetched_time, session=db_session)
+    publish_funding_rates('bybit', [{'symbol': 'BTCUSDT', 'funding_rate': 0.0002}], fetched_time=fetched_time - 3600 * 1000, session=db_session)
+    reset_funding_rate_cache()
 
-    result = _load_exchange_funding_rate_maps(['gate'], ['BTCUSDT'])
+    result = _load_exchange_funding_rate_maps(['gate', 'bybit'], ['BTCUSDT'], session=db_session)
 
     assert result == {
         'gate': {'BTCUSDT': 0.0006},
+        'bybit': {},
     }
@@ -0,0 +1,107 @@
+import pytest
+import werkzeug
+
+from coinx import metrics
+from coinx.collector.binance.client import _record_request_metrics, _request_metric_labels
+from coinx.collector.okx.series import _okx_rate_limits
+from coinx.config import OKX_BASE_URL
+from coinx.web.app import create_app
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset_metrics()
+    _okx_rate_limits.clear()
+    yield
+    _okx_rate_limits.clear()
+
+
+def create_test_client():
+    if not hasattr(werkzeug, '__version__'):
+        werkzeug.__version__ = '3'
+    app = create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def test_render_metrics_outputs_prometheus_text_with_runtime_gauges(monkeypatch):
+    monkeypatch.setattr('coinx.config.NOTIFICATIONS_ENABLED', False)
+    _okx_rate_limits.update_budget('okx', 'rubik', limit=20, remain=7)
+    _okx_rate_limits.mark_cooldown('okx', 'default', 30)
+    assert _request_metric_labels(f'{OKX_BASE_URL}/api/v5/market/history-candles') == ('okx', '/api/v5/market/history-candles')
+    _record_request_metrics(f'{OKX_BASE_URL}/api/v5/market/history-candles', 200, started_at=0.0)
+    metrics.record_cache_lookup('homepage', True)
+    metrics.record_cache_lookup('homepage', False)
+    metrics.observe('coinx_job_duration_seconds', 0.3, job='repair_market_rolling_job', status='success')
+
+    text = metrics.render_metrics()
+
+    assert '# TYPE coinx_exchange_requests_total counter' in text
+    assert 'coinx_exchange_requests_total{endpoint="/api/v5/market/history-candles",exchange="okx",status="200"} 1' in text
+    assert 'coinx_cache_requests_total{cache="homepage",result="hit"} 1' in text
+    assert 'coinx_rate_limit_remaining{exchange="okx",group="rubik",proxy="direct"} 7' in text
+    assert 'coinx_rate_limit_limit{exchange="okx",group="rubik",proxy="direct"} 20' in text
+    assert 'coinx_rate_limit_cooldown_seconds{exchange="okx",group="default",proxy="direct"} 29.' in text
+    assert 'coinx_job_duration_seconds_bucket{job="repair_market_rolling_job",status="success",le="0.25"} 0' in text
+    assert 'coinx_job_duration_seconds_bucket{job="repair_market_rolling_job",status="success",le="0.5"} 1' in text
+    assert 'coinx_job_duration_seconds_count{job="repair_market_rolling_job",status="success"} 1' in text
+    assert 'coinx_db_pool_size ' in text
+
+
+def test_metrics_endpoint_accepts_bearer_token_or_public_mode(monkeypatch):
+    monkeypatch.setattr('coinx.config.NOTIFICATIONS_ENABLED', False)
+    monkeypatch.setattr('coinx.config.METRICS_AUTH_TOKEN', 'scrape-secret')
+    client = create_test_client()
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    assert 'coinx_http_requests_total' in client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'}).get_data(as_text=True)
+
+    monkeypatch.setattr('coinx.config.METRICS_AUTH_TOKEN', None)
+    monkeypatch.setattr('coinx.config.METRICS_PUBLIC', True)
+    assert client.get('/metrics').status_code == 200
+
+    monkeypatch.setattr('coinx.config.METRICS_ENABLED', False)
+    assert client.get('/metrics').status_code == 404
+
+
+def test_collector_metrics_server_uses_same_token_check(monkeypatch):
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    from coinx.metrics_server import start_metrics_server, stop_metrics_server
+
+    monkeypatch.setattr('coinx.config.NOTIFICATIONS_ENABLED', False)
+    monkeypatch.setattr('coinx.config.METRICS_AUTH_TOKEN', 'scrape-secret')
+    metrics.inc_counter('coinx_repair_records_written_total', 3, exchange='binance')
+    server = start_metrics_server(port=0, host='127.0.0.1')
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    def status_of(path, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        try:
+            with urlopen(Request(base_url + path, headers=headers), timeout=5) as response:
+                return response.status, response.headers.get('Content-Type'), response.read().decode('utf-8')
+        except HTTPError as exc:
+            return exc.code, None, None
+
+    try:
+        assert status_of('/metrics')[0] == 401
+        assert status_of('/metrics', 'wrong')[0] == 401
+        assert status_of('/other', 'scrape-secret')[0] == 404
+        status, content_type, body = status_of('/metrics', 'scrape-secret')
+        assert status == 200
+        assert content_type.startswith('text/plain; version=0.0.4')
+        assert 'coinx_repair_records_written_total{exchange="binance"} 3' in body
+
+        # 采集进程没有登录页：未配置 token 时拒绝所有请求
+        monkeypatch.setattr('coinx.config.METRICS_AUTH_TOKEN', None)
+        assert status_of('/metrics')[0] == 401
+        monkeypatch.setattr('coinx.config.METRICS_PUBLIC', True)
+        assert status_of('/metrics')[0] == 200
+    finally:
+        stop_metrics_server(server)
@@ -0,0 +1,157 @@
+from cryptography.fernet import Fernet
+
+from coinx import config, notification_delivery, notifications
+from coinx.models import (
+    AlertRule,
+    AlertRuleChannel,
+    MarketFundingRate,
+    NotificationChannel,
+    NotificationDelivery,
+    NotificationOutbox,
+)
+
+
+def configure_async_delivery(monkeypatch, sent):
+    monkeypatch.setattr(config, 'NOTIFICATIONS_ENABLED', True)
+    monkeypatch.setattr(config, 'NOTIFICATION_ENCRYPTION_KEY', Fernet.generate_key().decode())
+    monkeypatch.setattr(config, 'NOTIFICATION_DELIVERY_MODE', 'async')
+    monkeypatch.setattr(config, 'NOTIFICATION_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(config, 'NOTIFICATION_RETRY_BASE_SECONDS', 10)
+    monkeypatch.setattr(notifications, 'send_apprise', lambda url, title, body: sent.append((url, title, body)) or True)
+
+
+def seed_two_funding_rules(db_session):
+    channel = NotificationChannel(
+        name='webhook',
+        channel_type='apprise',
+        config_encrypted=notifications.encrypt_apprise_url('json://example.test/coinx'),
+        key_version='v1',
+        enabled=True,
+    )
+    db_session.add(channel)
+    db_session.flush()
+    for threshold in (0.001, 0.0005):
+        rule = AlertRule(
+            name=f'funding-{threshold}',
+            event_type=notifications.EVENT_FUNDING_RATE,
+            scope_type='all_market',
+            scope_json={},
+            params_json={'threshold': threshold, 'direction': 'absolute'},
+            cooldown_seconds=0,
+            recovery_enabled=True,
+            enabled=True,
+        )
+        db_session.add(rule)
+        db_session.flush()
+        db_session.add(AlertRuleChannel(rule_id=rule.id, channel_id=channel.id))
+    db_session.add(MarketFundingRate(symbol='BTCUSDT', period='5m', event_time=100, funding_rate=0.0012, exchange='binance'))
+    db_session.commit()
+    return channel
+
+
+def test_evaluation_enqueues_and_worker_sends_one_batched_message(db_session, monkeypatch):
+    sent = []
+    configure_async_delivery(monkeypatch, sent)
+    seed_two_funding_rules(db_session)
+
+    assert notifications.evaluate_funding_rate_rules(session=db_session)['sent'] == 2
+    assert sent == []
+    assert db_session.query(NotificationOutbox).count() == 2
+
+    summary = notification_delivery.process_notification_outbox(session=db_session)
+
+    assert summary == {'batches': 1, 'events': 2, 'sent': 1, 'retry': 0, 'failed': 0}
+    assert len(sent) == 1
+    url, title, body = sent[0]
+    assert url == 'json://example.test/coinx'
+    assert title == 'CoinX · 2 条通知'
+    assert body.count('检查对象：1｜触发异常：1｜恢复正常：0') == 2
+    deliveries = db_session.query(NotificationDelivery).all()
+    assert [delivery.delivery_status for delivery in deliveries] == ['success', 'success']
+    assert deliveries[0].payload_json['delivery'] == {'attempts': 1, 'batch_size': 2}
+    assert db_session.query(NotificationOutbox).count() == 0
+
+
+def test_failed_batch_retries_with_backoff_then_records_failure(db_session, monkeypatch):
+    sent = []
+    configure_async_delivery(monkeypatch, sent)
+    seed_two_funding_rules(db_session)
+    notifications.evaluate_funding_rate_rules(session=db_session)
+    current_ms = [notifications.now_ms()]
+    monkeypatch.setattr(notifications, 'now_ms', lambda: current_ms[0])
+
+    def fail_delivery(*_args):
+        raise RuntimeError('webhook timed out')
+
+    monkeypatch.setattr(notifications, 'send_apprise', fail_delivery)
+
+    assert notification_delivery.process_notification_outbox(session=db_session)['retry'] == 1
+    rows = db_session.query(NotificationOutbox).all()
+    assert {(row.status, row.attempts, row.next_attempt_at, row.last_error) for row in rows} == {
+        ('pending', 1, current_ms[0] + 10000, 'webhook timed out'),
+    }
+    assert notification_delivery.process_notification_outbox(session=db_session)['batches'] == 0
+
+    current_ms[0] += 10000
+    assert notification_delivery.process_notification_outbox(session=db_session)['failed'] == 1
+    deliveries = db_session.query(NotificationDelivery).all()
+    assert {(delivery.delivery_status, delivery.error_message) for delivery in deliveries} == {
+        ('failed', 'webhook timed out'),
+    }
+    assert db_session.query(NotificationOutbox).count() == 0
+
+
+def test_stale_claim_does_not_send_or_finish_reclaimed_rows(db_session, monkeypatch):
+    sent = []
+    configure_async_delivery(monkeypatch, sent)
+    seed_two_funding_rules(db_session)
+    notifications.evaluate_funding_rate_rules(session=db_session)
+    current_ms = [notifications.now_ms()]
+    monkeypatch.setattr(notifications, 'now_ms', lambda: current_ms[0])
+
+    [(channel_id, outbox_ids, stale_token)] = notification_delivery.claim_due_batches(db_session)
+    # 租约过期后被另一个进程重新领取
+    current_ms[0] += notification_delivery.OUTBOX_LEASE_MS + 1
+    [(_channel_id, _ids, fresh_token)] = notification_delivery.claim_due_batches(db_session)
+    assert fresh_token != stale_token
+
+    result = notification_delivery.deliver_channel_batch(channel_id, outbox_ids, stale_token, session=db_session)
+
+    assert result == {'status': 'skipped', 'sent': 0}
+    assert sent == []
+
+    # 发送过程中租约被重新领取：旧批次既不写发送记录也不删除新领取的行
+    def reclaim_during_send(url, title, body):
+        sent.append(title)
+        db_session.execute(
+            NotificationOutbox.__table__.update().values(claim_token='other-claim')
+        )
+
+    monkeypatch.setattr(notifications, 'send_apprise', reclaim_during_send)
+    notification_delivery.deliver_channel_batch(channel_id, outbox_ids, fresh_token, session=db_session)
+
+    assert len(sent) == 1
+    assert db_session.query(NotificationDelivery).count() == 0
+    assert {row.claim_token for row in db_session.query(NotificationOutbox).all()} == {'other-claim'}
+
+
+def test_batches_respect_channel_concurrency_and_batch_size(monkeypatch):
+    monkeypatch.setattr(config, 'NOTIFICATION_BATCH_MAX_EVENTS', 2)
+    monkeypatch.setattr(config, 'NOTIFICATION_CHANNEL_CONCURRENCY', 2)
+    rows = [type('Row', (), {'id': index, 'channel_id': 1 if index < 6 else 2})() for index in range(8)]
+
+    assert notification_delivery._plan_batches(rows) == [(1, [0, 1]), (1, [2, 3]), (2, [6, 7])]
+    assert notification_delivery._plan_batches(rows, busy_slots={1: 1, 2: 2}) == [(1, [0, 1])]
+
+
+def test_channel_url_is_decrypted_once_per_ciphertext(monkeypatch):
+    monkeypatch.setattr(config, 'NOTIFICATION_ENCRYPTION_KEY', Fernet.generate_key().decode())
+    decrypted = []
+    original = notifications.decrypt_apprise_url
+    monkeypatch.setattr(notifications, 'decrypt_apprise_url', lambda channel: decrypted.append(1) or original(channel))
+    channel = type('Channel', (), {'config_encrypted': notifications.encrypt_apprise_url('json://example.test/a')})()
+
+    assert notifications.cached_apprise_url(channel) == notifications.cached_apprise_url(channel) == 'json://example.test/a'
+    channel.config_encrypted = notifications.encrypt_apprise_url('json://example.test/b')
+    assert notifications.cached_apprise_url(channel) == 'json://example.test/b'
+    assert len(decrypted) == 2
@@ -25,6 +25,7 @@ def configure_notifications(monkeypatch):
     monkeypatch.setattr(config, 'NOTIFICATIONS_ENABLED', True)
     monkeypatch.setattr(config, 'NOTIFICATION_ENCRYPTION_KEY', Fernet.generate_key().decode())
     monkeypatch.setattr(config, 'NOTIFICATION_ENCRYPTION_KEY_VERSION', 'v1')
+    monkeypatch.setattr(config, 'NOTIFICATION_DELIVERY_MODE', 'sync')
     monkeypatch.setattr(notifications, 'send_apprise', lambda *args, **kwargs: True)
 
 
@@ -507,3 +508,151 @@ def test_notification_management_page_renders():
 
     assert response.status_code == 200
     assert '告警管理' in response.get_data(as_text=True)
+
+
+def test_scheduled_rules_share_one_pass_with_bulk_state_io(db_session, monkeypatch):
+    configure_notifications(monkeypatch)
+    monkeypatch.setattr(notifications, 'get_session', lambda: db_session)
+    channel = create_channel(db_session)
+    strict = create_rule(
+        db_session, channel, notifications.EVENT_FUNDING_RATE, 'all_market',
+        {'threshold': 0.001, 'direction': 'absolute', 'recovery_confirmations': 1},
+    )
+    loose = AlertRule(
+        name='loose funding', event_type=notifications.EVENT_FUNDING_RATE, scope_type='all_market',
+        scope_json={}, params_json={'threshold': 0.0001, 'direction': 'absolute'},
+        cooldown_seconds=0, recovery_enabled=True, enabled=True,
+    )
+    db_session.add(loose)
+    db_session.flush()
+    db_session.add(AlertRuleChannel(rule_id=loose.id, channel_id=channel.id))
+    db_session.add_all([
+        MarketFundingRate(symbol='BTCUSDT', period='5m', event_time=100, funding_rate=0.0012, exchange='binance'),
+        MarketFundingRate(symbol='ETHUSDT', period='5m', event_time=100, funding_rate=0.0005, exchange='binance'),
+    ])
+    db_session.commit()
+    rate_loads = []
+    original_load = notifications.load_latest_funding_rates
+    monkeypatch.setattr(notifications, 'load_latest_funding_rates', lambda session=None: rate_loads.append(1) or original_load(session=session))
+    statements = []
+
+    def capture_state_statements(_conn, _cursor, statement, _params, _context, executemany):
+        if 'alert_states' in statement and not statement.lstrip().upper().startswith('PRAGMA'):
+            statements.append((statement.lstrip().split()[0].upper(), executemany))
+
+    event.listen(db_session.bind, 'before_cursor_execute', capture_state_statements)
+    try:
+        result = notifications.evaluate_scheduled_rules(notifications.EVENT_FUNDING_RATE)
+    finally:
+        event.remove(db_session.bind, 'before_cursor_execute', capture_state_statements)
+
+    assert result['status'] == 'success'
+    assert rate_loads == [1]
+    # One insert/select/CAS for all (rule, symbol) pairs, then one notified-at update per rule.
+    assert statements == [('INSERT', False), ('SELECT', False), ('UPDATE', True), ('UPDATE', False), ('UPDATE', False)]
+    runs = {run.rule_id: run for run in db_session.query(AlertEvaluationRun).all()}
+    assert (runs[strict.id].checked_count, runs[strict.id].matched_count, runs[strict.id].sent_count) == (2, 1, 1)
+    assert (runs[loose.id].checked_count, runs[loose.id].matched_count, runs[loose.id].sent_count) == (2, 2, 1)
+    states = db_session.query(AlertState).filter_by(state='triggered').all()
+    assert {(state.rule_id, state.subject_key, state.version) for state in states} == {
+        (strict.id, 'BTCUSDT', 1), (loose.id, 'BTCUSDT', 1), (loose.id, 'ETHUSDT', 1),
+    }
+
+
+def test_bulk_state_cas_detects_concurrent_writer(db_session, monkeypatch):
+    configure_notifications(monkeypatch)
+    channel = create_channel(db_session)
+    rule = create_rule(
+        db_session, channel, notifications.EVENT_FUNDING_RATE, 'all_market',
+        {'threshold': 0.001, 'direction': 'absolute'},
+    )
+    states = notifications._load_alert_states(db_session, [
+        (rule.id, 'absolute', 'BTCUSDT'), (rule.id, 'absolute', 'ETHUSDT'),
+    ])
+    btc, eth = states[(rule.id, 'absolute', 'BTCUSDT')], states[(rule.id, 'absolute', 'ETHUSDT')]
+    db_session.execute(AlertState.__table__.update().where(AlertState.__table__.c.id == eth.id).values(version=5))
+    values = {
+        'state': 'triggered', 'consecutive_matches': 1, 'last_value_json': {'funding_rate': 0.01},
+        'last_triggered_at': 1, 'last_recovered_at': None,
+    }
+
+    lost = notifications._bulk_cas_update_alert_states(db_session, [(btc, values), (eth, values)])
+
+    assert lost == [eth]
+    assert eth.version == 5 and eth.state == 'normal'
+    assert btc.version == 1 and btc.state == 'triggered'
+    db_session.commit()
+    assert db_session.get(AlertState, btc.id).last_value_json == {'funding_rate': 0.01}
+
+
+def test_observe_many_isolates_rule_errors_and_retries_conflicts_per_row(db_session, monkeypatch):
+    configure_notifications(monkeypatch)
+    channel = create_channel(db_session)
+    healthy = create_rule(
+        db_session, channel, notifications.EVENT_FUNDING_RATE, 'all_market',
+        {'threshold': 0.001, 'direction': 'absolute'},
+    )
+    healthy.name = 'healthy funding'
+    db_session.commit()
+    broken = create_rule(
+        db_session, channel, notifications.EVENT_FUNDING_RATE, 'all_market',
+        {'threshold': 0.001, 'direction': 'absolute'},
+    )
+
+    def fail(_state):
+        raise ValueError('bad params')
+
+    observations = [
+        notifications.AlertObservation(healthy, 'BTCUSDT', 'absolute', lambda _state: (True, {'funding_rate': 0.01}, None)),
+        notifications.AlertObservation(broken, 'BTCUSDT', 'absolute', lambda _state: (True, {'funding_rate': 0.01}, None)),
+        notifications.AlertObservation(broken, 'ETHUSDT', 'absolute', fail),
+    ]
+    # Every bulk round loses, so the healthy pair must land through the per-row CAS.
+    monkeypatch.setattr(notifications, '_bulk_cas_update_alert_states', lambda _db, writes: [state for state, _values in writes])
+    rule_errors = {}
+
+    results = notifications._observe_many(db_session, observations, rule_errors=rule_errors)
+    db_session.commit()
+
+    assert rule_errors == {broken.id: 'bad params'}
+    assert results[0]['event_status'] == 'triggered' and results[0]['state'] is not None
+    assert results[1]['event_status'] is None
+    states = {(state.rule_id, state.subject_key): state for state in db_session.query(AlertState).all()}
+    assert (states[(healthy.id, 'BTCUSDT')].state, states[(healthy.id, 'BTCUSDT')].version) == ('triggered', 1)
+    assert states[(broken.id, 'BTCUSDT')].state == 'normal'
+
+
+def test_failing_rule_does_not_fail_its_siblings_in_a_shared_pass(db_session, monkeypatch):
+    configure_notifications(monkeypatch)
+    monkeypatch.setattr(notifications, 'get_session', lambda: db_session)
+    channel = create_channel(db_session)
+    first = create_rule(
+        db_session, channel, notifications.EVENT_FUNDING_RATE, 'all_market',
+        {'threshold': 0.001, 'direction': 'absolute'},
+    )
+    first.name = 'first funding'
+    db_session.commit()
+    second = create_rule(
+        db_session, channel, notifications.EVENT_FUNDING_RATE, 'all_market',
+        {'threshold': 0.001, 'direction': 'absolute'},
+    )
+    db_session.add(MarketFundingRate(symbol='BTCUSDT', period='5m', event_time=100, funding_rate=0.0012, exchange='binance'))
+    db_session.commit()
+    original_deliver = notifications._deliver_evaluation_summary
+
+    def deliver(db, rule, *args):
+        if rule.id == first.id:
+            raise RuntimeError('channel exploded')
+        return original_deliver(db, rule, *args)
+
+    monkeypatch.setattr(notifications, '_deliver_evaluation_summary', deliver)
+
+    result = notifications.evaluate_scheduled_rules(notifications.EVENT_FUNDING_RATE)
+
+    assert result['status'] == 'error'
+    runs = {run.rule_id: run for run in db_session.query(AlertEvaluationRun).all()}
+    assert (runs[first.id].status, runs[first.id].sent_count) == ('error', 0)
+    assert 'channel exploded' in runs[first.id].error_message
+    assert (runs[second.id].status, runs[second.id].sent_count) == ('success', 1)
+    assert db_session.query(NotificationDelivery).filter_by(rule_id=second.id).count() == 1
+    assert db_session.query(NotificationDelivery).filter_by(rule_id=first.id).count() == 0
@@ -1,6 +1,7 @@
 from types import SimpleNamespace
 
 import coinx.runtime as runtime
+from coinx.collector.rate_limit import current_request_class
 
 
 def test_start_runtime_services_starts_scheduler_and_bootstrap(monkeypatch):
@@ -11,6 +12,7 @@ def test_start_runtime_services_starts_scheduler_and_bootstrap(monkeypatch):
 
     def fake_startup_repair():
         calls.append('repair_started')
+        calls.append(current_request_class())
 
     class FakeThread:
         def __init__(self, target=None, daemon=None):
@@ -23,6 +25,7 @@ def test_start_runtime_services_starts_scheduler_and_bootstrap(monkeypatch):
             calls.append(self.target.__name__)
             self.target()
 
+    monkeypatch.setattr(runtime, 'upgrade_database_schema', lambda: calls.append('upgrade_schema'))
     monkeypatch.setattr(runtime, 'scheduler', SimpleNamespace(running=True))
     monkeypatch.setattr(runtime, 'SCHEDULER_ENABLED', True)
     monkeypatch.setattr(runtime, 'get_active_coins', lambda: ['BTCUSDT'])
@@ -37,4 +40,26 @@ def test_start_runtime_services_starts_scheduler_and_bootstrap(monkeypatch):
     assert result['tracked_coins'] == ['BTCUSDT']
     assert result['scheduler_thread'].started is True
     assert result['repair_thread'].started is True
-    assert calls == ['fake_start_scheduler', 'scheduler_started', 'fake_startup_repair', 'repair_started']
+    assert calls == ['upgrade_schema', 'fake_start_scheduler', 'scheduler_started', '_run_startup_repair', 'repair_started', 'rolling']
+
+
+def test_upgrade_database_schema_adds_alert_state_version(monkeypatch, tmp_path):
+    from sqlalchemy import create_engine, inspect, text
+    from sqlalchemy.orm import sessionmaker
+
+    from coinx import notifications
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE alert_states (id INTEGER PRIMARY KEY, rule_id INTEGER, subject_key VARCHAR(80), '
+            "dimension_key VARCHAR(80), state VARCHAR(20) DEFAULT 'normal')"
+        ))
+    monkeypatch.setattr(runtime, 'get_session', sessionmaker(bind=engine))
+    monkeypatch.setattr(notifications, 'ALERT_STATE_VERSION_CHECKED', False)
+
+    runtime.upgrade_database_schema()
+
+    assert 'version' in {column['name'] for column in inspect(engine).get_columns('alert_states')}
+    assert notifications.ALERT_STATE_VERSION_CHECKED is True
+    engine.dispose()
@@ -0,0 +1,57 @@
+import json
+
+from coinx import scheduler, shutdown
+from coinx.collector import exchange_repair
+
+
+def test_graceful_shutdown_waits_for_running_jobs_until_deadline(monkeypatch):
+    monkeypatch.setattr(shutdown, 'SHUTDOWN_POLL_SECONDS', 0.01)
+    monkeypatch.setitem(scheduler.JOB_METADATA, 'repair_rolling', {'job_id': 'repair_rolling', 'running': True})
+
+    summary = shutdown.graceful_shutdown(timeout_seconds=0.05)
+
+    assert shutdown.is_shutting_down() is True
+    assert summary['unfinished_jobs'] == ['repair_rolling']
+    assert list(summary['steps']) == [name for name, _ in shutdown.SHUTDOWN_STEPS]
+    assert summary['steps']['drain_jobs']['duration_ms'] >= 50
+    assert shutdown.graceful_shutdown() is summary
+
+
+def test_graceful_shutdown_saves_history_cursor_to_warm_start_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(exchange_repair, '_history_symbol_cursor', 2)
+    monkeypatch.setattr(exchange_repair, '_history_cursor_pending_symbol', None)
+    monkeypatch.setattr(exchange_repair, '_history_cursor_next_symbol', 'SOLUSDT')
+
+    summary = shutdown.graceful_shutdown(timeout_seconds=1)
+
+    assert summary['unfinished_jobs'] == []
+    assert 'history_cursor' in summary['steps']['save_warm_start']['result']
+    snapshot = json.loads((tmp_path / 'warm_start.json').read_text(encoding='utf-8'))
+    assert snapshot['sections']['history_cursor']['data'] == {'index': 2, 'next_symbol': 'SOLUSDT'}
+
+
+def test_jobs_and_repair_tasks_are_skipped_once_shutting_down(monkeypatch):
+    calls = []
+
+    @scheduler.coordinated_job('test_job')
+    def job():
+        calls.append('job')
+        return 'done'
+
+    def worker(task, db_session=None):
+        calls.append(task['symbol'])
+        return {'symbol': task['symbol'], 'status': 'success'}
+
+    shutdown.SHUTDOWN_EVENT.set()
+
+    assert job() is None
+    results = exchange_repair._run_tasks(
+        [{'exchange': 'binance', 'symbol': 'BTCUSDT', 'series_type': 'klines', 'period': '5m'}],
+        worker,
+        max_workers=1,
+        mode='history',
+    )
+
+    assert calls == []
+    assert results[0]['status'] == 'skipped'
+    assert results[0]['reason'] == 'shutdown'
@@ -118,3 +118,26 @@ def test_control_task_job_rejects_actions_when_scheduler_disabled(monkeypatch):
     payload = response.get_json()
     assert payload['status'] == 'error'
     assert 'SCHEDULER_ENABLED=false' in payload['message']
+
+
+def test_list_task_jobs_includes_run_duration_percentiles(monkeypatch, test_db):
+    from sqlalchemy.orm import sessionmaker
+
+    from coinx.repositories.job_runs import record_job_run
+
+    monkeypatch.setattr('coinx.repositories.job_runs.get_session', sessionmaker(bind=test_db))
+    monkeypatch.setattr('coinx.web.routes.api_data.scheduler', SimpleNamespace(running=False, get_jobs=lambda: []))
+    monkeypatch.setattr('coinx.web.routes.api_data.get_all_job_runtime_metadata', lambda: {})
+    for duration_ms in (100, 200, 300):
+        record_job_run('job-a', 'success', duration_ms=duration_ms, summary={'duration_breakdown_ms': {'api_ms': duration_ms}})
+
+    client = create_test_client()
+    response = client.get('/api/task-jobs?window_hours=24')
+
+    assert response.status_code == 200
+    run_stats = response.get_json()['data']['run_stats']
+    assert run_stats['window_hours'] == 24
+    assert run_stats['jobs']['job-a']['p50_ms'] == 200
+    assert run_stats['jobs']['job-a']['stages']['api_ms'] == {'p50_ms': 200, 'p95_ms': 300}
+
+    assert client.get('/api/task-jobs?window_hours=-1').status_code == 400
@@ -22,3 +22,4 @@ def test_task_jobs_page_renders():
     assert 'SCHEDULER_ENABLED=false'.encode('utf-8') in response.data
     assert '限流等待'.encode('utf-8') in response.data
     assert '冷却剩余'.encode('utf-8') in response.data
+    assert 'p50 / p95'.encode('utf-8') in response.data
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+
+from flask import Flask
+import pytest
+import werkzeug
+
+from coinx import warm_start
+from coinx.collector import exchange_repair
+from coinx.collector.okx import series as okx_series
+from coinx.web.routes import api_data
+from coinx.web.routes.api_data import api_data_bp
+
+
+HOMEPAGE_PAYLOAD = {
+    'status': 'success',
+    'message': 'homepage data loaded',
+    'data': [{'symbol': 'BTCUSDT', 'status': 'complete'}],
+    'cache_update_time': 1711526400000,
+    'homepage_complete': True,
+}
+
+
+def create_test_client():
+    if not hasattr(werkzeug, '__version__'):
+        werkzeug.__version__ = '3'
+    app = Flask(__name__)
+    app.register_blueprint(api_data_bp)
+    return app.test_client()
+
+
+def test_save_and_restore_round_trip_dashboard_symbol_support_and_history_cursor(monkeypatch):
+    monkeypatch.setattr(exchange_repair, '_history_symbol_cursor', 3)
+    monkeypatch.setattr(exchange_repair, '_history_cursor_pending_symbol', None)
+    monkeypatch.setattr(exchange_repair, '_history_cursor_next_symbol', 'ETHUSDT')
+    monkeypatch.setattr(okx_series, '_supported_symbols_cache', {
+        'loaded_at': time.time() - 60,
+        'failed_at': 0,
+        'symbols': {'BTCUSDT', 'ETHUSDT'},
+        'contract_values': {'BTCUSDT': 0.01},
+    })
+    api_data._set_cached_homepage_payload((('BTCUSDT',), 1711526400000, 1), HOMEPAGE_PAYLOAD)
+    api_data._remember_market_structure_snapshot(['BTCUSDT'], {'data': [{'symbol': 'BTCUSDT'}], 'summary': {}})
+
+    assert warm_start.save_warm_start_snapshot() == ['dashboard', 'symbol_support', 'history_cursor']
+
+    api_data._clear_homepage_snapshot_cache()
+    api_data._clear_warm_start_payloads()
+    okx_series._supported_symbols_cache.update(symbols=None, contract_values={}, loaded_at=0)
+    exchange_repair.restore_history_cursor()
+
+    assert warm_start.restore_warm_start_snapshot() == {'dashboard': 2, 'symbol_support': 1, 'history_cursor': 1}
+    assert exchange_repair.get_history_cursor() == {'index': 3, 'next_symbol': 'ETHUSDT'}
+    assert api_data._get_warm_start_payload('homepage', ['BTCUSDT']) == HOMEPAGE_PAYLOAD
+    assert api_data._get_warm_start_payload('homepage', ['ETHUSDT']) is None
+    assert api_data._get_warm_start_payload('market_structure_score', ['BTCUSDT'])['data'] == [{'symbol': 'BTCUSDT'}]
+    assert okx_series._supported_symbols_cache['symbols'] == {'BTCUSDT', 'ETHUSDT'}
+    assert okx_series.get_contract_value('BTCUSDT') == 0.01
+
+
+def test_restore_skips_sections_older_than_max_age(monkeypatch, tmp_path):
+    monkeypatch.setattr('coinx.config.WARM_START_MAX_AGE_SECONDS', 60)
+    path = tmp_path / 'old.json'
+    saved_at = int(time.time() * 1000) - 120_000
+    path.write_text(json.dumps({
+        'version': warm_start.WARM_START_FORMAT_VERSION,
+        'sections': {
+            'dashboard': {'saved_at': saved_at, 'data': {'homepage': {'symbols': ['BTCUSDT'], 'payload': HOMEPAGE_PAYLOAD}}},
+        },
+    }), encoding='utf-8')
+
+    assert warm_start.restore_warm_start_snapshot(str(path)) == {}
+    assert api_data._get_warm_start_payload('homepage', ['BTCUSDT']) is None
+
+
+@pytest.mark.skipif(warm_start.fcntl is None, reason='fcntl is not available')
+def test_save_merges_peer_sections_under_file_lock(monkeypatch, tmp_path):
+    path = tmp_path / 'shared.json'
+    monkeypatch.setattr(warm_start, 'WARM_START_SECTIONS', (('history_cursor', lambda: {'index': 1}, None, False),))
+    written = []
+    with open(f'{path}.lock', 'a') as lock_file:
+        # 模拟另一个进程正在写入：持锁期间保存必须等待，拿到锁后再读取对方刚写入的分段
+        warm_start.fcntl.flock(lock_file.fileno(), warm_start.fcntl.LOCK_EX)
+        saver = threading.Thread(target=lambda: written.extend(warm_start.save_warm_start_snapshot(str(path))))
+        saver.start()
+        saver.join(0.2)
+        assert saver.is_alive()
+        path.write_text(json.dumps({
+            'version': warm_start.WARM_START_FORMAT_VERSION,
+            'sections': {'dashboard': {'saved_at': 1, 'data': {'peer': True}}},
+        }), encoding='utf-8')
+        warm_start.fcntl.flock(lock_file.fileno(), warm_start.fcntl.LOCK_UN)
+    saver.join(5)
+
+    assert written == ['history_cursor']
+    sections = json.loads(path.read_text(encoding='utf-8'))['sections']
+    assert sections['dashboard']['data'] == {'peer': True}
+    assert sections['history_cursor']['data'] == {'index': 1}
+
+
+def test_get_coins_serves_warm_payload_then_rebuilds_cache(monkeypatch):
+    monkeypatch.setattr('coinx.web.routes.api_data.get_active_coins', lambda: ['BTCUSDT'])
+    api_data.restore_warm_start_payloads(
+        {'homepage': {'symbols': ['BTCUSDT'], 'payload': HOMEPAGE_PAYLOAD}},
+        int(time.time() * 1000),
+    )
+    builds = []
+    monkeypatch.setattr(
+        'coinx.web.routes.api_data._start_homepage_cache_build_async',
+        lambda symbols, cache_key: builds.append((symbols, cache_key)),
+    )
+
+    response = create_test_client().get('/api/coins')
+
+    assert response.status_code == 200
+    assert response.get_json()['warm_start'] is True
+    assert response.get_json()['data'] == HOMEPAGE_PAYLOAD['data']
+    assert builds and builds[0][0] == ['BTCUSDT']
+
+    monkeypatch.setattr(
+        'coinx.web.routes.api_data.get_homepage_series_snapshot',
+        lambda symbols: {'data': [], 'cache_update_time': 1711526700000},
+    )
+    api_data._run_homepage_cache_build(['BTCUSDT'], builds[0][1])
+
+    assert api_data._get_warm_start_payload('homepage', ['BTCUSDT']) is None
+    assert api_data._get_cached_homepage_payload(builds[0][1])['cache_update_time'] == 1711526700000